@@ -671,6 +671,18 @@ def create_arg_parser():
         help="Enables a profiler for analyzing the performance of calls in OSB's worker coordinator (default: false).",
         default=False,
         action="store_true")
+    test_run_parser.add_argument(
+        "--event-loop",
+        help="The event loop implementation that OSB's worker coordinator uses to generate load. uvloop is faster but needs to be "
+             "installed separately (default: asyncio).",
+        choices=["asyncio", "uvloop"],
+        default="asyncio")
+    test_run_parser.add_argument(
+        "--worker-coordination",
+        help="How load generators report to OSB's worker coordinator. With 'aggregated', each load generator host pre-aggregates "
+             "samples and join points so that the coordinator only receives one message per host (default: direct).",
+        choices=["direct", "aggregated"],
+        default="direct")
     test_run_parser.add_argument(
         "--enable-assertions",
         help="Enables assertion checks for tasks (default: false).",
@@ -1129,6 +1141,8 @@ def configure_test(arg_parser, args, cfg):
     cfg.add(config.Scope.applicationOverride, "test_run", "user.tag", args.user_tag)
     cfg.add(config.Scope.applicationOverride, "worker_coordinator", "profiling", args.enable_worker_coordinator_profiling)
     cfg.add(config.Scope.applicationOverride, "worker_coordinator", "assertions", args.enable_assertions)
+    cfg.add(config.Scope.applicationOverride, "worker_coordinator", "event.loop", args.event_loop)
+    cfg.add(config.Scope.applicationOverride, "worker_coordinator", "coordination", args.worker_coordination)
     cfg.add(config.Scope.applicationOverride, "worker_coordinator", "on.error", args.on_error)
     cfg.add(
         config.Scope.applicationOverride,
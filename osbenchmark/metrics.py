@@ -22,16 +22,22 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import bisect
 import collections
+import collections.abc
 import glob
+import heapq
+import itertools
 import json
 import logging
 import math
 import os
 import pickle
+import queue
 import random
 import statistics
 import sys
+import threading
 import time
 import zlib
 import webbrowser
@@ -366,6 +372,9 @@ class SampleType(IntEnum):
     Normal = 1
 
 
+# The bulk and histogram variants of the put_* methods are part of the store's interface as they avoid per-value overhead when
+# large numbers of request metrics are stored.
+# pylint: disable=too-many-public-methods
 class MetricsStore:
     """
     Abstract metrics store
@@ -553,6 +562,81 @@ class MetricsStore:
         self._put_metric(MetaInfoScope.node, node_name, name, value, unit, task, operation, operation_type, sample_type, absolute_time,
                          relative_time, meta_data)
 
+    def put_values_bulk(self, name, values, unit=None, task=None, operation=None, operation_type=None, sample_types=SampleType.Normal,
+                        absolute_times=None, relative_times=None, meta_data=None):
+        """
+        Adds multiple cluster level value metrics with the same name and task at once. This is equivalent to calling
+        ``put_value_cluster_level`` once per value but cluster meta-info is copied and merged only once per distinct meta-data dict
+        instead of once per value. Metric records that have been created from the same meta-data dict share their ``meta`` dict.
+
+        :param name: The name of the metric.
+        :param values: A list of metric values. They are expected to be numeric.
+        :param unit: The unit of these metric values (e.g. ms, docs/s). Optional. Defaults to None.
+        :param task: The task name to which these values apply. Optional. Defaults to None.
+        :param operation: The operation name to which these values apply. Optional. Defaults to None.
+        :param operation_type: The operation type to which these values apply. Optional. Defaults to None.
+        :param sample_types: Either a list with one sample type per value or a single sample type for all values. Defaults to
+               SampleType.Normal.
+        :param absolute_times: A list with one absolute timestamp in seconds since epoch per value. Defaults to None. The metrics store
+               will derive the timestamp automatically.
+        :param relative_times: A list with one relative timestamp in seconds since the start of the benchmark per value. Defaults to
+               None. The metrics store will derive the timestamp automatically.
+        :param meta_data: Either a list with one dict (or None) per value or a single dict for all values. Defaults to None.
+        """
+        count = len(values)
+        if count == 0:
+            return
+        if absolute_times is None:
+            absolute_times = [self._clock.now()] * count
+        if relative_times is None:
+            relative_times = [self._stop_watch.split_time()] * count
+        if isinstance(sample_types, SampleType):
+            sample_types = [sample_types] * count
+        if meta_data is None or isinstance(meta_data, dict):
+            meta_data = [meta_data] * count
+
+        template = {
+            "test-run-id": self._test_run_id,
+            "test-run-timestamp": self._test_run_timestamp,
+            "environment": self._environment_name,
+            "workload": self._workload,
+            "test_procedure": self._test_procedure,
+            "cluster-config-instance": self._cluster_config_name,
+            "name": name,
+            "unit": unit,
+        }
+        if task:
+            template["task"] = task
+        if operation:
+            template["operation"] = operation
+        if operation_type:
+            template["operation-type"] = operation_type
+        if self._workload_params:
+            template["workload-params"] = self._workload_params
+
+        cluster_meta = self._meta_info[MetaInfoScope.cluster]
+        sample_type_names = {}
+        merged_meta_data = {}
+        for value, sample_type, absolute_time, relative_time, md in zip(values, sample_types, absolute_times, relative_times, meta_data):
+            # keyed by identity: callers typically pass the same meta-data dict for many values
+            meta = merged_meta_data.get(id(md))
+            if meta is None:
+                meta = cluster_meta.copy()
+                if md:
+                    meta.update(md)
+                merged_meta_data[id(md)] = meta
+            sample_type_name = sample_type_names.get(sample_type)
+            if sample_type_name is None:
+                sample_type_name = sample_type.name.lower()
+                sample_type_names[sample_type] = sample_type_name
+            doc = template.copy()
+            doc["@timestamp"] = time.to_epoch_millis(absolute_time)
+            doc["relative-time-ms"] = convert.seconds_to_ms(relative_time)
+            doc["value"] = value
+            doc["sample-type"] = sample_type_name
+            doc["meta"] = meta
+            self._add(doc)
+
     def _put_metric(self, level, level_key, name, value, unit, task, operation, operation_type, sample_type, absolute_time=None,
                     relative_time=None, meta_data=None):
         if level == MetaInfoScope.cluster:
@@ -565,7 +649,9 @@ class MetricsStore:
             raise exceptions.SystemSetupError("Unknown meta info level [%s] for metric [%s]" % (level, name))
         if meta_data:
             meta.update(meta_data)
+        self._add(self._metric_doc(name, value, unit, task, operation, operation_type, sample_type, absolute_time, relative_time, meta))
 
+    def _metric_doc(self, name, value, unit, task, operation, operation_type, sample_type, absolute_time, relative_time, meta):
         if absolute_time is None:
             absolute_time = self._clock.now()
         if relative_time is None:
@@ -594,7 +680,41 @@ class MetricsStore:
             doc["operation-type"] = operation_type
         if self._workload_params:
             doc["workload-params"] = self._workload_params
-        self._add(doc)
+        return doc
+
+    def put_histogram(self, name, histogram, unit=None, task=None, operation=None, operation_type=None, sample_type=SampleType.Normal,
+                      absolute_time=None, relative_time=None, meta_data=None, error_count=0):
+        """
+        Adds all values that have been recorded in a ``LogHistogram`` (e.g. by a load generator host that pre-aggregates samples). This
+        implementation adds one cluster level metric record per recorded value at the resolution of the histogram. Minimum and maximum
+        are retained exactly.
+
+        :param name: The name of the metric.
+        :param histogram: A ``LogHistogram`` with all values of this metric.
+        :param unit: The unit of these metric values (e.g. ms). Optional. Defaults to None.
+        :param task: The task name to which these values apply. Optional. Defaults to None.
+        :param operation: The operation name to which these values apply. Optional. Defaults to None.
+        :param operation_type: The operation type to which these values apply. Optional. Defaults to None.
+        :param sample_type: Whether these are warmup or normal measurement samples. Defaults to SampleType.Normal.
+        :param absolute_time: The absolute timestamp in seconds since epoch of the most recent value. Defaults to None. The metrics
+               store will derive the timestamp automatically.
+        :param relative_time: The relative timestamp in seconds since the start of the benchmark of the most recent value. Defaults to
+               None. The metrics store will derive the timestamp automatically.
+        :param meta_data: A dict, containing additional key-value pairs. Defaults to None.
+        :param error_count: The number of values that belong to failed requests. Defaults to 0.
+        """
+        values = histogram.values()
+        count = len(values)
+        if count == 0:
+            return
+        error_count = min(error_count, count)
+        failure = dict(meta_data or {}, success=False)
+        success = dict(meta_data or {}, success=True)
+        self.put_values_bulk(name=name, values=values, unit=unit, task=task, operation=operation, operation_type=operation_type,
+                             sample_types=sample_type,
+                             absolute_times=None if absolute_time is None else [absolute_time] * count,
+                             relative_times=None if relative_time is None else [relative_time] * count,
+                             meta_data=[failure] * error_count + [success] * (count - error_count))
 
     def put_doc(self, doc, level=None, node_name=None, meta_data=None, absolute_time=None, relative_time=None):
         """
@@ -797,6 +917,177 @@ class MetricsStore:
         return stats["avg"] if stats else None
 
 
+class BackgroundBulkFlusher:
+    """
+    Ships metrics documents to the metrics store on a background thread so that callers of ``OsMetricsStore#flush()`` are not blocked
+    by a slow metrics cluster. Submitted documents are split into batches by count and (approximate) size. Batches that cannot be
+    indexed after all retries, or that do not fit into the bounded queue, are spilled to disk and replayed once when the flusher is
+    closed.
+    """
+    # Only the size of every n-th document is determined to estimate batch sizes. Serializing every document just for that would
+    # double the JSON work per document and documents of the same submission are typically similar in size.
+    SIZE_SAMPLE_INTERVAL = 100
+
+    def __init__(self, client, doc_type, queue_size=64, batch_size=5000, batch_bytes=10 * 1024 * 1024, max_retries=3,
+                 retry_backoff=1.0, spill_dir=None):
+        """
+        :param client: The ``OsClient`` to use.
+        :param doc_type: The document type to use.
+        :param queue_size: The maximum number of pending ``submit`` calls. If the queue is full, further documents are spilled to disk.
+        :param batch_size: The maximum number of documents per bulk request.
+        :param batch_bytes: The maximum (approximate) size of all documents in a bulk request in bytes.
+        :param max_retries: The number of times a failed bulk request is retried before the batch is spilled to disk.
+        :param retry_backoff: The initial backoff in seconds between retries. It is doubled after each retry.
+        :param spill_dir: The directory where batches are spilled to. Defaults to OSB's log directory.
+        """
+        self.client = client
+        self.doc_type = doc_type
+        self.batch_size = batch_size
+        self.batch_bytes = batch_bytes
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.spill_dir = spill_dir
+        self.spilled_files = []
+        self.logger = logging.getLogger(__name__)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, index, docs):
+        """
+        Schedules the given documents for indexing. This method does not block.
+
+        :param index: The name of the target index.
+        :param docs: A list of documents.
+        """
+        if not docs:
+            return
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((index, docs))
+        except queue.Full:
+            self.logger.warning("Metrics flush queue is full. Spilling [%d] metrics documents to disk.", len(docs))
+            self._spill(index, docs)
+
+    def wait(self):
+        """
+        Blocks until all submitted documents have been processed.
+        """
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """
+        Waits for all submitted documents, stops the background thread and replays spilled documents.
+        """
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.join()
+            self._queue.put(None)
+            thread.join()
+        self._replay_spilled()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="metrics-flusher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                index, docs = item
+                for batch in self._batches(docs):
+                    if not self._index(index, batch):
+                        self._spill(index, batch)
+            except Exception:
+                self.logger.exception("Could not process metrics documents.")
+            finally:
+                self._queue.task_done()
+
+    def _batches(self, docs):
+        batch = []
+        batch_bytes = 0
+        doc_bytes = 0
+        for i, doc in enumerate(docs):
+            if i % BackgroundBulkFlusher.SIZE_SAMPLE_INTERVAL == 0:
+                doc_bytes = len(json.dumps(doc, default=str))
+            if batch and (len(batch) >= self.batch_size or batch_bytes + doc_bytes > self.batch_bytes):
+                yield batch
+                batch = []
+                batch_bytes = 0
+            batch.append(doc)
+            batch_bytes += doc_bytes
+        if batch:
+            yield batch
+
+    def _index(self, index, batch):
+        backoff = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.client.bulk_index(index=index, doc_type=self.doc_type, items=batch)
+                return True
+            except Exception:
+                if attempt < self.max_retries:
+                    self.logger.warning("Could not index [%d] metrics documents in attempt [%d/%d]. Retrying in [%f] seconds.",
+                                        len(batch), attempt + 1, self.max_retries + 1, backoff, exc_info=True)
+                    time.sleep(backoff)
+                    backoff *= 2
+                else:
+                    self.logger.exception("Could not index [%d] metrics documents after [%d] attempts.", len(batch), attempt + 1)
+        return False
+
+    def _spill(self, index, docs):
+        spill_dir = self.spill_dir if self.spill_dir else os.path.join(paths.logs(), "metrics")
+        io.ensure_dir(spill_dir)
+        spill_file = os.path.join(spill_dir, "{}-{}.json".format(index, os.getpid()))
+        with self._lock:
+            with open(spill_file, mode="a", encoding="utf-8") as f:
+                self._write_spilled(f, index, docs)
+            if spill_file not in self.spilled_files:
+                self.spilled_files.append(spill_file)
+
+    @staticmethod
+    def _write_spilled(f, index, docs):
+        for doc in docs:
+            f.write(json.dumps({"index": index, "doc": doc}, default=str))
+            f.write("\n")
+
+    def _replay_spilled(self):
+        with self._lock:
+            spilled_files = self.spilled_files
+            self.spilled_files = []
+        for spill_file in spilled_files:
+            docs_per_index = {}
+            with open(spill_file, mode="rt", encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    docs_per_index.setdefault(entry["index"], []).append(entry["doc"])
+            # (index, batch) pairs that could not be indexed. Once a batch fails, the remaining ones are not attempted anymore.
+            remaining = []
+            for index, docs in docs_per_index.items():
+                for batch in self._batches(docs):
+                    if remaining or not self._index(index, batch):
+                        remaining.append((index, batch))
+            if not remaining:
+                os.remove(spill_file)
+            else:
+                # only keep documents that have not been indexed yet so they are not indexed twice by a later replay
+                tmp_spill_file = f"{spill_file}.tmp"
+                with open(tmp_spill_file, mode="wt", encoding="utf-8") as f:
+                    for index, batch in remaining:
+                        self._write_spilled(f, index, batch)
+                os.replace(tmp_spill_file, spill_file)
+                self.spilled_files.append(spill_file)
+                console.warn("Could not store all metrics in the metrics store. Remaining metrics documents have been written to [%s]."
+                             % spill_file, logger=self.logger)
+
+
 class OsMetricsStore(MetricsStore):
     """
     A metrics store backed by OpenSearch.
@@ -822,6 +1113,17 @@ class OsMetricsStore(MetricsStore):
         self._client = client_factory_class(cfg).create()
         self._index_template_provider = index_template_provider_class(cfg)
         self._docs = None
+        if convert.to_bool(cfg.opts("reporting", "datastore.flush.background", mandatory=False, default_value=False)):
+            self._flusher = BackgroundBulkFlusher(
+                self._client,
+                OsMetricsStore.METRICS_DOC_TYPE,
+                queue_size=int(cfg.opts("reporting", "datastore.flush.queue.size", mandatory=False, default_value=64)),
+                batch_size=int(cfg.opts("reporting", "datastore.flush.batch.size", mandatory=False, default_value=5000)),
+                batch_bytes=int(cfg.opts("reporting", "datastore.flush.batch.bytes", mandatory=False, default_value=10 * 1024 * 1024)),
+                max_retries=int(cfg.opts("reporting", "datastore.flush.retries", mandatory=False, default_value=3)),
+                spill_dir=cfg.opts("reporting", "datastore.flush.spill.dir", mandatory=False, default_value=None))
+        else:
+            self._flusher = None
 
     def open(self, test_run_id=None, test_run_timestamp=None, workload_name=None, \
         test_procedure_name=None, cluster_config_name=None, ctx=None, \
@@ -860,7 +1162,10 @@ class OsMetricsStore(MetricsStore):
         return self._index_template_provider.metrics_template()
 
     def flush(self, refresh=True):
-        if self._docs:
+        if self._docs and self._flusher:
+            self.logger.debug("Submitting %d metrics documents for background indexing.", len(self._docs))
+            self._flusher.submit(self._index, self._docs)
+        elif self._docs:
             sw = time.StopWatch()
             sw.start()
             self._client.bulk_index(index=self._index, doc_type=OsMetricsStore.METRICS_DOC_TYPE, items=self._docs)
@@ -872,8 +1177,15 @@ class OsMetricsStore(MetricsStore):
         self._docs = []
         # ensure we can search immediately after flushing
         if refresh:
+            if self._flusher:
+                self._flusher.wait()
             self._client.refresh(index=self._index)
 
+    def close(self):
+        super().close()
+        if self._flusher:
+            self._flusher.close()
+
     def _add(self, doc):
         self._docs.append(doc)
 
@@ -1051,10 +1363,243 @@ class OsMetricsStore(MetricsStore):
         return "OpenSearch metrics store"
 
 
+class LogHistogram:
+    """
+    A streaming histogram in the spirit of HdrHistogram. Values are counted in logarithmically sized buckets so that the representative
+    value of a bucket differs by at most ``relative_error`` from any value that has been recorded in it. Memory consumption only depends
+    on the dynamic range of the recorded values, not on their number. Count, minimum, maximum and sum are tracked exactly.
+    """
+    def __init__(self, relative_error=0.01):
+        self.relative_error = relative_error
+        self.gamma = (1 + relative_error) / (1 - relative_error)
+        self._log_gamma = math.log(self.gamma)
+        # bucket index -> number of values in (gamma ** (index - 1), gamma ** index]
+        self.buckets = {}
+        # values <= 0 cannot be mapped to a logarithmic bucket
+        self.non_positive_count = 0
+        self.count = 0
+        self.min = None
+        self.max = None
+        self.sum = 0
+
+    def record(self, value):
+        if value > 0:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+        else:
+            self.non_positive_count += 1
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def record_all(self, values):
+        """
+        Records all values of a list. This is equivalent to calling ``record`` once per value but faster.
+        """
+        if len(values) == 0:
+            return
+        log_gamma = self._log_gamma
+        positive = [v for v in values if v > 0]
+        for index, count in collections.Counter(math.ceil(math.log(v) / log_gamma) for v in positive).items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.non_positive_count += len(values) - len(positive)
+        self.count += len(values)
+        self.sum += sum(values)
+        lowest = min(values)
+        highest = max(values)
+        if self.min is None or lowest < self.min:
+            self.min = lowest
+        if self.max is None or highest > self.max:
+            self.max = highest
+
+    def merge(self, other):
+        if other.relative_error != self.relative_error:
+            raise exceptions.SystemSetupError("Cannot merge histograms with relative error [%s] and [%s]." %
+                                              (self.relative_error, other.relative_error))
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.non_positive_count += other.non_positive_count
+        self.count += other.count
+        self.sum += other.sum
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def values(self):
+        """
+        :return: A sorted list with the representative value of each recorded value. Minimum and maximum are exact.
+        """
+        if self.count == 0:
+            return []
+        result = [min(self.min, 0)] * self.non_positive_count
+        for index in sorted(self.buckets):
+            value = min(max(2 * self.gamma ** index / (self.gamma + 1), self.min), self.max)
+            result.extend([value] * self.buckets[index])
+        result[0] = self.min
+        result[-1] = self.max
+        return result
+
+    def percentiles(self, percentiles):
+        """
+        Determines percentiles with the same interpolation between ranks as ``InMemoryMetricsStore.percentile_value``.
+
+        :param percentiles: A list of percentiles between [0, 100].
+        :return: An ordered dictionary with the (approximate) value for each percentile.
+        """
+        result = collections.OrderedDict()
+        if self.count == 0:
+            return result
+        indices = sorted(self.buckets)
+        # upper bound (exclusive) of the ranks that are covered by each bucket
+        upper_ranks = []
+        rank = self.non_positive_count
+        for index in indices:
+            rank += self.buckets[index]
+            upper_ranks.append(rank)
+
+        def value_at(r):
+            # the extremes are tracked exactly
+            if r == 0:
+                return self.min
+            if r == self.count - 1:
+                return self.max
+            if r < self.non_positive_count:
+                return min(self.min, 0)
+            index = indices[bisect.bisect_right(upper_ranks, r)]
+            # the bucket representative has the smallest relative error for all values within the bucket
+            value = 2 * self.gamma ** index / (self.gamma + 1)
+            return min(max(value, self.min), self.max)
+
+        for percentile in percentiles:
+            rank = float(percentile) / 100.0 * (self.count - 1)
+            if rank == int(rank):
+                result[percentile] = value_at(int(rank))
+            else:
+                lower_score = value_at(math.floor(rank))
+                higher_score = value_at(math.ceil(rank))
+                result[percentile] = lower_score + (higher_score - lower_score) * (rank - math.floor(rank))
+        return result
+
+
+class AggregatedRequestMetric:
+    """
+    Summarizes all request metric records of one metric, task, operation type and sample type. Besides the value histogram it retains
+    the unit, the number of failed requests and the first and most recent (by relative time) metric record.
+    """
+    def __init__(self, relative_error):
+        self.histogram = LogHistogram(relative_error)
+        self.unit = None
+        self.error_count = 0
+        self.first_doc = None
+        self.last_doc = None
+
+    def add(self, doc):
+        self.histogram.record(doc["value"])
+        if self.first_doc is None:
+            self.first_doc = doc
+            self.unit = doc.get("unit")
+        if self.last_doc is None or doc["relative-time-ms"] >= self.last_doc["relative-time-ms"]:
+            self.last_doc = doc
+        if doc.get("meta", {}).get("success") is False:
+            self.error_count += 1
+
+    def merge(self, other):
+        self.histogram.merge(other.histogram)
+        if self.first_doc is None:
+            self.first_doc = other.first_doc
+            self.unit = other.unit
+        if other.last_doc is not None and (self.last_doc is None or
+                                           other.last_doc["relative-time-ms"] >= self.last_doc["relative-time-ms"]):
+            self.last_doc = other.last_doc
+        self.error_count += other.error_count
+
+
+class MetricRecord(collections.abc.Mapping):
+    """
+    A compact, read-only representation of a metric record as created by ``MetricsStore._put_metric``. All properties that are shared
+    by many records (test run, workload, metric name, task, ...) are held in an interned dimension tuple. Meta-data are split into
+    values that typically repeat (strings, booleans and ``None``, e.g. cluster meta-info or ``success``), which are held in a dict that
+    is shared among records, and per-request numbers (e.g. ``took`` or ``hits``), which are held in the record itself. It behaves like
+    the corresponding dict; use ``to_dict()`` to materialize it.
+    """
+    __slots__ = ("dimensions", "timestamp", "relative_time", "value", "shared_meta", "request_meta_keys", "request_meta_values")
+
+    DIMENSIONS = ("test-run-id", "test-run-timestamp", "environment", "workload", "test_procedure", "cluster-config-instance", "name",
+                  "unit", "sample-type", "task", "operation", "operation-type", "workload-params")
+    OPTIONAL_DIMENSIONS = frozenset(["task", "operation", "operation-type", "workload-params"])
+    # in the same order as in docs created by ``MetricsStore._put_metric``
+    KEYS = ("@timestamp", "relative-time-ms", "test-run-id", "test-run-timestamp", "environment", "workload", "test_procedure",
+            "cluster-config-instance", "name", "value", "unit", "sample-type", "meta", "task", "operation", "operation-type",
+            "workload-params")
+    REQUIRED_KEYS = frozenset(KEYS) - OPTIONAL_DIMENSIONS
+    _DIMENSION_INDEX = {key: index for index, key in enumerate(DIMENSIONS)}
+    # marks optional dimensions that are not present in a record
+    ABSENT = None
+
+    def __init__(self, dimensions, timestamp, relative_time, value, shared_meta, request_meta_keys=None, request_meta_values=None):
+        self.dimensions = dimensions
+        self.timestamp = timestamp
+        self.relative_time = relative_time
+        self.value = value
+        self.shared_meta = shared_meta
+        self.request_meta_keys = request_meta_keys
+        self.request_meta_values = request_meta_values
+
+    @property
+    def meta(self):
+        if self.request_meta_keys is None:
+            return self.shared_meta
+        meta = self.shared_meta.copy()
+        meta.update(zip(self.request_meta_keys, self.request_meta_values))
+        return meta
+
+    @classmethod
+    def can_represent(cls, doc):
+        keys = doc.keys()
+        return cls.REQUIRED_KEYS <= keys and len(keys) <= len(cls.KEYS) and all(k in cls.KEYS for k in keys) and \
+            isinstance(doc["meta"], dict) and all(doc[k] is not None for k in cls.OPTIONAL_DIMENSIONS if k in doc)
+
+    def __getitem__(self, key):
+        if key == "value":
+            return self.value
+        elif key == "@timestamp":
+            return self.timestamp
+        elif key == "relative-time-ms":
+            return self.relative_time
+        elif key == "meta":
+            return self.meta
+        index = self._DIMENSION_INDEX.get(key)
+        if index is None:
+            raise KeyError(key)
+        value = self.dimensions[index]
+        if value is MetricRecord.ABSENT and key in MetricRecord.OPTIONAL_DIMENSIONS:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        for key in MetricRecord.KEYS:
+            if key not in MetricRecord.OPTIONAL_DIMENSIONS or self.dimensions[self._DIMENSION_INDEX[key]] is not MetricRecord.ABSENT:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
 class InMemoryMetricsStore(MetricsStore):
     # Note that this implementation can run out of memory; generally, this can occur when ingesting very large corpora.
 
-    # Approx size of a metrics doc (after tracking memory consumption during ingestion.
+    # Approx size of a metrics doc (after tracking memory consumption during ingestion. Metric records are held compactly
+    # (see MetricRecord) but they are materialized as docs when the store is externalized.
     DOC_SIZE_IN_BYTES = 1500
 
     # Warn when memory consumption crosses this threshold (percentage usage).
@@ -1063,6 +1608,12 @@ class InMemoryMetricsStore(MetricsStore):
     # Check memory usage every-so-many docs.
     MEMORY_CHECK_FREQUENCY = 10000
 
+    # Request metrics that are aggregated in histograms instead of being stored as individual docs if histograms are enabled.
+    HISTOGRAM_METRICS = ["latency", "service_time", "client_processing_time", "processing_time"]
+
+    # Maximum relative error of percentiles that are determined from histograms.
+    HISTOGRAM_RELATIVE_ERROR = 0.01
+
     def __init__(self, cfg, clock=time.Clock, meta_info=None):
         """
 
@@ -1078,6 +1629,16 @@ class InMemoryMetricsStore(MetricsStore):
         self.logger = logging.getLogger(__name__)
         self.out_of_memory = False
         self.memory_available_threshold = psutil.virtual_memory().total * (100 - self.MEMORY_WARNING_THRESHOLD) / 100
+        self.histograms_enabled = convert.to_bool(cfg.opts("reporting", "metrics.request.histograms", mandatory=False,
+                                                           default_value=False))
+        # (name, task, operation type, sample type) -> AggregatedRequestMetric
+        self.histograms = {}
+        # name -> task -> sample type -> ascending positions in self.docs
+        self.doc_index = {}
+        # interned dimension tuples, shared meta-data dicts and per-request meta-data keys of metric records
+        self.interned_dimensions = {}
+        self.interned_meta_data = {}
+        self.interned_meta_keys = {}
 
     def __del__(self):
         """
@@ -1086,37 +1647,187 @@ class InMemoryMetricsStore(MetricsStore):
         del self.docs
 
     def _add(self, doc):
+        if self.histograms_enabled and doc["name"] in self.HISTOGRAM_METRICS and "task" in doc:
+            key = (doc["name"], doc["task"], doc.get("operation-type"), doc.get("sample-type"))
+            aggregate = self.histograms.get(key)
+            if aggregate is None:
+                aggregate = AggregatedRequestMetric(self.HISTOGRAM_RELATIVE_ERROR)
+                self.histograms[key] = aggregate
+            aggregate.add(doc)
+            return
         if self.out_of_memory:
             return
         if self.doc_count % self.MEMORY_CHECK_FREQUENCY == 0 and psutil.virtual_memory().available < self.memory_available_threshold:
             console.warn("Memory threshold exceeded by in-memory metrics store, not adding additional entries", logger=self.logger)
             self.out_of_memory = True
             return
+        if MetricRecord.can_represent(doc):
+            doc = self._compact(doc)
+        positions = self.doc_index.setdefault(doc["name"], {}).setdefault(doc.get("task"), {}).setdefault(doc.get("sample-type"), [])
+        positions.append(len(self.docs))
         self.docs.append(doc)
         self.doc_count += 1
 
+    def _compact(self, doc):
+        dimensions = tuple(doc.get(key, MetricRecord.ABSENT) for key in MetricRecord.DIMENSIONS)
+        workload_params = dimensions[-1]
+        # workload parameters are the same dict for all records of a store so they are keyed by identity. The interned
+        # dimensions reference the dict and thus keep its id unique.
+        key = dimensions[:-1] + (id(workload_params),)
+        try:
+            dimensions = self.interned_dimensions.setdefault(key, dimensions)
+        except TypeError:
+            # values that are not hashable (e.g. custom objects) are not shared
+            pass
+        meta = doc["meta"]
+        shared_items = []
+        request_meta_keys = []
+        request_meta_values = []
+        for k, v in meta.items():
+            value_type = type(v)
+            if value_type is int or value_type is float:
+                request_meta_keys.append(k)
+                request_meta_values.append(v)
+            elif value_type is str or value_type is bool or v is None:
+                shared_items.append((k, v))
+            else:
+                # nested structures are rare and kept as is
+                return MetricRecord(dimensions, doc["@timestamp"], doc["relative-time-ms"], doc["value"], meta)
+        shared_items = tuple(shared_items)
+        shared_meta = self.interned_meta_data.get(shared_items)
+        if shared_meta is None:
+            shared_meta = dict(shared_items)
+            self.interned_meta_data[shared_items] = shared_meta
+        if not request_meta_keys:
+            return MetricRecord(dimensions, doc["@timestamp"], doc["relative-time-ms"], doc["value"], shared_meta)
+        request_meta_keys = tuple(request_meta_keys)
+        request_meta_keys = self.interned_meta_keys.setdefault(request_meta_keys, request_meta_keys)
+        return MetricRecord(dimensions, doc["@timestamp"], doc["relative-time-ms"], doc["value"], shared_meta, request_meta_keys,
+                            tuple(request_meta_values))
+
+    def _matching_docs(self, name, task, sample_type):
+        """
+        Looks up docs by the indexed properties.
+
+        :param name: The metric name to query.
+        :param task The task name to query. Optional.
+        :param sample_type The sample type to query. Optional.
+        :return: A generator of all docs with the given name, task and sample type in the order they have been added.
+        """
+        tasks = self.doc_index.get(name)
+        if not tasks:
+            return iter(())
+        if task is None:
+            sample_types = list(tasks.values())
+        else:
+            sample_types = [tasks[task]] if task in tasks else []
+        sample_type_name = sample_type.name.lower() if sample_type is not None else None
+        position_lists = [positions for per_sample_type in sample_types for st, positions in per_sample_type.items()
+                          if sample_type_name is None or st == sample_type_name]
+        if len(position_lists) == 1:
+            positions = position_lists[0]
+        else:
+            positions = heapq.merge(*position_lists)
+        docs = self.docs
+        return (docs[position] for position in positions)
 
     def flush(self, refresh=True):
         pass
 
     def to_externalizable(self, clear=False):
         docs = self.docs
+        histograms = self.histograms
         if clear:
             self.docs = []
+            self.doc_index = {}
+            self.interned_dimensions = {}
+            self.interned_meta_data = {}
+            self.interned_meta_keys = {}
             self.doc_count = 0
             self.out_of_memory = False
+            self.histograms = {}
         if len(docs) * self.DOC_SIZE_IN_BYTES > psutil.virtual_memory().available - self.memory_available_threshold:
             console.warn("Memory threshold exceeded by in-memory metrics store, skipping summary generation for current operation",
                          logger=self.logger)
             return None
-        compressed = zlib.compress(pickle.dumps(docs))
+        docs = [doc.to_dict() if isinstance(doc, MetricRecord) else doc for doc in docs]
+        # keep the plain list of docs as external representation unless there are histograms
+        compressed = zlib.compress(pickle.dumps((docs, histograms) if histograms else docs))
         self.logger.debug("Compression changed size of metric store from [%d] bytes to [%d] bytes",
                          sys.getsizeof(docs, -1), sys.getsizeof(compressed, -1))
         return compressed
 
+    def bulk_add(self, memento):
+        if memento:
+            self.logger.debug("Restoring in-memory representation of metrics store.")
+            docs = pickle.loads(zlib.decompress(memento))
+            if isinstance(docs, tuple):
+                docs, histograms = docs
+                for key, aggregate in histograms.items():
+                    self._merge_aggregate(key, aggregate)
+            for doc in docs:
+                self._add(doc)
+
+    def _merge_aggregate(self, key, aggregate):
+        if key in self.histograms:
+            self.histograms[key].merge(aggregate)
+        else:
+            self.histograms[key] = aggregate
+
+    def put_histogram(self, name, histogram, unit=None, task=None, operation=None, operation_type=None, sample_type=SampleType.Normal,
+                      absolute_time=None, relative_time=None, meta_data=None, error_count=0):
+        """
+        Merges request metric histograms directly into the aggregated request metrics instead of adding one record per value.
+        """
+        if name not in self.HISTOGRAM_METRICS or not task:
+            super().put_histogram(name, histogram, unit, task, operation, operation_type, sample_type, absolute_time, relative_time,
+                                  meta_data, error_count)
+            return
+        if histogram.count == 0:
+            return
+        meta = self._meta_info[MetaInfoScope.cluster].copy()
+        if meta_data:
+            meta.update(meta_data)
+        doc = self._metric_doc(name, histogram.max, unit, task, operation, operation_type, sample_type, absolute_time, relative_time,
+                               meta)
+        aggregate = AggregatedRequestMetric(histogram.relative_error)
+        aggregate.histogram.merge(histogram)
+        aggregate.unit = unit
+        aggregate.error_count = error_count
+        aggregate.first_doc = doc
+        aggregate.last_doc = doc
+        self._merge_aggregate((name, task, operation_type, doc["sample-type"]), aggregate)
+
+    def _aggregated(self, name):
+        # request metrics are also aggregated if they have been put as histograms (regardless of the local setting)
+        return name in self.HISTOGRAM_METRICS and (self.histograms_enabled or len(self.histograms) > 0)
+
+    def _histograms(self, name, task, operation_type, sample_type):
+        """
+        :return: A list of all aggregated request metrics that match the query.
+        """
+        sample_type_name = sample_type.name.lower() if sample_type is not None else None
+        return [aggregate for (n, t, o, st), aggregate in self.histograms.items()
+                if n == name and
+                (task is None or t == task) and
+                (operation_type is None or o == operation_type) and
+                (sample_type_name is None or st == sample_type_name)]
+
+    def _merged_histogram(self, name, task, operation_type, sample_type):
+        aggregates = self._histograms(name, task, operation_type, sample_type)
+        if not aggregates:
+            return None
+        histogram = LogHistogram(self.HISTOGRAM_RELATIVE_ERROR)
+        for aggregate in aggregates:
+            histogram.merge(aggregate.histogram)
+        return histogram
+
     def get_percentiles(self, name, task=None, operation_type=None, sample_type=None, percentiles=None):
         if percentiles is None:
             percentiles = [99, 99.9, 100]
+        if self._aggregated(name):
+            histogram = self._merged_histogram(name, task, operation_type, sample_type)
+            return histogram.percentiles(percentiles) if histogram else collections.OrderedDict()
         result = collections.OrderedDict()
         values = self.get(name, task, operation_type, sample_type)
         if len(values) > 0:
@@ -1150,11 +1861,12 @@ class InMemoryMetricsStore(MetricsStore):
     def get_error_rate(self, task, operation_type=None, sample_type=None):
         error = 0
         total_count = 0
-        for doc in self.docs:
-            # we can use any request metrics record (i.e. service time or latency)
-            if doc["name"] == "service_time" and doc["task"] == task and \
-                    (operation_type is None or doc["operation-type"] == operation_type) and \
-                    (sample_type is None or doc["sample-type"] == sample_type.name.lower()):
+        for aggregate in self._histograms("service_time", task, operation_type, sample_type):
+            total_count += aggregate.histogram.count
+            error += aggregate.error_count
+        # we can use any request metrics record (i.e. service time or latency)
+        for doc in self._matching_docs("service_time", task, sample_type):
+            if operation_type is None or doc["operation-type"] == operation_type:
                 total_count += 1
                 if doc["meta"]["success"] is False:
                     error += 1
@@ -1164,6 +1876,17 @@ class InMemoryMetricsStore(MetricsStore):
             return 0.0
 
     def get_stats(self, name, task=None, operation_type=None, sample_type=SampleType.Normal):
+        if self._aggregated(name):
+            histogram = self._merged_histogram(name, task, operation_type, sample_type)
+            if histogram is None or histogram.count == 0:
+                return None
+            return {
+                "count": histogram.count,
+                "min": histogram.min,
+                "max": histogram.max,
+                "avg": histogram.sum / histogram.count,
+                "sum": histogram.sum
+            }
         values = self.get(name, task, operation_type, sample_type)
         sorted_values = sorted(values)
         if len(sorted_values) > 0:
@@ -1179,26 +1902,32 @@ class InMemoryMetricsStore(MetricsStore):
 
     def _get(self, name, task, operation_type, sample_type, node_name, mapper):
         return [mapper(doc)
-                for doc in self.docs
-                if doc["name"] == name and
-                (task is None or doc["task"] == task) and
-                (operation_type is None or doc["operation-type"] == operation_type) and
-                (sample_type is None or doc["sample-type"] == sample_type.name.lower()) and
+                for doc in self._matching_docs(name, task, sample_type)
+                if (operation_type is None or doc["operation-type"] == operation_type) and
                 (node_name is None or doc.get("meta", {}).get("node_name") == node_name)
                 ]
 
+    def get_unit(self, name, task=None, operation_type=None, node_name=None):
+        if self._aggregated(name) and node_name is None:
+            for aggregate in self._histograms(name, task, operation_type, None):
+                return aggregate.unit
+        return super().get_unit(name, task, operation_type, node_name)
+
     def get_one(self, name, sample_type=None, node_name=None, task=None, mapper=lambda doc: doc["value"],
                 sort_key=None, sort_reverse=False):
+        docs = self._matching_docs(name, task, sample_type)
+        if node_name is not None:
+            docs = (doc for doc in docs if doc.get("meta", {}).get("node_name") == node_name)
+        if self._aggregated(name) and node_name is None:
+            # only the first and the most recent record are retained for aggregated request metrics
+            docs = itertools.chain(docs, [doc for aggregate in self._histograms(name, task, None, sample_type)
+                                          for doc in {id(aggregate.first_doc): aggregate.first_doc,
+                                                      id(aggregate.last_doc): aggregate.last_doc}.values()])
         if sort_key:
-            docs = sorted(self.docs, key=lambda k: k[sort_key], reverse=sort_reverse)
-        else:
-            docs = self.docs
-        for doc in docs:
-            if (doc["name"] == name and (task is None or doc["task"] == task) and
-                    (sample_type is None or doc["sample-type"] == sample_type.name.lower()) and
-                    (node_name is None or doc.get("meta", {}).get("node_name") == node_name)):
-                return mapper(doc)
-        return None
+            # only the matching docs need to be sorted
+            docs = sorted(docs, key=lambda k: k[sort_key], reverse=sort_reverse)
+        doc = next(iter(docs), None)
+        return mapper(doc) if doc is not None else None
 
     def __str__(self):
         return "in-memory metrics store"
@@ -1833,6 +2562,8 @@ class GlobalStatsCalculator:
                             task.operation.meta_data,
                             task.meta_data,
                         ),
+                        self.driver_health(task_name),
+                        self.arrivals(task_name),
                     )
 
                     result.add_correctness_metrics(
@@ -2010,6 +2741,40 @@ class GlobalStatsCalculator:
                     })
         return result
 
+    def driver_health(self, task_name):
+        """
+        :return: Statistics about the health of the load generator while it executed the given task, excluding warmup.
+        """
+        # ``single_latency`` only considers normal samples
+        health = {name: self.single_latency(task_name, None, metric_name=name)
+                  for name in ["worker_cpu_usage", "event_loop_lag", "schedule_slip"]}
+        health = {name: stats for name, stats in health.items() if stats}
+        dropped_samples = self.store.get("dropped_samples", task=task_name, sample_type=SampleType.Normal)
+        if dropped_samples:
+            health["dropped_samples"] = sum(dropped_samples)
+        return health
+
+    def arrivals(self, task_name):
+        """
+        :return: Statistics about the arrivals of a task with an open arrival-mode, excluding warmup. Empty for other tasks.
+                 Arrival rates are in ops/s.
+        """
+        arrivals = {}
+        queueing_delay = self.single_latency(task_name, None, metric_name="queueing_delay")
+        if queueing_delay:
+            arrivals["queueing_delay"] = queueing_delay
+        # every client reports its own rate once it has finished
+        for name in ["offered_arrival_rate", "issued_arrival_rate"]:
+            rates = self.store.get(name, task=task_name, sample_type=SampleType.Normal)
+            if rates:
+                arrivals[name] = sum(rates)
+        # counts are attached to samples while the task runs and reported separately once a client has finished
+        for name in ["dropped_arrivals", "late_arrivals"]:
+            stats = self.store.get_stats(name, task=task_name, sample_type=SampleType.Normal)
+            if stats and stats["count"] > 0:
+                arrivals[name] = int(stats["sum"])
+        return arrivals
+
     def error_rate(self, task_name, operation_type):
         return self.store.get_error_rate(task=task_name, operation_type=operation_type, sample_type=SampleType.Normal)
 
@@ -2133,6 +2898,8 @@ class GlobalStats:
                         all_results.append(op_metrics(item, "error_rate", single_value=True))
                     if "duration" in item:
                         all_results.append(op_metrics(item, "duration", single_value=True))
+                    for name, arrival_value in item.get("arrivals", {}).items():
+                        all_results.append(op_metrics({**item, name: arrival_value}, name, single_value=name != "queueing_delay"))
             elif metric == "ml_processing_time":
                 for item in value:
                     all_results.append({
@@ -2194,7 +2961,7 @@ class GlobalStats:
         return d.get(k, default) if d else default
 
     def add_op_metrics(self, task, operation, throughput, latency, service_time, client_processing_time,
-                       processing_time, error_rate, duration, meta):
+                       processing_time, error_rate, duration, meta, driver_health=None, arrivals=None):
         doc = {
             "task": task,
             "operation": operation,
@@ -2208,6 +2975,10 @@ class GlobalStats:
         }
         if meta:
             doc["meta"] = meta
+        if driver_health:
+            doc["driver_health"] = driver_health
+        if arrivals:
+            doc["arrivals"] = arrivals
         self.op_metrics.append(doc)
 
     def add_correctness_metrics(self, task, operation, recall_at_k_stats, recall_at_1_stats, error_rate, duration):
@@ -117,6 +117,11 @@ def comma_separated_string_to_number_list(string_list):
 
 # check-deprecated-terms-disable-1x
 class SummaryResultsPublisher:
+    # a worker that is (on average) busier than this is likely the bottleneck of the benchmark
+    DRIVER_CPU_USAGE_THRESHOLD = 90
+    # mean event loop lag or schedule slip in ms from which on measured latencies are likely skewed by the load generator
+    DRIVER_LAG_THRESHOLD_MS = 10
+
     def __init__(self, results, config):
         self.results = results
         self.results_file = config.opts("reporting", "output.path")
@@ -143,6 +148,7 @@ class SummaryResultsPublisher:
         if self.show_processing_time:
             metrics_table.extend(self._publish_processing_time(record, task))
         metrics_table.extend(self._publish_error_rate(record, task))
+        metrics_table.extend(self._publish_arrivals(record, task))
         self.add_warnings(warnings, record, task)
 
     def publish(self):
@@ -226,6 +232,27 @@ class SummaryResultsPublisher:
                                 % (op, error_rate * 100))
             else:
                 warnings.append("No throughput metrics available for [%s]. Likely cause: The benchmark ended already during warmup." % op)
+        self.add_driver_health_warnings(warnings, values.get("driver_health", {}), op)
+
+    def add_driver_health_warnings(self, warnings, driver_health, op):
+        causes = []
+        cpu_usage = driver_health.get("worker_cpu_usage", {}).get("mean")
+        if cpu_usage is not None and cpu_usage >= self.DRIVER_CPU_USAGE_THRESHOLD:
+            causes.append("mean worker CPU usage is %.1f%%" % cpu_usage)
+        event_loop_lag = driver_health.get("event_loop_lag", {}).get("mean")
+        if event_loop_lag is not None and event_loop_lag >= self.DRIVER_LAG_THRESHOLD_MS:
+            causes.append("mean event loop lag is %.2f ms" % event_loop_lag)
+        if causes:
+            warnings.append("Results for operation '%s' are likely limited by the load generator: %s. "
+                            "Consider adding load generator hosts or reducing the number of clients per worker." % (op, " and ".join(causes)))
+        schedule_slip = driver_health.get("schedule_slip", {}).get("mean")
+        if schedule_slip is not None and schedule_slip >= self.DRIVER_LAG_THRESHOLD_MS:
+            warnings.append("Requests of operation '%s' started on average %.2f ms later than scheduled. "
+                            "The target throughput has likely not been reached." % (op, schedule_slip))
+        dropped_samples = driver_health.get("dropped_samples")
+        if dropped_samples:
+            warnings.append("%d samples of operation '%s' were dropped because the sampling buffer was full. "
+                            "Consider increasing 'sample.queue.size' in the reporting section of benchmark.ini." % (dropped_samples, op))
 
     def write_results(self, metrics_table):
         write_single_results(self.results_file, self.results_format, self.cwd, self.numbers_align,
@@ -300,6 +327,18 @@ class SummaryResultsPublisher:
             self._line("error rate", task, values["error_rate"], "%", lambda v: "%.2f" % (v * 100.0))
         )
 
+    def _publish_arrivals(self, values, task):
+        arrivals = values.get("arrivals")
+        if not arrivals:
+            return []
+        return self._join(
+            self._line("Offered arrival rate", task, arrivals.get("offered_arrival_rate"), "ops/s", lambda v: "%.2f" % v),
+            self._line("Issued arrival rate", task, arrivals.get("issued_arrival_rate"), "ops/s", lambda v: "%.2f" % v),
+            self._line("Dropped arrivals", task, arrivals.get("dropped_arrivals", 0), "ops"),
+            self._line("Late arrivals", task, arrivals.get("late_arrivals", 0), "ops"),
+            *self._publish_percentiles("queueing delay", task, arrivals.get("queueing_delay"))
+        )
+
     def _publish_totals(self, stats):
         lines = []
         lines.extend(self._publish_total_time("indexing time", stats.total_time))
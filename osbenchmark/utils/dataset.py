@@ -5,10 +5,11 @@
 # compatible open source license.
 
 import os
-import struct
+import queue
+import threading
 from abc import ABC, ABCMeta, abstractmethod
 from enum import Enum
-from typing import cast
+from typing import Optional, cast
 
 import h5py
 import numpy as np
@@ -41,6 +42,7 @@ class DataSet(ABC):
         seek: Get to position in the data-set
         size: Gets the number of items in the data-set
         reset: Resets internal state of data-set to beginning
+        chunk_rows: Gets the number of rows in a storage chunk (if any)
     """
     __metaclass__ = ABCMeta
 
@@ -71,6 +73,13 @@ class DataSet(ABC):
         Resets the dataset reader
         """
 
+    def chunk_rows(self) -> Optional[int]:
+        """
+        Returns the number of rows per storage chunk or None if the data set is not chunked. Reads that are aligned to chunks avoid
+        reading (and decompressing) a chunk more than once.
+        """
+        return None
+
 
 def get_data_set(data_set_format: str, path: str, context: Context):
     """
@@ -137,6 +146,10 @@ class HDF5DataSet(DataSet):
     def reset(self):
         self.current = self.BEGINNING
 
+    def chunk_rows(self):
+        self._load()
+        return self.data.chunks[0] if self.data.chunks else None
+
     # pylint: disable=R0911
     @staticmethod
     def parse_context(context: Context) -> str:
@@ -173,13 +186,16 @@ class HDF5DataSet(DataSet):
 
 
 class BigANNDataSet(DataSet):
+    """Base class for `Big ANN Benchmarks <https://big-ann-benchmarks.com/index.html#bench-datasets>`_ binary files. The file is
+    memory-mapped so that reading a chunk is a zero-copy slice and seeking is O(1).
+    """
 
     DATA_SET_HEADER_LENGTH = 8
     FORMAT_NAME = "bigann"
 
     def __init__(self, dataset_path: str):
         self.dataset_path = dataset_path
-        self.file = None
+        self.data = None
         self.num_bytes = 0
         self.current = DataSet.BEGINNING
         self.bytes_per_num = 0
@@ -187,22 +203,26 @@ class BigANNDataSet(DataSet):
         self.row_length = 0
 
     def _init_internal_params(self):
-        self.file = open(self.dataset_path, 'rb')
-        self.file.seek(DataSet.BEGINNING, os.SEEK_END)
-        self.num_bytes = self.file.tell()
+        self.num_bytes = os.path.getsize(self.dataset_path)
         if self.num_bytes < BigANNDataSet.DATA_SET_HEADER_LENGTH:
             raise Exception("Invalid file: file size cannot be less than {} bytes".format(
                 BigANNDataSet.DATA_SET_HEADER_LENGTH))
-        self.file.seek(BigANNDataSet.BEGINNING)
-        self.rows = int.from_bytes(self.file.read(4), "little")
-        self.row_length = int.from_bytes(self.file.read(4), "little")
+        self.rows, self.row_length = (int(v) for v in np.fromfile(self.dataset_path, dtype="<u4", count=2))
         self.bytes_per_num = self._get_data_size()
-        self.reader = self._value_reader()
+
+    def _map_data(self):
+        dtype = self._dtype()
+        if self.rows * self.row_length == 0:
+            # empty files cannot be memory-mapped
+            return np.empty((self.rows, self.row_length), dtype=dtype)
+        return np.memmap(self.dataset_path, dtype=dtype, mode="r", offset=BigANNDataSet.DATA_SET_HEADER_LENGTH,
+                         shape=(self.rows, self.row_length))
 
     def _load(self):
         # load file if it is not loaded yet
-        if self.file is None:
+        if self.data is None:
             self._init_internal_params()
+            self.data = self._map_data()
 
     def read(self, chunk_size: int):
         # load file first before read
@@ -214,16 +234,11 @@ class BigANNDataSet(DataSet):
         if end_offset > self.size():
             end_offset = self.size()
 
-        vectors = np.asarray(
-            [self._read_vector() for _ in range(end_offset - self.current)]
-        )
+        # a view on the mapped file; pages are only read when the vectors are accessed
+        vectors = np.asarray(self.data[self.current:end_offset])
         self.current = end_offset
         return vectors
 
-    def _get_file_byte_offset(self, offset):
-        """Return file byte offset for given offset"""
-        return BigANNDataSet.DATA_SET_HEADER_LENGTH + (self.row_length * self.bytes_per_num * offset)
-
     def seek(self, offset: int):
         # load file first before seek
         self._load()
@@ -233,27 +248,16 @@ class BigANNDataSet(DataSet):
         if offset >= self.size():
             raise Exception("Offset must be less than the data set size")
 
-        bytes_offset = self._get_file_byte_offset(offset)
-        self.file.seek(bytes_offset)
         self.current = offset
 
-    def _read_vector(self):
-        return np.asarray([self.reader(self.file) for _ in range(self.row_length)])
-
     def size(self):
         # load file first before return size
         self._load()
         return self.rows
 
     def reset(self):
-        if self.file:
-            self.file.seek(BigANNDataSet.DATA_SET_HEADER_LENGTH)
         self.current = BigANNDataSet.BEGINNING
 
-    def __del__(self):
-        if self.file:
-            self.file.close()
-
     @abstractmethod
     def _get_supported_extension(self):
         """Return list of supported extension by this dataset"""
@@ -277,12 +281,12 @@ class BigANNDataSet(DataSet):
         return self.get_data_size(ext)
 
     @abstractmethod
-    def _get_value_reader(self, extension):
-        """Return value reader based on extension"""
+    def get_dtype(self, extension):
+        """Return the (little-endian) NumPy dtype of a value based on extension"""
 
-    def _value_reader(self):
+    def _dtype(self):
         ext = self._get_extension()
-        return self._get_value_reader(ext)
+        return self.get_dtype(ext)
 
 
 class BigANNVectorDataSet(BigANNDataSet):
@@ -318,12 +322,12 @@ class BigANNVectorDataSet(BigANNDataSet):
 
         return None
 
-    def _get_value_reader(self, extension):
+    def get_dtype(self, extension):
         if extension == BigANNVectorDataSet.U8BIN_EXTENSION:
-            return lambda file: float(int.from_bytes(file.read(BigANNVectorDataSet.BYTES_PER_U8INT), "little"))
+            return np.dtype(np.uint8)
 
         if extension == BigANNVectorDataSet.FBIN_EXTENSION:
-            return lambda file: struct.unpack('<f', file.read(BigANNVectorDataSet.BYTES_PER_FLOAT))
+            return np.dtype("<f4")
 
         return None
 
@@ -342,7 +346,7 @@ class BigANNGroundTruthDataSet(BigANNDataSet):
         # The ground truth binary files consist of the following information:
         # num_queries(uint32_t) K-NN(uint32) followed by num_queries X K x sizeof(uint32_t) bytes of data
         # representing the IDs of the K-nearest neighbors of the queries, followed by num_queries X K x sizeof(float)
-        # bytes of data representing the distances to the corresponding points.
+        # bytes of data representing the distances to the corresponding points. Only the IDs are mapped.
         if (self.num_bytes - BigANNDataSet.DATA_SET_HEADER_LENGTH) != 2 * (
                 self.rows * self.row_length * self.bytes_per_num):
             raise Exception("Invalid file. File size is not matching with expected estimated "
@@ -354,9 +358,145 @@ class BigANNGroundTruthDataSet(BigANNDataSet):
     def get_data_size(self, extension):
         return BigANNGroundTruthDataSet.BYTES_PER_UNSIGNED_INT32
 
-    def _get_value_reader(self, extension):
-        return lambda file: int.from_bytes(
-            file.read(BigANNGroundTruthDataSet.BYTES_PER_UNSIGNED_INT32), "little")
+    def get_dtype(self, extension):
+        return np.dtype("<u4")
+
+
+class PrefetchingDataSet(DataSet):
+    """Decorates a data set so that it is read ahead on a background thread. Blocks of rows are kept in a bounded queue and
+    ``read`` is served from memory. Block boundaries are aligned to storage chunks of the underlying data set so that every chunk
+    is read exactly once. Without chunks, every block is one contiguous read.
+    """
+
+    def __init__(self, data_set: DataSet, block_size: int = 1000, blocks: int = 4, end: Optional[int] = None):
+        """
+        @param data_set: data set to read from. It must not be accessed directly anymore.
+        @param block_size: number of rows to read at once. Rounded up to a multiple of the chunk size.
+        @param blocks: maximum number of blocks to read ahead
+        @param end: offset up to which rows are read ahead (defaults to the data set size)
+        """
+        self.data_set = data_set
+        self.blocks = blocks
+        chunk_rows = data_set.chunk_rows()
+        if chunk_rows:
+            block_size = -(-block_size // chunk_rows) * chunk_rows
+        self.block_size = block_size
+        self._size = data_set.size()
+        self.end = self._size if end is None else min(end, self._size)
+        self.current = self.BEGINNING
+        self._block = None
+        self._block_offset = 0
+        self._prefetcher = None
+
+    def read(self, chunk_size: int):
+        if self.current >= self.end:
+            return None
+        if self._prefetcher is None:
+            self._prefetcher = _Prefetcher(self.data_set, self.current, self.end, self.block_size, self.blocks)
+        parts = []
+        remaining = min(chunk_size, self.end - self.current)
+        while remaining > 0:
+            if self._block is None or self._block_offset >= len(self._block):
+                self._block = self._prefetcher.next_block()
+                self._block_offset = 0
+                if self._block is None:
+                    break
+            part = self._block[self._block_offset:self._block_offset + remaining]
+            self._block_offset += len(part)
+            remaining -= len(part)
+            parts.append(part)
+        if not parts:
+            self.current = self.end
+            return None
+        vectors = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        self.current += len(vectors)
+        return vectors
+
+    def seek(self, offset: int):
+        if offset < self.BEGINNING:
+            raise Exception("Offset must be greater than or equal to 0")
+
+        if offset >= self.size():
+            raise Exception("Offset must be less than the data set size")
+
+        self._stop()
+        self.current = offset
+
+    def size(self):
+        return self._size
+
+    def reset(self):
+        self._stop()
+        self.current = self.BEGINNING
+
+    def chunk_rows(self):
+        return self.data_set.chunk_rows()
+
+    def _stop(self):
+        if self._prefetcher is not None:
+            self._prefetcher.stop()
+            self._prefetcher = None
+        self._block = None
+        self._block_offset = 0
+
+    def __del__(self):
+        # let the background thread terminate if this data set is discarded before it has been read completely
+        if self._prefetcher is not None:
+            self._prefetcher.stopped.set()
+
+
+class _Prefetcher:
+    def __init__(self, data_set: DataSet, start: int, end: int, block_size: int, blocks: int):
+        self.stopped = threading.Event()
+        self._exhausted = False
+        self._queue = queue.Queue(maxsize=blocks)
+        self._thread = threading.Thread(target=self._run, args=(data_set, start, end, block_size), name="data-set-prefetcher",
+                                        daemon=True)
+        self._thread.start()
+
+    def _run(self, data_set, start, end, block_size):
+        try:
+            data_set.seek(start)
+            position = start
+            while position < end and not self.stopped.is_set():
+                # end blocks at multiples of the block size so reads stay aligned to chunks
+                block = data_set.read(min(block_size - position % block_size, end - position))
+                if block is None:
+                    break
+                if isinstance(block, np.ndarray) and not block.flags.owndata:
+                    # views on memory-mapped files are only read on access; force the read here
+                    block = np.array(block)
+                position += len(block)
+                if not self._put(block):
+                    return
+        except BaseException as e:  # pylint: disable=broad-except
+            self._put(e)
+            return
+        self._put(None)
+
+    def _put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def next_block(self):
+        if self._exhausted:
+            return None
+        item = self._queue.get()
+        if isinstance(item, BaseException):
+            self._exhausted = True
+            raise item
+        if item is None:
+            self._exhausted = True
+        return item
+
+    def stop(self):
+        self.stopped.set()
+        self._thread.join()
 
 
 def create_big_ann_dataset(file_path: str):
@@ -31,8 +31,12 @@ import shutil
 import subprocess
 import tarfile
 import zipfile
+import zlib
 import urllib.error
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import suppress
+
+import numpy as np
 import zstandard as zstd
 
 from osbenchmark import exceptions
@@ -99,6 +103,8 @@ class MmapSource:
         self.encoding = encoding
         self.f = None
         self.mm = None
+        # estimate of the average line length; used to size the window that is scanned by ``read_lines_block``
+        self.bytes_per_line = 512
 
     def open(self):
         self.f = open(self.file_name, mode="r+b")
@@ -129,6 +135,39 @@ class MmapSource:
             lines.append(line)
         return lines
 
+    def read_lines_block(self, num_lines):
+        """
+        Reads up to ``num_lines`` lines at once. Line boundaries are determined by scanning the memory-mapped file with numpy so the
+        lines are never split into individual objects.
+
+        :param num_lines: The maximum number of lines to read.
+        :return: A tuple of the number of lines read and the lines as one contiguous ``bytes`` object.
+        """
+        mm = self.mm
+        size = len(mm)
+        start = mm.tell()
+        end = start
+        remaining = num_lines
+        window = self.bytes_per_line * num_lines + self.bytes_per_line
+        while remaining > 0 and end < size:
+            count = min(window, size - end)
+            newlines = np.flatnonzero(np.frombuffer(mm, dtype=np.uint8, count=count, offset=end) == ord("\n"))
+            if len(newlines) >= remaining:
+                end += int(newlines[remaining - 1]) + 1
+                remaining = 0
+            else:
+                remaining -= len(newlines)
+                end += count
+                window *= 2
+        if remaining > 0 and end > start and mm[end - 1] != ord("\n"):
+            # the last line is not terminated by a newline
+            remaining -= 1
+        lines_read = num_lines - remaining
+        if lines_read > 0:
+            self.bytes_per_line = max(1, (end - start) // lines_read)
+        mm.seek(end)
+        return lines_read, mm[start:end]
+
     def close(self):
         self.mm.close()
         self.mm = None
@@ -409,6 +448,105 @@ def _do_decompress_zstd(target_directory, filename):
         compressed_file.close()
 
 
+# default number of lines between two entries in a file offset table
+FILE_OFFSET_TABLE_INTERVAL = 10000
+# number of lines between two entries in the pre-generated file offset tables that are provided alongside corpora
+PRE_GENERATED_FILE_OFFSET_TABLE_INTERVAL = 50000
+# number of bytes that are scanned at once when building a file offset table
+FILE_OFFSET_TABLE_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+def supports_streaming_decompression(zip_name):
+    """
+    :return: ``True`` iff the archive can be decompressed with ``StreamingDecompressor``.
+    """
+    _, extension = splitext(zip_name)
+    return extension in _STREAM_DECOMPRESSORS
+
+
+class _MultiStreamDecompressor:
+    """
+    Decompresses data incrementally. Archives that consist of several concatenated streams (as created by pbzip2 or pigz) are
+    supported by starting a new decompressor at the end of each stream.
+    """
+    def __init__(self, create_decompressor):
+        self._create_decompressor = create_decompressor
+        self._decompressor = create_decompressor()
+
+    @property
+    def eof(self):
+        return self._decompressor is None
+
+    def decompress(self, data):
+        chunks = []
+        while data:
+            if self._decompressor is None:
+                self._decompressor = self._create_decompressor()
+            chunks.append(self._decompressor.decompress(data))
+            if self._decompressor.eof:
+                data = self._decompressor.unused_data
+                self._decompressor = None
+            else:
+                data = b""
+        return b"".join(chunks)
+
+
+_STREAM_DECOMPRESSORS = {
+    ".bz2": bz2.BZ2Decompressor,
+    ".gz": lambda: zlib.decompressobj(wbits=zlib.MAX_WBITS | 16),
+    ".zst": lambda: zstd.ZstdDecompressor().decompressobj(),
+}
+
+
+class StreamingDecompressor:
+    """
+    Decompresses an archive that arrives in chunks (e.g. while it is being downloaded) into a data file and builds the file offset
+    table of the data file on the fly. Hence, the archive is never stored and the data file is written exactly once.
+
+    Use it as a context manager and pass each chunk of the archive to ``write``. The data file (and its offset table) only appear once
+    the context is left without an error.
+    """
+    def __init__(self, zip_name, data_file_path, offset_table_interval=FILE_OFFSET_TABLE_INTERVAL):
+        _, extension = splitext(zip_name)
+        self.zip_name = zip_name
+        self.data_file_path = data_file_path
+        self.compressed_bytes = 0
+        self.lines = None
+        self._decompressor = _MultiStreamDecompressor(_STREAM_DECOMPRESSORS[extension])
+        self._offset_table_builder = FileOffsetTableBuilder(data_file_path, offset_table_interval)
+        self._tmp_data_file_path = f"{data_file_path}.tmp"
+        self._data_file = None
+
+    def __enter__(self):
+        ensure_dir(dirname(self.data_file_path))
+        self._data_file = open(self._tmp_data_file_path, "wb")
+        return self
+
+    def write(self, data):
+        self.compressed_bytes += len(data)
+        try:
+            decompressed = self._decompressor.decompress(data)
+        except (OSError, EOFError, zlib.error, zstd.ZstdError) as e:
+            raise exceptions.DataError(f"[{self.zip_name}] is corrupt: {e}") from e
+        if decompressed:
+            self._data_file.write(decompressed)
+            self._offset_table_builder.update(decompressed)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._data_file.close()
+        self._data_file = None
+        if exc_type is not None:
+            os.remove(self._tmp_data_file_path)
+            return False
+        if not self._decompressor.eof:
+            os.remove(self._tmp_data_file_path)
+            raise exceptions.DataError(f"[{self.zip_name}] is truncated. Please retry.")
+        os.replace(self._tmp_data_file_path, self.data_file_path)
+        # the offset table needs to be written after the data file to be considered up-to-date
+        self.lines = self._offset_table_builder.finish()
+        return False
+
+
 def _do_decompress(target_directory, compressed_file):
     try:
         compressed_file.extractall(path=target_directory)
@@ -486,8 +624,20 @@ class FileOffsetTable:
     """
     The FileOffsetTable represents a persistent mapping from lines in a data file to their offset in bytes in the
     data file. This helps bulk-indexing clients to advance quickly to a certain position in a large data file.
+
+    The table is a binary file consisting of a fixed-size header followed by fixed-width ``(line number, offset)`` entries in
+    ascending order. Readers memory-map the entries and bisect them, so looking up an offset takes constant time regardless of the
+    size of the data file. The header stores the modification time and a fingerprint of the data file and a checksum of the
+    entries which are used to determine whether the table is still valid.
     """
-    def __init__(self, data_file_path, offset_table_path, mode):
+    MAGIC = b"OSBOFT02"
+    HEADER = np.dtype([("magic", "S8"), ("interval", "<u8"), ("entries", "<u8"), ("data_size", "<u8"),
+                       ("data_mtime_ns", "<i8"), ("data_checksum", "<u4"), ("checksum", "<u4")])
+    ENTRY = np.dtype([("line", "<u8"), ("offset", "<u8")])
+    # number of bytes at the beginning and at the end of the data file that are considered for its fingerprint
+    FINGERPRINT_SIZE = 64 * 1024
+
+    def __init__(self, data_file_path, offset_table_path, mode, interval=FILE_OFFSET_TABLE_INTERVAL):
         """
         Creates a new FileOffsetTable instance. The constructor should not be called directly but instead the
         respective factory methods should be used.
@@ -496,11 +646,14 @@ class FileOffsetTable:
         :param offset_table_path: The absolute path to the corresponding offset table file. Only required to exist
                                   for read operations on the data file.
         :param mode: The mode in which the file offset table should be opened.
+        :param interval: The (maximum) number of lines between two entries in the file offset table.
         """
         self.data_file_path = data_file_path
         self.offset_table_path = offset_table_path
         self.mode = mode
-        self.offset_file = None
+        self.interval = interval
+        self.offsets = None
+        self.entries = None
 
     def exists(self):
         """
@@ -508,24 +661,52 @@ class FileOffsetTable:
         """
         return os.path.exists(self.offset_table_path)
 
-    def is_valid(self):
+    def is_valid(self, max_interval=None):
         """
-        :return: True iff the file offset table exists and it is up-to-date.
+        :param max_interval: The maximum number of lines between two entries that is acceptable. Optional. Defaults to the interval of
+                             this table.
+        :return: True iff the file offset table exists, it is not corrupt, it matches the current contents of the data file and it is
+                 at least as fine-grained as requested.
         """
-        return self.exists() and os.path.getmtime(self.offset_table_path) >= os.path.getmtime(self.data_file_path)
+        if not self.exists():
+            return False
+        header = self.read_header(self.offset_table_path)
+        if header is None or header["interval"] > (max_interval or self.interval):
+            return False
+        # the fingerprint only covers the beginning and the end of the data file so changes in between are detected by the
+        # modification time
+        stat = os.stat(self.data_file_path)
+        if header["data_size"] != stat.st_size or header["data_mtime_ns"] != stat.st_mtime_ns or \
+                header["data_checksum"] != FileOffsetTable.fingerprint(self.data_file_path):
+            return False
+        with open(self.offset_table_path, "rb") as f:
+            f.seek(FileOffsetTable.HEADER.itemsize)
+            entries = f.read()
+        return len(entries) == header["entries"] * FileOffsetTable.ENTRY.itemsize and zlib.crc32(entries) == header["checksum"]
 
     def __enter__(self):
-        self.offset_file = open(self.offset_table_path, self.mode)
+        if "w" in self.mode:
+            self.offsets = []
+        else:
+            header = self.read_header(self.offset_table_path)
+            if header is None:
+                raise exceptions.DataError(f"[{self.offset_table_path}] is not a valid file offset table. Please remove it.")
+            if header["entries"] > 0:
+                self.entries = np.memmap(self.offset_table_path, dtype=FileOffsetTable.ENTRY, mode="r",
+                                         offset=FileOffsetTable.HEADER.itemsize, shape=(int(header["entries"]),))
+            else:
+                self.entries = np.empty(0, dtype=FileOffsetTable.ENTRY)
         return self
 
     def add_offset(self, line_number, offset):
         """
-        Adds a new offset mapping to the file offset table. This method has to be called inside a context-manager block.
+        Adds a new offset mapping to the file offset table. This method has to be called inside a context-manager block and
+        line numbers need to be added in ascending order.
 
         :param line_number: A line number to add.
         :param offset: The corresponding offset in bytes.
         """
-        print(f"{line_number};{offset}", file=self.offset_file)
+        self.offsets.append((line_number, offset))
 
     def find_closest_offset(self, target_line_number):
         """
@@ -538,32 +719,80 @@ class FileOffsetTable:
         :return: A tuple of file offset in bytes to the line with the closest match and the number of lines that
                  still need to be skipped.
         """
-        prior_offset = 0
-        prior_remaining_lines = target_line_number
-
-        for line in self.offset_file:
-            line_number, offset_in_bytes = [int(i) for i in line.strip().split(";")]
-            if line_number <= target_line_number:
-                prior_offset = offset_in_bytes
-                prior_remaining_lines = target_line_number - line_number
-            else:
-                break
-
-        return prior_offset, prior_remaining_lines
+        idx = int(np.searchsorted(self.entries["line"], target_line_number, side="right")) - 1
+        if idx < 0:
+            return 0, target_line_number
+        line_number, offset_in_bytes = self.entries[idx]
+        return int(offset_in_bytes), target_line_number - int(line_number)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.offset_file.close()
-        self.offset_file = None
+        if self.offsets is not None:
+            if exc_type is None:
+                self._write(self.offsets)
+            self.offsets = None
+        if self.entries is not None:
+            # release the memory mapping
+            self.entries = None
         return False
 
+    def _write(self, offsets):
+        entries = np.array(offsets, dtype=FileOffsetTable.ENTRY)
+        header = np.zeros(1, dtype=FileOffsetTable.HEADER)
+        header["magic"] = FileOffsetTable.MAGIC
+        header["interval"] = self.interval
+        header["entries"] = len(entries)
+        stat = os.stat(self.data_file_path)
+        header["data_size"] = stat.st_size
+        header["data_mtime_ns"] = stat.st_mtime_ns
+        header["data_checksum"] = FileOffsetTable.fingerprint(self.data_file_path)
+        header["checksum"] = zlib.crc32(entries.tobytes())
+        tmp_path = f"{self.offset_table_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header.tobytes())
+            f.write(entries.tobytes())
+        os.replace(tmp_path, self.offset_table_path)
+
+    @staticmethod
+    def read_header(offset_table_path):
+        """
+        Reads the header of a binary file offset table.
+
+        :param offset_table_path: The path to a file offset table.
+        :return: The header or ``None`` if the file is not a binary file offset table (e.g. a text-based one).
+        """
+        with open(offset_table_path, "rb") as f:
+            raw_header = f.read(FileOffsetTable.HEADER.itemsize)
+        if len(raw_header) < FileOffsetTable.HEADER.itemsize:
+            return None
+        header = np.frombuffer(raw_header, dtype=FileOffsetTable.HEADER)[0]
+        return header if header["magic"] == FileOffsetTable.MAGIC else None
+
+    @staticmethod
+    def fingerprint(data_file_path):
+        """
+        Calculates a cheap fingerprint of a data file from its size, its first and its last bytes.
+
+        :param data_file_path: The path to a data file.
+        :return: The fingerprint as an unsigned 32 bit integer.
+        """
+        size = os.path.getsize(data_file_path)
+        checksum = zlib.crc32(str(size).encode("utf-8"))
+        with open(data_file_path, "rb") as f:
+            checksum = zlib.crc32(f.read(FileOffsetTable.FINGERPRINT_SIZE), checksum)
+            if size > FileOffsetTable.FINGERPRINT_SIZE:
+                f.seek(max(FileOffsetTable.FINGERPRINT_SIZE, size - FileOffsetTable.FINGERPRINT_SIZE))
+                checksum = zlib.crc32(f.read(), checksum)
+        return checksum
+
     @classmethod
-    def create_for_data_file(cls, data_file_path):
+    def create_for_data_file(cls, data_file_path, interval=FILE_OFFSET_TABLE_INTERVAL):
         """
         Factory method to create a new file offset table.
 
         :param data_file_path: The absolute path to the data file for which a file offset table should be created.
+        :param interval: The number of lines between two entries in the file offset table.
         """
-        return cls(data_file_path, f"{data_file_path}.offset", "wt")
+        return cls(data_file_path, f"{data_file_path}.offset", "wb", interval)
 
     @classmethod
     def read_for_data_file(cls, data_file_path):
@@ -573,7 +802,7 @@ class FileOffsetTable:
 
         :param data_file_path: The absolute path to the data file for which the file offset table should be read.
         """
-        return cls(data_file_path, f"{data_file_path}.offset", "rt")
+        return cls(data_file_path, f"{data_file_path}.offset", "rb")
 
     @staticmethod
     def remove(data_file_path):
@@ -585,37 +814,159 @@ class FileOffsetTable:
         os.remove(f"{data_file_path}.offset")
 
 
-def prepare_file_offset_table(data_file_path, base_url, source_url, downloader):
+def _convert_text_file_offset_table(data_file_path, interval):
+    """
+    Converts a file offset table in the text-based format (one ``line;offset`` entry per line), as it is provided alongside some
+    corpora, to the binary format.
+
+    :return: True iff the file offset table could be converted.
+    """
+    offset_table_path = f"{data_file_path}.offset"
+    offsets = []
+    try:
+        with open(offset_table_path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    line_number, offset_in_bytes = [int(i) for i in line.strip().split(";")]
+                    offsets.append((line_number, offset_in_bytes))
+    except ValueError:
+        return False
+    # the coarsest distance between two entries determines the interval of the table
+    lines = [0] + [line_number for line_number, _ in offsets]
+    table_interval = max((b - a for a, b in zip(lines, lines[1:])), default=interval)
+    with FileOffsetTable.create_for_data_file(data_file_path, table_interval) as file_offset_table:
+        for line_number, offset_in_bytes in offsets:
+            file_offset_table.add_offset(line_number, offset_in_bytes)
+    return True
+
+
+class FileOffsetTableBuilder:
+    """
+    Builds the file offset table of a data file incrementally from the content of the data file.
+    """
+    def __init__(self, data_file_path, interval=FILE_OFFSET_TABLE_INTERVAL):
+        self.data_file_path = data_file_path
+        self.interval = interval
+        self.lines = 0
+        self.bytes = 0
+        self.offsets = []
+        self._ends_with_newline = True
+
+    def update(self, data):
+        """
+        :param data: The next chunk of the data file's content as bytes.
+        """
+        newlines = data.count(b"\n")
+        next_mark = (self.lines // self.interval + 1) * self.interval
+        if self.lines + newlines >= next_mark:
+            newline_positions = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord("\n"))
+            for mark in range(next_mark, self.lines + newlines + 1, self.interval):
+                self.offsets.append((mark, self.bytes + int(newline_positions[mark - self.lines - 1]) + 1))
+        self.lines += newlines
+        self.bytes += len(data)
+        if data:
+            self._ends_with_newline = data.endswith(b"\n")
+
+    def finish(self):
+        """
+        Writes the file offset table.
+
+        :return: The number of lines in the data file.
+        """
+        if not self._ends_with_newline:
+            # the last line is not terminated by a newline
+            self.lines += 1
+            if self.lines % self.interval == 0:
+                self.offsets.append((self.lines, self.bytes))
+        with FileOffsetTable.create_for_data_file(self.data_file_path, self.interval) as file_offset_table:
+            for line_number, offset in self.offsets:
+                file_offset_table.add_offset(line_number, offset)
+        return self.lines
+
+
+def _count_newlines(data, start, end):
+    return int(np.count_nonzero(np.frombuffer(data, dtype=np.uint8, count=end - start, offset=start) == ord("\n")))
+
+
+def _find_line_offsets(data, start, end, first_line, interval):
+    """
+    :return: The offsets of all lines in ``data[start:end]`` whose line number is a multiple of ``interval``, given that
+             ``first_line`` lines precede ``start``.
+    """
+    newline_positions = np.flatnonzero(np.frombuffer(data, dtype=np.uint8, count=end - start, offset=start) == ord("\n"))
+    first_mark = (first_line // interval + 1) * interval
+    marks = np.arange(first_mark, first_line + len(newline_positions) + 1, interval)
+    return list(zip(marks.tolist(), (newline_positions[marks - first_line - 1] + start + 1).tolist()))
+
+
+def scan_line_offsets(data_file_path, interval, chunk_size=FILE_OFFSET_TABLE_CHUNK_SIZE, max_workers=None):
+    """
+    Determines the number of lines in a data file and the offset of every line whose line number is a multiple of ``interval``.
+
+    The data file is memory-mapped and scanned for newlines in chunks of ``chunk_size`` bytes concurrently. A first pass counts the
+    newlines per chunk, which determines the line number at the start of each chunk, and a second pass determines the offsets. numpy
+    releases the GIL while scanning so chunks are processed in parallel by a thread pool.
+
+    :param data_file_path: The path to a data file.
+    :param interval: The number of lines between two offsets.
+    :param chunk_size: The number of bytes that are scanned at once.
+    :param max_workers: The number of threads to use. Defaults to the number of CPUs.
+    :return: A tuple of the number of lines in the data file and a list of ``(line number, offset)`` tuples.
+    """
+    size = os.path.getsize(data_file_path)
+    if size == 0:
+        return 0, []
+    chunks = [(start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+    with open(data_file_path, "rb") as data_file, \
+            mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ) as data, \
+            ThreadPoolExecutor(max_workers=min(max_workers or os.cpu_count() or 1, len(chunks))) as executor:
+        newlines = list(executor.map(lambda chunk: _count_newlines(data, *chunk), chunks))
+        first_lines = np.concatenate(([0], np.cumsum(newlines)[:-1])).tolist()
+        offsets = []
+        for chunk_offsets in executor.map(lambda args: _find_line_offsets(data, *args[0], args[1], interval), zip(chunks, first_lines)):
+            offsets.extend(chunk_offsets)
+        lines = sum(newlines)
+        if data[size - 1] != ord("\n"):
+            # the last line is not terminated by a newline
+            lines += 1
+            if lines % interval == 0:
+                offsets.append((lines, size))
+    return lines, offsets
+
+
+def prepare_file_offset_table(data_file_path, base_url, source_url, downloader, interval=FILE_OFFSET_TABLE_INTERVAL):
     """
     Creates a file that contains a mapping from line numbers to file offsets for the provided path. This file is used internally by
     #skip_lines(data_file_path, data_file) to speed up line skipping.
 
     :param data_file_path: The path to a text file that is readable by this process.
+    :param interval: The number of lines between two entries in the file offset table. Existing and pre-generated tables are also
+                     accepted if they are at most as coarse as ``PRE_GENERATED_FILE_OFFSET_TABLE_INTERVAL``.
     :return The number of lines read or ``None`` if it did not have to build the file offset table.
     """
-    file_offset_table = FileOffsetTable.create_for_data_file(data_file_path)
-    if not file_offset_table.is_valid():
+    file_offset_table = FileOffsetTable.create_for_data_file(data_file_path, interval)
+    # skipping up to a few ten thousand lines is cheap compared to building the table from scratch
+    max_interval = max(interval, PRE_GENERATED_FILE_OFFSET_TABLE_INTERVAL)
+    if not file_offset_table.is_valid(max_interval):
         if not source_url:
             try:
                 downloader.download(base_url, None, data_file_path + '.offset', None)
+                # pre-generated offset files are text-based
+                if FileOffsetTable.read_header(file_offset_table.offset_table_path) is None and \
+                        not _convert_text_file_offset_table(data_file_path, interval):
+                    logging.getLogger(__name__).warning("Ignoring malformed pre-generated offset file for [%s].", data_file_path)
             except exceptions.DataError as e:
                 if isinstance(e.cause, urllib.error.HTTPError) and (e.cause.code == 403 or e.cause.code == 404):
                     logging.getLogger(__name__).info("Pre-generated offset file not found, will generate from corpus data")
 
-    if not file_offset_table.is_valid():
+    if not file_offset_table.is_valid(max_interval):
         console.info("Preparing file offset table for [%s] ... " % data_file_path, end="", flush=True)
-        line_number = 0
+        lines, offsets = scan_line_offsets(data_file_path, interval)
         with file_offset_table:
-            with open(data_file_path, mode="rt", encoding="utf-8") as data_file:
-                while True:
-                    line = data_file.readline()
-                    if len(line) == 0:
-                        break
-                    line_number += 1
-                    if line_number % 50000 == 0:
-                        file_offset_table.add_offset(line_number, data_file.tell())
+            for line_number, offset in offsets:
+                file_offset_table.add_offset(line_number, offset)
         console.println("[OK]")
-        return line_number
+        return lines
     else:
         return None
 
@@ -21,10 +21,15 @@
 # KIND, either express or implied.  See the License for the
 # specific language governing permissions and limitations
 # under the License.
+import collections
+import concurrent.futures
 import functools
+import itertools
+import json
 import logging
 import os
 import socket
+import threading
 import urllib.error
 from urllib.parse import quote, parse_qs, urlencode, urlparse, urlunparse
 
@@ -36,6 +41,10 @@ from osbenchmark.utils import console, convert
 
 __HTTP = None
 
+DEFAULT_DOWNLOAD_STREAMS = 4
+DOWNLOAD_CHUNK_SIZE_IN_BYTES = 32 * 1024 * 1024
+MAX_CONNECTIONS_PER_HOST = 16
+
 
 def init():
     logger = logging.getLogger(__name__)
@@ -48,11 +57,13 @@ def init():
         __HTTP = urllib3.ProxyManager(proxy_url,
                                       cert_reqs='CERT_REQUIRED',
                                       ca_certs=certifi.where(),
+                                      # keep a connection per concurrent download stream
+                                      maxsize=MAX_CONNECTIONS_PER_HOST,
                                       # appropriate headers will only be set if there is auth info
                                       proxy_headers=urllib3.make_headers(proxy_basic_auth=parsed_url.auth))
     else:
         logger.info("Connecting directly to the Internet (no proxy support).")
-        __HTTP = urllib3.PoolManager(cert_reqs='CERT_REQUIRED', ca_certs=certifi.where())
+        __HTTP = urllib3.PoolManager(cert_reqs='CERT_REQUIRED', ca_certs=certifi.where(), maxsize=MAX_CONNECTIONS_PER_HOST)
 
 
 class Progress:
@@ -177,7 +188,142 @@ def download_from_bucket(blobstore, url, local_path, expected_size_in_bytes=None
     return expected_size_in_bytes
 
 
-def download_http(url, local_path, expected_size_in_bytes=None, progress_indicator=None):
+def _probe_http(url):
+    """
+    Determines the properties of the resource at ``url`` with a HEAD request. If the request fails, the size is unknown and range
+    requests are considered unsupported so callers fall back to a single-stream download.
+
+    :return: A tuple with the size of the resource (``None`` if unknown), whether the server supports range requests and a validator
+             (its ``ETag`` or ``Last-Modified`` header, ``None`` if unknown) that changes when the resource changes.
+    """
+    logger = logging.getLogger(__name__)
+    try:
+        r = __http().request("HEAD", url, retries=10, timeout=urllib3.Timeout(connect=45, read=240))
+    except urllib3.exceptions.HTTPError as e:
+        logger.warning("Could not probe [%s] (%s). Falling back to a single-stream download.", url, e)
+        return None, False, None
+    if r.status > 299:
+        logger.warning("Could not probe [%s] (HTTP status: %s). Falling back to a single-stream download.", url, r.status)
+        return None, False, None
+    try:
+        size = int(r.headers.get("Content-Length"))
+    except (TypeError, ValueError):
+        size = None
+    return size, r.headers.get("Accept-Ranges", "").lower() == "bytes", r.headers.get("ETag") or r.headers.get("Last-Modified")
+
+
+def _read_manifest(manifest_path, manifest_key, local_path, total_size):
+    """
+    :return: The indices of already completed chunks if ``manifest_path`` describes a partial download of the same data into
+    ``local_path``, otherwise ``None``.
+    """
+    try:
+        with open(manifest_path, "rt", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("key") != manifest_key:
+        logging.getLogger(__name__).info("Discarding partial download to [%s] as the remote data or download settings have changed.", local_path)
+        return None
+    if not os.path.isfile(local_path) or os.path.getsize(local_path) != total_size:
+        return None
+    return set(manifest.get("completed", []))
+
+
+def _write_manifest(manifest_path, manifest_key, completed):
+    tmp_manifest_path = manifest_path + ".tmp"
+    with open(tmp_manifest_path, "wt", encoding="utf-8") as f:
+        json.dump({"key": manifest_key, "completed": sorted(completed)}, f)
+    os.replace(tmp_manifest_path, manifest_path)
+
+
+def _download_http_segments(segments, local_path, progress_indicator=None, streams=DEFAULT_DOWNLOAD_STREAMS):
+    """
+    Downloads one or more HTTP resources into consecutive regions of a single local file.
+
+    Resources that support range requests are split into chunks of ``DOWNLOAD_CHUNK_SIZE_IN_BYTES`` which are fetched by ``streams``
+    concurrent connections and written directly to their final offset. Completed chunks are recorded in a sidecar manifest
+    (``local_path`` + ".manifest") so that an interrupted download resumes with the missing chunks. The manifest also records the
+    validator of each resource so completed chunks are discarded if a resource has changed in the meantime. The manifest is removed
+    once the download is complete.
+
+    :param segments: A list of (url, size in bytes, supports range requests, validator) tuples. See ``_probe_http`` for validators.
+    :return: The total size in bytes.
+    """
+    logger = logging.getLogger(__name__)
+    chunk_size_in_bytes = DOWNLOAD_CHUNK_SIZE_IN_BYTES
+    chunks = []
+    file_offset = 0
+    for url, size, supports_ranges, _ in segments:
+        step = chunk_size_in_bytes if supports_ranges else max(size, 1)
+        for url_offset in range(0, size, step):
+            chunks.append((url, url_offset, file_offset + url_offset, min(step, size - url_offset), supports_ranges))
+        file_offset += size
+    total_size = file_offset
+
+    manifest_path = local_path + ".manifest"
+    manifest_key = {"segments": [[url, size, validator] for url, size, _, validator in segments], "chunk_size": chunk_size_in_bytes}
+    completed = _read_manifest(manifest_path, manifest_key, local_path, total_size)
+    if completed is None:
+        completed = set()
+        with open(local_path, "wb") as f:
+            f.truncate(total_size)
+        _write_manifest(manifest_path, manifest_key, completed)
+    else:
+        logger.info("Resuming download to [%s] with [%d] of [%d] chunks completed.", local_path, len(completed), len(chunks))
+
+    lock = threading.Lock()
+    failed = threading.Event()
+    bytes_read = sum(chunks[i][3] for i in completed)
+
+    def fetch(chunk_index):
+        nonlocal bytes_read
+        url, url_offset, offset, length, ranged = chunks[chunk_index]
+        headers = {"Range": f"bytes={url_offset}-{url_offset + length - 1}"} if ranged else None
+        with __http().request("GET", url, headers=headers, preload_content=False, retries=10,
+                              timeout=urllib3.Timeout(connect=45, read=240)) as r, open(local_path, "r+b") as out_file:
+            if r.status > 299:
+                raise urllib.error.HTTPError(url, r.status, "", None, None)
+            if ranged and r.status != 206:
+                raise exceptions.DataError(f"Server did not honor range request for [{url}] (HTTP status: {r.status}).")
+            out_file.seek(offset)
+            written = 0
+            for data in r.stream(2 ** 16):
+                if failed.is_set():
+                    return
+                out_file.write(data[:length - written])
+                written += len(data)
+                with lock:
+                    bytes_read += len(data)
+                    if progress_indicator:
+                        progress_indicator(bytes_read, total_size)
+            if written != length:
+                raise exceptions.DataError(f"Download of [{url}] is corrupt. Received [{written}] bytes at offset [{url_offset}] "
+                                           f"but [{length}] bytes are expected.")
+        with lock:
+            completed.add(chunk_index)
+            _write_manifest(manifest_path, manifest_key, completed)
+
+    pending = [i for i in range(len(chunks)) if i not in completed]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, streams), thread_name_prefix="download") as pool:
+        futures = [pool.submit(fetch, i) for i in pending]
+        try:
+            for f in concurrent.futures.as_completed(futures):
+                f.result()
+        except BaseException:
+            failed.set()
+            pool.shutdown(cancel_futures=True)
+            raise
+    os.remove(manifest_path)
+    return total_size
+
+
+def download_http(url, local_path, expected_size_in_bytes=None, progress_indicator=None, streams=1):
+    if streams > 1:
+        size, supports_ranges, validator = _probe_http(url)
+        if size is not None and supports_ranges:
+            total_size = _download_http_segments([(url, size, True, validator)], local_path, progress_indicator, streams)
+            return total_size if expected_size_in_bytes is None else expected_size_in_bytes
     with __http().request("GET", url, preload_content=False, retries=10,
                           timeout=urllib3.Timeout(connect=45, read=240)) as r, open(local_path, "wb") as out_file:
         if r.status > 299:
@@ -201,6 +347,64 @@ def download_http(url, local_path, expected_size_in_bytes=None, progress_indicat
         return expected_size_in_bytes
 
 
+def _fetch_range(url, start, length):
+    r = __http().request("GET", url, headers={"Range": f"bytes={start}-{start + length - 1}"}, retries=10,
+                         timeout=urllib3.Timeout(connect=45, read=240))
+    if r.status > 299:
+        raise urllib.error.HTTPError(url, r.status, "", None, None)
+    if r.status != 206 or len(r.data) != length:
+        raise exceptions.DataError(f"Server did not honor range request for [{url}] (HTTP status: {r.status}).")
+    return r.data
+
+
+def stream_http(url, consumer, progress_indicator=None, streams=1):
+    """
+    Passes the content of ``url`` in order and in chunks to ``consumer`` without storing it.
+
+    If ``streams`` is greater than one and the server supports range requests, up to ``streams`` chunks of
+    ``DOWNLOAD_CHUNK_SIZE_IN_BYTES`` are fetched concurrently (and are held in memory until it is their turn).
+
+    :return: The number of bytes that have been read.
+    """
+    size, supports_ranges, _ = _probe_http(url) if streams > 1 else (None, False, None)
+    bytes_read = 0
+    if size is not None and supports_ranges:
+        chunk_size = DOWNLOAD_CHUNK_SIZE_IN_BYTES
+        starts = iter(range(0, size, chunk_size))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=streams, thread_name_prefix="download") as pool:
+            try:
+                in_flight = collections.deque(pool.submit(_fetch_range, url, start, min(chunk_size, size - start))
+                                              for start in itertools.islice(starts, streams))
+                while in_flight:
+                    data = in_flight.popleft().result()
+                    start = next(starts, None)
+                    if start is not None:
+                        in_flight.append(pool.submit(_fetch_range, url, start, min(chunk_size, size - start)))
+                    consumer(data)
+                    bytes_read += len(data)
+                    if progress_indicator:
+                        progress_indicator(bytes_read, size)
+            except BaseException:
+                pool.shutdown(cancel_futures=True)
+                raise
+        return bytes_read
+
+    with __http().request("GET", url, preload_content=False, retries=10,
+                          timeout=urllib3.Timeout(connect=45, read=240)) as r:
+        if r.status > 299:
+            raise urllib.error.HTTPError(url, r.status, "", None, None)
+        try:
+            size = int(r.getheader("Content-Length"))
+        except (TypeError, ValueError):
+            size = None
+        for chunk in r.stream(2 ** 20):
+            consumer(chunk)
+            bytes_read += len(chunk)
+            if progress_indicator and size:
+                progress_indicator(bytes_read, size)
+    return bytes_read
+
+
 def _add_url_param(url, params):
     url_parsed = urlparse(url)
     query = parse_qs(url_parsed.query)
@@ -209,7 +413,7 @@ def _add_url_param(url, params):
                        urlencode(query, doseq=True), url_parsed.fragment))
 
 
-def download(url, local_path, expected_size_in_bytes=None, progress_indicator=None):
+def download(url, local_path, expected_size_in_bytes=None, progress_indicator=None, streams=1):
     """
     Downloads a single file from a URL to the provided local path.
 
@@ -219,16 +423,50 @@ def download(url, local_path, expected_size_in_bytes=None, progress_indicator=No
     :param progress_indicator A callable that can be use to publish progress to the user. It is expected to take two parameters
     ``bytes_read`` and ``total_bytes``. If not provided, no progress is shown. Note that ``total_bytes`` is derived from
     the ``Content-Length`` header and not from the parameter ``expected_size_in_bytes`` for downloads via HTTP(S).
+    :param streams: The number of concurrent range requests for HTTP(S) downloads. If greater than one and supported by the server,
+    an interrupted download is resumed on the next attempt.
     """
-    tmp_data_set_path = local_path + ".tmp"
-    try:
+    def _download(tmp_data_set_path):
         scheme = urllib3.util.parse_url(url).scheme
         if scheme in ["s3", "gs"]:
-            expected_size_in_bytes = download_from_bucket(scheme, url, tmp_data_set_path, expected_size_in_bytes, progress_indicator)
+            return download_from_bucket(scheme, url, tmp_data_set_path, expected_size_in_bytes, progress_indicator)
         else:
-            expected_size_in_bytes = download_http(url, tmp_data_set_path, expected_size_in_bytes, progress_indicator)
+            return download_http(url, tmp_data_set_path, expected_size_in_bytes, progress_indicator, streams)
+
+    _download_to_tmp_file(_download, local_path)
+
+
+def download_parts(parts, local_path, progress_indicator=None, streams=DEFAULT_DOWNLOAD_STREAMS):
+    """
+    Downloads multiple HTTP(S) URLs into a single local file. The content of each part is written directly to its final offset,
+    i.e. no concatenation is needed afterwards. Parts are downloaded concurrently and the download is resumable (see ``download``).
+
+    :param parts: A list of (url, expected size in bytes) tuples. The expected size may be ``None`` if the server provides it.
+    :param local_path: The local file name of the file that should be downloaded.
+    :param progress_indicator: See ``download``.
+    :param streams: The number of concurrent HTTP requests.
+    """
+    def _download(tmp_data_set_path):
+        segments = []
+        for url, expected_size in parts:
+            size, supports_ranges, validator = _probe_http(url)
+            if expected_size is not None:
+                size = expected_size
+            elif size is None:
+                raise exceptions.DataError(f"Cannot determine the size of [{url}].")
+            segments.append((url, size, supports_ranges, validator))
+        return _download_http_segments(segments, tmp_data_set_path, progress_indicator, streams)
+
+    _download_to_tmp_file(_download, local_path)
+
+
+def _download_to_tmp_file(download_fn, local_path):
+    tmp_data_set_path = local_path + ".tmp"
+    try:
+        expected_size_in_bytes = download_fn(tmp_data_set_path)
     except BaseException:
-        if os.path.isfile(tmp_data_set_path):
+        # keep partial downloads that can be resumed
+        if os.path.isfile(tmp_data_set_path) and not os.path.isfile(tmp_data_set_path + ".manifest"):
             os.remove(tmp_data_set_path)
         raise
     else:
@@ -517,6 +517,9 @@ class BulkIndex(Runner):
          in ``benchmarks/worker_coordinator``.
         * ``request-timeout``: a non-negative float indicating the client-side timeout for the operation.  If not present, defaults to
          ``None`` and potentially falls back to the global timeout setting.
+        * ``adaptive-bulk-size``: If present, the bulk size is additionally returned as ``bulk_size`` so it is recorded as a metric.
+        * ``body-encoding``: If present, ``body`` has already been compressed with this content encoding (e.g. ``gzip``) and is sent
+         as is. Do not combine this with the client option ``http_compress``, which would compress the body again.
         """
         detailed_results = params.get("detailed-results", False)
 
@@ -539,7 +542,20 @@ class BulkIndex(Runner):
             opensearch.return_raw_response()
         request_context_holder.on_client_request_start()
 
-        if with_action_metadata:
+        body_encoding = params.get("body-encoding")
+        if body_encoding:
+            # the bulk API would append a newline to the compressed body; send it directly instead
+            headers = dict(api_kwargs.get("headers") or {})
+            headers["content-type"] = "application/x-ndjson"
+            headers["content-encoding"] = body_encoding
+            if "opaque_id" in api_kwargs:
+                headers["x-opaque-id"] = api_kwargs["opaque_id"]
+            if "request_timeout" in api_kwargs:
+                bulk_params["request_timeout"] = api_kwargs["request_timeout"]
+            path = "/_bulk" if with_action_metadata else f"/{params['index']}/_bulk"
+            response = await opensearch.transport.perform_request("POST", path, params=bulk_params, body=api_kwargs["body"],
+                                                                  headers=headers)
+        elif with_action_metadata:
             api_kwargs.pop("index", None)
             # only half of the lines are documents
             response = await opensearch.bulk(params=bulk_params, **api_kwargs)
@@ -555,6 +571,9 @@ class BulkIndex(Runner):
             "unit": unit,
         }
         meta_data.update(stats)
+        if "adaptive-bulk-size" in params:
+            # record the trajectory of bulk sizes
+            meta_data["bulk_size"] = bulk_size
         if not stats["success"]:
             meta_data["error-type"] = "bulk"
         return meta_data
@@ -22,8 +22,11 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import functools
 import inspect
+import itertools
 import logging
+import os
 import random
 import types
 from abc import ABC, abstractmethod
@@ -82,7 +85,8 @@ class MyScheduler:
 ``before_request`` and ``after_request`` can be used to adjust the target throughput based on feedback from the runner.
 
 If the scheduler also needs access to the parameter source, provide a ``parameter_source`` property. OSB injects the
-task's parameter source into this property.
+task's parameter source into this property. Similarly, OSB injects the client's index within the task into a
+``client_index`` property if the scheduler provides one.
 """
 
 
@@ -269,6 +273,69 @@ class PoissonScheduler(SimpleScheduler):
         return "Poisson scheduler"
 
 
+class ReplayScheduler(Scheduler):
+    """
+    Replays recorded arrival times, e.g. extracted from a production access log. The file referenced by the task
+    parameter ``arrivals-file`` contains one arrival time in seconds per line. Arrival times are relative to the first
+    arrival and are spread round-robin across the task's clients. They can be compressed or stretched with the task
+    parameter ``arrival-time-scale`` (e.g. ``0.5`` replays the recorded traffic at twice the rate).
+    """
+    name = "replay"
+    MIN_ARRIVAL = 1e-9
+
+    def __init__(self, task):
+        super().__init__()
+        self.task = task
+        arrivals_file = task.params.get("arrivals-file")
+        if not arrivals_file:
+            raise exceptions.SystemSetupError(f"Task [{task}] uses the [{self.name}] schedule but does not define 'arrivals-file'.")
+        time_scale = task.params.get("arrival-time-scale", 1)
+        if not isinstance(time_scale, (int, float)) or time_scale <= 0:
+            raise exceptions.SystemSetupError(f"'arrival-time-scale' of task [{task}] must be a positive number but was [{time_scale}].")
+        try:
+            # all clients of a task share the same arrival times which are only read once per file version
+            stat = os.stat(arrivals_file)
+            self.arrivals = _load_arrivals(arrivals_file, (stat.st_mtime_ns, stat.st_size), time_scale)
+        except (OSError, ValueError) as e:
+            raise exceptions.SystemSetupError(f"Cannot read arrival times of task [{task}] from [{arrivals_file}]: {e}") from None
+        if not self.arrivals:
+            raise exceptions.SystemSetupError(f"Arrivals file [{arrivals_file}] of task [{task}] does not contain any arrival times.")
+        self._client_index = 0
+        self._client_arrivals = None
+
+    @property
+    def client_index(self):
+        return self._client_index
+
+    @client_index.setter
+    def client_index(self, client_index):
+        self._client_index = client_index
+        self._client_arrivals = None
+
+    def next(self, current):
+        if self._client_arrivals is None:
+            # iterate over this client's share without copying the arrival times
+            self._client_arrivals = itertools.islice(self.arrivals, self._client_index, None, self.task.clients)
+        # raises StopIteration once all arrivals of this client have been replayed which ends the schedule
+        return next(self._client_arrivals)
+
+    def __str__(self):
+        return f"replay scheduler ({len(self.arrivals)} arrivals)"
+
+
+@functools.lru_cache(maxsize=16)
+def _load_arrivals(arrivals_file, version, time_scale):
+    # pylint: disable=unused-argument
+    # ``version`` is only part of the cache key so that changes to the file are picked up
+    with open(arrivals_file, "rt", encoding="utf-8") as f:
+        arrivals = sorted(float(line) for line in f if line.strip())
+    if not arrivals:
+        return ()
+    first_arrival = arrivals[0]
+    # a scheduled time of zero denotes an unthrottled request so the first arrival is shifted by a tiny offset
+    return tuple(max((arrival - first_arrival) * time_scale, ReplayScheduler.MIN_ARRIVAL) for arrival in arrivals)
+
+
 class UnitAwareScheduler(Scheduler):
     """
     Scheduler implementation that adjusts target throughput based on feedback from the runner. It delegates actual
@@ -309,6 +376,16 @@ class UnitAwareScheduler(Scheduler):
             target_throughput = (self.task.target_throughput.value / self.task.clients / self.current_weight)
             self.scheduler = self.scheduler_class(self.task, target_throughput)
 
+    def throttle_from_start(self):
+        """
+        Applies the target throughput already to the first request instead of waiting for feedback from the runner. This
+        is required if requests are issued before earlier responses have been received. Until the runner reports the
+        actual weight, each request is assumed to have a weight of one.
+        """
+        if self.current_weight is None:
+            self.current_weight = 1
+            self.scheduler = self.scheduler_class(self.task, self.task.target_throughput.value / self.task.clients)
+
     def next(self, current):
         return self.scheduler.next(current)
 
@@ -318,3 +395,4 @@ class UnitAwareScheduler(Scheduler):
 
 register_scheduler(DeterministicScheduler.name, DeterministicScheduler)
 register_scheduler(PoissonScheduler.name, PoissonScheduler)
+register_scheduler(ReplayScheduler.name, ReplayScheduler)
@@ -27,7 +27,6 @@ import collections
 import concurrent.futures
 import configparser
 import datetime
-import itertools
 import json
 import logging
 import math
@@ -37,12 +36,15 @@ import queue
 import random
 import sys
 import threading
+from multiprocessing import resource_tracker, shared_memory
 from dataclasses import dataclass
 from typing import Callable, List, Dict, Any
 
 import time
 from enum import Enum
 
+import numpy as np
+import psutil
 import thespian.actors
 
 from osbenchmark.utils import opts
@@ -136,12 +138,15 @@ class StartWorker:
     Starts a worker.
     """
 
-    def __init__(self, worker_id, config, workload, client_allocations, feedback_actor=None, error_queue=None, queue_lock=None, shared_states=None):
+    def __init__(self, worker_id, config, workload, client_allocations, feedback_actor=None, error_queue=None, queue_lock=None, shared_states=None,
+                 sample_ring=None, aggregator=None):
         """
         :param worker_id: Unique (numeric) id of the worker.
         :param config: OSB internal configuration object.
         :param workload: The workload to use.
         :param client_allocations: A structure describing which clients need to run which tasks.
+        :param sample_ring: Name of a shared memory ``SharedSampleRing`` to transport samples (optional).
+        :param aggregator: Address of the ``HostAggregatorActor`` that the worker reports to instead of the master (optional).
         """
         self.worker_id = worker_id
         self.config = config
@@ -151,6 +156,24 @@ class StartWorker:
         self.error_queue = error_queue
         self.queue_lock = queue_lock
         self.shared_states = shared_states
+        self.sample_ring = sample_ring
+        self.aggregator = aggregator
+
+
+class StartHostAggregator:
+    """
+    Starts the aggregator of a load generator host.
+    """
+
+    def __init__(self, host, config, workers):
+        """
+        :param host: The load generator host.
+        :param config: OSB internal configuration object.
+        :param workers: A dict of worker id to the address of each worker on this host.
+        """
+        self.host = host
+        self.config = config
+        self.workers = workers
 
 
 class Drive:
@@ -183,6 +206,37 @@ class UpdateSamples:
         self.profile_samples = profile_samples
 
 
+class UpdateWorkerMetrics:
+    """
+    Used to send measurements about a load generator itself (e.g. its event loop lag) from a worker to the master.
+    """
+
+    def __init__(self, worker_id, metrics):
+        """
+        :param worker_id: The id of the worker that has taken the measurements.
+        :param metrics: A list of ``(name, unit, task, sample_type, absolute_time, value)`` tuples.
+        """
+        self.worker_id = worker_id
+        self.metrics = metrics
+
+
+class UpdateSharedSamples:
+    """
+    Announces samples that a load generator has written to its shared memory sample ring. Only tasks and request meta-data that have
+    not been announced before are included. Request meta-data that are not interned (see ``SharedSampleWriter``) are sent inline
+    with every batch that refers to them.
+    """
+
+    def __init__(self, client_id, count, new_keys, new_meta_data, dependent_timings, profile_samples, inline_meta_data=None):
+        self.client_id = client_id
+        self.count = count
+        self.new_keys = new_keys
+        self.new_meta_data = new_meta_data
+        self.inline_meta_data = inline_meta_data or []
+        self.dependent_timings = dependent_timings
+        self.profile_samples = profile_samples
+
+
 class JoinPointReached:
     """
     Tells the master that a load generator has reached a join point. Used for coordination across multiple load generators.
@@ -197,6 +251,39 @@ class JoinPointReached:
         self.task = task
 
 
+class UpdateAggregatedSamples:
+    """
+    Used to send pre-reduced samples and load generator metrics of all workers on a load generator host to the master.
+    """
+
+    def __init__(self, host, aggregate, profile_samples, worker_metrics):
+        """
+        :param host: The load generator host.
+        :param aggregate: A ``SampleAggregate``.
+        :param profile_samples: A list of profile samples.
+        :param worker_metrics: A dict of worker id to a list of ``(name, unit, task, absolute_time, value)`` tuples.
+        """
+        self.host = host
+        self.aggregate = aggregate
+        self.profile_samples = profile_samples
+        self.worker_metrics = worker_metrics
+
+
+class HostJoinPointReached:
+    """
+    Tells the master that load generators on a host have reached a join point. Usually a host aggregator sends this only once all its
+    workers have reached the join point.
+    """
+
+    def __init__(self, host, worker_ids, task):
+        self.host = host
+        self.worker_ids = worker_ids
+        # All workers on this host share its clock so the time when this message is sent is representative for all of them (see
+        # also `JoinPointReached`).
+        self.host_timestamp = time.perf_counter()
+        self.task = task
+
+
 class BenchmarkComplete:
     """
     Indicates that the benchmark is complete.
@@ -637,6 +724,12 @@ class WorkerCoordinatorActor(actor.BenchmarkActor):
             else:
                 self.logger.error("Worker [%d] has exited prematurely. Aborting benchmark.", worker_index)
                 self.send(self.start_sender, actor.BenchmarkFailure("Worker [{}] has exited prematurely.".format(worker_index)))
+        elif msg.childAddress in self.coordinator.aggregators.values():
+            if self.status == "exiting":
+                self.logger.info("A host aggregator has exited.")
+            else:
+                self.logger.error("A host aggregator has exited prematurely. Aborting benchmark.")
+                self.send(self.start_sender, actor.BenchmarkFailure("A host aggregator has exited prematurely."))
         else:
             self.logger.info("A workload preparator has exited.")
 
@@ -677,11 +770,28 @@ class WorkerCoordinatorActor(actor.BenchmarkActor):
     def receiveMsg_JoinPointReached(self, msg, sender):
         self.coordinator.joinpoint_reached(msg.worker_id, msg.worker_timestamp, msg.task)
 
+    @actor.no_retry("worker_coordinator")  # pylint: disable=no-value-for-parameter
+    def receiveMsg_HostJoinPointReached(self, msg, sender):
+        self.coordinator.host_joinpoint_reached(msg.worker_ids, msg.host_timestamp, msg.task)
+
     @actor.no_retry("worker_coordinator")  # pylint: disable=no-value-for-parameter
     def receiveMsg_UpdateSamples(self, msg, sender):
         self.coordinator.update_samples(msg.samples)
         self.coordinator.update_profile_samples(msg.profile_samples)
 
+    @actor.no_retry("worker_coordinator")  # pylint: disable=no-value-for-parameter
+    def receiveMsg_UpdateWorkerMetrics(self, msg, sender):
+        self.coordinator.update_worker_metrics(msg.worker_id, msg.metrics)
+
+    @actor.no_retry("worker_coordinator")  # pylint: disable=no-value-for-parameter
+    def receiveMsg_UpdateSharedSamples(self, msg, sender):
+        self.coordinator.update_shared_samples(msg)
+        self.coordinator.update_profile_samples(msg.profile_samples)
+
+    @actor.no_retry("worker_coordinator")  # pylint: disable=no-value-for-parameter
+    def receiveMsg_UpdateAggregatedSamples(self, msg, sender):
+        self.coordinator.update_aggregated_samples(msg.aggregate, msg.profile_samples, msg.worker_metrics)
+
     @actor.no_retry("worker_coordinator")  # pylint: disable=no-value-for-parameter
     def receiveMsg_WakeupMessage(self, msg, sender):
         if msg.payload == WorkerCoordinatorActor.RESET_RELATIVE_TIME_MARKER:
@@ -697,8 +807,16 @@ class WorkerCoordinatorActor(actor.BenchmarkActor):
     def create_client(self, host):
         return self.createActor(Worker, targetActorRequirements=self._requirements(host))
 
-    def start_worker(self, worker_coordinator, worker_id, cfg, workload, allocations, error_queue=None, queue_lock=None, shared_states=None):
-        self.send(worker_coordinator, StartWorker(worker_id, cfg, workload, allocations, self.feedback_actor, error_queue, queue_lock, shared_states))
+    def start_worker(self, worker_coordinator, worker_id, cfg, workload, allocations, error_queue=None, queue_lock=None, shared_states=None,
+                     sample_ring=None, aggregator=None):
+        self.send(worker_coordinator, StartWorker(worker_id, cfg, workload, allocations, self.feedback_actor, error_queue, queue_lock, shared_states,
+                                                  sample_ring, aggregator))
+
+    def create_host_aggregator(self, host):
+        return self.createActor(HostAggregatorActor, targetActorRequirements=self._requirements(host))
+
+    def start_host_aggregator(self, aggregator, host, cfg, workers):
+        self.send(aggregator, StartHostAggregator(host, cfg, workers))
 
     def start_feedbackActor(self, shared_states):
         self.send(
@@ -773,6 +891,153 @@ def load_local_config(coordinator_config):
     return cfg
 
 
+COORDINATION_MODES = ["direct", "aggregated"]
+
+
+class HostAggregatorActor(actor.BenchmarkActor):
+    """
+    Runs on a load generator host and stands between all workers on that host and the master. This is actually only a thin actor
+    wrapper layer around ``HostAggregator`` which does the actual work.
+    """
+
+    WAKEUP_INTERVAL_SECONDS = 5
+
+    def __init__(self):
+        super().__init__()
+        self.coordinator = None
+        self.aggregator = None
+        self.workers = {}
+        self.wakeup_interval = HostAggregatorActor.WAKEUP_INTERVAL_SECONDS
+        # messages of workers that have arrived before the aggregator has been started
+        self.pending = []
+
+    @actor.no_retry("host aggregator")  # pylint: disable=no-value-for-parameter
+    def receiveMsg_StartHostAggregator(self, msg, sender):
+        self.logger.info("Host aggregator on [%s] is about to start for [%d] workers.", msg.host, len(msg.workers))
+        self.coordinator = sender
+        self.workers = msg.workers
+        cfg = load_local_config(msg.config)
+        # we need to wake up more often in test mode
+        if cfg.opts("workload", "test.mode.enabled"):
+            self.wakeup_interval = 0.5
+        self.aggregator = HostAggregator(self, msg.host, list(msg.workers.keys()))
+        pending = self.pending
+        self.pending = []
+        for pending_msg, pending_sender in pending:
+            self.receiveMessage(pending_msg, pending_sender)
+        self.wakeupAfter(datetime.timedelta(seconds=self.wakeup_interval))
+
+    @actor.no_retry("host aggregator")  # pylint: disable=no-value-for-parameter
+    def receiveMsg_UpdateSamples(self, msg, sender):
+        if self.aggregator is None:
+            self.pending.append((msg, sender))
+        else:
+            self.aggregator.update_samples(msg.samples, msg.profile_samples)
+
+    @actor.no_retry("host aggregator")  # pylint: disable=no-value-for-parameter
+    def receiveMsg_UpdateWorkerMetrics(self, msg, sender):
+        if self.aggregator is None:
+            self.pending.append((msg, sender))
+        else:
+            self.aggregator.update_worker_metrics(msg.worker_id, msg.metrics)
+
+    @actor.no_retry("host aggregator")  # pylint: disable=no-value-for-parameter
+    def receiveMsg_JoinPointReached(self, msg, sender):
+        if self.aggregator is None:
+            self.pending.append((msg, sender))
+        else:
+            self.aggregator.joinpoint_reached(msg.worker_id, msg.task)
+
+    @actor.no_retry("host aggregator")  # pylint: disable=no-value-for-parameter
+    def receiveMsg_Drive(self, msg, sender):
+        for worker in self.workers.values():
+            self.send(worker, msg)
+
+    @actor.no_retry("host aggregator")  # pylint: disable=no-value-for-parameter
+    def receiveMsg_CompleteCurrentTask(self, msg, sender):
+        for worker in self.workers.values():
+            self.send(worker, msg)
+
+    @actor.no_retry("host aggregator")  # pylint: disable=no-value-for-parameter
+    def receiveMsg_WakeupMessage(self, msg, sender):
+        self.aggregator.flush()
+        self.wakeupAfter(datetime.timedelta(seconds=self.wakeup_interval))
+
+    def receiveMsg_BenchmarkFailure(self, msg, sender):
+        # sent by our workers or our no_retry infrastructure; forward to master
+        self.send(self.coordinator, msg)
+
+    def receiveMsg_BenchmarkCancelled(self, msg, sender):
+        self.send(self.coordinator, msg)
+
+    def receiveMsg_PoisonMessage(self, poisonmsg, sender):
+        self.logger.error("Host aggregator received a fatal indication from a load generator (%s). Shutting down.", poisonmsg.details)
+        self.send(self.coordinator, actor.BenchmarkFailure("Fatal load generator indication", poisonmsg.details))
+
+    def receiveMsg_ActorExitRequest(self, msg, sender):
+        self.logger.info("Host aggregator has received ActorExitRequest.")
+
+    def receiveUnrecognizedMessage(self, msg, sender):
+        self.logger.info("Host aggregator received unknown message [%s] (ignoring).", str(msg))
+
+    def on_aggregated_samples(self, host, aggregate, profile_samples, worker_metrics):
+        self.send(self.coordinator, UpdateAggregatedSamples(host, aggregate, profile_samples, worker_metrics))
+
+    def on_joinpoint_reached(self, host, worker_ids, task_allocations):
+        self.send(self.coordinator, HostJoinPointReached(host, worker_ids, task_allocations))
+
+
+class HostAggregator:
+    def __init__(self, target, host, worker_ids):
+        """
+        Pre-reduces the samples of all workers on one load generator host and acts as a barrier for their join points so the master
+        receives only aggregates and usually only one message per host and join point. Like ``WorkerCoordinator`` it does not know
+        anything about actors but notifies a ``target`` instead.
+
+        :param target: A target that will be notified of important events.
+        :param host: The load generator host.
+        :param worker_ids: The ids of all workers on this host.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.target = target
+        self.host = host
+        self.worker_ids = worker_ids
+        self.aggregate = SampleAggregate()
+        self.profile_samples = []
+        self.worker_metrics = {}
+        self.arrived = []
+
+    def update_samples(self, samples, profile_samples):
+        if len(samples) > 0:
+            self.aggregate.add(samples)
+        if len(profile_samples) > 0:
+            self.profile_samples += profile_samples
+
+    def update_worker_metrics(self, worker_id, worker_metrics):
+        if worker_metrics:
+            self.worker_metrics.setdefault(worker_id, []).extend(worker_metrics)
+
+    def flush(self):
+        if len(self.aggregate) == 0 and not self.profile_samples and not self.worker_metrics:
+            return
+        self.target.on_aggregated_samples(self.host, self.aggregate, self.profile_samples, self.worker_metrics)
+        self.aggregate = SampleAggregate()
+        self.profile_samples = []
+        self.worker_metrics = {}
+
+    def joinpoint_reached(self, worker_id, task_allocations):
+        self.arrived.append(worker_id)
+        # The master needs to know early when tasks that complete their parent structure are done so it can tell all others to
+        # complete as well. Otherwise, workers on this host might wait for each other forever.
+        completes_parent = any(a.task.preceding_task_completes_parent for a in task_allocations)
+        if completes_parent or len(self.arrived) == len(self.worker_ids):
+            self.logger.info("[%d/%d] workers on [%s] reached join point.", len(self.arrived), len(self.worker_ids), self.host)
+            # all samples until the join point need to be with the master before it post-processes them
+            self.flush()
+            self.target.on_joinpoint_reached(self.host, self.arrived, task_allocations)
+            self.arrived = []
+
+
 class TaskExecutionActor(actor.BenchmarkActor):
     """
     This class should be used for long-running tasks, as it ensures they do not block the actor's messaging system
@@ -961,7 +1226,14 @@ class WorkerCoordinator:
         self.raw_samples = []
         self.raw_profile_samples = []
         self.most_recent_sample_per_client = {}
+        # worker id -> SharedSampleReader for workers on the same host as the coordinator
+        self.sample_readers = {}
+        # host -> address of its HostAggregatorActor if samples are pre-aggregated per load generator host
+        self.aggregators = {}
+        self.workers_per_host = {}
+        self.raw_aggregates = []
         self.sample_post_processor = None
+        self.aggregated_sample_post_processor = None
         self.profile_metrics_post_processor = None
 
         self.number_of_steps = 0
@@ -1081,6 +1353,9 @@ class WorkerCoordinator:
                                                          downsample_factor,
                                                          self.workload.meta_data,
                                                          self.test_procedure.meta_data)
+        self.aggregated_sample_post_processor = AggregatedSamplePostprocessor(self.metrics_store,
+                                                                              self.workload.meta_data,
+                                                                              self.test_procedure.meta_data)
 
         os_clients = self.create_os_clients()
 
@@ -1163,18 +1438,33 @@ class WorkerCoordinator:
         if allocator.clients < 128:
             self.logger.info("Allocation matrix:\n%s", "\n".join([str(a) for a in self.allocations]))
 
+        coordination = self.config.opts("worker_coordinator", "coordination", mandatory=False, default_value="direct")
+        if coordination not in COORDINATION_MODES:
+            raise exceptions.SystemSetupError("Unknown worker coordination mode [{}]. Use one of {}.".format(coordination, COORDINATION_MODES))
+        if coordination == "aggregated" and not isinstance(self.metrics_store, metrics.InMemoryMetricsStore):
+            # Other metrics stores would need to expand histograms into individual docs which loses timestamps and meta-data.
+            raise exceptions.SystemSetupError("Worker coordination mode [aggregated] requires the in-memory metrics store. Please use "
+                                              "[direct] coordination or do not configure an OpenSearch metrics store.")
         worker_assignments = calculate_worker_assignments(self.worker_ips, allocator.clients)
         worker_id = 0
         # redline testing: keep track of the total number of workers
         # and report this to the feedbackActor before starting a redline test
         for assignment in worker_assignments:
             host = assignment["host"]
+            aggregator = None
+            if coordination == "aggregated" and any(len(clients) > 0 for clients in assignment["workers"]):
+                self.logger.info("Allocating host aggregator on [%s].", host)
+                aggregator = self.target.create_host_aggregator(host)
+                self.aggregators[host] = aggregator
+                self.workers_per_host[host] = []
             for clients in assignment["workers"]:
                 # don't assign workers without any clients
                 if len(clients) > 0:
                     self.logger.info("Allocating worker [%d] on [%s] with [%d] clients.", worker_id, host, len(clients))
                     worker = self.target.create_client(host)
 
+                    # samples of pre-aggregating hosts are sent to their aggregator instead
+                    sample_ring = self.create_sample_ring(host, worker_id) if aggregator is None else None
                     client_allocations = ClientAllocations()
                     for client_id in clients:
                         client_allocations.add(client_id, self.allocations[client_id])
@@ -1186,11 +1476,18 @@ class WorkerCoordinator:
                             self.shared_client_dict[worker_id][client_id] = False
                         # and send it along with the start_worker message. This way, the worker can pass it down to its assigned clients
                         self.target.start_worker(worker, worker_id, self.config, self.workload, client_allocations,
-                                                 self.error_queue, self.queue_lock, shared_states=self.shared_client_dict[worker_id])
+                                                 self.error_queue, self.queue_lock, shared_states=self.shared_client_dict[worker_id],
+                                                 sample_ring=sample_ring, aggregator=aggregator)
                     else:
-                        self.target.start_worker(worker, worker_id, self.config, self.workload, client_allocations)
+                        self.target.start_worker(worker, worker_id, self.config, self.workload, client_allocations, sample_ring=sample_ring,
+                                                 aggregator=aggregator)
                     self.workers.append(worker)
+                    if aggregator is not None:
+                        self.workers_per_host[host].append(worker_id)
                     worker_id += 1
+            if aggregator is not None:
+                self.target.start_host_aggregator(aggregator, host, self.config,
+                                                  {wid: self.workers[wid] for wid in self.workers_per_host[host]})
         if redline_enabled:
             metrics_index = None
             test_run_id = None
@@ -1228,8 +1525,17 @@ class WorkerCoordinator:
         self.update_progress_message()
 
     def joinpoint_reached(self, worker_id, worker_local_timestamp, task_allocations):
-        self.currently_completed += 1
-        self.workers_completed_current_step[worker_id] = (worker_local_timestamp, time.perf_counter())
+        self.joinpoints_reached({worker_id: worker_local_timestamp}, task_allocations)
+
+    def host_joinpoint_reached(self, worker_ids, host_timestamp, task_allocations):
+        # all workers on a host share its clock
+        self.joinpoints_reached({worker_id: host_timestamp for worker_id in worker_ids}, task_allocations)
+
+    def joinpoints_reached(self, worker_local_timestamps, task_allocations):
+        master_received_msg_at = time.perf_counter()
+        for worker_id, worker_local_timestamp in worker_local_timestamps.items():
+            self.currently_completed += 1
+            self.workers_completed_current_step[worker_id] = (worker_local_timestamp, master_received_msg_at)
         self.logger.info("[%d/%d] workers reached join point [%d/%d].",
                          self.currently_completed, len(self.workers), self.current_step + 1, self.number_of_steps)
         # if we're in redline test mode, disable the feedback actor and pause all clients when we're at a joinpoint
@@ -1260,6 +1566,7 @@ class WorkerCoordinator:
                 m = self.metrics_store.to_externalizable(clear=True)
                 self.logger.debug("Closing metrics store...")
                 self.metrics_store.close()
+                self.release_sample_rings()
                 # immediately clear as we don't need it anymore and it can consume a significant amount of memory
                 self.metrics_store = None
                 self.logger.debug("Sending benchmark results...")
@@ -1289,6 +1596,15 @@ class WorkerCoordinator:
         # Using a perf_counter here is fine also in the distributed case as we subtract it from `master_received_msg_at` making it
         # a relative instead of an absolute value.
         start_next_task = time.perf_counter() + waiting_period
+        if self.aggregators:
+            # workers on the same host share its clock so their aggregator can tell all of them at once
+            for host, aggregator in self.aggregators.items():
+                host_ended_task_at, master_received_msg_at = workers_curr_step[self.workers_per_host[host][0]]
+                host_start_timestamp = host_ended_task_at + (start_next_task - master_received_msg_at)
+                self.logger.info("Scheduling next task for workers on [%s] at their timestamp [%f] (master timestamp [%f])",
+                                 host, host_start_timestamp, start_next_task)
+                self.target.drive_at(aggregator, host_start_timestamp)
+            return
         for worker_id, worker in enumerate(self.workers):
             worker_ended_task_at, master_received_msg_at = workers_curr_step[worker_id]
             worker_start_timestamp = worker_ended_task_at + (start_next_task - master_received_msg_at)
@@ -1320,7 +1636,8 @@ class WorkerCoordinator:
                 # Hence we need to memorize whether we have already sent it for the current step.
                 self.complete_current_task_sent = True
                 self.logger.info("All affected clients have finished. Notifying all clients to complete their current tasks.")
-                for worker in self.workers:
+                # aggregators notify all workers on their host
+                for worker in self.aggregators.values() if self.aggregators else self.workers:
                     self.target.complete_current_task(worker)
             else:
                 if len(pending_client_ids) > 32:
@@ -1339,13 +1656,65 @@ class WorkerCoordinator:
         self.progress_publisher.finish()
         if self.metrics_store and self.metrics_store.opened:
             self.metrics_store.close()
+        self.release_sample_rings()
+
+    def create_sample_ring(self, host, worker_id):
+        """
+        Creates a shared memory sample ring for a worker if it runs on the same host as the coordinator and the shared memory
+        transport is enabled.
+
+        :return: The name of the ring or ``None`` if samples should be sent as regular messages.
+        """
+        if host != "localhost" or not convert.to_bool(self.config.opts("reporting", "sample.transport.shared.memory",
+                                                                       mandatory=False, default_value=False)):
+            return None
+        capacity = int(self.config.opts("reporting", "sample.transport.ring.size", mandatory=False, default_value=1 << 16))
+        try:
+            ring = SharedSampleRing.create(capacity)
+        except OSError:
+            self.logger.exception("Could not create shared memory sample ring for worker [%d]. Falling back to messages.", worker_id)
+            return None
+        self.sample_readers[worker_id] = SharedSampleReader(ring)
+        return ring.name
+
+    def release_sample_rings(self):
+        for reader in self.sample_readers.values():
+            reader.close()
+        self.sample_readers = {}
 
     def update_samples(self, samples):
         if len(samples) > 0:
-            self.raw_samples += samples
-            # We need to check all samples, they will be from different clients
-            for s in samples:
-                self.most_recent_sample_per_client[s.client_id] = s
+            if isinstance(samples, SampleBatch):
+                self.raw_samples.append(samples)
+                self.most_recent_sample_per_client.update(samples.most_recent_per_client())
+            else:
+                self.raw_samples += samples
+                # We need to check all samples, they will be from different clients
+                for s in samples:
+                    self.most_recent_sample_per_client[s.client_id] = s
+
+    def update_worker_metrics(self, worker_id, worker_metrics):
+        if self.metrics_store is None or not worker_metrics:
+            return
+        meta_data = {"worker_id": worker_id}
+        metrics_per_name = collections.defaultdict(list)
+        for name, unit, task, sample_type, absolute_time, value in worker_metrics:
+            metrics_per_name[(name, unit, task, sample_type)].append((absolute_time, value))
+        for (name, unit, task, sample_type), values in metrics_per_name.items():
+            self.metrics_store.put_values_bulk(name=name, values=[value for _, value in values], unit=unit, task=task,
+                                               sample_types=sample_type, absolute_times=[absolute_time for absolute_time, _ in values],
+                                               meta_data=meta_data)
+
+    def update_aggregated_samples(self, aggregate, profile_samples, worker_metrics):
+        if len(aggregate) > 0:
+            self.raw_aggregates.append(aggregate)
+            self.most_recent_sample_per_client.update(aggregate.most_recent_per_client)
+        self.update_profile_samples(profile_samples)
+        for worker_id, metrics_of_worker in worker_metrics.items():
+            self.update_worker_metrics(worker_id, metrics_of_worker)
+
+    def update_shared_samples(self, msg):
+        self.update_samples(self.sample_readers[msg.client_id].read(msg))
 
     def update_profile_samples(self, profile_samples):
         if len(profile_samples) > 0:
@@ -1384,6 +1753,10 @@ class WorkerCoordinator:
         raw_samples = self.raw_samples
         self.raw_samples = []
         self.sample_post_processor(raw_samples)
+        aggregates = self.raw_aggregates
+        self.raw_aggregates = []
+        if len(aggregates) > 0:
+            self.aggregated_sample_post_processor(aggregates)
         profile_samples = self.raw_profile_samples
         self.raw_profile_samples = []
         if len(profile_samples) > 0:
@@ -1413,125 +1786,132 @@ class SamplePostprocessor():
 
 class DefaultSamplePostprocessor(SamplePostprocessor):
     """
-    Processes operational and correctness metric samples by merging and adding to the metrics store
+    Processes operational and correctness metric samples by merging and adding to the metrics store. Samples are grouped per task
+    and each metric of a task is stored with a single bulk call.
     """
+    RECALL_METRIC_NAMES = [
+        "recall@k", "recall@1",
+        "recall@max_distance", "recall@max_distance_1",
+        "recall@min_score", "recall@min_score_1",
+    ]
+    # request meta-data that are stored as metrics of their own (name -> unit)
+    REQUEST_META_DATA_METRICS = {
+        **dict.fromkeys(RECALL_METRIC_NAMES, ""),
+        "bulk_size": "docs",
+        "queueing_delay": "ms",
+        "dropped_arrivals": "ops",
+        "late_arrivals": "ops",
+    }
+
     def __init__(self, metrics_store, downsample_factor, workload_meta_data, test_procedure_meta_data):
         super().__init__(metrics_store, workload_meta_data, test_procedure_meta_data)
         self.throughput_calculator = ThroughputCalculator()
         self.downsample_factor = downsample_factor
+        self.task_meta_data = {}
+
+    def static_meta_data(self, task):
+        """
+        :return: The merged workload, test procedure, operation and task meta-data for the given task. These never change during a
+                 benchmark so they are merged only once per task.
+        """
+        meta_data = self.task_meta_data.get(task)
+        if meta_data is None:
+            meta_data = self.merge(
+                self.workload_meta_data,
+                self.test_procedure_meta_data,
+                task.operation.meta_data,
+                task.meta_data)
+            self.task_meta_data[task] = meta_data
+        return meta_data
+
+    def _merged_meta_data(self, batch, static_meta_data, merged_meta_data, meta_data_ids):
+        result = []
+        for meta_data_id in meta_data_ids:
+            meta_data = merged_meta_data.get(meta_data_id)
+            if meta_data is None:
+                request_meta_data = batch.meta_data[meta_data_id]
+                meta_data = self.merge(static_meta_data, request_meta_data) if request_meta_data else static_meta_data
+                merged_meta_data[meta_data_id] = meta_data
+            result.append(meta_data)
+        return result
+
+    def _put_request_metric(self, batch, task, name, unit, indices, values, sample_types, relative_times, merged_meta_data):
+        rows = batch.rows
+        self.metrics_store.put_values_bulk(name=name, values=values, unit=unit, task=task.name,
+                                           operation=task.operation.name, operation_type=task.operation.type,
+                                           sample_types=sample_types[indices].tolist(),
+                                           absolute_times=rows["absolute_time"][indices].tolist(),
+                                           relative_times=relative_times[indices].tolist(),
+                                           meta_data=self._merged_meta_data(batch, self.static_meta_data(task), merged_meta_data,
+                                                                            rows["meta_data"][indices].tolist()))
 
     def __call__(self, raw_samples):
         if len(raw_samples) == 0:
             return
         total_start = time.perf_counter()
         start = total_start
-        final_sample_count = 0
-        for idx, sample in enumerate(raw_samples):
-            self.logger.debug(
-                "All sample meta data: [%s],[%s],[%s],[%s],[%s]",
-                self.workload_meta_data,
-                self.test_procedure_meta_data,
-                sample.operation_meta_data,
-                sample.task.meta_data,
-                sample.request_meta_data,
-            )
-
-            # if request_meta_data exists then it will have {"success": true/false} as a parameter.
-            if sample.request_meta_data and len(sample.request_meta_data) > 1:
-                self.logger.debug("Found: %s", sample.request_meta_data)
-
-                recall_metric_names = [
-                    "recall@k", "recall@1",
-                    "recall@max_distance", "recall@max_distance_1",
-                    "recall@min_score", "recall@min_score_1",
-                ]
-
-                for recall_metric_name in recall_metric_names:
-                    if recall_metric_name in sample.request_meta_data:
-                        meta_data = self.merge(
-                            self.workload_meta_data,
-                            self.test_procedure_meta_data,
-                            sample.operation_meta_data,
-                            sample.task.meta_data,
-                            sample.request_meta_data,
-                        )
-
-                        self.metrics_store.put_value_cluster_level(
-                            name=recall_metric_name,
-                            value=sample.request_meta_data[recall_metric_name],
-                            unit="",
-                            task=sample.task.name,
-                            operation=sample.operation_name,
-                            operation_type=sample.operation_type,
-                            sample_type=sample.sample_type,
-                            absolute_time=sample.absolute_time,
-                            relative_time=sample.relative_time,
-                            meta_data=meta_data,
-                        )
-
-            if idx % self.downsample_factor == 0:
-                final_sample_count += 1
-                meta_data = self.merge(
-                    self.workload_meta_data,
-                    self.test_procedure_meta_data,
-                    sample.operation_meta_data,
-                    sample.task.meta_data,
-                    sample.request_meta_data)
-
-                self.metrics_store.put_value_cluster_level(name="latency", value=convert.seconds_to_ms(sample.latency),
-                                                           unit="ms", task=sample.task.name,
-                                                           operation=sample.operation_name, operation_type=sample.operation_type,
-                                                           sample_type=sample.sample_type, absolute_time=sample.absolute_time,
-                                                           relative_time=sample.relative_time, meta_data=meta_data)
-
-                self.metrics_store.put_value_cluster_level(name="service_time", value=convert.seconds_to_ms(sample.service_time),
-                                                           unit="ms", task=sample.task.name,
-                                                           operation=sample.operation_name, operation_type=sample.operation_type,
-                                                           sample_type=sample.sample_type, absolute_time=sample.absolute_time,
-                                                           relative_time=sample.relative_time, meta_data=meta_data)
-
-                self.metrics_store.put_value_cluster_level(name="client_processing_time",
-                                                           value=convert.seconds_to_ms(sample.client_processing_time),
-                                                           unit="ms", task=sample.task.name,
-                                                           operation=sample.operation_name, operation_type=sample.operation_type,
-                                                           sample_type=sample.sample_type, absolute_time=sample.absolute_time,
-                                                           relative_time=sample.relative_time, meta_data=meta_data)
-
-                self.metrics_store.put_value_cluster_level(name="processing_time", value=convert.seconds_to_ms(sample.processing_time),
-                                                           unit="ms", task=sample.task.name,
-                                                           operation=sample.operation_name, operation_type=sample.operation_type,
-                                                           sample_type=sample.sample_type, absolute_time=sample.absolute_time,
-                                                           relative_time=sample.relative_time, meta_data=meta_data)
-
-                for timing in sample.dependent_timings:
-                    self.metrics_store.put_value_cluster_level(name="service_time", value=convert.seconds_to_ms(timing.service_time),
-                                                               unit="ms", task=timing.task.name,
-                                                               operation=timing.operation_name, operation_type=timing.operation_type,
-                                                               sample_type=timing.sample_type, absolute_time=timing.absolute_time,
-                                                               relative_time=timing.relative_time, meta_data=meta_data)
+        batch = SampleBatch.of(raw_samples)
+        rows = batch.rows
+        sample_count = len(rows)
+
+        tasks, task_id_per_sample = batch.tasks()
+
+        # if request_meta_data exists then it will have {"success": true/false} as a parameter.
+        metrics_per_meta_data = [
+            [name for name in DefaultSamplePostprocessor.REQUEST_META_DATA_METRICS if name in request_meta_data]
+            if request_meta_data and len(request_meta_data) > 1 else []
+            for request_meta_data in batch.meta_data
+        ]
+        # per sample whether its request meta-data contain the metric; only for metrics that occur in this batch
+        has_metric_per_sample = {}
+        for metric_name in DefaultSamplePostprocessor.REQUEST_META_DATA_METRICS:
+            has_metric = np.array([metric_name in names for names in metrics_per_meta_data], dtype=bool)
+            if has_metric.any():
+                has_metric_per_sample[metric_name] = has_metric[rows["meta_data"]]
+        downsampled = np.arange(sample_count) % self.downsample_factor == 0
+        final_sample_count = int(np.count_nonzero(downsampled))
+        relative_times = batch.relative_time
+        sample_types = np.array(_SAMPLE_TYPES, dtype=object)[rows["sample_type"]]
+
+        for task_id, task in enumerate(tasks):
+            in_task = task_id_per_sample == task_id
+            static_meta_data = self.static_meta_data(task)
+            self.logger.debug("All static sample meta data for task [%s]: [%s]", task, static_meta_data)
+            # request meta-data are merged once per distinct request meta-data dict
+            merged_meta_data = {}
+
+            for metric_name, has_metric in has_metric_per_sample.items():
+                metric_unit = DefaultSamplePostprocessor.REQUEST_META_DATA_METRICS[metric_name]
+                indices = np.flatnonzero(in_task & has_metric)
+                if len(indices) > 0:
+                    values = [batch.meta_data[meta_data_id][metric_name] for meta_data_id in rows["meta_data"][indices].tolist()]
+                    self._put_request_metric(batch, task, metric_name, metric_unit, indices, values, sample_types, relative_times,
+                                             merged_meta_data)
+
+            indices = np.flatnonzero(in_task & downsampled)
+            if len(indices) == 0:
+                continue
+            # convert all request metrics at once instead of once per sample
+            for name in ["latency", "service_time", "client_processing_time", "processing_time"]:
+                self._put_request_metric(batch, task, name, "ms", indices, (rows[name][indices] * 1000).tolist(), sample_types,
+                                         relative_times, merged_meta_data)
+
+            dependent = [(idx, timing) for idx in indices.tolist() for timing in batch.dependent_timings.get(idx, [])]
+            if dependent:
+                self.metrics_store.put_values_bulk(
+                    name="service_time",
+                    values=[convert.seconds_to_ms(timing["service_time"]) for _, timing in dependent],
+                    unit="ms", task=task.name, operation=task.operation.name, operation_type=task.operation.type,
+                    sample_types=[sample_types[idx] for idx, _ in dependent],
+                    absolute_times=[timing["absolute_time"] for _, timing in dependent],
+                    relative_times=[timing["request_start"] - float(rows["task_start"][idx]) for idx, timing in dependent],
+                    meta_data=self._merged_meta_data(batch, static_meta_data, merged_meta_data,
+                                                     [int(rows["meta_data"][idx]) for idx, _ in dependent]))
 
         end = time.perf_counter()
         self.logger.debug("Storing latency and service time took [%f] seconds.", (end - start))
-        start = end
-        aggregates = self.throughput_calculator.calculate(raw_samples)
-        end = time.perf_counter()
-        self.logger.debug("Calculating throughput took [%f] seconds.", (end - start))
-        start = end
-        for task, samples in aggregates.items():
-            meta_data = self.merge(
-                self.workload_meta_data,
-                self.test_procedure_meta_data,
-                task.operation.meta_data,
-                task.meta_data
-            )
-            for absolute_time, relative_time, sample_type, throughput, throughput_unit in samples:
-                self.metrics_store.put_value_cluster_level(name="throughput", value=throughput, unit=throughput_unit, task=task.name,
-                                                           operation=task.operation.name, operation_type=task.operation.type,
-                                                           sample_type=sample_type, absolute_time=absolute_time,
-                                                           relative_time=relative_time, meta_data=meta_data)
-        end = time.perf_counter()
-        self.logger.debug("Storing throughput took [%f] seconds.", (end - start))
-        start = end
+        self.put_throughput(batch)
+        start = time.perf_counter()
         # this will be a noop for the in-memory metrics store. If we use an ES metrics store however, this will ensure that we already send
         # the data and also clear the in-memory buffer. This allows users to see data already while running the benchmark. In cases where
         # it does not matter (i.e. in-memory) we will still defer this step until the end.
@@ -1542,7 +1922,58 @@ class DefaultSamplePostprocessor(SamplePostprocessor):
         end = time.perf_counter()
         self.logger.debug("Flushing the metrics store took [%f] seconds.", (end - start))
         self.logger.debug("Postprocessing [%d] raw samples (downsampled to [%d] samples) took [%f] seconds in total.",
-                          len(raw_samples), final_sample_count, (end - total_start))
+                          len(batch), final_sample_count, (end - total_start))
+
+    def put_throughput(self, batch):
+        start = time.perf_counter()
+        aggregates = self.throughput_calculator.calculate(batch)
+        end = time.perf_counter()
+        self.logger.debug("Calculating throughput took [%f] seconds.", (end - start))
+        start = end
+        for task, samples in aggregates.items():
+            samples_per_unit = {}
+            for absolute_time, relative_time, sample_type, throughput, throughput_unit in samples:
+                samples_per_unit.setdefault(throughput_unit, []).append((absolute_time, relative_time, sample_type, throughput))
+            for throughput_unit, unit_samples in samples_per_unit.items():
+                absolute_times, relative_times, sample_types, throughputs = zip(*unit_samples)
+                self.metrics_store.put_values_bulk(name="throughput", values=list(throughputs), unit=throughput_unit, task=task.name,
+                                                   operation=task.operation.name, operation_type=task.operation.type,
+                                                   sample_types=list(sample_types), absolute_times=list(absolute_times),
+                                                   relative_times=list(relative_times), meta_data=self.static_meta_data(task))
+        end = time.perf_counter()
+        self.logger.debug("Storing throughput took [%f] seconds.", (end - start))
+
+
+class AggregatedSamplePostprocessor(DefaultSamplePostprocessor):
+    """
+    Processes samples that have already been pre-reduced to ``SampleAggregate`` instances on load generator hosts. Request metrics are
+    stored as histograms and throughput is calculated from the reduced samples.
+    """
+    def __init__(self, metrics_store, workload_meta_data, test_procedure_meta_data):
+        super().__init__(metrics_store, 1, workload_meta_data, test_procedure_meta_data)
+
+    def __call__(self, aggregates):
+        if len(aggregates) == 0:
+            return
+        total_start = time.perf_counter()
+        for aggregate in aggregates:
+            for (task, sample_type), summary in aggregate.summaries.items():
+                for name, histogram in summary.histograms.items():
+                    self.metrics_store.put_histogram(name=name, histogram=histogram,
+                                                     unit=DefaultSamplePostprocessor.REQUEST_META_DATA_METRICS.get(name, "ms"),
+                                                     task=task.name, operation=task.operation.name, operation_type=task.operation.type,
+                                                     sample_type=sample_type, absolute_time=summary.absolute_time,
+                                                     relative_time=summary.relative_time, meta_data=self.static_meta_data(task),
+                                                     error_count=summary.error_count)
+        end = time.perf_counter()
+        self.logger.debug("Storing request metric histograms took [%f] seconds.", (end - total_start))
+        self.put_throughput(SampleBatch.concatenate([aggregate.throughput_samples for aggregate in aggregates]))
+        start = time.perf_counter()
+        self.metrics_store.flush(refresh=False)
+        end = time.perf_counter()
+        self.logger.debug("Flushing the metrics store took [%f] seconds.", (end - start))
+        self.logger.debug("Postprocessing [%d] aggregates of [%d] samples took [%f] seconds in total.",
+                          len(aggregates), sum(len(aggregate) for aggregate in aggregates), (end - total_start))
 
 
 class ProfileMetricsSamplePostprocessor(SamplePostprocessor):
@@ -1714,11 +2145,17 @@ class Worker(actor.BenchmarkActor):
         self.feedback_actor = None
         self.error_queue = None
         self.queue_lock = None
+        self.sample_writer = None
+        # the event loop and clients are reused across all tasks of this worker
+        self.runtime = None
+        # names of the tasks that this worker executes at the moment; driver health metrics are attributed to them
+        self.current_task_names = []
+        self.reported_dropped_samples = 0
 
     @actor.no_retry("worker")  # pylint: disable=no-value-for-parameter
     def receiveMsg_StartWorker(self, msg, sender):
         self.logger.info("Worker[%d] is about to start.", msg.worker_id)
-        self.master = sender
+        self.master = msg.aggregator if msg.aggregator is not None else sender
         self.worker_id = msg.worker_id
         self.config = load_local_config(msg.config)
         self.on_error = self.config.opts("worker_coordinator", "on.error")
@@ -1732,6 +2169,13 @@ class Worker(actor.BenchmarkActor):
         self.shared_states = msg.shared_states
         self.error_queue = msg.error_queue
         self.queue_lock = msg.queue_lock
+        self.runtime = AsyncIoRuntime(self.config)
+        if msg.sample_ring:
+            try:
+                self.sample_writer = SharedSampleWriter(SharedSampleRing.attach(msg.sample_ring))
+            except OSError:
+                # e.g. the coordinator is on a different host after all
+                self.logger.warning("Worker[%d] cannot attach to sample ring [%s]. Sending samples as messages.", self.worker_id, msg.sample_ring)
         # we need to wake up more often in test mode
         if self.config.opts("workload", "test.mode.enabled"):
             self.wakeup_interval = 0.5
@@ -1822,7 +2266,14 @@ class Worker(actor.BenchmarkActor):
         self.logger.info("Worker[%s] has received ActorExitRequest.", str(self.worker_id))
         if self.executor_future is not None and self.executor_future.running():
             self.cancel.set()
+        if self.runtime is not None:
+            # the runtime must be closed on the thread that runs it
+            self.pool.submit(self.runtime.close)
+            self.runtime = None
         self.pool.shutdown()
+        if self.sample_writer:
+            self.sample_writer.close()
+            self.sample_writer = None
         self.logger.info("Worker[%s] is exiting due to ActorExitRequest.", str(self.worker_id))
 
     def receiveMsg_BenchmarkFailure(self, msg, sender):
@@ -1857,10 +2308,13 @@ class Worker(actor.BenchmarkActor):
                                  "tasks until next join point.", self.worker_id, self.current_task_index)
             else:
                 self.logger.info("Worker[%d] is executing tasks at index [%d].", self.worker_id, self.current_task_index)
+                self.current_task_names = sorted({allocation.task.name for _, allocation in task_allocations})
+                self.reported_dropped_samples = 0
                 self.sampler = DefaultSampler(start_timestamp=time.perf_counter(), buffer_size=self.sample_queue_size)
                 self.profile_sampler = ProfileMetricsSampler(start_timestamp=time.perf_counter(), buffer_size=self.sample_queue_size)
                 executor = AsyncIoAdapter(self.config, self.workload, task_allocations, self.sampler, self.profile_sampler,
-                                          self.cancel, self.complete, self.on_error, self.shared_states, self.feedback_actor, self.error_queue, self.queue_lock)
+                                          self.cancel, self.complete, self.on_error, self.shared_states, self.feedback_actor, self.error_queue, self.queue_lock,
+                                          runtime=self.runtime)
 
                 self.executor_future = self.pool.submit(executor)
                 self.wakeupAfter(datetime.timedelta(seconds=self.wakeup_interval))
@@ -1876,14 +2330,30 @@ class Worker(actor.BenchmarkActor):
         return current
 
     def send_samples(self):
+        self.send_worker_metrics()
         if self.sampler:
             samples = self.sampler.samples
             if len(samples) > 0:
-                self.send(self.master, UpdateSamples(self.worker_id, samples, self.profile_sampler.samples))
+                profile_samples = self.profile_sampler.samples
+                msg = self.sample_writer.write(self.worker_id, samples, profile_samples) if self.sample_writer else None
+                if msg is None:
+                    msg = UpdateSamples(self.worker_id, samples, profile_samples)
+                self.send(self.master, msg)
             return samples
         return None
 
 
+    def send_worker_metrics(self):
+        if self.runtime is not None and self.current_task_names:
+            dropped_samples = 0
+            if self.sampler:
+                dropped_samples = self.sampler.dropped - self.reported_dropped_samples
+                self.reported_dropped_samples = self.sampler.dropped
+            worker_metrics = self.runtime.driver_health.drain(self.current_task_names, dropped_samples)
+            if worker_metrics:
+                self.send(self.master, UpdateWorkerMetrics(self.worker_id, worker_metrics))
+
+
 class Sampler:
     """
     Encapsulates management of gathered samples.
@@ -1907,18 +2377,39 @@ class Sampler:
 class DefaultSampler(Sampler):
     """
     Encapsulates management of gathered default samples (operational and correctness metrics).
+
+    Samples are recorded into a columnar ``SampleBuffer`` instead of creating one ``DefaultSample`` object per request. Retrieving
+    samples swaps the buffer and returns its contents as a ``SampleBatch``.
     """
 
+    def __init__(self, start_timestamp, buffer_size=16384):
+        # pylint: disable=super-init-not-called
+        self.start_timestamp = start_timestamp
+        self.buffer_size = buffer_size
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._buffer = SampleBuffer(buffer_size)
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def samples(self):
+        with self._lock:
+            buffer = self._buffer
+            self._buffer = SampleBuffer(self.buffer_size)
+        return buffer.to_batch()
+
     def add(self, task, client_id, sample_type, meta_data, absolute_time, request_start, latency, service_time,
             client_processing_time, processing_time, throughput, ops, ops_unit, time_period, task_progress,
             dependent_timing=None):
-        try:
-            self.q.put_nowait(
-                DefaultSample(client_id, absolute_time, request_start, self.start_timestamp, task, sample_type, meta_data,
-                       latency, service_time, client_processing_time, processing_time, throughput, ops, ops_unit, time_period,
-                       task_progress, dependent_timing))
-        except queue.Full:
-            self.logger.warning("Dropping sample for [%s] due to a full sampling queue.", task.operation.name)
+        with self._lock:
+            if not self._buffer.add(client_id, absolute_time, request_start, self.start_timestamp, task, sample_type, meta_data,
+                                    latency, service_time, client_processing_time, processing_time, throughput, ops, ops_unit,
+                                    time_period, task_progress, dependent_timing):
+                self.dropped += 1
+                # avoid flooding the log; we report the total number of dropped samples only every so often.
+                if self.dropped == 1 or self.dropped % self.buffer_size == 0:
+                    self.logger.warning("Dropping sample for [%s] due to a full sampling buffer ([%d] samples dropped so far).",
+                                        task.operation.name, self.dropped)
 
 class ProfileMetricsSampler(Sampler):
     """
@@ -1949,7 +2440,7 @@ class Sample:
         self.sample_type = sample_type
         self.request_meta_data = request_meta_data
         self.time_period = time_period
-        self._dependent_timing = dependent_timing
+        self.dependent_timing = dependent_timing
         # may be None for eternal tasks!
         self.task_progress = task_progress
 
@@ -1991,8 +2482,8 @@ class DefaultSample(Sample):
 
     @property
     def dependent_timings(self):
-        if self._dependent_timing:
-            for t in self._dependent_timing:
+        if self.dependent_timing:
+            for t in self.dependent_timing:
                 yield DefaultSample(self.client_id, t["absolute_time"], t["request_start"], self.task_start, self.task,
                              self.sample_type, self.request_meta_data, 0, t["service_time"], 0, 0, 0, self.total_ops,
                              self.total_ops_unit, self.time_period, self.task_progress, None)
@@ -2009,12 +2500,559 @@ class ProfileMetricsSample(Sample):
 
     @property
     def dependent_timings(self):
-        if self._dependent_timing:
-            for t in self._dependent_timing:
+        if self.dependent_timing:
+            for t in self.dependent_timing:
                 yield ProfileMetricsSample(self.client_id, t["absolute_time"], t["request_start"], self.task_start, self.task,
                              self.sample_type, self.request_meta_data, self.time_period, self.task_progress, None)
 
 
+# Fixed-width record layout of a default sample. ``key`` refers to an interned (task, ops unit, progress unit) tuple and
+# ``meta_data`` to an interned request meta-data dict. Missing values (throughput, task progress) are stored as NaN.
+SAMPLE_RECORD = np.dtype([
+    ("client_id", np.int32),
+    ("sample_type", np.int8),
+    ("key", np.int32),
+    ("meta_data", np.int32),
+    ("absolute_time", np.float64),
+    ("request_start", np.float64),
+    ("task_start", np.float64),
+    ("latency", np.float64),
+    ("service_time", np.float64),
+    ("client_processing_time", np.float64),
+    ("processing_time", np.float64),
+    ("throughput", np.float64),
+    ("total_ops", np.float64),
+    ("time_period", np.float64),
+    ("progress", np.float64),
+])
+
+_SAMPLE_TYPES = tuple(metrics.SampleType)
+
+
+def _nan_if_none(v):
+    return math.nan if v is None else v
+
+
+def _none_if_nan(v):
+    return None if math.isnan(v) else v
+
+
+class SampleBuffer:
+    """
+    Preallocated, columnar storage for default samples. Rows are written into a single structured NumPy array that grows
+    geometrically up to ``max_size`` rows. Tasks and request meta-data are interned so that every row only stores small integer ids.
+    """
+    INITIAL_CAPACITY = 4096
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self.rows = np.empty(max(1, min(SampleBuffer.INITIAL_CAPACITY, max_size)), dtype=SAMPLE_RECORD)
+        self.keys = []
+        self.meta_data = []
+        self.dependent_timings = {}
+        self._key_ids = {}
+        self._meta_data_ids = {}
+
+    def add(self, client_id, absolute_time, request_start, task_start, task, sample_type, request_meta_data, latency,
+            service_time, client_processing_time, processing_time, throughput, total_ops, total_ops_unit, time_period,
+            task_progress, dependent_timing=None):
+        """
+        Appends a sample.
+
+        :return: ``True`` if the sample has been stored, ``False`` if the buffer is full.
+        """
+        if self.size == len(self.rows):
+            if self.size >= self.max_size:
+                return False
+            self.rows = np.resize(self.rows, min(self.size * 2, self.max_size))
+        if task_progress is None:
+            progress, progress_unit = math.nan, None
+        elif isinstance(task_progress, tuple):
+            progress, progress_unit = task_progress
+        else:
+            # plain numeric progress without a unit
+            progress, progress_unit = task_progress, False
+        idx = self.size
+        self.rows[idx] = (client_id, sample_type, self._key_id(task, total_ops_unit, progress_unit), self._meta_data_id(request_meta_data),
+                          absolute_time, request_start, task_start, latency, service_time, client_processing_time, processing_time,
+                          _nan_if_none(throughput), total_ops, time_period, progress)
+        if dependent_timing:
+            self.dependent_timings[idx] = dependent_timing
+        self.size += 1
+        return True
+
+    def add_sample(self, sample):
+        return self.add(sample.client_id, sample.absolute_time, sample.request_start, sample.task_start, sample.task,
+                        sample.sample_type, sample.request_meta_data, sample.latency, sample.service_time, sample.client_processing_time,
+                        sample.processing_time, sample.throughput, sample.total_ops, sample.total_ops_unit, sample.time_period,
+                        sample.task_progress, sample.dependent_timing)
+
+    def _key_id(self, task, total_ops_unit, progress_unit):
+        k = (task, total_ops_unit, progress_unit)
+        key_id = self._key_ids.get(k)
+        if key_id is None:
+            key_id = len(self.keys)
+            self.keys.append(k)
+            self._key_ids[k] = key_id
+        return key_id
+
+    def _meta_data_id(self, meta_data):
+        try:
+            k = tuple(meta_data.items()) if meta_data is not None else None
+            meta_data_id = self._meta_data_ids.get(k)
+        except TypeError:
+            # meta-data contains unhashable values (e.g. lists); store it without interning
+            k = meta_data_id = None
+        if meta_data_id is None:
+            meta_data_id = len(self.meta_data)
+            self.meta_data.append(meta_data)
+            if k is not None or meta_data is None:
+                self._meta_data_ids[k] = meta_data_id
+        return meta_data_id
+
+    def to_batch(self):
+        return SampleBatch(self.rows[:self.size].copy(), self.keys, self.meta_data, self.dependent_timings)
+
+
+class SampleBatch:
+    """
+    An immutable, columnar batch of default samples as produced by ``DefaultSampler``. It is shipped as one contiguous record array
+    plus small lookup tables and materializes ``DefaultSample`` objects only on access.
+    """
+
+    def __init__(self, rows, keys, meta_data, dependent_timings=None):
+        """
+        :param rows: A NumPy array with dtype ``SAMPLE_RECORD``.
+        :param keys: A list of (task, total ops unit, task progress unit) tuples referenced by the ``key`` column. The progress unit
+                     is ``None`` if there is no task progress and ``False`` if task progress is a plain number.
+        :param meta_data: A list of request meta-data dicts referenced by the ``meta_data`` column.
+        :param dependent_timings: A dict of row index to the list of dependent timings of that row (if any).
+        """
+        self.rows = rows
+        self.keys = keys
+        self.meta_data = meta_data
+        self.dependent_timings = dependent_timings or {}
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, dtype=SAMPLE_RECORD), [], [], {})
+
+    @classmethod
+    def of(cls, samples):
+        """
+        Creates a single batch from a batch, a list of ``DefaultSample`` objects or a list with a mix of both (order is retained).
+        """
+        if isinstance(samples, SampleBatch):
+            return samples
+        batches = []
+        pending = None
+        for s in samples:
+            if isinstance(s, SampleBatch):
+                if pending is not None:
+                    batches.append(pending.to_batch())
+                    pending = None
+                batches.append(s)
+            else:
+                if pending is None:
+                    pending = SampleBuffer(sys.maxsize)
+                pending.add_sample(s)
+        if pending is not None:
+            batches.append(pending.to_batch())
+        return cls.concatenate(batches)
+
+    @classmethod
+    def concatenate(cls, batches):
+        batches = [b for b in batches if len(b) > 0]
+        if len(batches) == 0:
+            return cls.empty()
+        elif len(batches) == 1:
+            return batches[0]
+        rows = np.concatenate([b.rows for b in batches])
+        keys = []
+        meta_data = []
+        dependent_timings = {}
+        offset = 0
+        for b in batches:
+            target = rows[offset:offset + len(b)]
+            target["key"] += len(keys)
+            target["meta_data"] += len(meta_data)
+            keys.extend(b.keys)
+            meta_data.extend(b.meta_data)
+            for idx, timings in b.dependent_timings.items():
+                dependent_timings[offset + idx] = timings
+            offset += len(b)
+        return cls(rows, keys, meta_data, dependent_timings)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.rows)
+        if not 0 <= index < len(self.rows):
+            raise IndexError("sample index out of range")
+        return self._sample(index, self.rows[index])
+
+    def __iter__(self):
+        for idx, row in enumerate(self.rows):
+            yield self._sample(idx, row)
+
+    def _sample(self, idx, row):
+        task, total_ops_unit, progress_unit = self.keys[row["key"]]
+        progress = float(row["progress"])
+        return DefaultSample(int(row["client_id"]), float(row["absolute_time"]), float(row["request_start"]), float(row["task_start"]),
+                             task, _SAMPLE_TYPES[row["sample_type"]], self.meta_data[row["meta_data"]], float(row["latency"]),
+                             float(row["service_time"]), float(row["client_processing_time"]), float(row["processing_time"]),
+                             _none_if_nan(float(row["throughput"])), float(row["total_ops"]), total_ops_unit, float(row["time_period"]),
+                             self._task_progress(progress, progress_unit), self.dependent_timings.get(idx))
+
+    @staticmethod
+    def _task_progress(progress, progress_unit):
+        if progress_unit is None:
+            return None
+        elif progress_unit is False:
+            return progress
+        else:
+            return progress, progress_unit
+
+    def column(self, name):
+        return self.rows[name]
+
+    def tasks(self):
+        """
+        Groups samples per task. Tasks may be referenced by several keys (e.g. with different units or after merging batches of
+        multiple workers).
+
+        :return: A tuple of the list of distinct tasks and an array with the index of the task in that list for each sample.
+        """
+        task_ids = {}
+        tasks = []
+        task_id_per_key = np.empty(len(self.keys), dtype=np.int32)
+        for key_id, (task, _, _) in enumerate(self.keys):
+            task_id = task_ids.get(task)
+            if task_id is None:
+                task_id = len(tasks)
+                tasks.append(task)
+                task_ids[task] = task_id
+            task_id_per_key[key_id] = task_id
+        return tasks, task_id_per_key[self.rows["key"]]
+
+    @property
+    def relative_time(self):
+        return self.rows["request_start"] - self.rows["task_start"]
+
+    def most_recent_per_client(self):
+        """
+        :return: A dict of client id to the most recent sample of that client in this batch.
+        """
+        client_ids = self.rows["client_id"][::-1]
+        unique_client_ids, reversed_indices = np.unique(client_ids, return_index=True)
+        last = len(self.rows) - 1
+        return {int(client_id): self[last - int(idx)] for client_id, idx in zip(unique_client_ids, reversed_indices)}
+
+class SampleAggregate:
+    """
+    A pre-reduced summary of default samples whose size does not grow with the number of requests. It is created on load generator
+    hosts so that only aggregates need to be sent to the master. Per task and sample type, request metrics are recorded in histograms.
+    For throughput calculation, samples are reduced to one row per task, sample type and time slot of ``THROUGHPUT_RESOLUTION`` seconds.
+    """
+    # width of the time slots (in seconds) to which samples are reduced for throughput calculation
+    THROUGHPUT_RESOLUTION = 0.1
+
+    REQUEST_METRICS = ["latency", "service_time", "client_processing_time", "processing_time"]
+
+    class Summary:
+        def __init__(self):
+            # metric name -> LogHistogram of all values in ms (or in the unit of the respective request meta-data)
+            self.histograms = {}
+            self.error_count = 0
+            # absolute and relative time of the most recent sample
+            self.absolute_time = None
+            self.relative_time = None
+
+        def histogram(self, name):
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = metrics.LogHistogram(metrics.InMemoryMetricsStore.HISTOGRAM_RELATIVE_ERROR)
+                self.histograms[name] = histogram
+            return histogram
+
+    def __init__(self):
+        # (task, sample type) -> Summary
+        self.summaries = {}
+        self.throughput_samples = SampleBatch.empty()
+        self.most_recent_per_client = {}
+        self.sample_count = 0
+
+    def __len__(self):
+        return self.sample_count
+
+    def add(self, samples):
+        """
+        Adds samples to this aggregate.
+
+        :param samples: A ``SampleBatch`` or a list of samples as accepted by ``SampleBatch.of``.
+        """
+        batch = SampleBatch.of(samples)
+        if len(batch) == 0:
+            return
+        rows = batch.rows
+        self.sample_count += len(rows)
+        self.most_recent_per_client.update(batch.most_recent_per_client())
+        tasks, task_id_per_sample = batch.tasks()
+        failed = np.array([bool(md) and md.get("success") is False for md in batch.meta_data], dtype=bool)[rows["meta_data"]]
+        # if request_meta_data exists then it will have {"success": true/false} as a parameter.
+        metrics_per_meta_data = [
+            [name for name in DefaultSamplePostprocessor.REQUEST_META_DATA_METRICS if name in request_meta_data]
+            if request_meta_data and len(request_meta_data) > 1 else []
+            for request_meta_data in batch.meta_data
+        ]
+        # per sample whether its request meta-data contain the metric; only for metrics that occur in this batch
+        has_metric_per_sample = {
+            name: np.array([name in names for names in metrics_per_meta_data], dtype=bool)[rows["meta_data"]]
+            for name in {name for names in metrics_per_meta_data for name in names}
+        }
+        relative_times = batch.relative_time
+
+        for task_id, task in enumerate(tasks):
+            in_task = task_id_per_sample == task_id
+            for sample_type_id in np.unique(rows["sample_type"][in_task]).tolist():
+                indices = np.flatnonzero(in_task & (rows["sample_type"] == sample_type_id))
+                key = (task, _SAMPLE_TYPES[sample_type_id])
+                summary = self.summaries.get(key)
+                if summary is None:
+                    summary = SampleAggregate.Summary()
+                    self.summaries[key] = summary
+                for name in SampleAggregate.REQUEST_METRICS:
+                    summary.histogram(name).record_all((rows[name][indices] * 1000).tolist())
+                if batch.dependent_timings:
+                    summary.histogram("service_time").record_all([convert.seconds_to_ms(timing["service_time"])
+                                                                  for idx in indices.tolist()
+                                                                  for timing in batch.dependent_timings.get(idx, [])])
+                for name, has_metric in has_metric_per_sample.items():
+                    meta_data_ids = rows["meta_data"][indices[has_metric[indices]]].tolist()
+                    summary.histogram(name).record_all([batch.meta_data[meta_data_id][name] for meta_data_id in meta_data_ids])
+                summary.error_count += int(np.count_nonzero(failed[indices]))
+                latest = int(indices[np.argmax(rows["absolute_time"][indices])])
+                if summary.absolute_time is None or float(rows["absolute_time"][latest]) >= summary.absolute_time:
+                    summary.absolute_time = float(rows["absolute_time"][latest])
+                    summary.relative_time = float(relative_times[latest])
+        self.throughput_samples = SampleBatch.concatenate([self.throughput_samples, self.reduce_for_throughput(batch)])
+
+    @staticmethod
+    def reduce_for_throughput(batch):
+        """
+        Reduces a batch to one row per key, sample type and time slot. Each row is the most recent sample of its slot but holds the
+        total number of operations of the slot and a time period that starts with the earliest sample of the slot. All other columns
+        except throughput (which is averaged) are not meaningful anymore.
+        """
+        rows = batch.rows
+        groups = np.empty(len(rows), dtype=[("key", np.int32), ("sample_type", np.int8), ("slot", np.int64)])
+        groups["key"] = rows["key"]
+        groups["sample_type"] = rows["sample_type"]
+        groups["slot"] = np.floor(rows["absolute_time"] / SampleAggregate.THROUGHPUT_RESOLUTION).astype(np.int64)
+        unique_groups, group_per_row = np.unique(groups, return_inverse=True)
+        group_per_row = group_per_row.ravel()
+        group_count = len(unique_groups)
+        # sort by group and then by time to find the most recent sample per group
+        order = np.lexsort((rows["absolute_time"], group_per_row))
+        last_per_group = order[np.r_[np.flatnonzero(np.diff(group_per_row[order])), len(order) - 1]]
+        reduced = rows[last_per_group]
+        samples_per_group = np.bincount(group_per_row, minlength=group_count)
+        reduced["total_ops"] = np.bincount(group_per_row, weights=rows["total_ops"], minlength=group_count)
+        reduced["throughput"] = np.bincount(group_per_row, weights=rows["throughput"], minlength=group_count) / samples_per_group
+        earliest_start = np.full(group_count, np.inf)
+        np.minimum.at(earliest_start, group_per_row, rows["absolute_time"] - rows["time_period"])
+        reduced["time_period"] = reduced["absolute_time"] - earliest_start
+        # request meta-data are not needed for throughput calculation
+        reduced["meta_data"] = 0
+        return SampleBatch(reduced, batch.keys, [None])
+
+
+class SharedSampleRing:
+    """
+    A single-producer, single-consumer ring buffer of ``SAMPLE_RECORD`` rows in shared memory. It is created by the coordinator for
+    each worker on the same host. The worker appends rows and announces them with an ``UpdateSharedSamples`` message; the coordinator
+    consumes them in announcement order and thereby frees space for the worker.
+    """
+    HEADER = np.dtype([("head", np.uint64), ("tail", np.uint64), ("capacity", np.uint64)])
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self.owner = owner
+        self._header = np.ndarray((), dtype=SharedSampleRing.HEADER, buffer=shm.buf)
+        self.capacity = int(self._header["capacity"])
+        self._rows = np.ndarray(self.capacity, dtype=SAMPLE_RECORD, buffer=shm.buf, offset=SharedSampleRing.HEADER.itemsize)
+
+    @classmethod
+    def create(cls, capacity):
+        shm = shared_memory.SharedMemory(create=True, size=SharedSampleRing.HEADER.itemsize + capacity * SAMPLE_RECORD.itemsize)
+        header = np.ndarray((), dtype=SharedSampleRing.HEADER, buffer=shm.buf)
+        header["head"] = 0
+        header["tail"] = 0
+        header["capacity"] = capacity
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == "posix":
+            # The coordinator owns the segment. Prevent the resource tracker of this process from unlinking it when we exit.
+            # pylint: disable=protected-access
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def free(self):
+        return self.capacity - (int(self._header["head"]) - int(self._header["tail"]))
+
+    def write(self, rows):
+        """
+        Appends rows (called by the worker).
+
+        :return: ``True`` if the rows have been written, ``False`` if there is not enough free space.
+        """
+        n = len(rows)
+        if n > self.free():
+            return False
+        head = int(self._header["head"])
+        start = head % self.capacity
+        first = min(n, self.capacity - start)
+        self._rows[start:start + first] = rows[:first]
+        self._rows[:n - first] = rows[first:]
+        # publish only after the rows have been written
+        self._header["head"] = head + n
+        return True
+
+    def read(self, count):
+        """
+        Consumes ``count`` rows (called by the coordinator).
+
+        :return: A copy of the consumed rows.
+        """
+        tail = int(self._header["tail"])
+        if count > int(self._header["head"]) - tail:
+            raise exceptions.BenchmarkAssertionError(f"Cannot read [{count}] samples from shared memory ring [{self.name}]. "
+                                                     f"Only [{int(self._header['head']) - tail}] are available.")
+        start = tail % self.capacity
+        first = min(count, self.capacity - start)
+        if first == count:
+            rows = self._rows[start:start + count].copy()
+        else:
+            rows = np.concatenate((self._rows[start:], self._rows[:count - first]))
+        self._header["tail"] = tail + count
+        return rows
+
+    def close(self):
+        # views on the buffer need to be released before the segment can be closed
+        self._header = None
+        self._rows = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+class SharedSampleWriter:
+    """
+    Worker side of the shared memory sample transport. Rows are written to a ``SharedSampleRing``; tasks and request meta-data are
+    interned for the whole lifetime of the worker so every ``UpdateSharedSamples`` message only carries entries that the coordinator
+    has not seen yet.
+
+    Only the first ``MAX_INTERNED_META_DATA`` distinct (hashable) request meta-data are interned so the lookup tables on both sides
+    stay bounded even if runners return per-request meta-data. All others are sent inline and referred to by negative ids.
+    """
+    MAX_INTERNED_META_DATA = 1024
+
+    def __init__(self, ring):
+        self.ring = ring
+        self._key_ids = {}
+        self._meta_data_ids = {}
+        self._key_count = 0
+        self._meta_data_count = 0
+
+    def write(self, worker_id, batch, profile_samples):
+        """
+        :return: An ``UpdateSharedSamples`` message announcing the batch or ``None`` if it does not fit into the ring. In that case
+                 the batch needs to be sent as a regular message.
+        """
+        if len(batch) > self.ring.free():
+            return None
+        new_keys = []
+        new_meta_data = []
+        inline_meta_data = []
+        key_ids = np.array([self._intern_key(k, new_keys) for k in batch.keys], dtype=np.int32)
+        meta_data_ids = np.array([self._intern_meta_data(m, new_meta_data, inline_meta_data) for m in batch.meta_data],
+                                 dtype=np.int32)
+        rows = batch.rows.copy()
+        rows["key"] = key_ids[rows["key"]]
+        rows["meta_data"] = meta_data_ids[rows["meta_data"]]
+        self.ring.write(rows)
+        return UpdateSharedSamples(worker_id, len(rows), new_keys, new_meta_data, batch.dependent_timings, profile_samples,
+                                   inline_meta_data)
+
+    def _intern_key(self, key, new_keys):
+        key_id = self._key_ids.get(key)
+        if key_id is None:
+            key_id = self._key_count
+            self._key_count += 1
+            self._key_ids[key] = key_id
+            new_keys.append(key)
+        return key_id
+
+    def _intern_meta_data(self, meta_data, new_meta_data, inline_meta_data):
+        try:
+            k = tuple(meta_data.items()) if meta_data is not None else None
+            meta_data_id = self._meta_data_ids.get(k)
+        except TypeError:
+            k = meta_data_id = None
+            hashable = False
+        else:
+            hashable = True
+        if meta_data_id is not None:
+            return meta_data_id
+        if not hashable or self._meta_data_count >= SharedSampleWriter.MAX_INTERNED_META_DATA:
+            # batch meta-data are already distinct so each entry is sent at most once per message
+            inline_meta_data.append(meta_data)
+            return -len(inline_meta_data)
+        meta_data_id = self._meta_data_count
+        self._meta_data_count += 1
+        self._meta_data_ids[k] = meta_data_id
+        new_meta_data.append(meta_data)
+        return meta_data_id
+
+    def close(self):
+        self.ring.close()
+
+
+class SharedSampleReader:
+    """
+    Coordinator side of the shared memory sample transport.
+    """
+
+    def __init__(self, ring):
+        self.ring = ring
+        self.keys = []
+        self.meta_data = []
+
+    def read(self, msg):
+        self.keys.extend(msg.new_keys)
+        self.meta_data.extend(msg.new_meta_data)
+        rows = self.ring.read(msg.count)
+        # only ship the entries that this batch refers to so batches stay independent of the lookup tables
+        key_ids, rows["key"] = np.unique(rows["key"], return_inverse=True)
+        meta_data_ids, rows["meta_data"] = np.unique(rows["meta_data"], return_inverse=True)
+        meta_data = [self.meta_data[i] if i >= 0 else msg.inline_meta_data[-i - 1] for i in meta_data_ids]
+        return SampleBatch(rows, [self.keys[i] for i in key_ids], meta_data, msg.dependent_timings)
+
+    def close(self):
+        self.ring.close()
+
+
 def select_test_procedure(config, t):
     test_procedure_name = config.opts("workload", "test_procedure.name")
     selected_test_procedure = t.find_test_procedure_or_default(test_procedure_name)
@@ -2028,10 +3066,14 @@ def select_test_procedure(config, t):
 class ThroughputCalculator:
     class TaskStats:
         """
-        Stores per task numbers needed for throughput calculation in between multiple calculations.
+        Stores per task numbers needed for throughput calculation in between multiple calculations. Only the state of the currently
+        open bucket is retained, not the samples themselves.
         """
         def __init__(self, bucket_interval, sample_type, start_time):
-            self.unprocessed = []
+            # number of operations of samples that have been seen but are not yet included in a throughput sample
+            self.pending_count = 0
+            # (interval, absolute time, relative time, ops unit) of the most recent of these samples
+            self.pending_last = None
             self.total_count = 0
             self.interval = 0
             self.bucket_interval = bucket_interval
@@ -2051,18 +3093,21 @@ class ThroughputCalculator:
                 self.sample_type = current_sample_type
                 self.has_samples_in_sample_type = False
 
-        def update_interval(self, absolute_sample_time):
-            self.interval = max(absolute_sample_time - self.start_time, self.interval)
-
-        def can_calculate_throughput(self):
-            return self.interval > 0 and self.interval >= self.bucket
+        def update_interval(self, interval):
+            self.interval = max(interval, self.interval)
 
         def can_add_final_throughput_sample(self):
             return self.interval > 0 and not self.has_samples_in_sample_type
 
-        def finish_bucket(self, new_total):
-            self.unprocessed = []
-            self.total_count = new_total
+        def add_pending(self, count, last_sample):
+            self.pending_count += count
+            if self.pending_last is None or last_sample[0] >= self.pending_last[0]:
+                self.pending_last = last_sample
+
+        def finish_bucket(self):
+            self.total_count += self.pending_count
+            self.pending_count = 0
+            self.pending_last = None
             self.has_samples_in_sample_type = True
             self.bucket = int(self.interval) + self.bucket_interval
 
@@ -2073,107 +3118,415 @@ class ThroughputCalculator:
         """
         Calculates global throughput based on samples gathered from multiple load generators.
 
-        :param samples: A list containing all samples from all load generators.
-        :param bucket_interval_secs: The bucket interval for aggregations.
+        :param samples: A ``SampleBatch`` or a list containing all samples from all load generators.
+        :param bucket_interval_secs: The bucket interval for aggregations in whole seconds.
         :return: A global view of throughput samples.
         """
-
-        samples_per_task = {}
-        # first we group all samples by task (operation).
-        for sample in samples:
-            k = sample.task
-            if k not in samples_per_task:
-                samples_per_task[k] = []
-            samples_per_task[k].append(sample)
+        batch = SampleBatch.of(samples)
+        ops_units = [total_ops_unit for _, total_ops_unit, _ in batch.keys]
+        tasks, task_id_per_sample = batch.tasks()
 
         global_throughput = {}
-        # with open("raw_samples_new.csv", "a") as sample_log:
-        # print("client_id,absolute_time,relative_time,operation,sample_type,total_ops,time_period", file=sample_log)
-        for k, v in samples_per_task.items():
-            task = k
-            if task not in global_throughput:
-                global_throughput[task] = []
-            # sort all samples by time
-            if task in self.task_stats:
-                samples = itertools.chain(v, self.task_stats[task].unprocessed)
-            else:
-                samples = v
-            current_samples = sorted(samples, key=lambda s: s.absolute_time)
-
+        for task_id, task in enumerate(tasks):
+            task_rows = batch.rows[task_id_per_sample == task_id]
+            if len(task_rows) == 0:
+                continue
             # Calculate throughput based on service time if the runner does not provide one, otherwise use it as is and
             # only transform the values into the expected structure.
-            first_sample = current_samples[0]
-            if first_sample.throughput is None:
-                task_throughput = self.calculate_task_throughput(task, current_samples, bucket_interval_secs)
+            if np.isnan(task_rows["throughput"][0]):
+                global_throughput[task] = self.calculate_task_throughput(task, task_rows, ops_units, int(bucket_interval_secs))
             else:
-                task_throughput = self.map_task_throughput(current_samples)
-            global_throughput[task].extend(task_throughput)
-
+                global_throughput[task] = self.map_task_throughput(task_rows, ops_units)
         return global_throughput
 
-    def calculate_task_throughput(self, task, current_samples, bucket_interval_secs):
+    def calculate_task_throughput(self, task, task_rows, ops_units, bucket_interval_secs):
+        """
+        Bins samples into one second wide bins (relative to the start of the task) and processes bins in time order. As bucket
+        boundaries are always whole seconds, the earliest sample of a bin is the only one that can complete a bucket and all other
+        samples only contribute to per-bin sums. Hence, samples are never sorted and only the state of the open bucket is carried
+        over to the next calculation.
+        """
         task_throughput = []
-
+        absolute_times = task_rows["absolute_time"]
         if task not in self.task_stats:
-            first_sample = current_samples[0]
+            first = int(np.argmin(absolute_times))
             self.task_stats[task] = ThroughputCalculator.TaskStats(bucket_interval=bucket_interval_secs,
-                                                                   sample_type=first_sample.sample_type,
-                                                                   start_time=first_sample.absolute_time - first_sample.time_period)
+                                                                   sample_type=_SAMPLE_TYPES[task_rows["sample_type"][first]],
+                                                                   start_time=float(absolute_times[first] - task_rows["time_period"][first]))
         current = self.task_stats[task]
-        count = current.total_count
-        last_sample = None
-        for sample in current_samples:
-            last_sample = sample
-            # print("%d,%f,%f,%s,%s,%d,%f" %
-            #       (sample.client_id, sample.absolute_time, sample.relative_time, sample.operation, sample.sample_type,
-            #        sample.total_ops, sample.time_period), file=sample_log)
-
-            # once we have seen a new sample type, we stick to it.
-            current.maybe_update_sample_type(sample.sample_type)
-
-            # we need to store the total count separately and cannot update `current.total_count` immediately here
-            # because we would count all raw samples in `unprocessed` twice. Hence, we'll only update
-            # `current.total_count` when we have calculated a new throughput sample.
-            count += sample.total_ops
-            current.update_interval(sample.absolute_time)
-
-            if current.can_calculate_throughput():
-                current.finish_bucket(count)
-                task_throughput.append((sample.absolute_time,
-                                        sample.relative_time,
-                                        current.sample_type,
-                                        current.throughput,
-                                        # we calculate throughput per second
-                                        f"{sample.total_ops_unit}/s"))
-            else:
-                current.unprocessed.append(sample)
 
-        # also include the last sample if we don't have one for the current sample type, even if it is below the bucket
-        # interval (mainly needed to ensure we show throughput data in test mode)
-        if last_sample is not None and current.can_add_final_throughput_sample():
-            current.finish_bucket(count)
-            task_throughput.append((last_sample.absolute_time,
-                                    last_sample.relative_time,
+        intervals = absolute_times - current.start_time
+        relative_times = task_rows["request_start"] - task_rows["task_start"]
+        total_ops = task_rows["total_ops"]
+        sample_types = task_rows["sample_type"]
+
+        bins = np.floor(intervals).astype(np.int64)
+        first_bin = int(bins.min())
+        bins -= first_bin
+        bin_count = int(bins.max()) + 1
+        samples_per_bin = np.bincount(bins, minlength=bin_count)
+        ops_per_bin = np.bincount(bins, weights=total_ops, minlength=bin_count)
+        max_sample_type_per_bin = np.zeros(bin_count, dtype=np.int64)
+        np.maximum.at(max_sample_type_per_bin, bins, sample_types)
+        min_interval_per_bin = np.full(bin_count, np.inf)
+        np.minimum.at(min_interval_per_bin, bins, intervals)
+        max_interval_per_bin = np.full(bin_count, -np.inf)
+        np.maximum.at(max_interval_per_bin, bins, intervals)
+        # earliest sample per bin (the first one in case of ties)
+        first_per_bin = np.empty(bin_count, dtype=np.int64)
+        candidates = np.flatnonzero(intervals == min_interval_per_bin[bins])[::-1]
+        first_per_bin[bins[candidates]] = candidates
+        # latest sample per bin (the last one in case of ties)
+        last_per_bin = np.empty(bin_count, dtype=np.int64)
+        candidates = np.flatnonzero(intervals == max_interval_per_bin[bins])
+        last_per_bin[bins[candidates]] = candidates
+
+        def sample_at(idx):
+            return float(intervals[idx]), float(absolute_times[idx]), float(relative_times[idx]), ops_units[task_rows["key"][idx]]
+
+        def add_throughput_sample(sample):
+            current.finish_bucket()
+            task_throughput.append((sample[1],
+                                    sample[2],
                                     current.sample_type,
                                     current.throughput,
-                                    f"{last_sample.total_ops_unit}/s"))
+                                    # we calculate throughput per second
+                                    f"{sample[3]}/s"))
+
+        for b in np.flatnonzero(samples_per_bin).tolist():
+            sample_count = int(samples_per_bin[b])
+            ops = float(ops_per_bin[b])
+            if first_bin + b >= current.bucket:
+                # the earliest sample of this bin completes the current bucket
+                first = int(first_per_bin[b])
+                current.maybe_update_sample_type(_SAMPLE_TYPES[sample_types[first]])
+                current.update_interval(float(intervals[first]))
+                current.pending_count += float(total_ops[first])
+                add_throughput_sample(sample_at(first))
+                sample_count -= 1
+                ops -= float(total_ops[first])
+            if sample_count > 0:
+                current.maybe_update_sample_type(_SAMPLE_TYPES[max_sample_type_per_bin[b]])
+                current.update_interval(float(max_interval_per_bin[b]))
+                current.add_pending(ops, sample_at(int(last_per_bin[b])))
+
+        # also include the last sample if we don't have one for the current sample type, even if it is below the bucket
+        # interval (mainly needed to ensure we show throughput data in test mode)
+        if current.pending_last is not None and current.can_add_final_throughput_sample():
+            add_throughput_sample(current.pending_last)
 
         return task_throughput
 
-    def map_task_throughput(self, current_samples):
+    def map_task_throughput(self, task_rows, ops_units):
+        absolute_times = task_rows["absolute_time"]
+        # samples of a single worker are already in order
+        if np.all(absolute_times[1:] >= absolute_times[:-1]):
+            order = range(len(task_rows))
+        else:
+            order = np.argsort(absolute_times, kind="stable").tolist()
+        relative_times = task_rows["request_start"] - task_rows["task_start"]
         throughput = []
-        for sample in current_samples:
-            throughput.append((sample.absolute_time,
-                               sample.relative_time,
-                               sample.sample_type,
-                               sample.throughput,
-                               f"{sample.total_ops_unit}/s"))
+        for idx in order:
+            throughput.append((float(absolute_times[idx]),
+                               float(relative_times[idx]),
+                               _SAMPLE_TYPES[task_rows["sample_type"][idx]],
+                               float(task_rows["throughput"][idx]),
+                               f"{ops_units[task_rows['key'][idx]]}/s"))
         return throughput
 
 
+EVENT_LOOPS = ["asyncio", "uvloop"]
+
+
+def new_event_loop(event_loop="asyncio"):
+    """
+    Creates a new event loop.
+
+    :param event_loop: The event loop implementation. One of ``EVENT_LOOPS``. If uvloop is requested but not installed, OSB
+                       falls back to asyncio's default event loop.
+    :return: A new event loop.
+    """
+    if event_loop not in EVENT_LOOPS:
+        raise exceptions.SystemSetupError(f"Unknown event loop [{event_loop}]. Use one of {EVENT_LOOPS}.")
+    if event_loop == "uvloop":
+        try:
+            # pylint: disable=import-outside-toplevel
+            import uvloop
+            return uvloop.new_event_loop()
+        except ImportError:
+            console.warn("The uvloop event loop has been requested but uvloop is not installed. Falling back to the default "
+                         "asyncio event loop. Install it with 'pip install uvloop'.", logger=logging.getLogger(__name__))
+    return asyncio.new_event_loop()
+
+
+class EventLoopLagMonitor:
+    """
+    Measures how much later than requested the event loop resumes a sleeping coroutine. A high lag means that the load
+    generator itself cannot keep up and adds to the latencies that it measures.
+    """
+    INTERVAL_SECONDS = 0.1
+    # keeps measurements of about half an hour if nobody drains them
+    MAX_SAMPLES = 16384
+
+    def __init__(self, interval=INTERVAL_SECONDS, max_samples=MAX_SAMPLES):
+        self.interval = interval
+        # measurements are taken on the worker's executor thread and drained on the actor thread
+        self.samples = collections.deque(maxlen=max_samples)
+
+    async def __call__(self):
+        while True:
+            expected_wakeup = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append((time.time(), max(time.perf_counter() - expected_wakeup, 0)))
+
+    def drain(self):
+        """
+        :return: A list of ``(absolute_time, lag)`` tuples for all measurements since the last call. Lags are in seconds.
+        """
+        measurements = []
+        while True:
+            try:
+                measurements.append(self.samples.popleft())
+            except IndexError:
+                return measurements
+
+
+class DriverHealth:
+    """
+    Collects measurements that show whether a worker itself limits the load that it generates: the CPU usage of the
+    thread that runs its event loop, the lag of its event loop, by how much requests start later than scheduled and how
+    many samples it had to drop because its sampling buffer was full. It also forwards the arrival statistics of clients
+    that have finished an open-loop schedule. All measurements are tagged with the sample type of the task at the time
+    they have been taken so warmup measurements can be told apart.
+    """
+    # schedule slips that are kept per task and sample type between two reports
+    MAX_SCHEDULE_SLIPS = 1024
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.loop_lag = EventLoopLagMonitor()
+        self.process = psutil.Process()
+        self.cpu_count = psutil.cpu_count() or 1
+        # the first call only establishes the baseline for the next one
+        self.process.cpu_percent()
+        # native id of the thread that runs the event loop and its (cpu time, wall clock time) at the previous measurement
+        self.loop_thread_id = None
+        self.loop_thread_times = None
+        # task name -> current sample type; updated by the executors of the task
+        self.sample_types = {}
+        # (task name, sample type) -> [number of slips, uniform sample of slips]; updated on the executor thread and
+        # drained on the actor thread
+        self.schedule_slips = {}
+        # (name, unit, task name, sample type, value) tuples of clients that have finished an open-loop schedule
+        self.arrivals = []
+        self.lock = threading.Lock()
+
+    def on_loop_thread(self):
+        """
+        Must be called on the thread that runs the event loop so its CPU usage can be measured.
+        """
+        self.loop_thread_id = threading.get_native_id()
+        self.loop_thread_times = self._loop_thread_times()
+
+    def on_sample_type(self, task_name, sample_type):
+        """
+        :param task_name: The name of the task that is executed.
+        :param sample_type: The sample type of the requests that the task issues from now on.
+        """
+        self.sample_types[task_name] = sample_type
+
+    def on_schedule_slip(self, task_name, slip):
+        """
+        :param task_name: The name of the task that has issued the request.
+        :param slip: The time in seconds by which the request started later than scheduled.
+        """
+        key = (task_name, self.sample_types.get(task_name, metrics.SampleType.Normal))
+        with self.lock:
+            slips = self.schedule_slips.get(key)
+            if slips is None:
+                slips = [0, []]
+                self.schedule_slips[key] = slips
+            slips[0] += 1
+            if len(slips[1]) < DriverHealth.MAX_SCHEDULE_SLIPS:
+                slips[1].append(slip)
+            else:
+                # reservoir sampling bounds the number of reported values while keeping their distribution
+                i = random.randrange(slips[0])
+                if i < DriverHealth.MAX_SCHEDULE_SLIPS:
+                    slips[1][i] = slip
+
+    def on_arrivals(self, task_name, arrivals):
+        """
+        :param task_name: The name of the task that has been executed.
+        :param arrivals: A list of ``(name, unit, sample_type, value)`` tuples as returned by ``ArrivalStats.drain``.
+        """
+        with self.lock:
+            self.arrivals.extend((name, unit, task_name, sample_type, value) for name, unit, sample_type, value in arrivals)
+
+    def _loop_thread_times(self):
+        if self.loop_thread_id is None:
+            return None
+        try:
+            for thread in self.process.threads():
+                if thread.id == self.loop_thread_id:
+                    return thread.user_time + thread.system_time, time.perf_counter()
+        except psutil.Error:
+            self.logger.debug("Cannot determine the CPU time of the event loop thread.", exc_info=True)
+        return None
+
+    def _cpu_usage(self):
+        # the process-wide CPU usage also includes other threads (e.g. the actor thread) and can exceed 100% on
+        # multi-core machines so we only use it, normalized to all cores, if the event loop thread cannot be inspected.
+        process_cpu_usage = self.process.cpu_percent() / self.cpu_count
+        previous = self.loop_thread_times
+        current = self._loop_thread_times()
+        self.loop_thread_times = current
+        if previous is None or current is None or current[1] <= previous[1]:
+            return process_cpu_usage
+        return min(100 * (current[0] - previous[0]) / (current[1] - previous[1]), 100.0)
+
+    def drain(self, task_names, dropped_samples=0):
+        """
+        :param task_names: Names of the tasks that are currently executed. Worker-wide measurements are attributed to each of them.
+        :param dropped_samples: The number of samples that have been dropped since the last call.
+        :return: A list of ``(name, unit, task, sample_type, absolute_time, value)`` tuples for all measurements since the
+                 last call.
+        """
+        now = time.time()
+        cpu_usage = self._cpu_usage()
+        loop_lags = self.loop_lag.drain()
+        with self.lock:
+            schedule_slips = self.schedule_slips
+            self.schedule_slips = {}
+            arrivals = self.arrivals
+            self.arrivals = []
+
+        measurements = []
+        for task_name in task_names:
+            sample_type = self.sample_types.get(task_name, metrics.SampleType.Normal)
+            measurements.append(("worker_cpu_usage", "%", task_name, sample_type, now, cpu_usage))
+            measurements.extend(("event_loop_lag", "ms", task_name, sample_type, absolute_time, convert.seconds_to_ms(lag))
+                                for absolute_time, lag in loop_lags)
+            if dropped_samples > 0:
+                measurements.append(("dropped_samples", "", task_name, sample_type, now, dropped_samples))
+        for (task_name, sample_type), (_, slips) in schedule_slips.items():
+            measurements.extend(("schedule_slip", "ms", task_name, sample_type, now, convert.seconds_to_ms(slip)) for slip in slips)
+        measurements.extend((name, unit, task_name, sample_type, now, value) for name, unit, task_name, sample_type, value in arrivals)
+        return measurements
+
+
+class AsyncIoRuntime:
+    """
+    Owns the event loop and the clients of a worker. Both outlive individual tasks so connections to the cluster(s) are
+    reused across tasks and join points instead of being re-established for every task. The runtime is not thread-safe
+    and must only be used from the worker's executor thread.
+    """
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.debug_event_loop = self.cfg.opts("system", "async.debug", mandatory=False, default_value=False)
+        self.event_loop = self.cfg.opts("worker_coordinator", "event.loop", mandatory=False, default_value="asyncio")
+        self.logger = logging.getLogger(__name__)
+        self.loop = None
+        self.clients = None
+        self.max_connections = 0
+        self.driver_health = DriverHealth()
+
+    def run(self, coroutine):
+        """
+        Runs the provided coroutine to completion on the long-lived event loop of this runtime.
+        """
+        if self.loop is None or self.loop.is_closed():
+            self.loop = new_event_loop(self.event_loop)
+            self.logger.info("Created event loop [%s].", type(self.loop).__module__)
+            self.loop.set_debug(self.debug_event_loop)
+            self.loop.set_exception_handler(self._logging_exception_handler)
+        asyncio.set_event_loop(self.loop)
+        return self.loop.run_until_complete(coroutine)
+
+    def _logging_exception_handler(self, loop, context):
+        self.logger.error("Uncaught exception in event loop: %s", context)
+
+    async def os_clients(self, connection_count):
+        """
+        :param connection_count: The number of requests that will be issued with the returned clients concurrently.
+        :return: A dict of clients per cluster with a connection pool that is large enough for ``connection_count`` requests.
+        """
+        # Connection pools cannot be resized in place, so they are only recreated when they are too small.
+        if self.clients is None or connection_count > self.max_connections:
+            if self.clients is not None:
+                self.logger.info("Growing connection pools from [%d] to [%d] connections.", self.max_connections, connection_count)
+                await self._close_clients()
+            # Properly size the internal connection pool to match the number of concurrent requests but allow the user
+            # to override it if needed.
+            self.clients = self._create_clients(self.cfg.opts("client", "hosts").all_hosts,
+                                                self.cfg.opts("client", "options").with_max_connections(connection_count))
+            self.max_connections = connection_count
+        return self.clients
+
+    def _create_clients(self, all_hosts, all_client_options):
+        opensearch = {}
+        grpc_hosts = self.cfg.opts("client", "grpc_hosts", mandatory=False)
+
+        # If gRPC hosts are configured and not empty, use them. Otherwise, use defaults for gRPC operations.
+        if grpc_hosts and grpc_hosts.all_hosts:
+            # Use the provided gRPC hosts
+            pass
+        else:
+            # Provide default gRPC hosts when using gRPC operations
+            # Default: localhost:9400 (matching current environment variable defaults)
+            grpc_hosts = opts.TargetHosts("localhost:9400")
+
+        database_type = self.cfg.opts("database", "type", default_value="opensearch", mandatory=False)
+
+        if database_type.lower() == "opensearch":
+            # OpenSearch path: identical to 2.1. Direct construction of
+            # client.OsClientFactory + client.UnifiedClientFactory so that
+            # nothing about how the OS client is built changes.
+            for cluster_name, cluster_hosts in all_hosts.items():
+                rest_client_factory = client.OsClientFactory(cluster_hosts, all_client_options[cluster_name])
+                unified_client_factory = client.UnifiedClientFactory(rest_client_factory, grpc_hosts)
+                opensearch[cluster_name] = unified_client_factory.create_async()
+        else:
+            # Non-OpenSearch path: route through the database abstraction layer
+            # to pick the right factory class for Vespa, Milvus, etc.
+            self.logger.info("Creating database clients with database_type=[%s]", database_type)
+            for cluster_name, cluster_hosts in all_hosts.items():
+                db_factory = DatabaseClientFactory.create_client_factory(
+                    database_type,
+                    cluster_hosts,
+                    all_client_options[cluster_name]
+                )
+                db_client = db_factory.create_async()
+                self.logger.info("Created client type=[%s] for cluster=[%s]", type(db_client).__name__, cluster_name)
+                opensearch[cluster_name] = db_client
+        return opensearch
+
+    async def _close_clients(self):
+        close_start = time.perf_counter()
+        for s in self.clients.values():
+            await s.transport.close()
+        self.clients = None
+        self.max_connections = 0
+        self.logger.info("Total time to close transports: %f seconds.", (time.perf_counter() - close_start))
+
+    def close(self):
+        """
+        Closes all clients and the event loop. The runtime creates new ones if it is used again afterwards.
+        """
+        if self.loop is None or self.loop.is_closed():
+            return
+        try:
+            if self.clients is not None:
+                self.loop.run_until_complete(self._close_clients())
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        finally:
+            self.loop.close()
+            self.loop = None
+
+
 class AsyncIoAdapter:
     def __init__(self, cfg, workload, task_allocations, sampler, profile_sampler, cancel, complete, abort_on_error,
-                 shared_states=None, feedback_actor=None, error_queue=None, queue_lock=None):
+                 shared_states=None, feedback_actor=None, error_queue=None, queue_lock=None, runtime=None):
         self.cfg = cfg
         self.workload = workload
         self.task_allocations = task_allocations
@@ -2184,76 +3537,34 @@ class AsyncIoAdapter:
         self.abort_on_error = abort_on_error
         self.profiling_enabled = self.cfg.opts("worker_coordinator", "profiling")
         self.assertions_enabled = self.cfg.opts("worker_coordinator", "assertions")
-        self.debug_event_loop = self.cfg.opts("system", "async.debug", mandatory=False, default_value=False)
         self.logger = logging.getLogger(__name__)
         self.shared_states = shared_states
         self.feedback_actor = feedback_actor
         self.error_queue = error_queue
         self.queue_lock = queue_lock
+        # without a runtime that is shared across tasks, the loop and all clients only live as long as this adapter
+        self.owns_runtime = runtime is None
+        self.runtime = AsyncIoRuntime(cfg) if runtime is None else runtime
 
     def __call__(self, *args, **kwargs):
-        # only possible in Python 3.7+ (has introduced get_running_loop)
-        # try:
-        #     loop = asyncio.get_running_loop()
-        # except RuntimeError:
-        #     loop = asyncio.new_event_loop()
-        #     asyncio.set_event_loop(loop)
-        loop = asyncio.new_event_loop()
-        loop.set_debug(self.debug_event_loop)
-        loop.set_exception_handler(self._logging_exception_handler)
-        asyncio.set_event_loop(loop)
         try:
-            loop.run_until_complete(self.run())
+            self.runtime.run(self.run())
         finally:
-            loop.close()
+            if self.owns_runtime:
+                self.runtime.close()
 
-    def _logging_exception_handler(self, loop, context):
-        self.logger.error("Uncaught exception in event loop: %s", context)
+    @staticmethod
+    def max_concurrent_requests(task_allocations):
+        """
+        :param task_allocations: A list of ``(client_id, task_allocation)`` tuples.
+        :return: The number of requests that all clients of ``task_allocations`` may have outstanding at the same time.
+        """
+        return sum(AsyncExecutor.max_concurrent_requests(task_allocation.task) for _, task_allocation in task_allocations)
 
     async def run(self):
-        def os_clients(all_hosts, all_client_options):
-            opensearch = {}
-            grpc_hosts = self.cfg.opts("client", "grpc_hosts", mandatory=False)
-
-            # If gRPC hosts are configured and not empty, use them. Otherwise, use defaults for gRPC operations.
-            if grpc_hosts and grpc_hosts.all_hosts:
-                # Use the provided gRPC hosts
-                pass
-            else:
-                # Provide default gRPC hosts when using gRPC operations
-                # Default: localhost:9400 (matching current environment variable defaults)
-                grpc_hosts = opts.TargetHosts("localhost:9400")
-
-            database_type = self.cfg.opts("database", "type", default_value="opensearch", mandatory=False)
-
-            if database_type.lower() == "opensearch":
-                # OpenSearch path: identical to 2.1. Direct construction of
-                # client.OsClientFactory + client.UnifiedClientFactory so that
-                # nothing about how the OS client is built changes.
-                for cluster_name, cluster_hosts in all_hosts.items():
-                    rest_client_factory = client.OsClientFactory(cluster_hosts, all_client_options[cluster_name])
-                    unified_client_factory = client.UnifiedClientFactory(rest_client_factory, grpc_hosts)
-                    opensearch[cluster_name] = unified_client_factory.create_async()
-            else:
-                # Non-OpenSearch path: route through the database abstraction layer
-                # to pick the right factory class for Vespa, Milvus, etc.
-                self.logger.info("Creating database clients with database_type=[%s]", database_type)
-                for cluster_name, cluster_hosts in all_hosts.items():
-                    db_factory = DatabaseClientFactory.create_client_factory(
-                        database_type,
-                        cluster_hosts,
-                        all_client_options[cluster_name]
-                    )
-                    db_client = db_factory.create_async()
-                    self.logger.info("Created client type=[%s] for cluster=[%s]", type(db_client).__name__, cluster_name)
-                    opensearch[cluster_name] = db_client
-            return opensearch
-
-        # Properly size the internal connection pool to match the number of expected clients but allow the user
-        # to override it if needed.
-        client_count = len(self.task_allocations)
-        opensearch = os_clients(self.cfg.opts("client", "hosts").all_hosts,
-                        self.cfg.opts("client", "options").with_max_connections(client_count))
+        # in an open loop each client has up to 'max-in-flight' requests outstanding which must not queue for a connection
+        # inside the client because that would count as service time instead of queueing delay
+        opensearch = await self.runtime.os_clients(AsyncIoAdapter.max_concurrent_requests(self.task_allocations))
 
         self.logger.info("Task assertions enabled: %s", str(self.assertions_enabled))
         runner.enable_assertions(self.assertions_enabled)
@@ -2277,22 +3588,23 @@ class AsyncIoAdapter:
             schedule = schedule_for(task_allocation, params_per_task[task])
             async_executor = AsyncExecutor(
                 client_id, task, schedule, opensearch, self.sampler, self.profile_sampler, self.cancel, self.complete,
-                task.error_behavior(self.abort_on_error), self.cfg, self.shared_states, self.feedback_actor, self.error_queue, self.queue_lock)
+                task.error_behavior(self.abort_on_error), self.cfg, self.shared_states, self.feedback_actor, self.error_queue, self.queue_lock,
+                driver_health=self.runtime.driver_health)
             final_executor = AsyncProfiler(async_executor) if self.profiling_enabled else async_executor
             aws.append(final_executor())
+        self.runtime.driver_health.on_loop_thread()
+        loop_lag_monitor = asyncio.ensure_future(self.runtime.driver_health.loop_lag())
         run_start = time.perf_counter()
         try:
             _ = await asyncio.gather(*aws)
         finally:
             run_end = time.perf_counter()
             self.logger.info("Total run duration: %f seconds.", (run_end - run_start))
-            await asyncio.get_event_loop().shutdown_asyncgens()
-            shutdown_asyncgens_end = time.perf_counter()
-            self.logger.info("Total time to shutdown asyncgens: %f seconds.", (shutdown_asyncgens_end - run_end))
-            for s in opensearch.values():
-                await s.transport.close()
-            transport_close_end = time.perf_counter()
-            self.logger.info("Total time to close transports: %f seconds.", (shutdown_asyncgens_end - transport_close_end))
+            loop_lag_monitor.cancel()
+            try:
+                await loop_lag_monitor
+            except asyncio.CancelledError:
+                pass
 
 
 class AsyncProfiler:
@@ -2328,9 +3640,110 @@ class AsyncProfiler:
             self.profile_logger.info(profile)
 
 
+class ArrivalStats:
+    """
+    Tracks the arrivals of a client that runs an open-loop schedule per sample type.
+    """
+    class Counts:
+        def __init__(self, first_arrival):
+            self.offered = 0
+            self.issued = 0
+            self.dropped = 0
+            self.late = 0
+            # counts that have not been reported yet
+            self.pending_dropped = 0
+            self.pending_late = 0
+            # scheduled arrival times in seconds relative to the start of the task
+            self.first_arrival = first_arrival
+            self.last_arrival = first_arrival
+
+    def __init__(self):
+        self.counts = {}
+
+    @property
+    def offered(self):
+        return sum(counts.offered for counts in self.counts.values())
+
+    @property
+    def issued(self):
+        return sum(counts.issued for counts in self.counts.values())
+
+    @property
+    def dropped(self):
+        return sum(counts.dropped for counts in self.counts.values())
+
+    @property
+    def late(self):
+        return sum(counts.late for counts in self.counts.values())
+
+    def _on_arrival(self, sample_type, arrival_time):
+        counts = self.counts.get(sample_type)
+        if counts is None:
+            counts = ArrivalStats.Counts(arrival_time)
+            self.counts[sample_type] = counts
+        counts.offered += 1
+        counts.last_arrival = arrival_time
+        return counts
+
+    def on_dropped(self, sample_type, arrival_time):
+        counts = self._on_arrival(sample_type, arrival_time)
+        counts.dropped += 1
+        counts.pending_dropped += 1
+
+    def on_issued(self, sample_type, arrival_time, late):
+        counts = self._on_arrival(sample_type, arrival_time)
+        counts.issued += 1
+        if late:
+            counts.late += 1
+            counts.pending_late += 1
+
+    def attach(self, request_meta_data, sample_type):
+        """
+        Attaches the dropped and late arrivals of the same sample type since the last call to the provided request meta-data so
+        they are stored as metrics along with the sample.
+        """
+        counts = self.counts.get(sample_type)
+        if counts is None:
+            return
+        if counts.pending_dropped:
+            request_meta_data["dropped_arrivals"] = counts.pending_dropped
+            counts.pending_dropped = 0
+        if counts.pending_late:
+            request_meta_data["late_arrivals"] = counts.pending_late
+            counts.pending_late = 0
+
+    def drain(self):
+        """
+        Reports everything that has not been attached to a sample yet. It is called once the client has finished so arrivals
+        that have been dropped or were late after the last completed request are not lost.
+
+        :return: A list of ``(name, unit, sample_type, value)`` tuples with all dropped and late arrivals since the last call
+                 and the offered and issued arrival rate per sample type.
+        """
+        measurements = []
+        for sample_type, counts in self.counts.items():
+            if counts.pending_dropped:
+                measurements.append(("dropped_arrivals", "ops", sample_type, counts.pending_dropped))
+                counts.pending_dropped = 0
+            if counts.pending_late:
+                measurements.append(("late_arrivals", "ops", sample_type, counts.pending_late))
+                counts.pending_late = 0
+            duration = counts.last_arrival - counts.first_arrival
+            if duration > 0:
+                # n arrivals span n - 1 inter-arrival times
+                offered_rate = (counts.offered - 1) / duration
+                measurements.append(("offered_arrival_rate", "ops/s", sample_type, offered_rate))
+                measurements.append(("issued_arrival_rate", "ops/s", sample_type, offered_rate * counts.issued / counts.offered))
+        return measurements
+
+
 class AsyncExecutor:
+    # arrivals released by more than this many seconds after their scheduled time are considered late
+    DEFAULT_LATE_ARRIVAL_THRESHOLD = 0.01
+    DEFAULT_MAX_IN_FLIGHT_PER_CLIENT = 100
+
     def __init__(self, client_id, task, schedule, opensearch, sampler, profile_sampler, cancel, complete, on_error,
-                 config=None, shared_states=None, feedback_actor=None, error_queue=None, queue_lock=None):
+                 config=None, shared_states=None, feedback_actor=None, error_queue=None, queue_lock=None, driver_health=None):
         """
         Executes tasks according to the schedule for a given operation.
         """
@@ -2351,6 +3764,7 @@ class AsyncExecutor:
         self.feedback_actor = feedback_actor
         self.error_queue = error_queue
         self.queue_lock = queue_lock
+        self.driver_health = driver_health
         self.redline_enabled = self.cfg.opts("workload", "redline.test", mandatory=False) if self.cfg else False
 
         # Client options are fetched once during initialization, not on every request.
@@ -2360,8 +3774,63 @@ class AsyncExecutor:
         # Variables to keep track of during execution
         self.expected_scheduled_time = 0
         self.sample_type = None
+        # the sample type that has last been reported to the driver health
+        self.reported_sample_type = None
         self.runner = None
         self.task_completes_parent = False
+        self.profile_metrics_sample_count = 0
+
+        self.open_loop = AsyncExecutor._open_loop(task)
+        if self.open_loop:
+            self.max_in_flight = AsyncExecutor._max_in_flight(task)
+            self.drop_on_saturation = self._drop_on_saturation()
+            self.late_arrival_threshold = self._late_arrival_threshold()
+            self.arrival_stats = ArrivalStats()
+
+    @staticmethod
+    def max_concurrent_requests(task) -> int:
+        """
+        :param task: A task.
+        :return: The maximum number of requests that a single client of ``task`` has outstanding at the same time.
+        """
+        return AsyncExecutor._max_in_flight(task) if AsyncExecutor._open_loop(task) else 1
+
+    @staticmethod
+    def _open_loop(task) -> bool:
+        """
+        Determines whether requests arrive independently of completions (open loop) or whether the client waits for a
+        response before it issues the next request (closed loop, the default).
+        """
+        arrival_mode = task.params.get("arrival-mode", "closed")
+        if arrival_mode not in ("open", "closed"):
+            raise exceptions.SystemSetupError(
+                f"Unknown arrival-mode [{arrival_mode}] for task [{task}]. Use one of ['open', 'closed'].")
+        return arrival_mode == "open"
+
+    @staticmethod
+    def _max_in_flight(task) -> int:
+        """Get the maximum number of concurrent requests of a client of ``task`` from the task-wide 'max-in-flight' limit."""
+        max_in_flight = task.params.get("max-in-flight", AsyncExecutor.DEFAULT_MAX_IN_FLIGHT_PER_CLIENT * task.clients)
+        if not isinstance(max_in_flight, int) or max_in_flight < task.clients:
+            raise exceptions.SystemSetupError(f"'max-in-flight' of task [{task}] must be an integer of at least "
+                                              f"the number of clients [{task.clients}] but was [{max_in_flight}].")
+        return math.ceil(max_in_flight / task.clients)
+
+    def _drop_on_saturation(self) -> bool:
+        """Determines whether arrivals are dropped or queued when all in-flight slots are taken."""
+        on_saturation = self.task.params.get("on-saturation", "drop")
+        if on_saturation not in ("drop", "queue"):
+            raise exceptions.SystemSetupError(
+                f"Unknown on-saturation [{on_saturation}] for task [{self.task}]. Use one of ['drop', 'queue'].")
+        return on_saturation == "drop"
+
+    def _late_arrival_threshold(self) -> float:
+        """Get the delay in seconds after which a queued arrival is reported as late."""
+        threshold = self.task.params.get("late-arrival-threshold", AsyncExecutor.DEFAULT_LATE_ARRIVAL_THRESHOLD)
+        if isinstance(threshold, bool) or not isinstance(threshold, (int, float)) or threshold < 0:
+            raise exceptions.SystemSetupError(f"'late-arrival-threshold' of task [{self.task}] must be a non-negative number "
+                                              f"but was [{threshold}].")
+        return threshold
 
     def _get_client_options(self) -> dict:
         """Get client options from configuration."""
@@ -2399,6 +3868,8 @@ class AsyncExecutor:
     async def _execute_request(self, params: dict, expected_scheduled_time: float, total_start: float,
                                client_state: bool) -> dict:
         """Execute a request with timing control and error handling."""
+        # concurrent open-loop requests replace the current runner while this request is in flight
+        runner_for_request = self.runner
         request_timeout = (params or {}).get("request-timeout", None)
         absolute_expected_schedule_time = total_start + expected_scheduled_time
         throughput_throttled = expected_scheduled_time > 0
@@ -2411,6 +3882,8 @@ class AsyncExecutor:
         absolute_processing_start = time.time()
         processing_start = time.perf_counter()
         self.schedule_handle.before_request(processing_start)
+        if throughput_throttled and self.driver_health is not None:
+            self.driver_health.on_schedule_slip(self.task.name, max(processing_start - absolute_expected_schedule_time, 0))
 
         context_manager = await self._prepare_context_manager(params)
 
@@ -2420,7 +3893,7 @@ class AsyncExecutor:
             try:
                 total_ops, total_ops_unit, request_meta_data = await asyncio.wait_for(
                     execute_single(
-                        self.runner, self.opensearch, params, self.on_error,
+                        runner_for_request, self.opensearch, params, self.on_error,
                         redline_enabled=self.redline_enabled, client_enabled=client_state
                     ),
                     timeout=self.base_timeout if request_timeout is None else request_timeout
@@ -2498,7 +3971,8 @@ class AsyncExecutor:
             result_data["processing_end"],
             result_data["total_ops"],
             result_data["total_ops_unit"],
-            result_data["request_meta_data"]
+            result_data["request_meta_data"],
+            service_time
         )
 
         throughput = result_data["request_meta_data"].pop("throughput", None)
@@ -2557,47 +4031,158 @@ class AsyncExecutor:
             except queue.Full:
                 self.logger.warning("Error queue full; dropping error from client %s", self.client_id)
 
-    async def __call__(self, *args, **kwargs):
-        self.task_completes_parent = self.task.completes_parent
-        total_start = time.perf_counter()
+    def _on_sample_type(self, sample_type) -> None:
+        if sample_type != self.reported_sample_type and self.driver_health is not None:
+            self.driver_health.on_sample_type(self.task.name, sample_type)
+        self.reported_sample_type = sample_type
+
+    def _prepare_profiling(self, params: dict) -> bool:
+        """Decides whether the next request is profiled and marks its parameters accordingly."""
+        profile_metrics_sample_size = (params or {}).get("profile-metrics-sample-size", None)
+        add_profile_metric_sample = profile_metrics_sample_size and self.profile_metrics_sample_count < profile_metrics_sample_size
+        if add_profile_metric_sample:
+            self.profile_metrics_sample_count += 1
+            params["profile-query"] = True
+        elif params:
+            params["profile-query"] = False
+        return add_profile_metric_sample
+
+    async def _run_closed_loop(self, schedule, total_start: float) -> None:
+        """Issues the next request of the schedule only after the response to the previous one has been received."""
+        async for expected_scheduled_time, sample_type, task_progress, runner, params in schedule:
+            self.expected_scheduled_time = expected_scheduled_time
+            self._on_sample_type(sample_type)
+            self.sample_type = sample_type
+            self.runner = runner
 
-        self.logger.debug("Initializing schedule for client id [%s].", self.client_id)
-        schedule = self.schedule_handle()
-        self.schedule_handle.start()
-        rampup_wait_time = self.schedule_handle.ramp_up_wait_time
+            if self.cancel.is_set():
+                self.logger.info("User cancelled execution.")
+                break
 
-        await self._wait_for_rampup(rampup_wait_time)
+            # `execute_single` will handle the no-op if the client is paused.
+            client_state = (self.shared_states or {}).get(self.client_id, True)
+            add_profile_metric_sample = self._prepare_profiling(params)
 
-        self.logger.debug("Entering main loop for client id [%s].", self.client_id)
-        profile_metrics_sample_count = 0
+            result_data = await self._execute_request(params, expected_scheduled_time, total_start, client_state)
+
+            completed = self._process_results(result_data, total_start, client_state, task_progress, add_profile_metric_sample)
+
+            if completed:
+                self.logger.info("Task [%s] is considered completed due to external event.", self.task)
+                break
+
+    async def _run_open_loop(self, schedule, total_start: float) -> None:
+        """
+        Issues requests at their scheduled arrival time regardless of whether earlier requests have completed. At most
+        ``max_in_flight`` requests of this client are outstanding; further arrivals are either dropped or queued until a
+        request completes (and are then reported as late).
+        """
+        sched = self.schedule_handle.sched
+        if isinstance(sched, scheduler.UnitAwareScheduler):
+            # arrivals are scheduled ahead of any response so we cannot wait for the runner's feedback
+            sched.throttle_from_start()
+            sched = sched.scheduler
+        if isinstance(sched, scheduler.Unthrottled):
+            raise exceptions.SystemSetupError(f"Task [{self.task}] uses an open arrival-mode and thus requires a target "
+                                              f"throughput or a schedule that defines arrival times.")
+        in_flight_slots = asyncio.Semaphore(self.max_in_flight)
+        in_flight = set()
+        failures = []
+        completed = asyncio.Event()
+
+        def on_done(request):
+            in_flight.discard(request)
+            in_flight_slots.release()
+            if not request.cancelled() and request.exception() is not None:
+                failures.append(request.exception())
+
+        async def execute_arrival(expected_scheduled_time, sample_type, task_progress, runner, params, client_state):
+            add_profile_metric_sample = self._prepare_profiling(params)
+            # `_execute_request` picks up the runner before it suspends for the first time
+            self.runner = runner
+            result_data = await self._execute_request(params, expected_scheduled_time, total_start, client_state)
+            arrival_time = total_start + expected_scheduled_time
+            result_data["request_meta_data"]["queueing_delay"] = convert.seconds_to_ms(result_data["processing_start"] - arrival_time)
+            self.arrival_stats.attach(result_data["request_meta_data"], sample_type)
+            # `_process_results` does not suspend so restoring the state of this request is safe
+            self.expected_scheduled_time = expected_scheduled_time
+            self.sample_type = sample_type
+            self.runner = runner
+            if self._process_results(result_data, total_start, client_state, task_progress, add_profile_metric_sample):
+                completed.set()
+
+        start = time.perf_counter()
         try:
             async for expected_scheduled_time, sample_type, task_progress, runner, params in schedule:
-                self.expected_scheduled_time = expected_scheduled_time
-                self.sample_type = sample_type
-                self.runner = runner
-
                 if self.cancel.is_set():
                     self.logger.info("User cancelled execution.")
                     break
+                if failures:
+                    raise failures[0]
+                if completed.is_set():
+                    self.logger.info("Task [%s] is considered completed due to external event.", self.task)
+                    break
+                self._on_sample_type(sample_type)
+
+                arrival_time = total_start + expected_scheduled_time
+                rest = arrival_time - time.perf_counter()
+                if rest > 0:
+                    await asyncio.sleep(rest)
+
+                if in_flight_slots.locked() and self.drop_on_saturation:
+                    self.arrival_stats.on_dropped(sample_type, expected_scheduled_time)
+                    # let in-flight requests progress even if we are behind schedule
+                    await asyncio.sleep(0)
+                    continue
+                await in_flight_slots.acquire()
+                self.arrival_stats.on_issued(sample_type, expected_scheduled_time,
+                                             time.perf_counter() - arrival_time > self.late_arrival_threshold)
 
-                # `execute_single` will handle the no-op if the client is paused.
                 client_state = (self.shared_states or {}).get(self.client_id, True)
+                request = asyncio.create_task(
+                    execute_arrival(expected_scheduled_time, sample_type, task_progress, runner, params, client_state))
+                in_flight.add(request)
+                request.add_done_callback(on_done)
+
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+            if failures:
+                raise failures[0]
+        finally:
+            for request in list(in_flight):
+                request.cancel()
+            self._log_arrival_stats(time.perf_counter() - start)
+            if self.driver_health is not None:
+                self.driver_health.on_arrivals(self.task.name, self.arrival_stats.drain())
+
+    def _log_arrival_stats(self, duration: float) -> None:
+        stats = self.arrival_stats
+        if duration > 0:
+            self.logger.info("Client id [%s] offered [%d] arrivals for task [%s] ([%.2f] ops/s) and issued [%d] ([%.2f] ops/s); "
+                             "[%d] arrivals were dropped and [%d] were late.", self.client_id, stats.offered, self.task,
+                             stats.offered / duration, stats.issued, stats.issued / duration, stats.dropped, stats.late)
+        if stats.dropped:
+            console.warn(f"Client id [{self.client_id}] dropped [{stats.dropped}] of [{stats.offered}] arrivals for task "
+                         f"[{self.task}] because [{self.max_in_flight}] requests were in flight. Consider increasing "
+                         f"'max-in-flight' or reducing the target throughput.", logger=self.logger)
 
-                profile_metrics_sample_size = (params or {}).get("profile-metrics-sample-size", None)
-                add_profile_metric_sample = profile_metrics_sample_size and profile_metrics_sample_count < profile_metrics_sample_size
-                if add_profile_metric_sample:
-                    profile_metrics_sample_count += 1
-                    params["profile-query"] = True
-                elif params:
-                    params["profile-query"] = False
+    async def __call__(self, *args, **kwargs):
+        self.task_completes_parent = self.task.completes_parent
+        total_start = time.perf_counter()
 
-                result_data = await self._execute_request(params, expected_scheduled_time, total_start, client_state)
+        self.logger.debug("Initializing schedule for client id [%s].", self.client_id)
+        schedule = self.schedule_handle()
+        self.schedule_handle.start()
+        rampup_wait_time = self.schedule_handle.ramp_up_wait_time
 
-                completed = self._process_results(result_data, total_start, client_state, task_progress, add_profile_metric_sample)
+        await self._wait_for_rampup(rampup_wait_time)
 
-                if completed:
-                    self.logger.info("Task [%s] is considered completed due to external event.", self.task)
-                    break
+        self.logger.debug("Entering main loop for client id [%s].", self.client_id)
+        try:
+            if self.open_loop:
+                await self._run_open_loop(schedule, total_start)
+            else:
+                await self._run_closed_loop(schedule, total_start)
         except BaseException as e:
             self.logger.exception("Could not execute schedule")
             raise exceptions.BenchmarkError(f"Cannot run task [{self.task}]: {e}") from None
@@ -2608,6 +4193,8 @@ class AsyncExecutor:
                     self.task, self.client_id
                 )
                 self.complete.set()
+            # the event loop outlives this task so the schedule is not closed implicitly on loop shutdown
+            await schedule.aclose()
             await self._cleanup()
 
 request_context_holder = client.RequestContextHolder()
@@ -2912,6 +4499,8 @@ def schedule_for(task_allocation, parameter_source):
         if client_index == 0:
             logger.debug("Setting parameter source [%s] for scheduler [%s]", params_for_op, sched)
         sched.parameter_source = params_for_op
+    if hasattr(sched, "client_index"):
+        sched.client_index = client_index
 
     if requires_time_period_schedule(task, runner_for_op, params_for_op):
         warmup_time_period = task.warmup_time_period if task.warmup_time_period else 0
@@ -2979,11 +4568,7 @@ class ScheduleHandle:
         self.task_progress_control = task_progress_control
         self.runner = runner
         self.params = params
-        # TODO: Can we offload the parameter source execution to a different thread / process? Is this too heavy-weight?
-        # from concurrent.futures import ThreadPoolExecutor
-        # import asyncio
-        # self.io_pool_exc = ThreadPoolExecutor(max_workers=1)
-        # self.loop = asyncio.get_event_loop()
+
     @property
     def ramp_up_wait_time(self):
         """
@@ -3001,8 +4586,31 @@ class ScheduleHandle:
     def before_request(self, now):
         self.sched.before_request(now)
 
-    def after_request(self, now, weight, unit, request_meta_data):
+    def after_request(self, now, weight, unit, request_meta_data, service_time=None):
         self.sched.after_request(now, weight, unit, request_meta_data)
+        # parameter sources may adapt subsequent requests based on feedback (e.g. adaptive bulk sizes)
+        if service_time is not None and hasattr(self.params, "after_request"):
+            self.params.after_request(service_time, weight, unit, request_meta_data)
+
+    async def wait_for_params(self):
+        """
+        Waits without blocking the event loop until parameter sources that generate parameters in the background (see ``params_ready``)
+        have generated the parameters for the next request. They signal readiness from their background thread.
+        """
+        if hasattr(self.params, "params_ready"):
+            loop = asyncio.get_running_loop()
+            ready = asyncio.Event()
+
+            def on_ready():
+                try:
+                    loop.call_soon_threadsafe(ready.set)
+                except RuntimeError:
+                    # the event loop has been closed in the meantime (e.g. because the task has been cancelled)
+                    pass
+
+            while not self.params.params_ready(on_ready):
+                await ready.wait()
+                ready.clear()
 
     async def __call__(self):
         next_scheduled = 0
@@ -3013,7 +4621,7 @@ class ScheduleHandle:
                     next_scheduled = self.sched.next(next_scheduled)
                     # does not contribute at all to completion. Hence, we cannot define completion.
                     task_progress = self.params.task_progress if param_source_knows_progress else None
-                    # current_params = await self.loop.run_in_executor(self.io_pool_exc, self.params.params)
+                    await self.wait_for_params()
                     yield (next_scheduled, self.task_progress_control.sample_type, task_progress, self.runner,
                            self.params.params())
                     self.task_progress_control.next()
@@ -3023,7 +4631,7 @@ class ScheduleHandle:
             while not self.task_progress_control.completed:
                 try:
                     next_scheduled = self.sched.next(next_scheduled)
-                    #current_params = await self.loop.run_in_executor(self.io_pool_exc, self.params.params)
+                    await self.wait_for_params()
                     yield (next_scheduled,
                            self.task_progress_control.sample_type,
                            self.task_progress_control.task_progress,
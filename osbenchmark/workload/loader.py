@@ -31,6 +31,7 @@ import sys
 import shutil
 import tempfile
 import urllib.error
+import urllib.parse
 
 import jinja2
 import jinja2.exceptions
@@ -81,6 +82,8 @@ class WorkloadProcessorRegistry:
         self.workload_processors = []
         self.offline = cfg.opts("system", "offline.mode")
         self.test_mode = cfg.opts("workload", "test.mode.enabled", mandatory=False, default_value=False)
+        self.download_streams = int(cfg.opts("workload", "download.streams", mandatory=False, default_value=net.DEFAULT_DOWNLOAD_STREAMS))
+        self.download_streaming = convert.to_bool(cfg.opts("workload", "download.streaming", mandatory=False, default_value=False))
         self.base_config = cfg
         self.custom_configuration = False
 
@@ -92,7 +95,7 @@ class WorkloadProcessorRegistry:
             # stop resetting self.workload_processors
             self.custom_configuration = True
         if hasattr(processor, "downloader"):
-            processor.downloader = Downloader(self.offline, self.test_mode)
+            processor.downloader = Downloader(self.offline, self.test_mode, self.download_streams, self.download_streaming)
         if hasattr(processor, "decompressor"):
             processor.decompressor = Decompressor()
         self.workload_processors.append(processor)
@@ -429,7 +432,9 @@ class DefaultWorkloadPreparator(WorkloadProcessor):
                     preparator.prepare_document_set(document_set, data_root[1])
 
     def on_prepare_workload(self, workload, data_root_dir):
-        prep = DocumentSetPreparator(workload.name, self.downloader, self.decompressor)
+        offset_table_interval = int(self.cfg.opts("workload", "offset.table.interval", mandatory=False,
+                                                  default_value=io.FILE_OFFSET_TABLE_INTERVAL))
+        prep = DocumentSetPreparator(workload.name, self.downloader, self.decompressor, offset_table_interval)
         for corpus in used_corpora(workload):
             params = {
                 "cfg": self.cfg,
@@ -466,28 +471,87 @@ class Decompressor:
 
 
 class Downloader:
-    def __init__(self, offline, test_mode):
+    def __init__(self, offline, test_mode, streams=net.DEFAULT_DOWNLOAD_STREAMS, streaming=False):
         self.offline = offline
         self.test_mode = test_mode
+        self.streams = streams
+        # whether archives should be decompressed while they are downloaded (opt-in: such downloads cannot be resumed and use
+        # single-threaded in-process decompressors instead of pbzip2 or pigz)
+        self.streaming = streaming
         self.logger = logging.getLogger(__name__)
 
-    def download(self, base_url, source_url, target_path, size_in_bytes):
-        file_name = os.path.basename(target_path)
-
+    def _data_url(self, base_url, source_url, target_path):
         if not base_url:
             raise exceptions.DataError("Cannot download data because no base URL is provided.")
         if self.offline:
             raise exceptions.SystemSetupError(f"Cannot find [{target_path}]. Please disable offline mode and retry.")
 
         if source_url:
-            data_url = source_url
+            return source_url
+        if base_url.endswith("/"):
+            separator = ""
         else:
-            if base_url.endswith("/"):
-                separator = ""
-            else:
-                separator = "/"
-            # join manually as `urllib.parse.urljoin` does not work with S3 or GS URL schemes.
-            data_url = f"{base_url}{separator}{file_name}"
+            separator = "/"
+        # join manually as `urllib.parse.urljoin` does not work with S3 or GS URL schemes.
+        return f"{base_url}{separator}{os.path.basename(target_path)}"
+
+    def download(self, base_url, source_url, target_path, size_in_bytes):
+        data_url = self._data_url(base_url, source_url, target_path)
+        self._download(data_url, target_path, size_in_bytes,
+                       lambda progress: net.download(data_url, target_path, size_in_bytes, progress_indicator=progress, streams=self.streams))
+
+    def can_download_and_decompress(self, base_url, source_url, archive_path):
+        url = source_url or base_url
+        return self.streaming and url is not None and urllib.parse.urlparse(url).scheme in ["http", "https"] and \
+            io.supports_streaming_decompression(archive_path)
+
+    def download_and_decompress(self, base_url, source_url, archive_path, documents_path, compressed_size, uncompressed_size,
+                                offset_table_interval=io.FILE_OFFSET_TABLE_INTERVAL):
+        """
+        Downloads an archive and decompresses it on the fly into ``documents_path``. The file offset table of the documents file is
+        built at the same time. The archive itself is not stored.
+
+        :return: The number of lines in the documents file.
+        """
+        data_url = self._data_url(base_url, source_url, archive_path)
+        decompressor = io.StreamingDecompressor(archive_path, documents_path, offset_table_interval)
+
+        def download_fn(progress):
+            with decompressor:
+                net.stream_http(data_url, decompressor.write, progress_indicator=progress, streams=self.streams)
+                if compressed_size is not None and decompressor.compressed_bytes != compressed_size:
+                    raise exceptions.DataError(f"Download of [{data_url}] is corrupt. Downloaded [{decompressor.compressed_bytes}] "
+                                               f"bytes but [{compressed_size}] bytes are expected. Please retry.")
+
+        self._download(data_url, documents_path, uncompressed_size, download_fn)
+        return decompressor.lines
+
+    def download_parts(self, base_url, parts, target_path, size_in_bytes):
+        """
+        Downloads the parts of a file (a list of dicts with the keys ``name`` and ``size``) into ``target_path``. HTTP(S) parts are
+        downloaded concurrently and directly into their final position in the target file.
+        """
+        part_urls = [self._data_url(base_url, None, os.path.join(os.path.dirname(target_path), part["name"])) for part in parts]
+        if all(urllib.parse.urlparse(url).scheme in ["http", "https"] for url in part_urls):
+            self._download(", ".join(part_urls), target_path, size_in_bytes,
+                           lambda progress: net.download_parts([(url, part["size"]) for url, part in zip(part_urls, parts)], target_path,
+                                                               progress_indicator=progress, streams=self.streams))
+        else:
+            for part in parts:
+                self.download(base_url, None, os.path.join(os.path.dirname(target_path), part["name"]), part["size"])
+            try:
+                with open(target_path, "wb") as outfile:
+                    console.info(f"Concatenating file parts {', '.join([p['name'] for p in parts])}"
+                                 f" into {os.path.basename(target_path)}", flush=True, logger=self.logger)
+                    for part in parts:
+                        part_name = os.path.join(os.path.dirname(target_path), part["name"])
+                        with open(part_name, "rb") as infile:
+                            shutil.copyfileobj(infile, outfile)
+                            os.remove(part_name)
+            except Exception as e:
+                raise exceptions.DataError(f"Encountered exception {repr(e)} when building corpus file from parts")
+
+    def _download(self, data_url, target_path, size_in_bytes, download_fn):
         try:
             io.ensure_dir(os.path.dirname(target_path))
             if size_in_bytes:
@@ -499,7 +563,7 @@ class Downloader:
             # we want to have a bit more accurate download progress as these files are typically very large
             progress = net.Progress("[INFO] Downloading workload data file: " + os.path.basename(target_path),
                                     accuracy=1)
-            net.download(data_url, target_path, size_in_bytes, progress_indicator=progress)
+            download_fn(progress)
             progress.finish()
             self.logger.info("Downloaded data from [%s] to [%s].", data_url, target_path)
         except urllib.error.HTTPError as e:
@@ -527,10 +591,11 @@ class Downloader:
 
 
 class DocumentSetPreparator:
-    def __init__(self, workload_name, downloader, decompressor):
+    def __init__(self, workload_name, downloader, decompressor, offset_table_interval=io.FILE_OFFSET_TABLE_INTERVAL):
         self.workload_name = workload_name
         self.downloader = downloader
         self.decompressor = decompressor
+        self.offset_table_interval = offset_table_interval
         self.logger = logging.getLogger(__name__)
 
     def is_locally_available(self, file_name):
@@ -540,8 +605,9 @@ class DocumentSetPreparator:
         return expected_size is None or os.path.getsize(file_name) == expected_size
 
     def create_file_offset_table(self, document_file_path, base_url, source_url, expected_number_of_lines):
-        # just rebuild the file every time for the time being. Later on, we might check the data file fingerprint to avoid it
-        lines_read = io.prepare_file_offset_table(document_file_path, base_url, source_url, self.downloader)
+        # the file offset table is only rebuilt if it does not match the fingerprint of the data file
+        lines_read = io.prepare_file_offset_table(document_file_path, base_url, source_url, self.downloader,
+                                                  interval=self.offset_table_interval)
         if lines_read and lines_read != expected_number_of_lines:
             io.remove_file_offset_table(document_file_path)
             raise exceptions.DataError(f"Data in [{document_file_path}] for workload [{self.workload_name}] are invalid. "
@@ -585,20 +651,17 @@ class DocumentSetPreparator:
                     raise exceptions.BenchmarkAssertionError(f"Workload {self.workload_name} specifies documents but no corpus")
 
                 try:
-                    if document_set.document_file_parts:
-                        for part in document_set.document_file_parts:
-                            self.downloader.download(document_set.base_url, None, os.path.join(data_root, part["name"]), part["size"])
-                        try:
-                            with open(target_path, "wb") as outfile:
-                                console.info(f"Concatenating file parts {', '.join([p['name'] for p in document_set.document_file_parts])}"
-                                             f" into {os.path.basename(target_path)}", flush=True, logger=self.logger)
-                                for part in document_set.document_file_parts:
-                                    part_name = os.path.join(data_root, part["name"])
-                                    with open(part_name, "rb") as infile:
-                                        shutil.copyfileobj(infile, outfile)
-                                        os.remove(part_name)
-                        except Exception as e:
-                            raise exceptions.DataError(f"Encountered exception {repr(e)} when building corpus file from parts")
+                    if document_set.has_compressed_corpus() and not document_set.document_file_parts and \
+                            self.downloader.can_download_and_decompress(document_set.base_url, document_set.source_url, archive_path):
+                        lines = self.downloader.download_and_decompress(document_set.base_url, document_set.source_url, archive_path,
+                                                                        doc_path, expected_size, document_set.uncompressed_size_in_bytes,
+                                                                        offset_table_interval=self.offset_table_interval)
+                        if document_set.support_file_offset_table and lines != document_set.number_of_lines:
+                            io.remove_file_offset_table(doc_path)
+                            raise exceptions.DataError(f"Data in [{doc_path}] for workload [{self.workload_name}] are invalid. "
+                                                       f"Expected [{document_set.number_of_lines}] lines but got [{lines}].")
+                    elif document_set.document_file_parts:
+                        self.downloader.download_parts(document_set.base_url, document_set.document_file_parts, target_path, expected_size)
                     else:
                         self.downloader.download(document_set.base_url, document_set.source_url, target_path, expected_size)
                 except exceptions.DataError as e:
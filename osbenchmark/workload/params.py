@@ -25,24 +25,34 @@
 import os
 import collections
 import copy
+import functools
+import hashlib
 import inspect
+import json
 import logging
 import math
+import mmap
 import numbers
 import operator
+import queue
 import random
 import re
+import threading
 import time
 import multiprocessing
+import weakref
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from abc import ABC, abstractmethod
 from enum import Enum
 from typing import List, Dict, Any, Optional, Tuple
 
 import numpy as np
+import zstandard as zstd
 
 from osbenchmark import exceptions
-from osbenchmark.utils import io
-from osbenchmark.utils.dataset import DataSet, get_data_set, Context
+from osbenchmark.utils import convert, io
+from osbenchmark.utils.dataset import DataSet, PrefetchingDataSet, get_data_set, Context
 from osbenchmark.utils.parse import parse_string_parameter, parse_int_parameter
 from osbenchmark.workload import loader, workload
 from osbenchmark.workload.ingestion_manager import IngestionManager
@@ -698,12 +708,74 @@ class BulkIndexParamSource(ParamSource):
         except ValueError:
             raise exceptions.InvalidSyntax("'batch-size' must be numeric")
 
+        self.body_compression = params.get("body-compression")
+        if self.body_compression is not None:
+            if self.body_compression not in BULK_BODY_COMPRESSORS:
+                raise exceptions.InvalidSyntax("Unknown 'body-compression' setting [{}]".format(self.body_compression))
+            try:
+                self.body_compression_level = int(params.get("body-compression-level", BULK_BODY_COMPRESSORS[self.body_compression][1]))
+            except ValueError:
+                raise exceptions.InvalidSyntax("'body-compression-level' must be numeric")
+        else:
+            self.body_compression_level = None
+
+        try:
+            # compressing bodies on the event loop would distort latency so they are always prefetched
+            self.prefetch_bulks = int(params.get("prefetch-bulks", DEFAULT_COMPRESSED_PREFETCH_BULKS if self.body_compression else 0))
+            if self.prefetch_bulks < 0:
+                raise exceptions.InvalidSyntax("'prefetch-bulks' must be non-negative but was %d" % self.prefetch_bulks)
+        except ValueError:
+            raise exceptions.InvalidSyntax("'prefetch-bulks' must be numeric")
+
         self.ingest_percentage = self.float_param(params, name="ingest-percentage", default_value=100, min_value=0, max_value=100)
         self.looped = params.get("looped", False)
+        self.adaptive_bulk_size = self.adaptive_bulk_size_param(params)
+        if self.adaptive_bulk_size and params.get("bulk-cache", False):
+            raise exceptions.InvalidSyntax("'bulk-cache' cannot be used with 'adaptive-bulk-size'")
+        if params.get("bulk-cache", False):
+            if any(corpus.streaming_ingestion for corpus in self.corpora):
+                raise exceptions.InvalidSyntax("'bulk-cache' cannot be used with streaming ingestion")
+            self.bulk_cache_dir = params.get("bulk-cache-dir", DEFAULT_BULK_CACHE_DIR)
+            self.bulk_cache_max_size = convert.gb_to_bytes(self.float_param(params, name="bulk-cache-max-size-gb",
+                                                                            default_value=DEFAULT_BULK_CACHE_MAX_SIZE_GB,
+                                                                            min_value=0, max_value=math.inf))
+        else:
+            self.bulk_cache_dir = None
+            self.bulk_cache_max_size = None
         self.param_source = PartitionBulkIndexParamSource(self.corpora, self.batch_size, self.bulk_size,
                                                           self.ingest_percentage, self.id_conflicts,
                                                           self.conflict_probability, self.on_conflict,
-                                                          self.recency, self.pipeline, self.looped, self._params)
+                                                          self.recency, self.pipeline, self.looped, self._params,
+                                                          self.prefetch_bulks, self.body_compression, self.body_compression_level,
+                                                          self.bulk_cache_dir, self.adaptive_bulk_size,
+                                                          bulk_cache_max_size=self.bulk_cache_max_size)
+
+    def adaptive_bulk_size_param(self, params):
+        adaptive = params.get("adaptive-bulk-size")
+        if not adaptive:
+            return None
+        if not isinstance(adaptive, dict):
+            raise exceptions.InvalidSyntax("'adaptive-bulk-size' must be an object")
+        try:
+            min_bulk_size = int(adaptive.get("min-bulk-size", 1))
+            max_bulk_size = int(adaptive.get("max-bulk-size", self.bulk_size * 10))
+        except ValueError:
+            raise exceptions.InvalidSyntax("'min-bulk-size' and 'max-bulk-size' must be numeric")
+        if not 0 < min_bulk_size <= self.bulk_size <= max_bulk_size:
+            raise exceptions.InvalidSyntax("'bulk-size' [{}] must be between 'min-bulk-size' [{}] and 'max-bulk-size' [{}]".format(
+                self.bulk_size, min_bulk_size, max_bulk_size))
+        target_latency = adaptive.get("target-latency")
+        if target_latency is not None:
+            try:
+                target_latency = float(target_latency)
+            except ValueError:
+                raise exceptions.InvalidSyntax("'target-latency' must be numeric")
+            if target_latency <= 0:
+                raise exceptions.InvalidSyntax("'target-latency' must be positive but was {}".format(target_latency))
+        measure = adaptive.get("measure", "service-time")
+        if measure not in AdaptiveBulkSize.MEASURES:
+            raise exceptions.InvalidSyntax("Unknown 'measure' setting [{}] for 'adaptive-bulk-size'".format(measure))
+        return AdaptiveBulkSize(self.bulk_size, min_bulk_size, max_bulk_size, target_latency, measure)
 
     def float_param(self, params, name, default_value, min_value, max_value, min_operator=operator.le):
         try:
@@ -750,7 +822,9 @@ class BulkIndexParamSource(ParamSource):
 
 class PartitionBulkIndexParamSource:
     def __init__(self, corpora, batch_size, bulk_size, ingest_percentage, id_conflicts, conflict_probability,
-                 on_conflict, recency, pipeline=None, looped = False,  original_params=None):
+                 on_conflict, recency, pipeline=None, looped = False,  original_params=None, prefetch_bulks=0,
+                 body_compression=None, body_compression_level=None, bulk_cache_dir=None, adaptive_bulk_size=None,
+                 bulk_cache_max_size=None):
         """
 
         :param corpora: Specification of affected document corpora.
@@ -765,6 +839,17 @@ class PartitionBulkIndexParamSource:
         :param pipeline: The name of the ingest pipeline to run.
         :param looped: Set to True for looped mode where bulk requests are repeated from the beginning when entire corpus was ingested.
         :param original_params: The original dict passed to the parent parameter source.
+        :param prefetch_bulks: The number of bulk requests that are generated ahead by a background thread. ``0`` (default) generates
+                               bulk requests on demand.
+        :param body_compression: The content encoding (``gzip`` or ``zstd``) with which bulk bodies are compressed ahead of time.
+                                 ``None`` (default) sends uncompressed bodies.
+        :param body_compression_level: The compression level. Only relevant if ``body_compression`` is set.
+        :param bulk_cache_dir: The directory in which bulk requests are cached across runs. Relative paths are resolved against the
+                               directory of the first document file. ``None`` (default) disables caching.
+        :param adaptive_bulk_size: An ``AdaptiveBulkSize`` that adjusts the bulk size between requests. ``None`` (default) keeps the
+                                   bulk size constant.
+        :param bulk_cache_max_size: The maximum size in bytes of all cached bulk requests in ``bulk_cache_dir``. ``None`` (default)
+                                    does not limit the size.
         """
         self.corpora = corpora
         self.partitions = []
@@ -779,11 +864,22 @@ class PartitionBulkIndexParamSource:
         self.pipeline = pipeline
         self.looped = looped
         self.original_params = original_params
+        self.prefetch_bulks = prefetch_bulks
+        self.body_compression = body_compression
+        self.body_compression_level = body_compression_level
+        self.bulk_cache_dir = bulk_cache_dir
+        self.bulk_cache_max_size = bulk_cache_max_size
+        self.adaptive_bulk_size = adaptive_bulk_size
+        self.readers = None
         # this is only intended for unit-testing
         self.create_reader = original_params.pop("__create_reader", create_default_reader)
+        self.internal_params = None
         self.current_bulk = 0
         # use a value > 0 so task_progress returns a sensible value
         self.total_bulks = 1
+        # only tracked with adaptive bulk sizes where the number of bulks is not known upfront
+        self.current_docs = 0
+        self.total_docs = 1
         self.infinite = False
         self.streaming_ingestion = corpora[0].streaming_ingestion
 
@@ -796,18 +892,53 @@ class PartitionBulkIndexParamSource:
         self.partitions.append(partition_index)
 
     def params(self):
-        if self.current_bulk == 0:
+        if not self._ensure_internal_params():
+            raise StopIteration()
+        self.current_bulk += 1
+        bulk = next(self.internal_params)
+        self.current_docs += bulk["bulk-size"]
+        return bulk
+
+    def after_request(self, service_time, weight, unit, request_meta_data):
+        """
+        Adjusts the bulk size of subsequent bulk requests based on the latency of a completed bulk request if adaptive bulk sizing is
+        enabled.
+        """
+        if self.adaptive_bulk_size and self.adaptive_bulk_size.update(service_time, weight, request_meta_data) and self.readers:
+            for reader in self.readers:
+                reader.resize(self.adaptive_bulk_size.bulk_size)
+
+    def params_ready(self, on_ready=None):
+        """
+        :param on_ready: An optional callback without arguments that is invoked from a background thread once ``params`` can return
+                         without waiting. It is only invoked if this method returns ``False``.
+        :return: True iff ``params`` can return without waiting for a bulk request to be generated in the background.
+        """
+        if not self.prefetch_bulks or not self._ensure_internal_params():
+            return True
+        return self.internal_params.ready(on_ready)
+
+    def _ensure_internal_params(self):
+        """
+        :return: False iff all bulk requests have been generated.
+        """
+        if self.internal_params is None:
             self._init_internal_params()
         # self.internal_params always reads all files. This is necessary to ensure we terminate early in case
         # the user has specified ingest percentage.
-        if not self.streaming_ingestion and self.current_bulk == self.total_bulks:
+        if not self.streaming_ingestion and self._all_bulks_issued():
             if self.looped:
                 self.current_bulk = 0
+                self.current_docs = 0
                 self._init_internal_params()
             else:
-                raise StopIteration()
-        self.current_bulk += 1
-        return next(self.internal_params)
+                return False
+        return True
+
+    def _all_bulks_issued(self):
+        if self.adaptive_bulk_size:
+            return self.current_docs >= self.total_docs
+        return self.current_bulk == self.total_bulks
 
     def _init_internal_params(self):
         # contains a continuous range of client ids
@@ -815,18 +946,58 @@ class PartitionBulkIndexParamSource:
         start_index = self.partitions[0]
         end_index = self.partitions[-1]
 
-        self.internal_params = bulk_data_based(self.total_partitions, start_index, end_index, self.corpora,
-                                               self.batch_size, self.bulk_size, self.id_conflicts,
-                                               self.conflict_probability, self.on_conflict, self.recency,
-                                               self.pipeline, self.original_params, self.create_reader)
-
         if not self.streaming_ingestion:
             all_bulks = number_of_bulks(self.corpora, start_index, end_index, self.total_partitions, self.bulk_size)
             self.total_bulks = math.ceil((all_bulks * self.ingest_percentage) / 100)
+            all_docs = number_of_documents(self.corpora, start_index, end_index, self.total_partitions)
+            self.total_docs = math.ceil((all_docs * self.ingest_percentage) / 100)
+
+        cache = self._bulk_cache(start_index, end_index) if self.bulk_cache_dir else None
+        if self.adaptive_bulk_size:
+            bulk_size = self.adaptive_bulk_size.bulk_size
+            # read exactly one bulk at a time so a new bulk size takes effect with the next bulk
+            self.readers = create_readers(self.total_partitions, start_index, end_index, self.corpora, bulk_size, bulk_size,
+                                          self.id_conflicts, self.conflict_probability, self.on_conflict, self.recency,
+                                          self.create_reader)
+            self.internal_params = bulk_generator(chain(*self.readers), self.pipeline, self.original_params)
+            if self.body_compression:
+                self.internal_params = compress_bulks(self.internal_params, self.body_compression, self.body_compression_level)
+        elif cache and cache.exists():
+            self.internal_params = bulk_generator(cache.replay(), self.pipeline, self.original_params)
+            if self.body_compression:
+                self.internal_params = with_body_encoding(self.internal_params, self.body_compression)
+        else:
+            self.internal_params = bulk_data_based(self.total_partitions, start_index, end_index, self.corpora,
+                                                   self.batch_size, self.bulk_size, self.id_conflicts,
+                                                   self.conflict_probability, self.on_conflict, self.recency,
+                                                   self.pipeline, self.original_params, self.create_reader)
+            if self.body_compression:
+                self.internal_params = compress_bulks(self.internal_params, self.body_compression, self.body_compression_level)
+            if cache:
+                self.internal_params = cache.record(self.internal_params, all_bulks)
+        if self.prefetch_bulks:
+            self.internal_params = BulkPrefetcher(self.internal_params, self.prefetch_bulks)
+
+    def _bulk_cache(self, start_index, end_index):
+        cache_dir = self.bulk_cache_dir
+        if not os.path.isabs(cache_dir):
+            document_file = self.corpora[0].documents[0].document_file
+            cache_dir = os.path.join(os.path.dirname(document_file), cache_dir)
+        key = BulkCache.key(self.corpora, total_partitions=self.total_partitions, start_index=start_index, end_index=end_index,
+                            batch_size=self.batch_size, bulk_size=self.bulk_size, id_conflicts=self.id_conflicts.name,
+                            conflict_probability=self.conflict_probability, on_conflict=self.on_conflict, recency=self.recency,
+                            body_compression=self.body_compression, body_compression_level=self.body_compression_level)
+        return BulkCache(cache_dir, key, self.bulk_cache_max_size)
 
     @property
     def task_progress(self):
-        return (IngestionManager.rd_index.value * IngestionManager.chunk_size/1000, 'GB') if self.streaming_ingestion else (self.current_bulk / self.total_bulks, '%')
+        if self.streaming_ingestion:
+            return IngestionManager.rd_index.value * IngestionManager.chunk_size/1000, 'GB'
+        elif self.adaptive_bulk_size:
+            return min(self.current_docs / self.total_docs, 1.0), '%'
+        else:
+            return self.current_bulk / self.total_bulks, '%'
+
 
 
 class OpenPointInTimeParamSource(ParamSource):
@@ -919,6 +1090,9 @@ class VectorDataSetPartitionParamSource(ParamSource):
         task_progress: Progress indicator for how exhausted data set is
         offset: Offset into the data set to start at. Relevant when there are
                 multiple partitions
+        prefetch_blocks: Number of blocks that each partition reads ahead on a
+                background thread. 0 disables read-ahead.
+        prefetch_block_size: Number of vectors per read-ahead block
     """
     NESTED_FIELD_SEPARATOR = "."
 
@@ -932,6 +1106,8 @@ class VectorDataSetPartitionParamSource(ParamSource):
         self.data_set_corpus = parse_string_parameter("data_set_corpus", params, "")
         self._validate_data_set(self.data_set_path, self.data_set_corpus)
         self.total_num_vectors: int = parse_int_parameter("num_vectors", params, -1)
+        self.prefetch_blocks: int = parse_int_parameter("prefetch_blocks", params, 0)
+        self.prefetch_block_size: int = parse_int_parameter("prefetch_block_size", params, 1000)
         self.num_vectors = 0
         self.total = 1
         self.current = 0
@@ -1012,15 +1188,21 @@ class VectorDataSetPartitionParamSource(ParamSource):
             partition_x.num_vectors += remaining_vectors
 
         # We need to create a new instance of the data set for each client
-        partition_x.data_set = get_data_set(
-            self.data_set_format,
-            self.data_set_path,
-            self.context
-        )
-        partition_x.data_set.seek(partition_x.offset)
+        partition_x.data_set = partition_x.open_partition_data_set(self.data_set_format, self.data_set_path, self.context)
         partition_x.current = partition_x.offset
         return partition_x
 
+    def open_partition_data_set(self, data_set_format, data_set_path, context) -> DataSet:
+        """
+        Opens a data set positioned at the offset of this partition. If enabled, the vectors of this partition are read ahead on a
+        background thread.
+        """
+        data_set = get_data_set(data_set_format, data_set_path, context)
+        if self.prefetch_blocks > 0:
+            data_set = PrefetchingDataSet(data_set, self.prefetch_block_size, self.prefetch_blocks, end=self.offset + self.num_vectors)
+        data_set.seek(self.offset)
+        return data_set
+
     def get_split_fields(self) -> Tuple[str, str]:
         fields_as_array = self.field_name.split(self.NESTED_FIELD_SEPARATOR)
 
@@ -1233,16 +1415,14 @@ class VectorSearchPartitionParamSource(VectorDataSetPartitionParamSource):
         else:
             neighbors_context = Context.NEIGHBORS
 
-        partition.neighbors_data_set = get_data_set(
+        partition.neighbors_data_set = partition.open_partition_data_set(
             self.neighbors_data_set_format, self.neighbors_data_set_path, neighbors_context)
-        partition.neighbors_data_set.seek(partition.offset)
 
         if self.radial_search_type:
             threshold_context = self.RADIAL_THRESHOLD_CONTEXTS[
                 (self.radial_engine, self.radial_search_type)]
-            partition.threshold_data_set = get_data_set(
+            partition.threshold_data_set = partition.open_partition_data_set(
                 self.neighbors_data_set_format, self.neighbors_data_set_path, threshold_context)
-            partition.threshold_data_set.seek(partition.offset)
 
         return partition
 
@@ -1408,16 +1588,14 @@ class BulkVectorsFromDataSetParamSource(VectorDataSetPartitionParamSource):
             self.parent_data_set_path = self.data_set_path
         # add neighbor instance to partition
         if self.is_nested:
-            partition.parent_data_set = get_data_set(
+            partition.parent_data_set = partition.open_partition_data_set(
                 self.parent_data_set_format, self.parent_data_set_path, Context.PARENTS
             )
-            partition.parent_data_set.seek(partition.offset)
 
         if self.filter_attributes:
-            partition.attributes_data_set = get_data_set(
+            partition.attributes_data_set = partition.open_partition_data_set(
                 self.parent_data_set_format, self.parent_data_set_path, Context.ATTRIBUTES
             )
-            partition.attributes_data_set.seek(partition.offset)
 
         return partition
 
@@ -1620,13 +1798,27 @@ def number_of_bulks(corpora, start_partition_index, end_partition_index, total_p
     return bulks
 
 
-def build_conflicting_ids(conflicts, docs_to_index, offset, shuffle=random.shuffle):
+def number_of_documents(corpora, start_partition_index, end_partition_index, total_partitions):
+    """
+    :return: The number of documents that the given client will index.
+    """
+    num_docs = 0
+    for corpus in corpora:
+        for docs in corpus.documents:
+            _, docs_in_partition, _ = bounds(docs.number_of_documents, start_partition_index, end_partition_index,
+                                             total_partitions, docs.includes_action_and_meta_data)
+            num_docs += docs_in_partition
+    return num_docs
+
+
+def build_conflicting_ids(conflicts, docs_to_index, offset, shuffle=np.random.shuffle):
+    """
+    :return: ``None`` if no conflicts should be generated, otherwise an ``int64`` array of all document ids for this partition.
+    """
     if conflicts is None or conflicts == IndexIdConflict.NoConflicts:
         return None
-    all_ids = [0] * docs_to_index
-    for i in range(docs_to_index):
-        # always consider the offset as each client will index its own range and we don't want uncontrolled conflicts across clients
-        all_ids[i] = "%010d" % (offset + i)
+    # always consider the offset as each client will index its own range and we don't want uncontrolled conflicts across clients
+    all_ids = np.arange(offset, offset + docs_to_index, dtype=np.int64)
     if conflicts == IndexIdConflict.RandomConflicts:
         shuffle(all_ids)
     return all_ids
@@ -1665,7 +1857,7 @@ def create_default_reader(corpus, docs, offset, num_lines, num_docs, batch_size,
     else:
         am_handler = GenerateActionMetaData(target, docs.target_type,
                                             build_conflicting_ids(id_conflicts, num_docs, offset), conflict_probability,
-                                            on_conflict, recency, use_create=use_create)
+                                            on_conflict, recency, use_create=use_create, rng=np.random.default_rng())
         return MetadataIndexDataReader(docs.document_file, batch_size, bulk_size, source, am_handler, target, docs.target_type)
 
 
@@ -1749,6 +1941,430 @@ def bulk_generator(readers, pipeline, original_params):
             yield params
 
 
+def _gzip_compress(body, level):
+    return zlib.compress(body, level, wbits=zlib.MAX_WBITS | 16)
+
+
+def _zstd_compress(body, level):
+    # compressors are not thread-safe
+    return zstd.ZstdCompressor(level=level).compress(body)
+
+
+# compression function and default compression level per content encoding
+BULK_BODY_COMPRESSORS = {
+    "gzip": (_gzip_compress, 1),
+    "zstd": (_zstd_compress, 3),
+}
+
+# number of bulk requests that are prefetched by default if bodies are compressed
+DEFAULT_COMPRESSED_PREFETCH_BULKS = 4
+
+# directory in which bulk requests are cached, relative to the directory of the first document file
+DEFAULT_BULK_CACHE_DIR = "bulk-cache"
+# disk space that all cached bulk requests in a cache directory may take before least recently used entries are evicted
+DEFAULT_BULK_CACHE_MAX_SIZE_GB = 50
+
+
+@functools.lru_cache(maxsize=1)
+def _compression_pool():
+    # shared by all clients of a worker. zlib and zstd release the GIL while compressing.
+    return ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="bulk-compression")
+
+
+def with_body_encoding(bulks, encoding):
+    """
+    Marks the bodies of bulk requests that have already been compressed with the given content encoding.
+    """
+    for bulk in bulks:
+        bulk["body-encoding"] = encoding
+        yield bulk
+
+
+def compress_bulks(bulks, encoding, level, max_pending=2):
+    """
+    Compresses the bodies of bulk requests in a thread pool. Bulk requests are returned in their original order.
+
+    :param bulks: An iterator of bulk request parameters.
+    :param encoding: The content encoding to use. One of the keys in ``BULK_BODY_COMPRESSORS``.
+    :param level: The compression level.
+    :param max_pending: The maximum number of bulk requests that are compressed concurrently.
+    :return: A generator of bulk request parameters with compressed bodies. The key ``body-encoding`` denotes the content encoding.
+    """
+    compress, _ = BULK_BODY_COMPRESSORS[encoding]
+    pool = _compression_pool()
+    pending = collections.deque()
+
+    def compressed(bulk, future):
+        bulk["body"] = future.result()
+        bulk["body-encoding"] = encoding
+        return bulk
+
+    for bulk in bulks:
+        body = bulk["body"]
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        pending.append((bulk, pool.submit(compress, body, level)))
+        if len(pending) >= max_pending:
+            yield compressed(*pending.popleft())
+    while pending:
+        yield compressed(*pending.popleft())
+
+
+class BulkPrefetcher:
+    """
+    Generates bulk requests on a background thread into a bounded queue so reading and assembling bulk bodies does not block the
+    event loop that issues requests. The thread stops once the prefetcher is garbage-collected.
+    """
+    _END = object()
+
+    def __init__(self, bulks, max_bulks):
+        """
+        :param bulks: An iterator of bulk request parameters.
+        :param max_bulks: The maximum number of bulk requests that are generated ahead.
+        """
+        self._queue = queue.Queue(maxsize=max_bulks)
+        self._next = None
+        # callbacks that are invoked on the background thread once the next bulk request is available
+        self._waiters = []
+        self._waiters_lock = threading.Lock()
+        stopped = threading.Event()
+        self._thread = threading.Thread(target=BulkPrefetcher._run, args=(bulks, self._queue, self._waiters, self._waiters_lock, stopped),
+                                        name="bulk-prefetcher", daemon=True)
+        # the thread must not refer to the prefetcher, otherwise it would never be garbage-collected
+        weakref.finalize(self, stopped.set)
+        self._thread.start()
+
+    @staticmethod
+    def _run(bulks, bulk_queue, waiters, waiters_lock, stopped):
+        def put(item):
+            while not stopped.is_set():
+                try:
+                    bulk_queue.put(item, timeout=0.1)
+                except queue.Full:
+                    continue
+                with waiters_lock:
+                    callbacks = waiters[:]
+                    waiters.clear()
+                for callback in callbacks:
+                    callback()
+                return True
+            return False
+
+        try:
+            for bulk in bulks:
+                if not put(bulk):
+                    return
+        except BaseException as e:  # pylint: disable=broad-except
+            put(e)
+            return
+        put(BulkPrefetcher._END)
+
+    def ready(self, on_ready=None):
+        """
+        :param on_ready: An optional callback without arguments. If the next bulk request is not available yet, it is invoked once it
+                         is, on the background thread.
+        :return: True iff the next bulk request is available without waiting.
+        """
+        if self._next is not None:
+            return True
+        # the background thread checks for waiters after it has added a bulk request so we cannot miss a notification
+        with self._waiters_lock:
+            if not self._queue.empty():
+                return True
+            if on_ready is not None:
+                self._waiters.append(on_ready)
+            return False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._next is None:
+            self._next = self._queue.get()
+        item = self._next
+        if item is BulkPrefetcher._END:
+            raise StopIteration()
+        self._next = None
+        if isinstance(item, BaseException):
+            self._next = BulkPrefetcher._END
+            raise item
+        return item
+
+
+class BulkCache:
+    """
+    Persists the bulk requests of a client partition so subsequent runs can replay the exact same bulk bodies instead of reading the
+    corpus and generating action and meta-data lines again.
+
+    A cache entry consists of a file with all bulk bodies in the order in which they have been issued and an index file. The index file
+    is a binary file consisting of a fixed-size header, fixed-width ``(end offset, number of documents, target)`` entries and a JSON list
+    of all ``(index, type)`` targets. Entries are keyed by a fingerprint of the corpus files and all parameters that influence bulk bodies.
+
+    Each entry takes about as much disk space as the (possibly compressed) bulk bodies of its partition, i.e. a cache for all clients
+    of a task is roughly as large as the corpus plus its action and meta-data lines. Entries of changed corpora or parameters are never
+    hit again; least recently used entries are evicted once all entries in the cache directory exceed the maximum size.
+    """
+    MAGIC = b"OSBBLK01"
+    HEADER = np.dtype([("magic", "S8"), ("entries", "<u8"), ("targets_size", "<u8")])
+    ENTRY = np.dtype([("end", "<u8"), ("docs", "<u8"), ("target", "<u4")])
+
+    def __init__(self, cache_dir, key, max_size_in_bytes=None):
+        """
+        :param cache_dir: The directory in which cache entries are stored.
+        :param key: The key of this cache entry. See ``BulkCache.key``.
+        :param max_size_in_bytes: The maximum size of all entries in ``cache_dir``. ``None`` (default) does not limit the size.
+        """
+        self.cache_dir = cache_dir
+        self.max_size_in_bytes = max_size_in_bytes
+        self.bodies_path = os.path.join(cache_dir, f"{key}.bulks")
+        self.index_path = f"{self.bodies_path}.idx"
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def key(corpora, **parameters):
+        """
+        :param corpora: Specification of affected document corpora.
+        :param parameters: All parameters that influence the contents of bulk requests.
+        :return: A key that identifies bulk requests generated from the current contents of ``corpora`` with ``parameters``.
+        """
+        documents = []
+        for corpus in corpora:
+            for docs in corpus.documents:
+                fingerprint = None
+                if docs.document_file and os.path.isfile(docs.document_file):
+                    # the content fingerprint only considers the beginning and the end of the file, the modification time catches
+                    # (most) changes in between without reading the whole corpus
+                    stat = os.stat(docs.document_file)
+                    fingerprint = [stat.st_size, stat.st_mtime_ns, io.FileOffsetTable.fingerprint(docs.document_file)]
+                documents.append([corpus.name, docs.document_file, docs.number_of_documents, docs.target_index,
+                                  docs.target_data_stream, docs.target_type, docs.includes_action_and_meta_data, fingerprint])
+        spec = json.dumps({"documents": documents, "parameters": parameters}, sort_keys=True, default=str)
+        return hashlib.sha1(spec.encode("utf-8")).hexdigest()
+
+    def exists(self):
+        """
+        :return: True iff a complete cache entry exists.
+        """
+        if not os.path.isfile(self.bodies_path) or not os.path.isfile(self.index_path):
+            return False
+        header = self._read_header()
+        if header is None or os.path.getsize(self.index_path) != \
+                BulkCache.HEADER.itemsize + header["entries"] * BulkCache.ENTRY.itemsize + header["targets_size"]:
+            return False
+        if header["entries"] == 0:
+            return True
+        with open(self.index_path, "rb") as f:
+            f.seek(BulkCache.HEADER.itemsize + (int(header["entries"]) - 1) * BulkCache.ENTRY.itemsize)
+            last_entry = np.frombuffer(f.read(BulkCache.ENTRY.itemsize), dtype=BulkCache.ENTRY)[0]
+        return last_entry["end"] == os.path.getsize(self.bodies_path)
+
+    def _read_header(self):
+        with open(self.index_path, "rb") as f:
+            raw_header = f.read(BulkCache.HEADER.itemsize)
+        if len(raw_header) < BulkCache.HEADER.itemsize:
+            return None
+        header = np.frombuffer(raw_header, dtype=BulkCache.HEADER)[0]
+        return header if header["magic"] == BulkCache.MAGIC else None
+
+    def replay(self):
+        """
+        Replays all cached bulk requests. Bulk bodies are sliced from a memory-mapped file.
+
+        :return: A generator of ``(index, type, batch)`` tuples like the ones produced by index data readers.
+        """
+        header = self._read_header()
+        with open(self.index_path, "rb") as f:
+            f.seek(BulkCache.HEADER.itemsize)
+            entries = np.frombuffer(f.read(int(header["entries"]) * BulkCache.ENTRY.itemsize), dtype=BulkCache.ENTRY)
+            targets = json.loads(f.read(int(header["targets_size"])))
+        # the modification time of the index file tracks when an entry has been used for eviction
+        os.utime(self.index_path)
+        if len(entries) == 0:
+            return
+        self.logger.info("Replaying [%d] bulk requests from [%s].", len(entries), self.bodies_path)
+        with open(self.bodies_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as bodies:
+            start = 0
+            for end, docs, target in entries.tolist():
+                index, type = targets[target]
+                yield index, type, [(docs, bodies[start:end])]
+                start = end
+
+    def record(self, bulks, total_bulks):
+        """
+        Writes bulk requests to the cache while they are passed through. The cache entry is only committed once ``total_bulks`` bulk
+        requests have been recorded.
+
+        :param bulks: An iterator of bulk request parameters.
+        :param total_bulks: The total number of bulk requests of this partition.
+        :return: A generator of the bulk request parameters in ``bulks``.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self.bodies_path}.{os.getpid()}.tmp"
+        entries = []
+        targets = {}
+        committed = False
+        try:
+            with open(tmp_path, "wb") as f:
+                for bulk in bulks:
+                    body = bulk["body"]
+                    f.write(body.encode("utf-8") if isinstance(body, str) else body)
+                    target = targets.setdefault((bulk["index"], bulk["type"]), len(targets))
+                    entries.append((f.tell(), bulk["bulk-size"], target))
+                    if len(entries) == total_bulks:
+                        f.flush()
+                        self._commit(tmp_path, entries, targets)
+                        committed = True
+                    yield bulk
+        finally:
+            if not committed and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _commit(self, tmp_path, entries, targets):
+        entries = np.array(entries, dtype=BulkCache.ENTRY)
+        raw_targets = json.dumps(list(targets.keys())).encode("utf-8")
+        header = np.zeros(1, dtype=BulkCache.HEADER)
+        header["magic"] = BulkCache.MAGIC
+        header["entries"] = len(entries)
+        header["targets_size"] = len(raw_targets)
+        os.replace(tmp_path, self.bodies_path)
+        tmp_index_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_index_path, "wb") as f:
+            f.write(header.tobytes())
+            f.write(entries.tobytes())
+            f.write(raw_targets)
+        os.replace(tmp_index_path, self.index_path)
+        self.logger.info("Cached [%d] bulk requests in [%s].", len(entries), self.bodies_path)
+        self._evict()
+
+    def _evict(self):
+        """
+        Removes least recently used entries until all entries in the cache directory take at most ``max_size_in_bytes``. The entry of
+        this cache is never removed.
+        """
+        if self.max_size_in_bytes is None:
+            return
+        total_size = 0
+        candidates = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".bulks"):
+                continue
+            bodies_path = os.path.join(self.cache_dir, name)
+            index_path = f"{bodies_path}.idx"
+            try:
+                size = os.path.getsize(bodies_path)
+                if os.path.isfile(index_path):
+                    size += os.path.getsize(index_path)
+                    last_used = os.path.getmtime(index_path)
+                else:
+                    # incomplete entries are evicted first
+                    last_used = 0
+            except FileNotFoundError:
+                # removed concurrently by another client
+                continue
+            total_size += size
+            if bodies_path != self.bodies_path:
+                candidates.append((last_used, bodies_path, index_path, size))
+        for _, bodies_path, index_path, size in sorted(candidates):
+            if total_size <= self.max_size_in_bytes:
+                break
+            self.logger.info("Evicting bulk cache entry [%s] to keep the bulk cache below [%d] bytes.", bodies_path,
+                             self.max_size_in_bytes)
+            for path in (index_path, bodies_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total_size -= size
+
+
+class AdaptiveBulkSize:
+    """
+    Adjusts the number of documents per bulk request based on the latency of completed bulk requests. Latencies are evaluated in windows
+    of ``WINDOW`` requests:
+
+    * With a target latency, the bulk size is scaled by the ratio of the target and the median observed latency (by at most a factor of
+      ``MAX_FACTOR`` per window).
+    * Otherwise, the bulk size that maximizes documents per second is searched by hill climbing. The search reverses its direction with a
+      smaller step whenever throughput does not improve and settles on the best bulk size once the step becomes negligible.
+    """
+    MEASURES = ["service-time", "took"]
+    WINDOW = 5
+    MAX_FACTOR = 2.0
+    # minimum relative throughput improvement to continue searching in the same direction
+    MIN_IMPROVEMENT = 0.02
+    MIN_STEP = 1.05
+
+    def __init__(self, bulk_size, min_bulk_size, max_bulk_size, target_latency=None, measure="service-time"):
+        """
+        :param bulk_size: The initial number of documents per bulk.
+        :param min_bulk_size: The minimum number of documents per bulk.
+        :param max_bulk_size: The maximum number of documents per bulk.
+        :param target_latency: The latency in seconds on which bulk requests should converge. ``None`` (default) maximizes throughput.
+        :param measure: Either ``service-time`` (default) to use the service time or ``took`` to use the ``took`` time reported by
+                        OpenSearch as latency.
+        """
+        self.bulk_size = bulk_size
+        self.min_bulk_size = min_bulk_size
+        self.max_bulk_size = max_bulk_size
+        self.target_latency = target_latency
+        self.measure = measure
+        self.converged = False
+        self._lock = threading.Lock()
+        self._latencies = []
+        self._docs = 0
+        self._step = AdaptiveBulkSize.MAX_FACTOR
+        self._direction = 1
+        self._previous_throughput = None
+        self._best = (0, bulk_size)
+
+    def update(self, service_time, docs, request_meta_data):
+        """
+        Records the latency of a completed bulk request. Only bulk requests that have been built with the current bulk size are
+        considered. Others have been generated ahead (e.g. by ``BulkPrefetcher``) before the most recent change of the bulk size or
+        are truncated at the end of a partition and would make the controller scale from a stale bulk size.
+
+        :param service_time: The service time of the bulk request in seconds.
+        :param docs: The number of documents in the bulk request.
+        :param request_meta_data: The meta-data returned by the bulk runner.
+        :return: True iff the bulk size has changed.
+        """
+        if not request_meta_data.get("success", False) or docs <= 0:
+            return False
+        latency = service_time
+        if self.measure == "took" and request_meta_data.get("took") is not None:
+            latency = request_meta_data["took"] / 1000
+        with self._lock:
+            if docs != self.bulk_size:
+                return False
+            self._latencies.append(latency)
+            self._docs += docs
+            if len(self._latencies) < AdaptiveBulkSize.WINDOW or self.converged:
+                return False
+            if self.target_latency:
+                ratio = self.target_latency / max(float(np.median(self._latencies)), 1e-6)
+                bulk_size = self.bulk_size * min(max(ratio, 1 / AdaptiveBulkSize.MAX_FACTOR), AdaptiveBulkSize.MAX_FACTOR)
+            else:
+                bulk_size = self._climb(self._docs / max(sum(self._latencies), 1e-6))
+            self._latencies = []
+            self._docs = 0
+            bulk_size = min(max(round(bulk_size), self.min_bulk_size), self.max_bulk_size)
+            changed = bulk_size != self.bulk_size
+            self.bulk_size = bulk_size
+            return changed
+
+    def _climb(self, throughput):
+        if throughput > self._best[0]:
+            self._best = (throughput, self.bulk_size)
+        if self._previous_throughput is not None and throughput < self._previous_throughput * (1 + AdaptiveBulkSize.MIN_IMPROVEMENT):
+            self._direction = -self._direction
+            self._step = math.sqrt(self._step)
+        self._previous_throughput = throughput
+        if self._step < AdaptiveBulkSize.MIN_STEP:
+            self.converged = True
+            return self._best[1]
+        return self.bulk_size * self._step ** self._direction
+
+
 def bulk_data_based(num_clients, start_client_index, end_client_index, corpora, batch_size, bulk_size, id_conflicts,
                     conflict_probability, on_conflict, recency, pipeline, original_params, create_reader=create_default_reader):
     """
@@ -1780,21 +2396,23 @@ def bulk_data_based(num_clients, start_client_index, end_client_index, corpora,
 
 class GenerateActionMetaData:
     RECENCY_SLOPE = 30
+    # document ids are rendered with (at least) this number of digits
+    ID_DIGITS = 10
 
     def __init__(self, index_name, type_name, conflicting_ids=None, conflict_probability=None, on_conflict=None, recency=None,
-                 rand=random.random, randint=random.randint, randexp=random.expovariate, use_create=False):
+                 rand=random.random, randint=random.randint, randexp=random.expovariate, use_create=False, rng=None):
         if type_name:
             self.meta_data_index_with_id = '{"index": {"_index": "%s", "_type": "%s", "_id": "%s"}}\n' % \
-                                           (index_name, type_name, "%s")
+                                           (index_name, type_name, "%010d")
             self.meta_data_update_with_id = '{"update": {"_index": "%s", "_type": "%s", "_id": "%s"}}\n' % \
-                                            (index_name, type_name, "%s")
+                                            (index_name, type_name, "%010d")
             self.meta_data_index_no_id = '{"index": {"_index": "%s", "_type": "%s"}}\n' % (index_name, type_name)
         else:
-            self.meta_data_index_with_id = '{"index": {"_index": "%s", "_id": "%s"}}\n' % (index_name, "%s")
-            self.meta_data_update_with_id = '{"update": {"_index": "%s", "_id": "%s"}}\n' % (index_name, "%s")
+            self.meta_data_index_with_id = '{"index": {"_index": "%s", "_id": "%s"}}\n' % (index_name, "%010d")
+            self.meta_data_update_with_id = '{"update": {"_index": "%s", "_id": "%s"}}\n' % (index_name, "%010d")
             self.meta_data_index_no_id = '{"index": {"_index": "%s"}}\n' % index_name
             self.meta_data_create_no_id = '{"create": {"_index": "%s"}}\n' % index_name
-        if use_create and conflicting_ids:
+        if use_create and conflicting_ids is not None:
             raise exceptions.BenchmarkError("Index mode '_create' cannot be used with conflicting ids")
         self.conflicting_ids = conflicting_ids
         self.on_conflict = on_conflict
@@ -1806,6 +2424,7 @@ class GenerateActionMetaData:
         self.rand = rand
         self.randint = randint
         self.randexp = randexp
+        self.rng = rng
         self.id_up_to = 0
 
     @property
@@ -1815,6 +2434,13 @@ class GenerateActionMetaData:
         """
         return self.conflicting_ids is None
 
+    @property
+    def supports_bulks(self):
+        """
+        :return: True iff action and meta-data lines can be generated for a whole bulk at once with ``next_bulk``.
+        """
+        return self.rng is not None and not self.is_constant
+
     def __iter__(self):
         return self
 
@@ -1855,6 +2481,81 @@ class GenerateActionMetaData:
                 return "create", self.meta_data_create_no_id
             return "index", self.meta_data_index_no_id
 
+    def next_bulk(self, num_docs):
+        """
+        Generates the action and meta-data lines for up to ``num_docs`` documents at once. Conflict decisions and conflicting ids are
+        drawn with numpy from ``rng`` and the lines are rendered into one ``bytes`` object without formatting them individually.
+
+        :param num_docs: The number of documents in the bulk.
+        :return: A tuple of a boolean array that marks documents which need to be sent as an update, the rendered action and
+                 meta-data lines and an array with the end offset of each line. Fewer than ``num_docs`` lines are returned if the
+                 document ids are exhausted.
+        """
+        ids = np.asarray(self.conflicting_ids)
+        if self.conflict_probability:
+            conflicts = self.rng.random(num_docs) <= self.conflict_probability
+            if self.id_up_to == 0:
+                # there is no id yet that could conflict
+                conflicts[0] = False
+        else:
+            conflicts = np.zeros(num_docs, dtype=bool)
+        fresh = ~conflicts
+        fresh_up_to = np.cumsum(fresh)
+        available = len(ids) - self.id_up_to
+        if fresh_up_to[-1] > available:
+            num_docs = int(np.searchsorted(fresh_up_to, available + 1))
+            if num_docs == 0:
+                raise StopIteration()
+            conflicts = conflicts[:num_docs]
+            fresh = fresh[:num_docs]
+            fresh_up_to = fresh_up_to[:num_docs]
+        # the value of id_up_to at the time each document is processed
+        id_up_to = self.id_up_to + fresh_up_to - fresh
+
+        doc_ids = np.empty(num_docs, dtype=np.int64)
+        doc_ids[fresh] = ids[id_up_to[fresh]]
+        if conflicts.any():
+            if self.on_conflict not in ["index", "update"]:
+                raise exceptions.BenchmarkAssertionError("Unknown action [{}]".format(self.on_conflict))
+            conflicting_up_to = id_up_to[conflicts]
+            if self.recency == 0:
+                idx = self.rng.integers(0, conflicting_up_to)
+            else:
+                # see __next__ for the rationale
+                idx_range = np.minimum(self.rng.exponential(1 / (GenerateActionMetaData.RECENCY_SLOPE * self.recency),
+                                                            len(conflicting_up_to)), 1)
+                idx = np.rint((conflicting_up_to - 1) * (1 - idx_range)).astype(np.int64)
+            doc_ids[conflicts] = ids[idx]
+        self.id_up_to += int(fresh_up_to[-1])
+
+        updates = conflicts if self.on_conflict == "update" else np.zeros(num_docs, dtype=bool)
+        index_line = tuple(self.meta_data_index_with_id.encode("utf-8").split(b"%010d"))
+        update_line = tuple(self.meta_data_update_with_id.encode("utf-8").split(b"%010d"))
+        lengths = np.where(updates, len(update_line[0]) + len(update_line[1]), len(index_line[0]) + len(index_line[1]))
+        lengths += GenerateActionMetaData.ID_DIGITS
+        ends = np.cumsum(lengths)
+        lines = np.empty(int(ends[-1]), dtype=np.uint8)
+        for mask, (prefix, suffix) in [(~updates, index_line), (updates, update_line)]:
+            if mask.any():
+                rendered = self._render_lines(prefix, suffix, doc_ids[mask])
+                positions = (ends[mask] - lengths[mask])[:, np.newaxis] + np.arange(rendered.shape[1])
+                lines[positions] = rendered
+        return updates, lines.tobytes(), ends
+
+    @staticmethod
+    def _render_lines(prefix, suffix, doc_ids):
+        if len(doc_ids) > 0 and doc_ids.max() >= 10 ** GenerateActionMetaData.ID_DIGITS:
+            raise exceptions.BenchmarkAssertionError("Document id [{}] exceeds {} digits".format(
+                doc_ids.max(), GenerateActionMetaData.ID_DIGITS))
+        id_start = len(prefix)
+        id_end = id_start + GenerateActionMetaData.ID_DIGITS
+        rendered = np.empty((len(doc_ids), id_end + len(suffix)), dtype=np.uint8)
+        rendered[:, :id_start] = np.frombuffer(prefix, dtype=np.uint8)
+        divisors = 10 ** np.arange(GenerateActionMetaData.ID_DIGITS - 1, -1, -1, dtype=np.int64)
+        rendered[:, id_start:id_end] = doc_ids[:, np.newaxis] // divisors % 10 + ord("0")
+        rendered[:, id_end:] = np.frombuffer(suffix, dtype=np.uint8)
+        return rendered
+
 
 class Slice:
     def __init__(self, source_class, offset, number_of_lines, corpus, docs):
@@ -1966,6 +2667,28 @@ class Slice:
                 raise StopIteration()
             return lines
 
+    @property
+    def supports_blocks(self):
+        """
+        :return: True iff lines can be read as one contiguous block with ``next_block``.
+        """
+        return not self.streaming_ingestion and hasattr(self.source, "read_lines_block")
+
+    def next_block(self):
+        """
+        Reads the next bulk of lines like ``__next__`` but without splitting them into individual lines.
+
+        :return: A tuple of the number of lines read and the lines as one contiguous ``bytes`` object.
+        """
+        if self.current_line >= self.number_of_lines:
+            raise StopIteration()
+        # ensure we don't read past the allowed number of lines.
+        num_lines, block = self.source.read_lines_block(min(self.bulk_size, self.number_of_lines - self.current_line))
+        self.current_line += num_lines
+        if num_lines == 0:
+            raise StopIteration()
+        return num_lines, block
+
     def __str__(self):
         return "%s[%d;%d]" % (self.source, self.offset, self.offset + self.number_of_lines)
 
@@ -2019,6 +2742,20 @@ class IndexDataReader:
         self.file_source.close()
         return False
 
+    def resize(self, bulk_size):
+        """
+        Changes the number of documents per bulk. Subsequent batches consist of exactly one bulk.
+
+        :param bulk_size: The new number of documents per bulk.
+        """
+        self.batch_size = bulk_size
+        self._resize_source(bulk_size)
+
+    def _resize_source(self, lines):
+        self.bulk_size = lines
+        # the file source picks up the bulk size when it is opened
+        self.file_source.bulk_size = lines
+
 
 class MetadataIndexDataReader(IndexDataReader):
     def __init__(self, data_file, batch_size, bulk_size, file_source, action_metadata, index_name, type_name):
@@ -2028,9 +2765,15 @@ class MetadataIndexDataReader(IndexDataReader):
 
     def __enter__(self):
         super().__enter__()
+        supports_blocks = getattr(self.file_source, "supports_blocks", False)
         if self.action_metadata.is_constant:
             _, self.action_metadata_line = next(self.action_metadata)
-            self.read_bulk = self._read_bulk_fast
+            if supports_blocks:
+                self.read_bulk = self._read_bulk_block
+            else:
+                self.read_bulk = self._read_bulk_fast
+        elif getattr(self.action_metadata, "supports_bulks", False):
+            self.read_bulk = self._read_bulk_batched_block if supports_blocks else self._read_bulk_batched
         else:
             self.read_bulk = self._read_bulk_regular
         return self
@@ -2049,6 +2792,67 @@ class MetadataIndexDataReader(IndexDataReader):
             current_bulk.append(doc)
         return len(docs), current_bulk
 
+    def _read_bulk_block(self):
+        """
+        Special-case implementation for bulk data files where the action and meta-data line is always identical and the documents can
+        be read as one contiguous block. The action and meta-data line is inserted after each newline in a single pass so the bulk body
+        is assembled without creating an object per document.
+        """
+        action_metadata_line = self.action_metadata_line.encode("utf-8")
+        num_docs, docs = self.file_source.next_block()
+        return num_docs, [action_metadata_line + docs.replace(b"\n", b"\n" + action_metadata_line, num_docs - 1)]
+
+    def _read_bulk_batched(self):
+        """
+        Implementation for bulk data files where action and meta-data lines vary (i.e. ids may conflict). All lines of a bulk are
+        generated at once.
+        """
+        docs = next(self.file_source)
+        updates, lines, line_ends = self.action_metadata.next_bulk(len(docs))
+        return len(line_ends), self._interleave(docs, updates, lines, line_ends)
+
+    def _read_bulk_batched_block(self):
+        """
+        Like ``_read_bulk_batched`` but reads the documents as one contiguous block. Unless documents need to be wrapped for an update,
+        action and meta-data lines are interleaved with the documents in a single pass.
+        """
+        num_docs, docs = self.file_source.next_block()
+        updates, lines, line_ends = self.action_metadata.next_bulk(num_docs)
+        num_docs = len(line_ends)
+        if updates.any():
+            return num_docs, self._interleave(docs.splitlines(keepends=True), updates, lines, line_ends)
+
+        docs = np.frombuffer(docs, dtype=np.uint8)
+        doc_ends = np.flatnonzero(docs == ord("\n")) + 1
+        if len(doc_ends) < num_docs:
+            # the last line is not terminated by a newline
+            doc_ends = np.append(doc_ends, len(docs))
+        docs = docs[:doc_ends[num_docs - 1]]
+        doc_starts = np.concatenate(([0], doc_ends[:num_docs - 1]))
+        line_lengths = np.diff(line_ends, prepend=0)
+        body = np.empty(len(lines) + len(docs), dtype=np.uint8)
+        # each action and meta-data line is shifted by the size of all preceding documents
+        line_positions = np.arange(len(lines)) + np.repeat(doc_starts, line_lengths)
+        is_line = np.zeros(len(body), dtype=bool)
+        is_line[line_positions] = True
+        body[line_positions] = np.frombuffer(lines, dtype=np.uint8)
+        body[~is_line] = docs
+        return num_docs, [body.tobytes()]
+
+    @staticmethod
+    def _interleave(docs, updates, lines, line_ends):
+        current_bulk = []
+        line_start = 0
+        for doc, line_end, update in zip(docs, line_ends.tolist(), updates.tolist()):
+            current_bulk.append(lines[line_start:line_end])
+            line_start = line_end
+            if update:
+                # remove the trailing "\n" as the doc needs to fit on one line
+                current_bulk.append(b"{\"doc\":%s}\n" % doc.strip())
+            else:
+                current_bulk.append(doc)
+        return current_bulk
+
     def _read_bulk_regular(self):
         """
         General case implementation for bulk files. This implementation can cover all cases but is slower when the
@@ -2078,10 +2882,26 @@ class SourceOnlyIndexDataReader(IndexDataReader):
         # documents are only on every other line.
         super().__init__(data_file, batch_size, bulk_size * 2, file_source, index_name, type_name)
 
-    def read_bulk(self):
+    def __enter__(self):
+        super().__enter__()
+        if getattr(self.file_source, "supports_blocks", False):
+            self.read_bulk = self._read_bulk_block
+        else:
+            self.read_bulk = self._read_bulk_lines
+        return self
+
+    def resize(self, bulk_size):
+        super().resize(bulk_size)
+        self._resize_source(bulk_size * 2)
+
+    def _read_bulk_lines(self):
         bulk_items = next(self.file_source)
         return len(bulk_items) // 2, bulk_items
 
+    def _read_bulk_block(self):
+        num_lines, bulk = self.file_source.next_block()
+        return num_lines // 2, [bulk]
+
 
 register_param_source_for_operation(workload.OperationType.Bulk, BulkIndexParamSource)
 register_param_source_for_operation(workload.OperationType.ProtoBulk, BulkIndexParamSource)
@@ -28,11 +28,13 @@ import datetime
 import json
 import logging
 import os
+import pickle
 import random
 import string
 import tempfile
 import unittest.mock as mock
 import uuid
+import zlib
 from unittest import TestCase
 from collections import namedtuple
 
@@ -1212,6 +1214,115 @@ class OsMetricsTests(TestCase):
         return actual_error_rate
 
 
+class BackgroundBulkFlusherTests(TestCase):
+    def setUp(self):
+        self.client = mock.Mock()
+        self.spill_dir = tempfile.mkdtemp()
+
+    def test_indexes_in_batches(self):
+        flusher = metrics.BackgroundBulkFlusher(self.client, "_doc", batch_size=2, spill_dir=self.spill_dir)
+        flusher.submit("metrics", [{"value": 1}, {"value": 2}, {"value": 3}])
+        flusher.submit("metrics", [{"value": 4}])
+        flusher.wait()
+
+        self.client.bulk_index.assert_has_calls([
+            mock.call(index="metrics", doc_type="_doc", items=[{"value": 1}, {"value": 2}]),
+            mock.call(index="metrics", doc_type="_doc", items=[{"value": 3}]),
+            mock.call(index="metrics", doc_type="_doc", items=[{"value": 4}]),
+        ])
+        flusher.close()
+        self.assertEqual([], flusher.spilled_files)
+
+    def test_limits_batch_bytes(self):
+        flusher = metrics.BackgroundBulkFlusher(self.client, "_doc", batch_bytes=30, spill_dir=self.spill_dir)
+        flusher.submit("metrics", [{"value": "a" * 10}, {"value": "b" * 10}])
+        flusher.close()
+
+        self.assertEqual(2, self.client.bulk_index.call_count)
+
+    @mock.patch("osbenchmark.time.sleep")
+    def test_retries_with_backoff(self, sleep):
+        self.client.bulk_index.side_effect = [exceptions.BenchmarkError("unavailable"), exceptions.BenchmarkError("unavailable"), None]
+        flusher = metrics.BackgroundBulkFlusher(self.client, "_doc", max_retries=3, retry_backoff=1.0, spill_dir=self.spill_dir)
+        flusher.submit("metrics", [{"value": 1}])
+        flusher.close()
+
+        self.assertEqual(3, self.client.bulk_index.call_count)
+        sleep.assert_has_calls([mock.call(1.0), mock.call(2.0)])
+        self.assertEqual([], os.listdir(self.spill_dir))
+
+    @mock.patch("osbenchmark.time.sleep")
+    def test_spills_to_disk_and_replays_on_close(self, sleep):
+        # fail all attempts while running, succeed when replaying
+        self.client.bulk_index.side_effect = [exceptions.BenchmarkError("unavailable")] * 2 + [None]
+        flusher = metrics.BackgroundBulkFlusher(self.client, "_doc", max_retries=1, spill_dir=self.spill_dir)
+        flusher.submit("metrics", [{"value": 1}, {"value": 2}])
+        flusher.wait()
+
+        self.assertEqual(1, len(flusher.spilled_files))
+        flusher.close()
+
+        self.client.bulk_index.assert_called_with(index="metrics", doc_type="_doc", items=[{"value": 1}, {"value": 2}])
+        self.assertEqual([], flusher.spilled_files)
+        self.assertEqual([], os.listdir(self.spill_dir))
+
+    @mock.patch("osbenchmark.time.sleep")
+    def test_keeps_spilled_documents_if_replay_fails(self, sleep):
+        self.client.bulk_index.side_effect = exceptions.BenchmarkError("unavailable")
+        flusher = metrics.BackgroundBulkFlusher(self.client, "_doc", max_retries=0, spill_dir=self.spill_dir)
+        flusher.submit("metrics", [{"value": 1}])
+        flusher.close()
+
+        self.assertEqual(1, len(flusher.spilled_files))
+        with open(flusher.spilled_files[0], encoding="utf-8") as f:
+            self.assertEqual([{"index": "metrics", "doc": {"value": 1}}], [json.loads(line) for line in f])
+
+    @mock.patch("osbenchmark.time.sleep")
+    def test_keeps_only_documents_that_have_not_been_replayed(self, sleep):
+        unavailable = exceptions.BenchmarkError("unavailable")
+        # fail while running, then index the first batch when replaying
+        self.client.bulk_index.side_effect = [unavailable] * 3 + [None, unavailable]
+        flusher = metrics.BackgroundBulkFlusher(self.client, "_doc", batch_size=1, max_retries=0, spill_dir=self.spill_dir)
+        flusher.submit("metrics", [{"value": 1}, {"value": 2}, {"value": 3}])
+        flusher.close()
+
+        # the third batch is not attempted after the second one has failed
+        self.assertEqual(5, self.client.bulk_index.call_count)
+        self.assertEqual(1, len(flusher.spilled_files))
+        with open(flusher.spilled_files[0], encoding="utf-8") as f:
+            self.assertEqual([{"index": "metrics", "doc": {"value": 2}}, {"index": "metrics", "doc": {"value": 3}}],
+                             [json.loads(line) for line in f])
+
+    @mock.patch.object(metrics.BackgroundBulkFlusher, "SIZE_SAMPLE_INTERVAL", 2)
+    def test_estimates_batch_bytes_from_sampled_documents(self):
+        flusher = metrics.BackgroundBulkFlusher(self.client, "_doc", batch_bytes=30, spill_dir=self.spill_dir)
+        with mock.patch("json.dumps", wraps=json.dumps) as dumps:
+            flusher.submit("metrics", [{"value": "a" * 10}, {"value": "b" * 10}, {"value": "c" * 10}])
+            flusher.close()
+
+        self.assertEqual(2, dumps.call_count)
+        self.assertEqual(3, self.client.bulk_index.call_count)
+
+    def test_background_flush_in_metrics_store(self):
+        cfg = config.Config()
+        cfg.add(config.Scope.application, "system", "env.name", "unittest")
+        cfg.add(config.Scope.application, "workload", "params", {})
+        cfg.add(config.Scope.application, "reporting", "datastore.flush.background", True)
+        cfg.add(config.Scope.application, "reporting", "datastore.flush.spill.dir", self.spill_dir)
+        metrics_store = metrics.OsMetricsStore(cfg,
+                                               client_factory_class=MockClientFactory,
+                                               index_template_provider_class=DummyIndexTemplateProvider,
+                                               clock=StaticClock)
+        os_mock = metrics_store._client
+        metrics_store.open(OsMetricsTests.TEST_RUN_ID, OsMetricsTests.TEST_RUN_TIMESTAMP, "test", "append", "defaults", create=True)
+        metrics_store.put_value_cluster_level("indexing_throughput", 5000, "docs/s")
+        metrics_store.flush(refresh=False)
+        metrics_store.close()
+
+        self.assertEqual(1, os_mock.bulk_index.call_count)
+        self.assertEqual("indexing_throughput", os_mock.bulk_index.call_args.kwargs["items"][0]["name"])
+
+
 class OsTestRunStoreTests(TestCase):
     TEST_RUN_TIMESTAMP = datetime.datetime(2016, 1, 31)
     TEST_RUN_ID = "6ebc6e53-ee20-4b0c-99b4-09697987e9f4"
@@ -1896,6 +2007,113 @@ class InMemoryMetricsStoreTests(TestCase):
             "io-batch-size-kb": 4
         }, self.metrics_store.docs[1]["meta"])
 
+    def test_put_values_bulk(self):
+        self.metrics_store.open(InMemoryMetricsStoreTests.TEST_RUN_ID, InMemoryMetricsStoreTests.TEST_RUN_TIMESTAMP,
+                                "test", "append-no-conflicts", "defaults", create=True)
+        self.metrics_store.add_meta_info(metrics.MetaInfoScope.cluster, None, "cluster-name", "test")
+        success = {"success": True}
+        self.metrics_store.put_values_bulk("service_time", [10, 20, 30], "ms", task="task1", operation="op1", operation_type="search",
+                                           sample_types=[metrics.SampleType.Warmup, metrics.SampleType.Normal, metrics.SampleType.Normal],
+                                           absolute_times=[100, 101, 102], relative_times=[1, 2, 3],
+                                           meta_data=[success, success, {"success": False}])
+        bulk_docs = self.metrics_store.docs
+
+        self.metrics_store = metrics.InMemoryMetricsStore(self.cfg, clock=StaticClock)
+        self.metrics_store.open(InMemoryMetricsStoreTests.TEST_RUN_ID, InMemoryMetricsStoreTests.TEST_RUN_TIMESTAMP,
+                                "test", "append-no-conflicts", "defaults", create=True)
+        self.metrics_store.add_meta_info(metrics.MetaInfoScope.cluster, None, "cluster-name", "test")
+        for value, sample_type, absolute_time, relative_time, meta_data in [(10, metrics.SampleType.Warmup, 100, 1, success),
+                                                                            (20, metrics.SampleType.Normal, 101, 2, success),
+                                                                            (30, metrics.SampleType.Normal, 102, 3, {"success": False})]:
+            self.metrics_store.put_value_cluster_level("service_time", value, "ms", task="task1", operation="op1",
+                                                       operation_type="search", sample_type=sample_type, absolute_time=absolute_time,
+                                                       relative_time=relative_time, meta_data=meta_data)
+
+        self.assertEqual(self.metrics_store.docs, bulk_docs)
+        self.assertEqual({"cluster-name": "test", "success": True}, bulk_docs[0]["meta"])
+        # values with the same meta-data share the merged meta dict
+        self.assertIs(bulk_docs[0]["meta"], bulk_docs[1]["meta"])
+        self.assertEqual([20, 30], self.metrics_store.get("service_time", task="task1", sample_type=metrics.SampleType.Normal))
+
+    def test_get_uses_index_and_preserves_insertion_order(self):
+        self.metrics_store.open(InMemoryMetricsStoreTests.TEST_RUN_ID, InMemoryMetricsStoreTests.TEST_RUN_TIMESTAMP,
+                                "test", "append-no-conflicts", "defaults", create=True)
+        self.metrics_store.put_value_cluster_level("latency", 1, "ms", task="task1", sample_type=metrics.SampleType.Warmup)
+        self.metrics_store.put_value_cluster_level("latency", 2, "ms", task="task2", sample_type=metrics.SampleType.Normal)
+        self.metrics_store.put_value_cluster_level("service_time", 100, "ms", task="task1", sample_type=metrics.SampleType.Normal)
+        self.metrics_store.put_value_cluster_level("latency", 3, "ms", task="task1", sample_type=metrics.SampleType.Normal)
+        self.metrics_store.put_value_cluster_level("final_index_size", 1000, "GB")
+
+        self.assertEqual([1, 2, 3], self.metrics_store.get("latency"))
+        self.assertEqual([1, 3], self.metrics_store.get("latency", task="task1"))
+        self.assertEqual([2, 3], self.metrics_store.get("latency", sample_type=metrics.SampleType.Normal))
+        self.assertEqual([1], self.metrics_store.get("latency", sample_type=metrics.SampleType.Warmup))
+        self.assertEqual([], self.metrics_store.get("latency", task="task3"))
+        self.assertEqual([], self.metrics_store.get("unknown"))
+        self.assertEqual([1000], self.metrics_store.get("final_index_size"))
+        self.assertEqual(3, self.metrics_store.get_one("latency", task="task1", sort_key="value", sort_reverse=True))
+        self.assertEqual(2, self.metrics_store.get_one("latency", sample_type=metrics.SampleType.Normal))
+
+        self.metrics_store.to_externalizable(clear=True)
+        self.assertEqual([], self.metrics_store.get("latency"))
+        self.assertIsNone(self.metrics_store.get_one("latency"))
+
+    def test_stores_metric_records_compactly(self):
+        self.metrics_store.open(InMemoryMetricsStoreTests.TEST_RUN_ID, InMemoryMetricsStoreTests.TEST_RUN_TIMESTAMP,
+                                "test", "append-no-conflicts", "defaults", create=True)
+        self.metrics_store.put_value_cluster_level("service_time", 10, "ms", task="task1", operation_type="search",
+                                                   meta_data={"success": True})
+        self.metrics_store.put_value_cluster_level("service_time", 20, "ms", task="task1", operation_type="search",
+                                                   meta_data={"success": True})
+        self.metrics_store.put_value_cluster_level("service_time", 30, "ms", task="task1", operation_type="search",
+                                                   meta_data={"success": True, "took": 25, "shards": [1, 2]})
+        self.metrics_store.put_value_cluster_level("service_time", 40, "ms", task="task1", operation_type="search",
+                                                   meta_data={"success": True, "took": 35, "hits": 100})
+        self.metrics_store.put_value_cluster_level("final_index_size", 1000, "GB")
+        self.metrics_store.put_doc({"name": "ml_processing_time", "job": "job1", "min": 1, "max": 2})
+
+        first, second, nested, per_request, third, fourth = self.metrics_store.docs
+        self.assertIsInstance(first, metrics.MetricRecord)
+        self.assertIs(first.dimensions, second.dimensions)
+        self.assertIs(first["meta"], second["meta"])
+        self.assertEqual({"success": True}, second["meta"])
+        self.assertEqual({"success": True, "took": 25, "shards": [1, 2]}, nested["meta"])
+        # per-request numbers are held in the record, repeating values are shared
+        self.assertIs(first.shared_meta, per_request.shared_meta)
+        self.assertEqual((35, 100), per_request.request_meta_values)
+        self.assertEqual({"success": True, "took": 35, "hits": 100}, per_request["meta"])
+        self.assertEqual("search", second["operation-type"])
+        self.assertEqual(20, second["value"])
+        self.assertNotIn("task", third)
+        self.assertIsNone(third.get("operation"))
+        with self.assertRaises(KeyError):
+            # pylint: disable=pointless-statement
+            third["task"]
+        # docs that are not metric records are kept as is
+        self.assertIsInstance(fourth, dict)
+
+        memento = self.metrics_store.to_externalizable(clear=True)
+        docs = pickle.loads(zlib.decompress(memento))
+        self.assertEqual([dict] * 6, [type(doc) for doc in docs])
+        self.assertEqual(docs[0], first)
+        self.assertEqual(docs[3], per_request)
+        self.assertEqual(list(first), list(docs[0]))
+        self.assertEqual({
+            "@timestamp": StaticClock.NOW * 1000,
+            "relative-time-ms": 0,
+            "test-run-id": InMemoryMetricsStoreTests.TEST_RUN_ID,
+            "test-run-timestamp": "20160131T000000Z",
+            "environment": "unittest",
+            "workload": "test",
+            "test_procedure": "append-no-conflicts",
+            "cluster-config-instance": "defaults",
+            "name": "final_index_size",
+            "value": 1000,
+            "unit": "GB",
+            "sample-type": "normal",
+            "meta": {},
+        }, docs[4])
+
     def test_get_error_rate_zero_without_samples(self):
         self.metrics_store.open(InMemoryMetricsStoreTests.TEST_RUN_ID, InMemoryMetricsStoreTests.TEST_RUN_TIMESTAMP,
                                 "test", "append-no-conflicts", "defaults", create=True)
@@ -1945,6 +2163,178 @@ class InMemoryMetricsStoreTests(TestCase):
         self.assertEqual(0.2, self.metrics_store.get_error_rate("term-query", sample_type=metrics.SampleType.Normal))
 
 
+class LogHistogramTests(TestCase):
+    def test_percentiles_within_relative_error(self):
+        histogram = metrics.LogHistogram(relative_error=0.01)
+        values = [random.uniform(0.1, 5000) for _ in range(10000)]
+        for v in values:
+            histogram.record(v)
+
+        sorted_values = sorted(values)
+        percentiles = histogram.percentiles([0, 50, 90, 99, 99.9, 100])
+        self.assertEqual(sorted_values[0], percentiles[0])
+        self.assertEqual(sorted_values[-1], percentiles[100])
+        for percentile, value in percentiles.items():
+            expected = metrics.InMemoryMetricsStore.percentile_value(sorted_values, percentile)
+            self.assertAlmostEqual(expected, value, delta=expected * 0.01)
+        self.assertEqual(10000, histogram.count)
+        self.assertEqual(min(values), histogram.min)
+        self.assertEqual(max(values), histogram.max)
+
+    def test_bounded_number_of_buckets(self):
+        histogram = metrics.LogHistogram(relative_error=0.01)
+        for i in range(100000):
+            histogram.record(1 + i % 1000)
+        # 1 to 1000 spans ln(1000) / ln(1.0202) buckets
+        self.assertLessEqual(len(histogram.buckets), 350)
+
+    def test_merge(self):
+        a = metrics.LogHistogram()
+        b = metrics.LogHistogram()
+        for v in [0, 1, 2, 3]:
+            a.record(v)
+        for v in [10, 20]:
+            b.record(v)
+        a.merge(b)
+
+        self.assertEqual(6, a.count)
+        self.assertEqual(0, a.min)
+        self.assertEqual(20, a.max)
+        self.assertEqual(36, a.sum)
+        self.assertEqual(0, a.percentiles([0])[0])
+        self.assertEqual(20, a.percentiles([100])[100])
+
+    def test_empty(self):
+        self.assertEqual(collections.OrderedDict(), metrics.LogHistogram().percentiles([50, 99]))
+        self.assertEqual([], metrics.LogHistogram().values())
+
+    def test_record_all(self):
+        values = [0, 0.5, 1, 2, 2, 3, 1000]
+        a = metrics.LogHistogram()
+        for v in values:
+            a.record(v)
+        b = metrics.LogHistogram()
+        b.record_all(values)
+
+        self.assertEqual(a.buckets, b.buckets)
+        self.assertEqual((a.non_positive_count, a.count, a.min, a.max, a.sum), (b.non_positive_count, b.count, b.min, b.max, b.sum))
+
+    def test_values(self):
+        histogram = metrics.LogHistogram(relative_error=0.01)
+        histogram.record_all([0, 1, 10, 10, 100])
+
+        values = histogram.values()
+        self.assertEqual(5, len(values))
+        self.assertEqual(0, values[0])
+        self.assertEqual(100, values[-1])
+        self.assertAlmostEqual(1, values[1], delta=0.01)
+        self.assertAlmostEqual(10, values[2], delta=0.1)
+        self.assertEqual(values[2], values[3])
+
+
+class InMemoryMetricsStoreHistogramTests(TestCase):
+    TEST_RUN_TIMESTAMP = datetime.datetime(2016, 1, 31)
+    TEST_RUN_ID = "6ebc6e53-ee20-4b0c-99b4-09697987e9f4"
+
+    def setUp(self):
+        self.cfg = config.Config()
+        self.cfg.add(config.Scope.application, "system", "env.name", "unittest")
+        self.cfg.add(config.Scope.application, "workload", "params", {})
+        self.cfg.add(config.Scope.application, "reporting", "metrics.request.histograms", True)
+        self.metrics_store = self.create_store()
+
+    def create_store(self):
+        store = metrics.InMemoryMetricsStore(self.cfg, clock=StaticClock)
+        store.open(InMemoryMetricsStoreHistogramTests.TEST_RUN_ID, InMemoryMetricsStoreHistogramTests.TEST_RUN_TIMESTAMP,
+                   "test", "append-no-conflicts", "defaults", create=True)
+        return store
+
+    def put_service_times(self, store, values, sample_type=metrics.SampleType.Normal, success=True):
+        for i, v in enumerate(values):
+            store.put_value_cluster_level("service_time", v, "ms", task="term-query", operation_type="search", sample_type=sample_type,
+                                          relative_time=i, meta_data={"success": success})
+
+    def test_aggregates_request_metrics(self):
+        self.put_service_times(self.metrics_store, [1, 2, 3, 4, 100], sample_type=metrics.SampleType.Normal)
+        self.put_service_times(self.metrics_store, [1000], sample_type=metrics.SampleType.Warmup, success=False)
+        self.metrics_store.put_value_cluster_level("final_index_size", 1000, "GB")
+
+        # only non-request metrics are stored as docs
+        self.assertEqual(1, len(self.metrics_store.docs))
+        stats = self.metrics_store.get_stats("service_time", task="term-query", operation_type="search")
+        self.assertEqual({"count": 5, "min": 1, "max": 100, "avg": 22, "sum": 110}, stats)
+        percentiles = self.metrics_store.get_percentiles("service_time", task="term-query", sample_type=metrics.SampleType.Normal,
+                                                         percentiles=[0, 50, 100])
+        self.assertEqual(1, percentiles[0])
+        self.assertAlmostEqual(3, percentiles[50], delta=3 * 0.01)
+        self.assertEqual(100, percentiles[100])
+        self.assertEqual("ms", self.metrics_store.get_unit("service_time", task="term-query"))
+        self.assertEqual(0.0, self.metrics_store.get_error_rate("term-query", sample_type=metrics.SampleType.Normal))
+        self.assertEqual(1.0, self.metrics_store.get_error_rate("term-query", sample_type=metrics.SampleType.Warmup))
+        self.assertEqual(1 / 6, self.metrics_store.get_error_rate("term-query"))
+        self.assertEqual(4000, self.metrics_store.get_one("service_time", task="term-query", mapper=lambda doc: doc["relative-time-ms"],
+                                                          sort_key="relative-time-ms", sort_reverse=True))
+        self.assertIsNone(self.metrics_store.get_stats("latency", task="term-query"))
+        self.assertEqual(collections.OrderedDict(), self.metrics_store.get_percentiles("latency", task="term-query"))
+
+    def test_filters_aggregated_request_metrics_by_sample_type(self):
+        self.put_service_times(self.metrics_store, [1, 2, 3, 4, 100], sample_type=metrics.SampleType.Normal)
+        self.put_service_times(self.metrics_store, [1000], sample_type=metrics.SampleType.Warmup)
+
+        # warmup has the value 0 and must not be mistaken for "no filter"
+        warmup_stats = self.metrics_store.get_stats("service_time", task="term-query", sample_type=metrics.SampleType.Warmup)
+        self.assertEqual({"count": 1, "min": 1000, "max": 1000, "avg": 1000, "sum": 1000}, warmup_stats)
+        self.assertEqual(1000, self.metrics_store.get_percentiles("service_time", task="term-query", sample_type=metrics.SampleType.Warmup,
+                                                                  percentiles=[0])[0])
+        all_stats = self.metrics_store.get_stats("service_time", task="term-query", sample_type=None)
+        self.assertEqual(6, all_stats["count"])
+
+    def test_put_histograms(self):
+        # histograms that are put directly are considered even if the store does not aggregate request metrics itself
+        self.cfg.add(config.Scope.application, "reporting", "metrics.request.histograms", False)
+        store = self.create_store()
+        for values, relative_time in [([1, 2, 3], 10), ([4, 100], 5)]:
+            histogram = metrics.LogHistogram(metrics.InMemoryMetricsStore.HISTOGRAM_RELATIVE_ERROR)
+            histogram.record_all(values)
+            store.put_histogram("service_time", histogram, "ms", task="term-query", operation_type="search",
+                                relative_time=relative_time, meta_data={"workload": "a"}, error_count=1)
+
+        self.assertEqual(0, len(store.docs))
+        stats = store.get_stats("service_time", task="term-query", operation_type="search")
+        self.assertEqual({"count": 5, "min": 1, "max": 100, "avg": 22, "sum": 110}, stats)
+        self.assertEqual(100, store.get_percentiles("service_time", task="term-query", percentiles=[100])[100])
+        self.assertEqual("ms", store.get_unit("service_time", task="term-query"))
+        self.assertEqual(2 / 5, store.get_error_rate("term-query"))
+        self.assertEqual(10000, store.get_one("service_time", task="term-query", mapper=lambda doc: doc["relative-time-ms"],
+                                              sort_key="relative-time-ms", sort_reverse=True))
+
+    def test_put_histogram_of_other_metrics_as_docs(self):
+        histogram = metrics.LogHistogram(metrics.InMemoryMetricsStore.HISTOGRAM_RELATIVE_ERROR)
+        histogram.record_all([500, 500, 1000])
+        self.metrics_store.put_histogram("bulk_size", histogram, "docs", task="index-append", operation_type="bulk",
+                                         relative_time=3, error_count=1)
+
+        self.assertEqual([500, 500, 1000], sorted(self.metrics_store.get("bulk_size", task="index-append")))
+        self.assertEqual([False, True, True], [doc["meta"]["success"] for doc in self.metrics_store.docs])
+        self.assertEqual("docs", self.metrics_store.get_unit("bulk_size", task="index-append"))
+
+    def test_externalize_and_bulk_add(self):
+        self.put_service_times(self.metrics_store, [1, 2, 3])
+        self.metrics_store.put_value_cluster_level("final_index_size", 1000, "GB")
+        memento = self.metrics_store.to_externalizable(clear=True)
+        self.assertEqual({}, self.metrics_store.histograms)
+
+        store = self.create_store()
+        self.put_service_times(store, [4, 5])
+        store.bulk_add(memento)
+
+        self.assertEqual(1000, store.get_one("final_index_size"))
+        stats = store.get_stats("service_time", task="term-query")
+        self.assertEqual(5, stats["count"])
+        self.assertEqual(1, stats["min"])
+        self.assertEqual(5, stats["max"])
+
+
 class FileTestRunStoreTests(TestCase):
     TEST_RUN_TIMESTAMP = datetime.datetime(2016, 1, 31)
     TEST_RUN_ID = "6ebc6e53-ee20-4b0c-99b4-09697987e9f4"
@@ -2200,6 +2590,74 @@ class GlobalStatsCalculatorTests(TestCase):
         assert "delete-index" in [op_metric.get('task') for op_metric in result.op_metrics]
 
 
+    def test_calculates_driver_health(self):
+        task = Task("index-append", operation=Operation(name="index-append", operation_type="bulk"))
+        test_procedure = TestProcedure(name="append-no-conflicts", schedule=[task], meta_data={})
+        self.metrics_store.open(InMemoryMetricsStoreTests.TEST_RUN_ID, InMemoryMetricsStoreTests.TEST_RUN_TIMESTAMP,
+                                "test", "append-no-conflicts", "defaults", create=True)
+        self.metrics_store.put_values_bulk("service_time", [10.0, 12.0], unit="ms", task="index-append", operation="index-append",
+                                           operation_type="bulk", meta_data={"success": True})
+        self.metrics_store.put_values_bulk("worker_cpu_usage", [80.0, 100.0], unit="%", task="index-append", meta_data={"worker_id": 0})
+        self.metrics_store.put_values_bulk("event_loop_lag", [1.0, 3.0], unit="ms", task="index-append", meta_data={"worker_id": 0})
+        self.metrics_store.put_values_bulk("dropped_samples", [5, 7], unit="", task="index-append", meta_data={"worker_id": 0})
+        # measurements during warmup are ignored
+        self.metrics_store.put_values_bulk("worker_cpu_usage", [10.0], unit="%", task="index-append", sample_types=metrics.SampleType.Warmup,
+                                           meta_data={"worker_id": 0})
+        self.metrics_store.put_values_bulk("event_loop_lag", [50.0], unit="ms", task="index-append", sample_types=metrics.SampleType.Warmup,
+                                           meta_data={"worker_id": 0})
+        self.metrics_store.put_values_bulk("dropped_samples", [100], unit="", task="index-append", sample_types=metrics.SampleType.Warmup,
+                                           meta_data={"worker_id": 0})
+
+        result = GlobalStatsCalculator(store=self.metrics_store, workload=Workload(name="geonames", meta_data={}),
+                                       test_procedure=test_procedure)()
+
+        driver_health = result.op_metrics[0]["driver_health"]
+        self.assertEqual(90.0, driver_health["worker_cpu_usage"]["mean"])
+        self.assertEqual("%", driver_health["worker_cpu_usage"]["unit"])
+        self.assertEqual(2.0, driver_health["event_loop_lag"]["mean"])
+        self.assertEqual(12, driver_health["dropped_samples"])
+        # the worker has not reported any schedule slips as the task is not throttled
+        self.assertNotIn("schedule_slip", driver_health)
+        # the task does not use an open arrival-mode
+        self.assertNotIn("arrivals", result.op_metrics[0])
+
+    def test_calculates_arrivals(self):
+        task = Task("search", operation=Operation(name="search", operation_type="search"), params={"arrival-mode": "open"})
+        test_procedure = TestProcedure(name="open-loop", schedule=[task], meta_data={})
+        self.metrics_store.open(InMemoryMetricsStoreTests.TEST_RUN_ID, InMemoryMetricsStoreTests.TEST_RUN_TIMESTAMP,
+                                "test", "open-loop", "defaults", create=True)
+        self.metrics_store.put_values_bulk("service_time", [10.0, 12.0], unit="ms", task="search", operation="search",
+                                           operation_type="search", meta_data={"success": True})
+        # attached to samples while the task runs
+        self.metrics_store.put_values_bulk("queueing_delay", [1.0, 5.0], unit="ms", task="search", operation="search",
+                                           operation_type="search", meta_data={"success": True})
+        self.metrics_store.put_values_bulk("dropped_arrivals", [3], unit="ops", task="search", operation="search",
+                                           operation_type="search", meta_data={"success": True})
+        # reported by two clients once they have finished
+        self.metrics_store.put_values_bulk("dropped_arrivals", [2], unit="ops", task="search", meta_data={"worker_id": 0})
+        self.metrics_store.put_values_bulk("late_arrivals", [4], unit="ops", task="search", meta_data={"worker_id": 0})
+        self.metrics_store.put_values_bulk("offered_arrival_rate", [100.0, 100.0], unit="ops/s", task="search",
+                                           meta_data={"worker_id": 0})
+        self.metrics_store.put_values_bulk("issued_arrival_rate", [80.0, 90.0], unit="ops/s", task="search",
+                                           meta_data={"worker_id": 0})
+        # warmup is ignored
+        self.metrics_store.put_values_bulk("dropped_arrivals", [50], unit="ops", task="search", sample_types=metrics.SampleType.Warmup,
+                                           meta_data={"worker_id": 0})
+
+        result = GlobalStatsCalculator(store=self.metrics_store, workload=Workload(name="geonames", meta_data={}),
+                                       test_procedure=test_procedure)()
+
+        arrivals = result.op_metrics[0]["arrivals"]
+        self.assertEqual(3.0, arrivals["queueing_delay"]["mean"])
+        self.assertEqual("ms", arrivals["queueing_delay"]["unit"])
+        self.assertEqual(200.0, arrivals["offered_arrival_rate"])
+        self.assertEqual(170.0, arrivals["issued_arrival_rate"])
+        self.assertEqual(5, arrivals["dropped_arrivals"])
+        self.assertEqual(4, arrivals["late_arrivals"])
+        self.assertIn({"task": "search", "operation": "search", "name": "dropped_arrivals", "value": {"single": 5}},
+                      [{k: v for k, v in doc.items() if k != "meta"} for doc in result.as_flat_list()])
+
+
 class GlobalStatsTests(TestCase):
     def test_as_flat_list(self):
         d = {
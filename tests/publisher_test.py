@@ -113,3 +113,53 @@ class FormatterTests(TestCase):
         self.assertEqual(len(result_aggregated), 4)
         self.assertEqual(result_aggregated[0][2], 95)  # baseline overall_min
         self.assertEqual(result_aggregated[3][3], 205)  # contender overall_max
+
+
+class SummaryResultsPublisherTests(TestCase):
+    def setUp(self):
+        config = Mock()
+        config.opts.side_effect = lambda *args, **kwargs: kwargs.get("default_value")
+        self.publisher = publisher.SummaryResultsPublisher(results=None, config=config)
+        self.op_metrics = {"error_rate": 0, "throughput": {"median": 1000}}
+
+    def test_no_warnings_for_healthy_load_generator(self):
+        warnings = []
+        self.publisher.add_warnings(warnings, {**self.op_metrics, "driver_health": {
+            "worker_cpu_usage": {"mean": 45.0, "unit": "%"},
+            "event_loop_lag": {"mean": 0.8, "unit": "ms"},
+            "schedule_slip": {"mean": 0.2, "unit": "ms"}
+        }}, "index-append")
+        self.assertEqual([], warnings)
+
+    def test_warns_if_results_are_driver_bound(self):
+        warnings = []
+        self.publisher.add_warnings(warnings, {**self.op_metrics, "driver_health": {
+            "worker_cpu_usage": {"mean": 98.5, "unit": "%"},
+            "event_loop_lag": {"mean": 42.0, "unit": "ms"},
+            "schedule_slip": {"mean": 120.0, "unit": "ms"},
+            "dropped_samples": 17
+        }}, "index-append")
+        self.assertEqual(3, len(warnings))
+        self.assertIn("likely limited by the load generator: mean worker CPU usage is 98.5% and mean event loop lag is 42.00 ms",
+                      warnings[0])
+        self.assertIn("started on average 120.00 ms later than scheduled", warnings[1])
+        self.assertIn("17 samples of operation 'index-append' were dropped", warnings[2])
+
+    def test_publishes_arrivals_of_open_loop_tasks(self):
+        lines = self.publisher._publish_arrivals({**self.op_metrics, "arrivals": {
+            "offered_arrival_rate": 200.0,
+            "issued_arrival_rate": 170.0,
+            "dropped_arrivals": 30,
+            "queueing_delay": {"50_0": 1.5, "mean": 2.0, "unit": "ms"}
+        }}, "search")
+        self.assertEqual([["Offered arrival rate", "search", "200.00", "ops/s"],
+                          ["Issued arrival rate", "search", "170.00", "ops/s"],
+                          ["Dropped arrivals", "search", 30, "ops"],
+                          ["Late arrivals", "search", 0, "ops"],
+                          ["50th percentile queueing delay", "search", 1.5, "ms"]], lines)
+        self.assertEqual([], self.publisher._publish_arrivals(self.op_metrics, "search"))
+
+    def test_no_warnings_without_driver_health(self):
+        warnings = []
+        self.publisher.add_warnings(warnings, self.op_metrics, "index-append")
+        self.assertEqual([], warnings)
@@ -3,10 +3,14 @@
 # The OpenSearch Contributors require contributions made to
 # this file be licensed under the Apache-2.0 license or a
 # compatible open source license.
+import os
 import tempfile
 from unittest import TestCase
 
-from osbenchmark.utils.dataset import Context, get_data_set, HDF5DataSet, BigANNVectorDataSet
+import h5py
+import numpy as np
+
+from osbenchmark.utils.dataset import Context, get_data_set, HDF5DataSet, BigANNVectorDataSet, PrefetchingDataSet
 from osbenchmark.utils.parse import ConfigurationError
 from tests.utils.dataset_helper import create_data_set, create_ground_truth
 
@@ -66,3 +70,54 @@ class DataSetTestCase(TestCase):
     def testUnSupportedDataSetFormat(self):
         with self.assertRaises(ConfigurationError) as _:
             get_data_set("random", "/some/path", Context.INDEX)
+
+    def testBigANNReadsChunksAndSeeks(self):
+        data_set_dir = tempfile.mkdtemp()
+        vectors = np.arange(DEFAULT_NUM_VECTORS * DEFAULT_DIMENSION, dtype=np.float32).reshape(DEFAULT_NUM_VECTORS, DEFAULT_DIMENSION)
+        path = os.path.join(data_set_dir, "vectors.fbin")
+        with open(path, "wb") as f:
+            f.write(int.to_bytes(DEFAULT_NUM_VECTORS, 4, "little"))
+            f.write(int.to_bytes(DEFAULT_DIMENSION, 4, "little"))
+            vectors.tofile(f)
+
+        data_set_instance = get_data_set("bigann", path, Context.INDEX)
+        np.testing.assert_array_equal(vectors[0:4], data_set_instance.read(4))
+        data_set_instance.seek(8)
+        np.testing.assert_array_equal(vectors[8:10], data_set_instance.read(4))
+        self.assertIsNone(data_set_instance.read(4))
+        data_set_instance.reset()
+        np.testing.assert_array_equal(vectors[0:1], data_set_instance.read(1))
+
+    def testBigANNGroundTruthReadsNeighborIds(self):
+        data_set_dir = tempfile.mkdtemp()
+        ids = np.arange(20, dtype=np.uint32).reshape(4, 5)
+        path = os.path.join(data_set_dir, "neighbors.bin")
+        with open(path, "wb") as f:
+            f.write(int.to_bytes(4, 4, "little"))
+            f.write(int.to_bytes(5, 4, "little"))
+            ids.tofile(f)
+            # distances
+            np.ones((4, 5), dtype=np.float32).tofile(f)
+
+        data_set_instance = get_data_set("bigann", path, Context.NEIGHBORS)
+        data_set_instance.seek(3)
+        self.assertEqual([[15, 16, 17, 18, 19]], data_set_instance.read(2).tolist())
+
+    def testPrefetchingDataSetReadsAheadInChunkAlignedBlocks(self):
+        data_set_dir = tempfile.mkdtemp()
+        vectors = np.arange(100 * DEFAULT_DIMENSION, dtype=np.float32).reshape(100, DEFAULT_DIMENSION)
+        path = os.path.join(data_set_dir, "vectors.hdf5")
+        with h5py.File(path, "w") as f:
+            f.create_dataset("train", data=vectors, chunks=(8, DEFAULT_DIMENSION))
+
+        data_set_instance = PrefetchingDataSet(get_data_set("hdf5", path, Context.INDEX), block_size=10, blocks=2, end=50)
+        self.assertEqual(16, data_set_instance.block_size)
+        self.assertEqual(100, data_set_instance.size())
+
+        data_set_instance.seek(5)
+        np.testing.assert_array_equal(vectors[5:35], data_set_instance.read(30))
+        np.testing.assert_array_equal(vectors[35:50], data_set_instance.read(30))
+        self.assertIsNone(data_set_instance.read(1))
+
+        data_set_instance.reset()
+        np.testing.assert_array_equal(vectors[0:1], data_set_instance.read(1))
@@ -30,6 +30,9 @@ import tempfile
 import unittest.mock as mock
 from unittest import TestCase
 
+import pytest
+
+from osbenchmark import exceptions
 from osbenchmark.utils import io
 
 
@@ -73,6 +76,20 @@ class IoTests(TestCase):
         # no extension whatsoever
         self.assertFalse(io.has_extension("/tmp/README", "README"))
 
+    def test_mmap_source_reads_lines_as_block(self):
+        for contents in [b"a\nbb\nccc\ndddd\n", b"a\nbb\nccc\ndddd"]:
+            data_file_path = os.path.join(tempfile.mkdtemp(), "docs.json")
+            with open(data_file_path, "wb") as f:
+                f.write(contents)
+
+            with io.MmapSource(data_file_path, "rt") as source:
+                # start with a window that is too small to hold all requested lines
+                source.bytes_per_line = 1
+                self.assertEqual((1, b"a\n"), source.read_lines_block(1))
+                self.assertEqual((2, b"bb\nccc\n"), source.read_lines_block(2))
+                self.assertEqual((1, contents[9:]), source.read_lines_block(5))
+                self.assertEqual((0, b""), source.read_lines_block(5))
+
 
 class TestDecompression:
     def test_decompresses_supported_file_formats(self):
@@ -125,6 +142,188 @@ class TestDecompression:
         mocked_warn_logger.assert_called_once_with(expected_err, archive_path, decompress_cmd, stderr_msg)
         assert result is False
 
+    def test_decompresses_streams_in_chunks(self):
+        for ext in ["gz", "bz2", "zst"]:
+            tmp_dir = tempfile.mkdtemp()
+            archive_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources", f"test.txt.{ext}")
+            decompressed_path = os.path.join(tmp_dir, "test.txt")
+            with open(archive_path, "rb") as f:
+                archive = f.read()
+
+            assert io.supports_streaming_decompression(archive_path)
+            with io.StreamingDecompressor(archive_path, decompressed_path) as decompressor:
+                for i in range(0, len(archive), 5):
+                    decompressor.write(archive[i:i + 5])
+
+            assert self.read(decompressed_path) == "Sample text for DecompressionTests\n"
+            assert decompressor.lines == 1
+            assert os.path.exists(f"{decompressed_path}.offset")
+
+    def test_streaming_decompression_detects_truncated_archives(self):
+        tmp_dir = tempfile.mkdtemp()
+        archive_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources", "test.txt.bz2")
+        decompressed_path = os.path.join(tmp_dir, "test.txt")
+        with open(archive_path, "rb") as f:
+            archive = f.read()
+
+        with pytest.raises(exceptions.DataError, match="is truncated"):
+            with io.StreamingDecompressor(archive_path, decompressed_path) as decompressor:
+                decompressor.write(archive[:-10])
+
+        assert os.listdir(tmp_dir) == []
+
     def read(self, f):
         with open(f, 'r') as content_file:
             return content_file.read()
+
+
+class TestFileOffsetTableBuilder:
+    @pytest.mark.parametrize("trailing_newline", [True, False])
+    def test_builds_same_offset_table_as_reading_the_file(self, trailing_newline):
+        tmp_dir = tempfile.mkdtemp()
+        data_file_path = os.path.join(tmp_dir, "docs.json")
+        content = "".join(f'{{"id": {i}}}\n' for i in range(12))
+        if not trailing_newline:
+            content = content[:-1]
+        with open(data_file_path, "wt", encoding="utf-8") as f:
+            f.write(content)
+
+        expected_lines = io.prepare_file_offset_table(data_file_path, None, "source-url", None, interval=3)
+        with open(f"{data_file_path}.offset", "rb") as f:
+            expected_offsets = f.read()
+
+        builder = io.FileOffsetTableBuilder(data_file_path, interval=3)
+        data = content.encode("utf-8")
+        for i in range(0, len(data), 7):
+            builder.update(data[i:i + 7])
+
+        assert builder.finish() == expected_lines == 12
+        with open(f"{data_file_path}.offset", "rb") as f:
+            assert f.read() == expected_offsets
+
+
+class TestFileOffsetTable:
+    def data_file(self, lines):
+        data_file_path = os.path.join(tempfile.mkdtemp(), "docs.json")
+        with open(data_file_path, "wt", encoding="utf-8") as f:
+            for i in range(lines):
+                f.write(f'{{"id": {i}}}\n')
+        return data_file_path
+
+    def test_skips_lines_with_offset_table(self):
+        data_file_path = self.data_file(lines=100)
+        assert io.prepare_file_offset_table(data_file_path, None, "source-url", None, interval=7) == 100
+
+        with io.FileOffsetTable.read_for_data_file(data_file_path) as file_offset_table:
+            assert file_offset_table.find_closest_offset(3) == (0, 3)
+            assert file_offset_table.find_closest_offset(7) == (70, 0)
+            assert file_offset_table.find_closest_offset(99) == (1068, 1)
+
+        for lines_to_skip in [0, 1, 6, 7, 8, 50, 99]:
+            with open(data_file_path, "rt", encoding="utf-8") as data_file:
+                io.skip_lines(data_file_path, data_file, lines_to_skip)
+                assert data_file.readline() == f'{{"id": {lines_to_skip}}}\n'
+
+    def test_detects_stale_offset_table(self):
+        data_file_path = self.data_file(lines=20)
+        io.prepare_file_offset_table(data_file_path, None, "source-url", None, interval=5)
+        assert io.FileOffsetTable.create_for_data_file(data_file_path, interval=5).is_valid()
+        # a coarser table is still good enough
+        assert io.FileOffsetTable.create_for_data_file(data_file_path, interval=10).is_valid()
+        # ... but a finer one is not
+        assert not io.FileOffsetTable.create_for_data_file(data_file_path, interval=2).is_valid()
+
+        # same size but different content
+        with open(data_file_path, "r+b") as f:
+            f.write(b"{")
+            f.seek(-3, os.SEEK_END)
+            f.write(b"xx\n")
+        assert not io.FileOffsetTable.create_for_data_file(data_file_path, interval=5).is_valid()
+        assert io.prepare_file_offset_table(data_file_path, None, "source-url", None, interval=5) == 20
+
+        # corrupt entries
+        with open(f"{data_file_path}.offset", "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            f.write(b"\xff")
+        assert not io.FileOffsetTable.create_for_data_file(data_file_path, interval=5).is_valid()
+
+    def test_detects_offset_table_of_data_file_modified_in_the_middle(self):
+        # large enough that the middle is not covered by the fingerprint
+        data_file_path = self.data_file(lines=50000)
+        io.prepare_file_offset_table(data_file_path, None, "source-url", None, interval=1000)
+        assert io.FileOffsetTable.create_for_data_file(data_file_path, interval=1000).is_valid()
+
+        stat = os.stat(data_file_path)
+        with open(data_file_path, "r+b") as f:
+            f.seek(stat.st_size // 2)
+            line = f.readline()
+            f.seek(-len(line), os.SEEK_CUR)
+            # same size but the line boundaries move
+            f.write(b"\n" + line[:-1])
+        os.utime(data_file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        assert os.path.getsize(data_file_path) == stat.st_size
+        assert not io.FileOffsetTable.create_for_data_file(data_file_path, interval=1000).is_valid()
+        assert io.prepare_file_offset_table(data_file_path, None, "source-url", None, interval=1000) == 50000
+
+    def test_converts_pre_generated_text_offset_table(self):
+        data_file_path = self.data_file(lines=20)
+        downloader = mock.Mock()
+
+        def download(base_url, source_url, target_path, size_in_bytes):
+            with open(target_path, "wt", encoding="utf-8") as f:
+                f.write("10;100\n20;210\n")
+
+        downloader.download.side_effect = download
+
+        # did not need to read the data file
+        assert io.prepare_file_offset_table(data_file_path, "http://localhost/corpora", None, downloader, interval=10) is None
+        downloader.download.assert_called_once_with("http://localhost/corpora", None, f"{data_file_path}.offset", None)
+        with io.FileOffsetTable.read_for_data_file(data_file_path) as file_offset_table:
+            assert file_offset_table.find_closest_offset(15) == (100, 5)
+
+    def test_accepts_coarser_pre_generated_offset_table(self):
+        data_file_path = self.data_file(lines=20)
+        downloader = mock.Mock()
+
+        def download(base_url, source_url, target_path, size_in_bytes):
+            with open(target_path, "wt", encoding="utf-8") as f:
+                f.write("50000;1000000\n100000;2000000\n")
+
+        downloader.download.side_effect = download
+
+        assert io.prepare_file_offset_table(data_file_path, "http://localhost/corpora", None, downloader) is None
+        # the converted table is reused
+        assert io.prepare_file_offset_table(data_file_path, "http://localhost/corpora", None, downloader) is None
+        downloader.download.assert_called_once_with("http://localhost/corpora", None, f"{data_file_path}.offset", None)
+        assert io.FileOffsetTable.read_header(f"{data_file_path}.offset")["interval"] == 50000
+
+    def test_rejects_text_offset_table_when_reading(self):
+        data_file_path = self.data_file(lines=20)
+        with open(f"{data_file_path}.offset", "wt", encoding="utf-8") as f:
+            f.write("10;100\n")
+
+        with pytest.raises(exceptions.DataError, match="is not a valid file offset table"):
+            with open(data_file_path, "rt", encoding="utf-8") as data_file:
+                io.skip_lines(data_file_path, data_file, 15)
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 10, 64, 1024])
+    @pytest.mark.parametrize("trailing_newline", [True, False])
+    def test_scans_line_offsets_in_chunks(self, chunk_size, trailing_newline):
+        data_file_path = self.data_file(lines=30)
+        if not trailing_newline:
+            with open(data_file_path, "r+b") as f:
+                f.truncate(os.path.getsize(data_file_path) - 1)
+        with open(data_file_path, "rb") as f:
+            content = f.read()
+        builder = io.FileOffsetTableBuilder(data_file_path, interval=6)
+        builder.update(content)
+
+        lines, offsets = io.scan_line_offsets(data_file_path, interval=6, chunk_size=chunk_size, max_workers=4)
+
+        assert lines == builder.finish() == 30
+        assert offsets == builder.offsets
+        assert offsets[-1] == (30, len(content))
+
+    def test_scans_empty_file(self):
+        data_file_path = self.data_file(lines=0)
+        assert io.scan_line_offsets(data_file_path, interval=6) == (0, [])
@@ -21,8 +21,12 @@
 # KIND, either express or implied.  See the License for the
 # specific language governing permissions and limitations
 # under the License.
+import http.server
+import os
 import random
+import threading
 import unittest.mock as mock
+import urllib.error
 
 import pytest
 
@@ -94,3 +98,129 @@ class TestNetUtils:
         mock_progress.reset_mock()
         progress(42, None)
         assert mock_progress.print.called
+
+
+class RangeRequestHandler(http.server.BaseHTTPRequestHandler):
+    content = {}
+    etags = {}
+    requested_ranges = []
+    failing_ranges = set()
+    head_supported = True
+
+    def do_HEAD(self):
+        if not self.head_supported:
+            self.send_error(405)
+            return
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def _respond(self, send_body):
+        data = self.content[self.path]
+        status = 200
+        range_header = self.headers.get("Range")
+        if range_header:
+            start, end = (int(v) for v in range_header[len("bytes="):].split("-"))
+            RangeRequestHandler.requested_ranges.append((self.path, start))
+            if (self.path, start) in self.failing_ranges:
+                self.send_error(500)
+                return
+            data = data[start:end + 1]
+            status = 206
+        self.send_response(status)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(len(data)))
+        if self.path in self.etags:
+            self.send_header("ETag", self.etags[self.path])
+        self.end_headers()
+        if send_body:
+            self.wfile.write(data)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class TestRangedDownloads:
+    @pytest.fixture
+    def server(self):
+        RangeRequestHandler.content = {"/xaa": bytes(range(256)) * 40, "/xab": b"opensearch" * 100}
+        RangeRequestHandler.etags = {}
+        RangeRequestHandler.requested_ranges = []
+        RangeRequestHandler.failing_ranges = set()
+        RangeRequestHandler.head_supported = True
+        httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), RangeRequestHandler)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        yield f"http://127.0.0.1:{httpd.server_address[1]}"
+        httpd.shutdown()
+        httpd.server_close()
+
+    @mock.patch("osbenchmark.utils.net.DOWNLOAD_CHUNK_SIZE_IN_BYTES", 1000)
+    def test_download_with_multiple_streams(self, server, tmp_path):
+        target = str(tmp_path / "xaa")
+
+        net.download(f"{server}/xaa", target, 10240, streams=3)
+
+        assert open(target, "rb").read() == RangeRequestHandler.content["/xaa"]
+        assert sorted(start for _, start in RangeRequestHandler.requested_ranges) == list(range(0, 10240, 1000))
+        assert os.listdir(tmp_path) == ["xaa"]
+
+    @mock.patch("osbenchmark.utils.net.DOWNLOAD_CHUNK_SIZE_IN_BYTES", 1000)
+    def test_resumes_interrupted_download_of_parts(self, server, tmp_path):
+        target = str(tmp_path / "docs.json")
+        parts = [(f"{server}/xaa", 10240), (f"{server}/xab", None)]
+        RangeRequestHandler.failing_ranges = {("/xab", 0)}
+
+        with pytest.raises(urllib.error.HTTPError):
+            net.download_parts(parts, target, streams=1)
+        assert sorted(os.listdir(tmp_path)) == ["docs.json.tmp", "docs.json.tmp.manifest"]
+
+        RangeRequestHandler.failing_ranges = set()
+        RangeRequestHandler.requested_ranges = []
+        net.download_parts(parts, target, streams=2)
+
+        assert open(target, "rb").read() == RangeRequestHandler.content["/xaa"] + RangeRequestHandler.content["/xab"]
+        # only the chunks that have not been completed before are requested again
+        assert RangeRequestHandler.requested_ranges == [("/xab", 0)]
+        assert os.listdir(tmp_path) == ["docs.json"]
+
+    @mock.patch("osbenchmark.utils.net.DOWNLOAD_CHUNK_SIZE_IN_BYTES", 1000)
+    def test_falls_back_to_single_stream_if_probe_fails(self, server, tmp_path):
+        target = str(tmp_path / "xaa")
+        RangeRequestHandler.head_supported = False
+
+        net.download(f"{server}/xaa", target, 10240, streams=3)
+
+        assert open(target, "rb").read() == RangeRequestHandler.content["/xaa"]
+        assert RangeRequestHandler.requested_ranges == []
+
+    @mock.patch("osbenchmark.utils.net.DOWNLOAD_CHUNK_SIZE_IN_BYTES", 1000)
+    def test_discards_partial_download_if_remote_file_changed(self, server, tmp_path):
+        target = str(tmp_path / "xaa")
+        RangeRequestHandler.etags = {"/xaa": '"v1"'}
+        RangeRequestHandler.failing_ranges = {("/xaa", 5000)}
+
+        with pytest.raises(urllib.error.HTTPError):
+            net.download(f"{server}/xaa", target, 10240, streams=2)
+        assert sorted(os.listdir(tmp_path)) == ["xaa.tmp", "xaa.tmp.manifest"]
+
+        RangeRequestHandler.content["/xaa"] = bytes(reversed(range(256))) * 40
+        RangeRequestHandler.etags = {"/xaa": '"v2"'}
+        RangeRequestHandler.failing_ranges = set()
+        RangeRequestHandler.requested_ranges = []
+        net.download(f"{server}/xaa", target, 10240, streams=2)
+
+        assert open(target, "rb").read() == RangeRequestHandler.content["/xaa"]
+        # chunks of the previous version are not reused
+        assert sorted(start for _, start in RangeRequestHandler.requested_ranges) == list(range(0, 10240, 1000))
+
+    @mock.patch("osbenchmark.utils.net.DOWNLOAD_CHUNK_SIZE_IN_BYTES", 1000)
+    def test_streams_ranges_in_order(self, server):
+        received = []
+
+        bytes_read = net.stream_http(f"{server}/xaa", received.append, streams=4)
+
+        assert bytes_read == 10240
+        assert b"".join(received) == RangeRequestHandler.content["/xaa"]
+        assert [len(chunk) for chunk in received] == [1000] * 10 + [240]
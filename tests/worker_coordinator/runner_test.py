@@ -457,6 +457,75 @@ class BulkIndexRunnerTests(TestCase):
                                    opaque_id="DESIRED-OPAQUE-ID",
                                    request_timeout=3.0)
 
+    @mock.patch('osbenchmark.client.RequestContextHolder.on_client_request_end')
+    @mock.patch('osbenchmark.client.RequestContextHolder.on_client_request_start')
+    @mock.patch("opensearchpy.OpenSearch")
+    @run_async
+    async def test_bulk_with_adaptive_bulk_size(self, opensearch, on_client_request_start, on_client_request_end):
+        bulk_response = {
+            "errors": False,
+            "took": 8
+        }
+        opensearch.bulk.return_value = as_future(io.StringIO(json.dumps(bulk_response)))
+
+        bulk = runner.BulkIndex()
+
+        bulk_params = {
+            "body": "action_meta_data\n" +
+                    "index_line\n",
+            "action-metadata-present": True,
+            "adaptive-bulk-size": {"target-latency": 0.5},
+            "bulk-size": 1,
+            "unit": "docs"
+        }
+
+        result = await bulk(opensearch, bulk_params)
+
+        self.assertEqual(1, result["weight"])
+        self.assertEqual(1, result["bulk_size"])
+
+    @mock.patch('osbenchmark.client.RequestContextHolder.on_client_request_end')
+    @mock.patch('osbenchmark.client.RequestContextHolder.on_client_request_start')
+    @mock.patch("opensearchpy.OpenSearch")
+    @run_async
+    async def test_precompressed_bulk(self, opensearch, on_client_request_start, on_client_request_end):
+        bulk_response = {
+            "errors": False,
+            "took": 8
+        }
+        opensearch.transport.perform_request.return_value = as_future(io.StringIO(json.dumps(bulk_response)))
+
+        bulk = runner.BulkIndex()
+
+        bulk_params = {
+            "body": b"compressed",
+            "body-encoding": "gzip",
+            "action-metadata-present": False,
+            "index": "test1",
+            "request-timeout": 3.0,
+            "headers": {"x-test-id": "1234"},
+            "opaque-id": "DESIRED-OPAQUE-ID",
+            "bulk-size": 3,
+            "unit": "docs"
+        }
+
+        result = await bulk(opensearch, bulk_params)
+
+        self.assertEqual(8, result["took"])
+        self.assertEqual(3, result["weight"])
+        self.assertEqual(True, result["success"])
+
+        opensearch.bulk.assert_not_called()
+        opensearch.transport.perform_request.assert_called_once_with("POST", "/test1/_bulk",
+                                                                     params={"request_timeout": 3.0},
+                                                                     body=b"compressed",
+                                                                     headers={
+                                                                         "x-test-id": "1234",
+                                                                         "content-type": "application/x-ndjson",
+                                                                         "content-encoding": "gzip",
+                                                                         "x-opaque-id": "DESIRED-OPAQUE-ID",
+                                                                     })
+
     @mock.patch('osbenchmark.client.RequestContextHolder.on_client_request_end')
     @mock.patch('osbenchmark.client.RequestContextHolder.on_client_request_start')
     @mock.patch("opensearchpy.OpenSearch")
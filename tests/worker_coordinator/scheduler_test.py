@@ -23,7 +23,9 @@
 # under the License.
 # pylint: disable=protected-access
 
+import os
 import random
+import tempfile
 from unittest import TestCase
 
 from osbenchmark import exceptions
@@ -70,6 +72,65 @@ class PoissonSchedulerTests(SchedulerTestCase):
         self.assertThroughputEquals(s, target_throughput, f"target throughput=[{target_throughput}] ops/s")
 
 
+class ReplaySchedulerTests(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.arrivals_file = os.path.join(self.tmp_dir.name, "arrivals.txt")
+        with open(self.arrivals_file, "wt", encoding="utf-8") as f:
+            f.write("100.5\n100.0\n\n101.0\n102.5\n103.0\n")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def task(self, clients=1, **params):
+        return workload.Task(name="bulk-index",
+                             operation=workload.Operation(name="bulk-index", operation_type=workload.OperationType.Bulk.to_hyphenated_string()),
+                             clients=clients,
+                             schedule=scheduler.ReplayScheduler.name,
+                             params={"arrivals-file": self.arrivals_file, **params})
+
+    def replay(self, sched):
+        arrivals = []
+        current = 0
+        while True:
+            try:
+                current = sched.next(current)
+                arrivals.append(current)
+            except StopIteration:
+                return arrivals
+
+    def test_replays_arrivals_relative_to_first_arrival(self):
+        sched = scheduler.scheduler_for(self.task())
+        self.assertIsInstance(sched, scheduler.ReplayScheduler)
+        self.assertEqual([scheduler.ReplayScheduler.MIN_ARRIVAL, 0.5, 1.0, 2.5, 3.0], self.replay(sched))
+
+    def test_spreads_arrivals_across_clients(self):
+        task = self.task(clients=2, **{"arrival-time-scale": 2})
+        first_client = scheduler.scheduler_for(task)
+        second_client = scheduler.scheduler_for(task)
+        second_client.client_index = 1
+
+        self.assertEqual([scheduler.ReplayScheduler.MIN_ARRIVAL, 2.0, 6.0], self.replay(first_client))
+        self.assertEqual([1.0, 5.0], self.replay(second_client))
+
+    def test_reads_arrivals_file_once_for_all_clients(self):
+        first_client = scheduler.scheduler_for(self.task(clients=2))
+        second_client = scheduler.scheduler_for(self.task(clients=2))
+        self.assertIs(first_client.arrivals, second_client.arrivals)
+
+    def test_requires_arrivals_file(self):
+        task = self.task()
+        del task.params["arrivals-file"]
+        with self.assertRaisesRegex(exceptions.SystemSetupError, "does not define 'arrivals-file'"):
+            scheduler.scheduler_for(task)
+
+    def test_rejects_invalid_arrivals(self):
+        with open(self.arrivals_file, "wt", encoding="utf-8") as f:
+            f.write("100.0\nnot-a-timestamp\n")
+        with self.assertRaisesRegex(exceptions.SystemSetupError, "Cannot read arrival times"):
+            scheduler.scheduler_for(self.task())
+
+
 class UnitAwareSchedulerTests(TestCase):
     def test_scheduler_rejects_differing_throughput_units(self):
         task = workload.Task(name="bulk-index",
@@ -114,6 +175,28 @@ class UnitAwareSchedulerTests(TestCase):
         # pylint: disable=not-callable
         self.assertEqual(2 * task.clients, s.next(0))
 
+    def test_scheduler_throttles_from_start(self):
+        task = workload.Task(name="bulk-index",
+                          operation=workload.Operation(
+                              name="bulk-index",
+                              operation_type=workload.OperationType.Bulk.to_hyphenated_string()),
+                          clients=4,
+                          params={
+                              "target-throughput": "20 docs/s"
+                          })
+
+        s = scheduler.UnitAwareScheduler(task=task, scheduler_class=scheduler.DeterministicScheduler)
+        s.throttle_from_start()
+        # without feedback each request is assumed to have a weight of one
+        # suppress pylint false positive
+        # pylint: disable=not-callable
+        self.assertEqual(1 / 5, s.next(0))
+        # feedback from the runner still adjusts the throughput
+        s.after_request(now=None, weight=5, unit="docs", request_meta_data=None)
+        # suppress pylint false positive
+        # pylint: disable=not-callable
+        self.assertEqual(1, s.next(0))
+
     def test_scheduler_accepts_differing_units_pages_and_ops(self):
         task = workload.Task(name="scroll-query",
                           operation=workload.Operation(
@@ -25,11 +25,13 @@
 import asyncio
 import collections
 import io
+import pickle
 import queue
 import threading
 import time
 import unittest.mock as mock
 from datetime import datetime
+from multiprocessing import shared_memory
 from unittest import TestCase
 
 import opensearchpy
@@ -38,6 +40,7 @@ import pytest
 from osbenchmark import metrics, workload, exceptions, config
 from osbenchmark.worker_coordinator import worker_coordinator, runner, scheduler
 from osbenchmark.workload import params
+from osbenchmark.utils import opts
 from tests import run_async, as_future
 
 
@@ -254,6 +257,72 @@ class WorkerCoordinatorTests(TestCase):
         self.assertEqual(1, target.on_task_finished.call_count)
         self.assertEqual(4, target.drive_at.call_count)
 
+    @mock.patch("osbenchmark.utils.net.resolve")
+    def test_start_benchmark_with_host_aggregators(self, resolve):
+        self.cfg.add(config.Scope.applicationOverride, "worker_coordinator", "worker_ips", ["10.5.5.1", "10.5.5.2"])
+        self.cfg.add(config.Scope.applicationOverride, "worker_coordinator", "coordination", "aggregated")
+        resolve.side_effect = ["10.5.5.1", "10.5.5.2"]
+
+        target = self.create_test_worker_coordinator_target()
+        target.create_host_aggregator.side_effect = lambda host: f"aggregator_{host}"
+        d = worker_coordinator.WorkerCoordinator(target, self.cfg, os_client_factory_class=WorkerCoordinatorTests.StaticClientFactory)
+        d.prepare_benchmark(t=self.workload)
+        d.start_benchmark()
+
+        target.create_host_aggregator.assert_has_calls(calls=[mock.call("10.5.5.1"), mock.call("10.5.5.2")])
+        self.assertEqual(["aggregator_10.5.5.1", "aggregator_10.5.5.1", "aggregator_10.5.5.2", "aggregator_10.5.5.2"],
+                         [c.kwargs["aggregator"] for c in target.start_worker.call_args_list])
+        # samples are sent to the aggregators, not via shared memory
+        self.assertEqual([None] * 4, [c.kwargs["sample_ring"] for c in target.start_worker.call_args_list])
+        target.start_host_aggregator.assert_has_calls(calls=[
+            mock.call("aggregator_10.5.5.1", "10.5.5.1", self.cfg, {0: "client_marker", 1: "client_marker"}),
+            mock.call("aggregator_10.5.5.2", "10.5.5.2", self.cfg, {2: "client_marker", 3: "client_marker"}),
+        ])
+
+    @mock.patch("osbenchmark.utils.net.resolve")
+    def test_hosts_reach_join_point(self, resolve):
+        self.cfg.add(config.Scope.applicationOverride, "worker_coordinator", "worker_ips", ["10.5.5.1", "10.5.5.2"])
+        self.cfg.add(config.Scope.applicationOverride, "worker_coordinator", "coordination", "aggregated")
+        resolve.side_effect = ["10.5.5.1", "10.5.5.2"]
+
+        target = self.create_test_worker_coordinator_target()
+        target.create_host_aggregator.side_effect = lambda host: f"aggregator_{host}"
+        d = worker_coordinator.WorkerCoordinator(target, self.cfg, os_client_factory_class=WorkerCoordinatorTests.StaticClientFactory)
+        d.prepare_benchmark(t=self.workload)
+        d.start_benchmark()
+        allocations = [worker_coordinator.ClientAllocation(client_id=0, task=worker_coordinator.JoinPoint(id=0))]
+
+        d.host_joinpoint_reached(worker_ids=[0, 1], host_timestamp=10, task_allocations=allocations)
+
+        self.assertEqual(-1, d.current_step)
+        self.assertEqual({0: 10, 1: 10}, {worker_id: ts for worker_id, (ts, _) in d.workers_completed_current_step.items()})
+
+        d.host_joinpoint_reached(worker_ids=[2, 3], host_timestamp=20, task_allocations=allocations)
+
+        self.assertEqual(0, d.current_step)
+        self.assertEqual(1, target.on_task_finished.call_count)
+        # one message per host
+        self.assertEqual(["aggregator_10.5.5.1", "aggregator_10.5.5.2"], [c.args[0] for c in target.drive_at.call_args_list])
+
+    def test_rejects_unknown_coordination_mode(self):
+        self.cfg.add(config.Scope.applicationOverride, "worker_coordinator", "coordination", "hierarchical")
+        d = worker_coordinator.WorkerCoordinator(self.create_test_worker_coordinator_target(), self.cfg,
+                                                 os_client_factory_class=WorkerCoordinatorTests.StaticClientFactory)
+        d.prepare_benchmark(t=self.workload)
+
+        with self.assertRaisesRegex(exceptions.SystemSetupError, r"Unknown worker coordination mode \[hierarchical\]"):
+            d.start_benchmark()
+
+    def test_rejects_aggregated_coordination_with_opensearch_metrics_store(self):
+        self.cfg.add(config.Scope.applicationOverride, "worker_coordinator", "coordination", "aggregated")
+        d = worker_coordinator.WorkerCoordinator(self.create_test_worker_coordinator_target(), self.cfg,
+                                                 os_client_factory_class=WorkerCoordinatorTests.StaticClientFactory)
+        d.prepare_benchmark(t=self.workload)
+        d.metrics_store = mock.create_autospec(metrics.OsMetricsStore, instance=True)
+
+        with self.assertRaisesRegex(exceptions.SystemSetupError, r"\[aggregated\] requires the in-memory metrics store"):
+            d.start_benchmark()
+
     @run_async
     async def test_load_test_clients_override(self):
         self.cfg.add(config.Scope.applicationOverride, "workload", "load.test.clients", 100)
@@ -278,41 +347,41 @@ def op(name, operation_type):
 
 
 class SamplePostprocessorTests(TestCase):
-    def throughput(self, absolute_time, relative_time, value):
+    def throughput(self, absolute_times, relative_times, values):
         return mock.call(name="throughput",
-                         value=value,
+                         values=values,
                          unit="docs/s",
                          task="index",
                          operation="index-op",
                          operation_type="bulk",
-                         sample_type=metrics.SampleType.Normal,
-                         absolute_time=absolute_time,
-                         relative_time=relative_time,
+                         sample_types=[metrics.SampleType.Normal] * len(values),
+                         absolute_times=absolute_times,
+                         relative_times=relative_times,
                          meta_data={})
 
-    def service_time(self, absolute_time, relative_time, value):
-        return self.request_metric(absolute_time, relative_time, "service_time", value)
+    def service_time(self, absolute_times, relative_times, values):
+        return self.request_metric(absolute_times, relative_times, "service_time", values)
 
-    def client_processing_time(self, absolute_time, relative_time, value):
-        return self.request_metric(absolute_time, relative_time, "client_processing_time", value)
+    def client_processing_time(self, absolute_times, relative_times, values):
+        return self.request_metric(absolute_times, relative_times, "client_processing_time", values)
 
-    def processing_time(self, absolute_time, relative_time, value):
-        return self.request_metric(absolute_time, relative_time, "processing_time", value)
+    def processing_time(self, absolute_times, relative_times, values):
+        return self.request_metric(absolute_times, relative_times, "processing_time", values)
 
-    def latency(self, absolute_time, relative_time, value):
-        return self.request_metric(absolute_time, relative_time, "latency", value)
+    def latency(self, absolute_times, relative_times, values):
+        return self.request_metric(absolute_times, relative_times, "latency", values)
 
-    def request_metric(self, absolute_time, relative_time, name, value):
+    def request_metric(self, absolute_times, relative_times, name, values):
         return mock.call(name=name,
-                         value=value,
+                         values=values,
                          unit="ms",
                          task="index",
                          operation="index-op",
                          operation_type="bulk",
-                         sample_type=metrics.SampleType.Normal,
-                         absolute_time=absolute_time,
-                         relative_time=relative_time,
-                         meta_data={})
+                         sample_types=[metrics.SampleType.Normal] * len(values),
+                         absolute_times=absolute_times,
+                         relative_times=relative_times,
+                         meta_data=[{}] * len(values))
 
     @mock.patch("osbenchmark.metrics.MetricsStore")
     def test_all_samples(self, metrics_store):
@@ -334,14 +403,13 @@ class SamplePostprocessorTests(TestCase):
         post_process(samples)
 
         calls = [
-            self.latency(38598, 24, 10.0), self.service_time(38598, 24, 7.0),
-            self.client_processing_time(38598, 24, 0.7), self.processing_time(38598, 24, 9.0),
-            self.latency(38599, 25, 10.0), self.service_time(38599, 25, 7.0),
-            self.client_processing_time(38599, 25, 0.7), self.processing_time(38599, 25, 9.0),
-            self.throughput(38598, 24, 5000),
-            self.throughput(38599, 25, 5000),
+            self.latency([38598, 38599], [24, 25], [10.0, 10.0]),
+            self.service_time([38598, 38599], [24, 25], [7.0, 7.0]),
+            self.client_processing_time([38598, 38599], [24, 25], [0.7, 0.7]),
+            self.processing_time([38598, 38599], [24, 25], [9.0, 9.0]),
+            self.throughput([38598, 38599], [24, 25], [5000, 5000]),
         ]
-        metrics_store.put_value_cluster_level.assert_has_calls(calls)
+        metrics_store.put_values_bulk.assert_has_calls(calls)
 
     @mock.patch("osbenchmark.metrics.MetricsStore")
     def test_downsamples(self, metrics_store):
@@ -365,12 +433,13 @@ class SamplePostprocessorTests(TestCase):
 
         calls = [
             # only the first out of two request samples is included, throughput metrics are still complete
-            self.latency(38598, 24, 10.0), self.service_time(38598, 24, 7.0),
-            self.client_processing_time(38598, 24, 0.7), self.processing_time(38598, 24, 9.0),
-            self.throughput(38598, 24, 5000),
-            self.throughput(38599, 25, 5000),
+            self.latency([38598], [24], [10.0]),
+            self.service_time([38598], [24], [7.0]),
+            self.client_processing_time([38598], [24], [0.7]),
+            self.processing_time([38598], [24], [9.0]),
+            self.throughput([38598, 38599], [24, 25], [5000, 5000]),
         ]
-        metrics_store.put_value_cluster_level.assert_has_calls(calls)
+        metrics_store.put_values_bulk.assert_has_calls(calls)
 
     @mock.patch("osbenchmark.metrics.MetricsStore")
     def test_dependent_samples(self, metrics_store):
@@ -405,14 +474,366 @@ class SamplePostprocessorTests(TestCase):
         post_process(samples)
 
         calls = [
-            self.latency(38598, 24, 10.0), self.service_time(38598, 24, 7.0),
-            self.client_processing_time(38598, 24, 0.7), self.processing_time(38598, 24, 9.0),
+            self.latency([38598], [24], [10.0]),
+            self.service_time([38598], [24], [7.0]),
+            self.client_processing_time([38598], [24], [0.7]),
+            self.processing_time([38598], [24], [9.0]),
             # dependent timings
-            self.service_time(38601, 25, 50.0),
-            self.service_time(38602, 26, 80.0),
-            self.throughput(38598, 24, 5000),
+            self.service_time([38601, 38602], [25, 26], [50.0, 80.0]),
+            self.throughput([38598], [24], [5000]),
         ]
-        metrics_store.put_value_cluster_level.assert_has_calls(calls)
+        metrics_store.put_values_bulk.assert_has_calls(calls)
+
+    @mock.patch("osbenchmark.metrics.MetricsStore")
+    def test_merges_meta_data_once_per_request_meta_data(self, metrics_store):
+        post_process = worker_coordinator.DefaultSamplePostprocessor(metrics_store,
+                                                  downsample_factor=1,
+                                                  workload_meta_data={"workload": "a"},
+                                                  test_procedure_meta_data={})
+
+        task = workload.Task("index", workload.Operation("index-op", "bulk", param_source="worker-coordinator-test-param-source"))
+        sampler = worker_coordinator.DefaultSampler(start_timestamp=0)
+        for absolute_time in [38598, 38599]:
+            sampler.add(task, 0, metrics.SampleType.Normal, {"success": True}, absolute_time, 24, 0.01, 0.007, 0.0007, 0.009,
+                        None, 5000, "docs", 1, None)
+
+        post_process(sampler.samples)
+
+        latency = metrics_store.put_values_bulk.call_args_list[0].kwargs
+        self.assertEqual("latency", latency["name"])
+        self.assertEqual([{"workload": "a", "success": True}] * 2, latency["meta_data"])
+        self.assertIs(latency["meta_data"][0], latency["meta_data"][1])
+        throughput = metrics_store.put_values_bulk.call_args_list[-1].kwargs
+        self.assertEqual("throughput", throughput["name"])
+        self.assertEqual({"workload": "a"}, throughput["meta_data"])
+
+    @mock.patch("osbenchmark.metrics.MetricsStore")
+    def test_sample_batch(self, metrics_store):
+        post_process = worker_coordinator.DefaultSamplePostprocessor(metrics_store,
+                                                  downsample_factor=1,
+                                                  workload_meta_data={},
+                                                  test_procedure_meta_data={})
+
+        task = workload.Task("index", workload.Operation("index-op", "bulk", param_source="worker-coordinator-test-param-source"))
+        sampler = worker_coordinator.DefaultSampler(start_timestamp=0)
+        sampler.add(task, 0, metrics.SampleType.Normal, None, 38598, 24, 0.01, 0.007, 0.0007, 0.009, None, 5000, "docs", 1, (0.5, "%"))
+        sampler.add(task, 0, metrics.SampleType.Normal, None, 38599, 25, 0.01, 0.007, 0.0007, 0.009, None, 5000, "docs", 2, (1.0, "%"))
+
+        post_process(sampler.samples)
+
+        calls = [
+            self.latency([38598, 38599], [24, 25], [10.0, 10.0]),
+            self.service_time([38598, 38599], [24, 25], [7.0, 7.0]),
+            self.client_processing_time([38598, 38599], [24, 25], [0.7, 0.7]),
+            self.processing_time([38598, 38599], [24, 25], [9.0, 9.0]),
+            self.throughput([38598, 38599], [24, 25], [5000, 5000]),
+        ]
+        metrics_store.put_values_bulk.assert_has_calls(calls)
+
+
+class SampleBatchTests(TestCase):
+    def setUp(self):
+        self.task = workload.Task("index", workload.Operation("index-op", "bulk", param_source="worker-coordinator-test-param-source"))
+
+    def add(self, sampler, client_id, absolute_time, meta_data=None, task_progress=None, dependent_timing=None):
+        sampler.add(self.task, client_id, metrics.SampleType.Normal, meta_data, absolute_time, absolute_time - 100, 0.01, 0.007,
+                    0.0007, 0.009, None, 5000, "docs", 1, task_progress, dependent_timing)
+
+    def test_materializes_samples(self):
+        sampler = worker_coordinator.DefaultSampler(start_timestamp=10)
+        self.add(sampler, 3, 200, meta_data={"success": True}, task_progress=(0.5, "%"),
+                 dependent_timing=[{"absolute_time": 201, "request_start": 101, "service_time": 0.05}])
+        batch = sampler.samples
+
+        self.assertEqual(1, len(batch))
+        sample = batch[0]
+        self.assertEqual(3, sample.client_id)
+        self.assertEqual(self.task, sample.task)
+        self.assertEqual(metrics.SampleType.Normal, sample.sample_type)
+        self.assertEqual({"success": True}, sample.request_meta_data)
+        self.assertEqual(200, sample.absolute_time)
+        self.assertEqual(90, sample.relative_time)
+        self.assertEqual(0.007, sample.service_time)
+        self.assertIsNone(sample.throughput)
+        self.assertEqual(5000, sample.total_ops)
+        self.assertEqual("docs", sample.total_ops_unit)
+        self.assertEqual((0.5, "%"), sample.task_progress)
+        self.assertEqual([91], [t.relative_time for t in sample.dependent_timings])
+        # draining resets the buffer
+        self.assertEqual(0, len(sampler.samples))
+
+    def test_interns_tasks_and_meta_data(self):
+        sampler = worker_coordinator.DefaultSampler(start_timestamp=0)
+        for i in range(10):
+            self.add(sampler, 0, i, meta_data={"success": True})
+        self.add(sampler, 0, 10, meta_data={"success": False})
+        batch = sampler.samples
+
+        self.assertEqual(11, len(batch))
+        self.assertEqual(1, len(batch.keys))
+        self.assertEqual([{"success": True}, {"success": False}], batch.meta_data)
+
+    def test_grows_and_drops_when_full(self):
+        sampler = worker_coordinator.DefaultSampler(start_timestamp=0, buffer_size=3)
+        for i in range(5):
+            self.add(sampler, 0, i)
+
+        self.assertEqual(2, sampler.dropped)
+        self.assertEqual([0, 1, 2], [s.absolute_time for s in sampler.samples])
+
+    def test_concatenates_batches_and_samples(self):
+        first = worker_coordinator.DefaultSampler(start_timestamp=0)
+        self.add(first, 0, 1, meta_data={"success": True})
+        self.add(first, 1, 2, meta_data={"success": False})
+        second = worker_coordinator.DefaultSampler(start_timestamp=0)
+        self.add(second, 2, 3, meta_data={"success": False}, dependent_timing=[{"absolute_time": 4, "request_start": 4,
+                                                                                 "service_time": 0.1}])
+        loose_sample = worker_coordinator.DefaultSample(3, 5, 5, 0, self.task, metrics.SampleType.Normal, None, 0.01, 0.007,
+                                                        0.0007, 0.009, None, 5000, "docs", 1, None)
+
+        batch = worker_coordinator.SampleBatch.of([first.samples, second.samples, loose_sample])
+
+        self.assertEqual([1, 2, 3, 5], [s.absolute_time for s in batch])
+        self.assertEqual([{"success": True}, {"success": False}, {"success": False}, None], [s.request_meta_data for s in batch])
+        self.assertEqual([4], [t.absolute_time for t in batch[2].dependent_timings])
+
+    def test_most_recent_sample_per_client(self):
+        sampler = worker_coordinator.DefaultSampler(start_timestamp=0)
+        self.add(sampler, 0, 1, task_progress=(0.1, "%"))
+        self.add(sampler, 1, 2, task_progress=(0.2, "%"))
+        self.add(sampler, 0, 3, task_progress=(0.3, "%"))
+
+        most_recent = sampler.samples.most_recent_per_client()
+
+        self.assertEqual({0: (0.3, "%"), 1: (0.2, "%")}, {k: v.task_progress for k, v in most_recent.items()})
+
+    def test_can_be_pickled(self):
+        sampler = worker_coordinator.DefaultSampler(start_timestamp=0)
+        self.add(sampler, 0, 1, meta_data={"success": True})
+
+        batch = pickle.loads(pickle.dumps(sampler.samples))
+
+        self.assertEqual(1, len(batch))
+        self.assertEqual({"success": True}, batch[-1].request_meta_data)
+
+
+class SampleAggregateTests(TestCase):
+    def setUp(self):
+        self.task = workload.Task("index", workload.Operation("index-op", "bulk", param_source="worker-coordinator-test-param-source"))
+
+    def samples(self, count, start=1000, meta_data=None, dependent_timing=None):
+        sampler = worker_coordinator.DefaultSampler(start_timestamp=0)
+        for i in range(count):
+            absolute_time = start + i * 0.01
+            sample_type = metrics.SampleType.Warmup if i < count // 4 else metrics.SampleType.Normal
+            sampler.add(self.task, i % 4, sample_type, meta_data(i) if meta_data else None, absolute_time, absolute_time - start,
+                        0.001 * (i + 1), 0.001 * (i + 1), 0.0001, 0.001, None, 500, "docs", absolute_time - start + 0.01, (i / count, "%"),
+                        dependent_timing)
+        return sampler.samples
+
+    def test_summarizes_request_metrics_per_sample_type(self):
+        aggregate = worker_coordinator.SampleAggregate()
+        aggregate.add(self.samples(400, meta_data=lambda i: {"success": i % 10 != 0, "bulk_size": 500}))
+        aggregate.add(self.samples(
+            4, start=1010, dependent_timing=[{"absolute_time": 1010, "request_start": 10, "service_time": 0.5}]))
+
+        self.assertEqual(404, len(aggregate))
+        normal = aggregate.summaries[(self.task, metrics.SampleType.Normal)]
+        self.assertEqual({"latency", "service_time", "client_processing_time", "processing_time", "bulk_size"}, set(normal.histograms))
+        self.assertEqual(303, normal.histograms["latency"].count)
+        # including dependent timings
+        self.assertEqual(306, normal.histograms["service_time"].count)
+        self.assertEqual(500, normal.histograms["service_time"].max)
+        self.assertEqual(300, normal.histograms["bulk_size"].count)
+        self.assertEqual(30, normal.error_count)
+        self.assertAlmostEqual(1010.03, normal.absolute_time)
+        self.assertAlmostEqual(0.03, normal.relative_time)
+        warmup = aggregate.summaries[(self.task, metrics.SampleType.Warmup)]
+        self.assertEqual(101, warmup.histograms["latency"].count)
+        self.assertEqual(10, warmup.error_count)
+        self.assertEqual({0, 1, 2, 3}, set(aggregate.most_recent_per_client))
+
+    def test_reduces_samples_for_throughput(self):
+        samples = self.samples(1000)
+        aggregate = worker_coordinator.SampleAggregate()
+        aggregate.add(samples)
+
+        reduced = aggregate.throughput_samples
+        # 10 seconds in slots of 0.1 seconds per sample type
+        self.assertLessEqual(len(reduced), 102)
+        self.assertEqual(500 * 1000, reduced.column("total_ops").sum())
+
+        expected = worker_coordinator.ThroughputCalculator().calculate(samples)[self.task]
+        actual = worker_coordinator.ThroughputCalculator().calculate(reduced)[self.task]
+        self.assertEqual(len(expected), len(actual))
+        for (_, _, expected_sample_type, expected_throughput, expected_unit), (_, _, sample_type, throughput, unit) in zip(expected, actual):
+            self.assertEqual(expected_sample_type, sample_type)
+            self.assertAlmostEqual(expected_throughput, throughput, delta=expected_throughput * 0.02)
+            self.assertEqual(expected_unit, unit)
+
+    def test_can_be_pickled(self):
+        aggregate = worker_coordinator.SampleAggregate()
+        aggregate.add(self.samples(8))
+
+        aggregate = pickle.loads(pickle.dumps(aggregate))
+
+        self.assertEqual(8, len(aggregate))
+        self.assertEqual(6, aggregate.summaries[(self.task, metrics.SampleType.Normal)].histograms["latency"].count)
+
+    @mock.patch("osbenchmark.metrics.MetricsStore")
+    def test_postprocesses_aggregates(self, metrics_store):
+        post_process = worker_coordinator.AggregatedSamplePostprocessor(metrics_store, workload_meta_data={"workload": "a"},
+                                                                        test_procedure_meta_data={})
+        aggregate = worker_coordinator.SampleAggregate()
+        aggregate.add(self.samples(8, meta_data=lambda i: {"success": i != 7}))
+
+        post_process([aggregate])
+
+        histograms = {(c.kwargs["name"], c.kwargs["sample_type"]): c.kwargs for c in metrics_store.put_histogram.call_args_list}
+        self.assertEqual(8, len(histograms))
+        service_time = histograms[("service_time", metrics.SampleType.Normal)]
+        self.assertEqual(6, service_time["histogram"].count)
+        self.assertEqual("ms", service_time["unit"])
+        self.assertEqual("index", service_time["task"])
+        self.assertEqual("bulk", service_time["operation_type"])
+        self.assertEqual({"workload": "a"}, service_time["meta_data"])
+        self.assertEqual(1, service_time["error_count"])
+        throughput = metrics_store.put_values_bulk.call_args_list[-1].kwargs
+        self.assertEqual("throughput", throughput["name"])
+        self.assertEqual("docs/s", throughput["unit"])
+        metrics_store.flush.assert_called_once_with(refresh=False)
+
+
+class HostAggregatorTests(TestCase):
+    def setUp(self):
+        self.target = mock.Mock()
+        self.aggregator = worker_coordinator.HostAggregator(self.target, "10.5.5.1", [0, 1])
+        self.task = workload.Task("index", workload.Operation("index-op", "bulk", param_source="worker-coordinator-test-param-source"))
+
+    def samples(self):
+        sampler = worker_coordinator.DefaultSampler(start_timestamp=0)
+        sampler.add(self.task, 0, metrics.SampleType.Normal, None, 1000, 0, 0.01, 0.007, 0.0007, 0.009, None, 500, "docs", 1, None)
+        return sampler.samples
+
+    def allocations(self, clients_executing_completing_task=None):
+        return [worker_coordinator.ClientAllocation(
+            client_id=0, task=worker_coordinator.JoinPoint(id=1, clients_executing_completing_task=clients_executing_completing_task))]
+
+    def test_waits_for_all_workers_and_sends_samples_first(self):
+        self.aggregator.update_samples(self.samples(), [])
+        self.aggregator.update_worker_metrics(0, [("event_loop_lag", "ms", "index", 1000, 0.5)])
+        self.aggregator.joinpoint_reached(0, self.allocations())
+
+        self.assertEqual([], self.target.mock_calls)
+
+        self.aggregator.update_samples(self.samples(), [])
+        self.aggregator.joinpoint_reached(1, self.allocations())
+
+        self.assertEqual(["on_aggregated_samples", "on_joinpoint_reached"], [c[0] for c in self.target.mock_calls])
+        _, aggregate, profile_samples, worker_metrics = self.target.on_aggregated_samples.call_args.args
+        self.assertEqual(2, len(aggregate))
+        self.assertEqual([], profile_samples)
+        self.assertEqual({0: [("event_loop_lag", "ms", "index", 1000, 0.5)]}, worker_metrics)
+        self.target.on_joinpoint_reached.assert_called_once_with("10.5.5.1", [0, 1], self.allocations())
+
+    def test_forwards_join_points_that_may_complete_the_parent_immediately(self):
+        self.aggregator.joinpoint_reached(0, self.allocations(clients_executing_completing_task=[0]))
+        self.aggregator.joinpoint_reached(1, self.allocations(clients_executing_completing_task=[0]))
+
+        self.assertEqual([mock.call("10.5.5.1", [0], mock.ANY), mock.call("10.5.5.1", [1], mock.ANY)],
+                         self.target.on_joinpoint_reached.call_args_list)
+
+    def test_flushes_only_if_there_is_something_to_send(self):
+        self.aggregator.flush()
+        self.assertEqual(0, self.target.on_aggregated_samples.call_count)
+
+        self.aggregator.update_samples(self.samples(), [])
+        self.aggregator.flush()
+        self.aggregator.flush()
+        self.assertEqual(1, self.target.on_aggregated_samples.call_count)
+
+    def test_coordinator_consumes_aggregates(self):
+        d = worker_coordinator.WorkerCoordinator(mock.Mock(), config.Config())
+        self.aggregator.update_samples(self.samples(), [])
+        self.aggregator.flush()
+
+        d.update_aggregated_samples(*self.target.on_aggregated_samples.call_args.args[1:])
+
+        self.assertEqual(1, len(d.raw_aggregates))
+        self.assertEqual(1000, d.most_recent_sample_per_client[0].absolute_time)
+
+
+class SharedSampleTransportTests(TestCase):
+    def setUp(self):
+        self.task = workload.Task("index", workload.Operation("index-op", "bulk", param_source="worker-coordinator-test-param-source"))
+        self.ring = worker_coordinator.SharedSampleRing.create(capacity=4)
+        self.reader = worker_coordinator.SharedSampleReader(self.ring)
+        # the worker usually attaches from a different process (see ``SharedSampleRing.attach()``)
+        self.writer = worker_coordinator.SharedSampleWriter(
+            worker_coordinator.SharedSampleRing(shared_memory.SharedMemory(name=self.ring.name), owner=False))
+
+    def tearDown(self):
+        self.writer.close()
+        self.reader.close()
+
+    def batch(self, *samples):
+        sampler = worker_coordinator.DefaultSampler(start_timestamp=0)
+        for absolute_time, meta_data in samples:
+            sampler.add(self.task, 0, metrics.SampleType.Normal, meta_data, absolute_time, absolute_time, 0.01, 0.007,
+                        0.0007, 0.009, None, 5000, "docs", 1, None)
+        return sampler.samples
+
+    def test_transports_samples_and_announces_only_new_lookup_entries(self):
+        first = self.writer.write(0, self.batch((1, {"success": True}), (2, {"success": False})), [])
+        second = self.writer.write(0, self.batch((3, {"success": False})), [])
+
+        self.assertEqual([self.task], [k[0] for k in first.new_keys])
+        self.assertEqual([{"success": True}, {"success": False}], first.new_meta_data)
+        self.assertEqual([], second.new_keys)
+        self.assertEqual([], second.new_meta_data)
+
+        self.assertEqual([(1, {"success": True}), (2, {"success": False})],
+                         [(s.absolute_time, s.request_meta_data) for s in self.reader.read(first)])
+        batch = self.reader.read(second)
+        self.assertEqual([(3, {"success": False})], [(s.absolute_time, s.request_meta_data) for s in batch])
+        self.assertEqual([{"success": False}], batch.meta_data)
+
+    @mock.patch.object(worker_coordinator.SharedSampleWriter, "MAX_INTERNED_META_DATA", 1)
+    def test_sends_meta_data_inline_that_is_not_interned(self):
+        first = self.writer.write(0, self.batch((1, {"success": True}), (2, {"success": True, "took": 7})), [])
+        second = self.writer.write(0, self.batch((3, {"success": True, "took": 7}), (4, {"success": True, "shards": [1, 2]})), [])
+
+        self.assertEqual([{"success": True}], first.new_meta_data)
+        self.assertEqual([{"success": True, "took": 7}], first.inline_meta_data)
+        self.assertEqual([], second.new_meta_data)
+        self.assertEqual([{"success": True, "took": 7}, {"success": True, "shards": [1, 2]}], second.inline_meta_data)
+
+        self.assertEqual([(1, {"success": True}), (2, {"success": True, "took": 7})],
+                         [(s.absolute_time, s.request_meta_data) for s in self.reader.read(first)])
+        self.assertEqual([(3, {"success": True, "took": 7}), (4, {"success": True, "shards": [1, 2]})],
+                         [(s.absolute_time, s.request_meta_data) for s in self.reader.read(second)])
+        # only interned meta-data are retained by the coordinator
+        self.assertEqual([{"success": True}], self.reader.meta_data)
+
+    def test_wraps_around_and_rejects_batches_that_do_not_fit(self):
+        self.reader.read(self.writer.write(0, self.batch((1, None), (2, None), (3, None)), []))
+
+        self.assertIsNone(self.writer.write(0, self.batch(*[(t, None) for t in range(4, 9)]), []))
+        msg = self.writer.write(0, self.batch((4, None), (5, None), (6, None)), [])
+        self.assertIsNone(self.writer.write(0, self.batch((7, None), (8, None)), []))
+
+        self.assertEqual([4, 5, 6], [s.absolute_time for s in self.reader.read(msg)])
+        self.assertEqual(4, self.ring.free())
+
+    def test_coordinator_consumes_announced_samples(self):
+        cfg = config.Config()
+        d = worker_coordinator.WorkerCoordinator(mock.Mock(), cfg)
+        d.sample_readers[0] = self.reader
+
+        d.update_shared_samples(self.writer.write(0, self.batch((1, None), (2, None)), []))
+
+        self.assertEqual([1, 2], [s.absolute_time for s in worker_coordinator.SampleBatch.of(d.raw_samples)])
+        self.assertEqual(2, d.most_recent_sample_per_client[0].absolute_time)
 
 
 class WorkerAssignmentTests(TestCase):
@@ -834,6 +1255,23 @@ class MetricsAggregationTests(TestCase):
         self.assertEqual((38600, 26, metrics.SampleType.Normal, 6666.666666666667, "docs/s"), throughput[5])
         # self.assertEqual((1470838600.5, 26.5, metrics.SampleType.Normal, 10000), throughput[6])
 
+    def test_carries_over_open_bucket_between_calculations(self):
+        op = workload.Operation("index", workload.OperationType.Bulk, param_source="worker-coordinator-test-param-source")
+
+        def sample(absolute_time):
+            return worker_coordinator.DefaultSample(0, absolute_time, absolute_time, 1000, op, metrics.SampleType.Normal,
+                                                    None, -1, -1, -1, -1, None, 100, "docs", 0, None)
+
+        calculator = worker_coordinator.ThroughputCalculator()
+        # samples are out of order within a calculation
+        self.assertEqual([(1001.0, 1.0, metrics.SampleType.Normal, 200, "docs/s")],
+                         calculator.calculate([sample(1001.2), sample(1001.0), sample(1000.0)])[op])
+        # the bucket is still open after this calculation
+        self.assertEqual([], calculator.calculate([sample(1001.5)])[op])
+        # pending samples of earlier calculations are counted exactly once
+        self.assertEqual([(1002.0, 2.0, metrics.SampleType.Normal, 250, "docs/s")],
+                         calculator.calculate([sample(1002.0)])[op])
+
     def test_use_provided_throughput(self):
         op = workload.Operation("index-recovery", workload.OperationType.WaitForRecovery,
                              param_source="worker-coordinator-test-param-source")
@@ -949,6 +1387,54 @@ class SchedulerTests(TestCase):
         self.assertIsNotNone(schedule.sched.parameter_source, "Parameter source has not been injected into scheduler")
         self.assertEqual(param_source, schedule.sched.parameter_source)
 
+    @run_async
+    async def test_waits_until_parameter_source_is_ready(self):
+        class PrefetchingParamSource:
+            def __init__(self):
+                self.polls = 0
+                self.calls = 0
+
+            def params_ready(self, on_ready=None):
+                self.polls += 1
+                if self.polls % 2 == 0:
+                    return True
+                # the parameters are generated in the background and signal readiness from there
+                threading.Timer(0.01, on_ready).start()
+                return False
+
+            def params(self):
+                assert self.polls % 2 == 0, "params() called before they are ready"
+                self.calls += 1
+                return {"bulk": self.calls}
+
+        task = workload.Task("bulk", workload.Operation("bulk", workload.OperationType.Bulk.to_hyphenated_string()), clients=1)
+        task_allocation = worker_coordinator.TaskAllocation(task=task, client_index_in_task=0, global_client_index=0, total_clients=1)
+        param_source = PrefetchingParamSource()
+        schedule = worker_coordinator.ScheduleHandle(task_allocation, SchedulerTests.CustomComplexScheduler(task),
+                                                     worker_coordinator.IterationBased(0, 2), mock.Mock(), param_source)
+
+        expected_schedule = [
+            (0, metrics.SampleType.Normal, 1 / 2, {"bulk": 1}),
+            (0, metrics.SampleType.Normal, 2 / 2, {"bulk": 2}),
+        ]
+        await self.assert_schedule(expected_schedule, schedule)
+        self.assertEqual(4, param_source.polls)
+
+    def test_forwards_feedback_to_parameter_source(self):
+        task = workload.Task("bulk", workload.Operation("bulk", workload.OperationType.Bulk.to_hyphenated_string()), clients=1)
+        task_allocation = worker_coordinator.TaskAllocation(task=task, client_index_in_task=0, global_client_index=0, total_clients=1)
+        param_source = mock.Mock()
+        sched = mock.Mock()
+        schedule = worker_coordinator.ScheduleHandle(task_allocation, sched, worker_coordinator.IterationBased(0, 1), mock.Mock(),
+                                                     param_source)
+
+        schedule.after_request(10, 500, "docs", {"success": True}, service_time=0.2)
+        # no feedback without a service time
+        schedule.after_request(11, 0, "ops", {"success": False, "skipped": True})
+
+        self.assertEqual(2, sched.after_request.call_count)
+        param_source.after_request.assert_called_once_with(0.2, 500, "docs", {"success": True})
+
     @run_async
     async def test_search_task_one_client(self):
         task = workload.Task("search", workload.Operation("search", workload.OperationType.Search.to_hyphenated_string(),
@@ -1583,6 +2069,73 @@ class AsyncExecutorTests(TestCase):
                             msg="Expected sample size to be between %d and %d but was %d" % (lower_bound, upper_bound, sample_size))
             self.assertTrue(complete.is_set(), "Executor should auto-complete a task that terminates its parent")
 
+    @mock.patch("opensearchpy.OpenSearch")
+    @run_async
+    async def test_run_schedule_in_open_loop(self, opensearch):
+        class SlowRunner:
+            def __init__(self):
+                self.in_flight = 0
+                self.max_in_flight = 0
+
+            async def __call__(self, opensearch, params):
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                await asyncio.sleep(0.1)
+                self.in_flight -= 1
+
+        slow_runner = SlowRunner()
+        runner.register_runner("slow-op", slow_runner, async_runner=True)
+        opensearch.new_request_context.return_value = AsyncExecutorTests.StaticRequestTiming(task_start=time.perf_counter())
+
+        params.register_param_source_for_name("worker-coordinator-test-param-source", WorkerCoordinatorTestParamSource)
+        test_workload = workload.Workload(name="unittest", description="unittest workload", indices=None, test_procedures=None)
+
+        for on_saturation in ["drop", "queue"]:
+            task = workload.Task("time-based", workload.Operation("time-based", operation_type="slow-op",
+                                                                  param_source="worker-coordinator-test-param-source"),
+                                 warmup_time_period=0, time_period=0.3, clients=1,
+                                 params={"target-throughput": 100, "arrival-mode": "open", "max-in-flight": 4,
+                                         "on-saturation": on_saturation})
+            param_source = workload.operation_parameters(test_workload, task)
+            task_allocation = worker_coordinator.TaskAllocation(task=task, client_index_in_task=0, global_client_index=0,
+                                                                total_clients=task.clients)
+            schedule = worker_coordinator.schedule_for(task_allocation, param_source)
+            sampler = worker_coordinator.DefaultSampler(start_timestamp=0)
+            execute_schedule = worker_coordinator.AsyncExecutor(client_id=0,
+                                                                task=task,
+                                                                schedule=schedule,
+                                                                opensearch={"default": opensearch},
+                                                                sampler=sampler,
+                                                                profile_sampler=worker_coordinator.ProfileMetricsSampler(start_timestamp=0),
+                                                                cancel=threading.Event(),
+                                                                complete=threading.Event(),
+                                                                on_error="continue")
+            await execute_schedule()
+
+            samples = sampler.samples
+            stats = execute_schedule.arrival_stats
+            # counts that have not been attached to a sample are reported once the client has finished
+            drained = execute_schedule.arrival_stats.drain()
+            # requests overlap but never exceed the in-flight limit
+            self.assertEqual(4, slow_runner.max_in_flight)
+            self.assertEqual(stats.issued, len(samples))
+            self.assertEqual(stats.offered, stats.issued + stats.dropped)
+            self.assertTrue(all("queueing_delay" in sample.request_meta_data for sample in samples))
+            offered_rate = [value for name, _, _, value in drained if name == "offered_arrival_rate"]
+            issued_rate = [value for name, _, _, value in drained if name == "issued_arrival_rate"]
+            self.assertAlmostEqual(100, offered_rate[0], delta=1)
+            self.assertAlmostEqual(offered_rate[0] * stats.issued / stats.offered, issued_rate[0])
+            if on_saturation == "drop":
+                # arrivals follow the target throughput of 100 ops/s from the first request on
+                self.assertAlmostEqual(30, stats.offered, delta=4)
+                self.assertEqual(stats.dropped, sum(sample.request_meta_data.get("dropped_arrivals", 0) for sample in samples) +
+                                 sum(value for name, _, _, value in drained if name == "dropped_arrivals"))
+            else:
+                self.assertEqual(0, stats.dropped)
+                self.assertGreater(stats.late, 0)
+                self.assertEqual(stats.late, sum(sample.request_meta_data.get("late_arrivals", 0) for sample in samples) +
+                                 sum(value for name, _, _, value in drained if name == "late_arrivals"))
+
     @mock.patch("opensearchpy.OpenSearch")
     @run_async
     async def test_cancel_execute_schedule(self, opensearch):
@@ -1907,6 +2460,28 @@ class AsyncExecutorHelperMethodsTests(TestCase):
             queue_lock=self.queue_lock
         )
 
+    def test_rejects_invalid_open_loop_settings(self):
+        for task_params, message in [({"arrival-mode": "bursty"}, "Unknown arrival-mode"),
+                                     ({"arrival-mode": "open", "max-in-flight": 1}, "'max-in-flight'"),
+                                     ({"arrival-mode": "open", "on-saturation": "block"}, "Unknown on-saturation"),
+                                     ({"arrival-mode": "open", "late-arrival-threshold": -1}, "'late-arrival-threshold'"),
+                                     ({"arrival-mode": "open", "late-arrival-threshold": "1s"}, "'late-arrival-threshold'")]:
+            task = workload.Task("test-task", workload.Operation("test-op", workload.OperationType.Bulk), clients=2, params=task_params)
+            with self.assertRaisesRegex(exceptions.SystemSetupError, message):
+                worker_coordinator.AsyncExecutor(client_id=0, task=task, schedule=self.schedule_handle, opensearch=self.opensearch,
+                                                 sampler=self.sampler, profile_sampler=self.profile_sampler, cancel=self.cancel,
+                                                 complete=self.complete, on_error="abort", config=self.cfg)
+
+    def test_max_in_flight_is_split_across_clients(self):
+        task = workload.Task("test-task", workload.Operation("test-op", workload.OperationType.Bulk), clients=2,
+                             params={"arrival-mode": "open", "max-in-flight": 5})
+        executor = worker_coordinator.AsyncExecutor(client_id=0, task=task, schedule=self.schedule_handle, opensearch=self.opensearch,
+                                                    sampler=self.sampler, profile_sampler=self.profile_sampler, cancel=self.cancel,
+                                                    complete=self.complete, on_error="abort", config=self.cfg)
+        self.assertTrue(executor.open_loop)
+        self.assertEqual(3, executor.max_in_flight)
+        self.assertTrue(executor.drop_on_saturation)
+
     def test_get_client_options_with_valid_config(self):
         """Test that _get_client_options returns correct options from config."""
         options = self.executor._get_client_options()
@@ -2101,6 +2676,7 @@ class AsyncExecutorHelperMethodsTests(TestCase):
 
         self.executor._prepare_context_manager = mock.AsyncMock(return_value=context_manager)
         self.executor.runner = mock.Mock()
+        self.executor.driver_health = mock.Mock()
 
         with mock.patch('time.perf_counter', side_effect=[10.0, 10.5, 13.0]):
             with mock.patch('asyncio.sleep') as sleep_mock:
@@ -2113,6 +2689,235 @@ class AsyncExecutorHelperMethodsTests(TestCase):
 
         sleep_mock.assert_called_once_with(1.0)
         self.assertTrue(result["throughput_throttled"])
+        # the request started in time
+        self.executor.driver_health.on_schedule_slip.assert_called_once_with("test-task", 0)
+
+
+class AsyncIoRuntimeTests(TestCase):
+    def setUp(self):
+        self.cfg = config.Config()
+        target_hosts = opts.TargetHosts("localhost:9200")
+        self.cfg.add(config.Scope.application, "client", "hosts", target_hosts)
+        self.cfg.add(config.Scope.application, "client", "options", opts.ClientOptions("timeout:60", target_hosts=target_hosts))
+        self.runtime = worker_coordinator.AsyncIoRuntime(self.cfg)
+        self.created_clients = []
+
+        def create_clients(all_hosts, all_client_options):
+            opensearch = mock.Mock()
+            opensearch.transport.close = mock.AsyncMock()
+            self.created_clients.append((opensearch, all_client_options["default"]["max_connections"]))
+            return {"default": opensearch}
+
+        patcher = mock.patch.object(worker_coordinator.AsyncIoRuntime, "_create_clients", side_effect=create_clients)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reuses_loop_and_clients_across_runs(self):
+        async def current_loop_and_clients(client_count):
+            return asyncio.get_running_loop(), await self.runtime.os_clients(client_count)
+
+        first_loop, first_clients = self.runtime.run(current_loop_and_clients(4))
+        second_loop, second_clients = self.runtime.run(current_loop_and_clients(2))
+
+        self.assertIs(first_loop, second_loop)
+        self.assertIs(first_clients, second_clients)
+        self.assertEqual(1, len(self.created_clients))
+
+        self.runtime.close()
+        self.assertTrue(first_loop.is_closed())
+        self.created_clients[0][0].transport.close.assert_awaited_once()
+
+    def test_grows_connection_pool(self):
+        async def clients(client_count):
+            return await self.runtime.os_clients(client_count)
+
+        self.runtime.run(clients(2))
+        self.runtime.run(clients(8))
+
+        self.assertEqual([2, 8], [max_connections for _, max_connections in self.created_clients])
+        self.created_clients[0][0].transport.close.assert_awaited_once()
+        self.created_clients[1][0].transport.close.assert_not_awaited()
+        self.runtime.close()
+
+    def test_sizes_connection_pool_for_requests_in_flight(self):
+        self.cfg.add(config.Scope.application, "worker_coordinator", "profiling", False)
+        self.cfg.add(config.Scope.application, "worker_coordinator", "assertions", False)
+        # the in-flight limit exceeds the minimum pool size of the client
+        open_task = workload.Task("open", workload.Operation("search", workload.OperationType.Search), clients=2,
+                                  params={"target-throughput": 1000, "arrival-mode": "open", "max-in-flight": 600})
+        closed_task = workload.Task("closed", workload.Operation("bulk", workload.OperationType.Bulk), clients=3)
+        task_allocations = [(i, worker_coordinator.TaskAllocation(open_task, i, i, 2)) for i in range(2)] + \
+                           [(2 + i, worker_coordinator.TaskAllocation(closed_task, i, 2 + i, 3)) for i in range(3)]
+        adapter = worker_coordinator.AsyncIoAdapter(self.cfg, mock.Mock(), task_allocations, sampler=None, profile_sampler=None,
+                                                    cancel=threading.Event(), complete=threading.Event(), abort_on_error=False,
+                                                    runtime=self.runtime)
+
+        # stop as soon as the clients have been created
+        with mock.patch("osbenchmark.workload.operation_parameters", side_effect=exceptions.BenchmarkError("stop")):
+            with self.assertRaisesRegex(exceptions.BenchmarkError, "stop"):
+                adapter()
+
+        self.assertEqual([600 + 3], [max_connections for _, max_connections in self.created_clients])
+        self.runtime.close()
+
+
+class EventLoopTests(TestCase):
+    def test_creates_default_event_loop(self):
+        loop = worker_coordinator.new_event_loop("asyncio")
+        try:
+            self.assertIsInstance(loop, asyncio.AbstractEventLoop)
+        finally:
+            loop.close()
+
+    @mock.patch.dict("sys.modules", {"uvloop": None})
+    @mock.patch("osbenchmark.utils.console.warn")
+    def test_falls_back_if_uvloop_is_not_installed(self, warn):
+        loop = worker_coordinator.new_event_loop("uvloop")
+        try:
+            self.assertIsInstance(loop, asyncio.AbstractEventLoop)
+        finally:
+            loop.close()
+        warn.assert_called_once()
+
+    def test_rejects_unknown_event_loop(self):
+        with self.assertRaisesRegex(exceptions.SystemSetupError, r"Unknown event loop \[tokio\]"):
+            worker_coordinator.new_event_loop("tokio")
+
+    def test_measures_event_loop_lag(self):
+        monitor = worker_coordinator.EventLoopLagMonitor(interval=0.01)
+
+        async def block_event_loop():
+            lag_monitor = asyncio.ensure_future(monitor())
+            await asyncio.sleep(0.05)
+            # blocks the event loop so the monitor wakes up late
+            time.sleep(0.2)
+            await asyncio.sleep(0.05)
+            lag_monitor.cancel()
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(block_event_loop())
+        finally:
+            loop.close()
+
+        lags = [lag for _, lag in monitor.drain()]
+        self.assertGreater(len(lags), 2)
+        self.assertGreater(max(lags), 0.1)
+        self.assertEqual([], monitor.drain())
+
+
+class WorkerMetricsTests(TestCase):
+    def test_stores_worker_metrics(self):
+        d = worker_coordinator.WorkerCoordinator(mock.Mock(), config.Config())
+        d.metrics_store = mock.Mock()
+
+        d.update_worker_metrics(3, [("event_loop_lag", "ms", "index", metrics.SampleType.Warmup, 999.9, 40.0),
+                                    ("event_loop_lag", "ms", "index", metrics.SampleType.Normal, 1000.0, 1.5),
+                                    ("event_loop_lag", "ms", "index", metrics.SampleType.Normal, 1000.1, 25.0),
+                                    ("worker_cpu_usage", "%", "index", metrics.SampleType.Normal, 1000.1, 97.0)])
+
+        d.metrics_store.put_values_bulk.assert_has_calls([
+            mock.call(name="event_loop_lag", values=[40.0], unit="ms", task="index", sample_types=metrics.SampleType.Warmup,
+                      absolute_times=[999.9], meta_data={"worker_id": 3}),
+            mock.call(name="event_loop_lag", values=[1.5, 25.0], unit="ms", task="index", sample_types=metrics.SampleType.Normal,
+                      absolute_times=[1000.0, 1000.1], meta_data={"worker_id": 3}),
+            mock.call(name="worker_cpu_usage", values=[97.0], unit="%", task="index", sample_types=metrics.SampleType.Normal,
+                      absolute_times=[1000.1], meta_data={"worker_id": 3})
+        ])
+
+    def test_ignores_worker_metrics_without_metrics_store(self):
+        d = worker_coordinator.WorkerCoordinator(mock.Mock(), config.Config())
+        d.update_worker_metrics(3, [("event_loop_lag", "ms", "index", metrics.SampleType.Normal, 1000.0, 1.5)])
+
+
+class DriverHealthTests(TestCase):
+    @mock.patch("psutil.cpu_count", return_value=4)
+    @mock.patch("psutil.Process")
+    def test_drains_measurements_per_task(self, process, cpu_count):
+        process.return_value.cpu_percent.return_value = 350.0
+        driver_health = worker_coordinator.DriverHealth()
+        driver_health.on_sample_type("index", metrics.SampleType.Warmup)
+        driver_health.loop_lag.samples.append((1000.0, 0.002))
+        driver_health.on_schedule_slip("search", 0.25)
+
+        measurements = driver_health.drain(["index", "search"], dropped_samples=3)
+
+        # the event loop thread is unknown so the process-wide usage is normalized to all cores
+        worker_cpu_usage = [m for m in measurements if m[0] == "worker_cpu_usage"]
+        self.assertEqual([("index", metrics.SampleType.Warmup, 87.5), ("search", metrics.SampleType.Normal, 87.5)],
+                         [(m[2], m[3], m[5]) for m in worker_cpu_usage])
+        self.assertIn(("event_loop_lag", "ms", "index", metrics.SampleType.Warmup, 1000.0, 2.0), measurements)
+        self.assertIn(("event_loop_lag", "ms", "search", metrics.SampleType.Normal, 1000.0, 2.0), measurements)
+        self.assertEqual([("index", 3), ("search", 3)], [(m[2], m[5]) for m in measurements if m[0] == "dropped_samples"])
+        self.assertEqual([("search", 250.0)], [(m[2], m[5]) for m in measurements if m[0] == "schedule_slip"])
+
+        # everything has been reported already except for the CPU usage which is sampled on each call
+        self.assertEqual(["worker_cpu_usage"], [m[0] for m in driver_health.drain(["index"])])
+
+    @mock.patch("psutil.Process")
+    def test_tags_schedule_slips_with_current_sample_type(self, process):
+        driver_health = worker_coordinator.DriverHealth()
+        driver_health.on_sample_type("index", metrics.SampleType.Warmup)
+        driver_health.on_schedule_slip("index", 0.5)
+        driver_health.on_sample_type("index", metrics.SampleType.Normal)
+        driver_health.on_schedule_slip("index", 0.001)
+
+        slips = [(m[3], m[5]) for m in driver_health.drain([]) if m[0] == "schedule_slip"]
+        self.assertEqual([(metrics.SampleType.Warmup, 500.0), (metrics.SampleType.Normal, 1.0)], slips)
+
+    @mock.patch("time.perf_counter")
+    @mock.patch("threading.get_native_id", return_value=42)
+    @mock.patch("psutil.Process")
+    def test_measures_cpu_usage_of_event_loop_thread(self, process, get_native_id, perf_counter):
+        process.return_value.cpu_percent.return_value = 350.0
+        process.return_value.threads.side_effect = [
+            [mock.Mock(id=41, user_time=100.0, system_time=10.0), mock.Mock(id=42, user_time=2.0, system_time=1.0)],
+            [mock.Mock(id=41, user_time=200.0, system_time=10.0), mock.Mock(id=42, user_time=2.5, system_time=1.5)],
+        ]
+        perf_counter.side_effect = [10.0, 12.0]
+        driver_health = worker_coordinator.DriverHealth()
+        driver_health.on_loop_thread()
+
+        worker_cpu_usage = [m[5] for m in driver_health.drain(["index"]) if m[0] == "worker_cpu_usage"]
+        # 1 second of CPU time within 2 seconds
+        self.assertEqual([50.0], worker_cpu_usage)
+
+    @mock.patch("psutil.Process")
+    def test_reports_arrivals_of_finished_clients(self, process):
+        stats = worker_coordinator.ArrivalStats()
+        stats.on_issued(metrics.SampleType.Warmup, 0.0, late=False)
+        for i in range(11):
+            stats.on_issued(metrics.SampleType.Normal, 1.0 + i / 10, late=i == 3)
+        # the late arrival is attached to a completed request, the dropped arrival happens afterwards
+        request_meta_data = {}
+        stats.attach(request_meta_data, metrics.SampleType.Normal)
+        self.assertEqual({"late_arrivals": 1}, request_meta_data)
+        stats.on_dropped(metrics.SampleType.Normal, 2.1)
+
+        driver_health = worker_coordinator.DriverHealth()
+        driver_health.on_arrivals("search", stats.drain())
+        arrivals = {(m[0], m[3]): m[5] for m in driver_health.drain([]) if m[2] == "search"}
+
+        self.assertEqual(1, arrivals[("dropped_arrivals", metrics.SampleType.Normal)])
+        self.assertNotIn(("late_arrivals", metrics.SampleType.Normal), arrivals)
+        # 12 arrivals within 1.1 seconds
+        self.assertAlmostEqual(10, arrivals[("offered_arrival_rate", metrics.SampleType.Normal)])
+        self.assertAlmostEqual(10 * 11 / 12, arrivals[("issued_arrival_rate", metrics.SampleType.Normal)])
+        # a single warmup arrival does not define a rate
+        self.assertEqual({metrics.SampleType.Normal}, {sample_type for _, sample_type in arrivals})
+        # pending counts are only reported once
+        self.assertEqual(["offered_arrival_rate", "issued_arrival_rate"], [m[0] for m in stats.drain()])
+
+    @mock.patch("psutil.Process")
+    def test_bounds_schedule_slips(self, process):
+        driver_health = worker_coordinator.DriverHealth()
+        for i in range(worker_coordinator.DriverHealth.MAX_SCHEDULE_SLIPS * 4):
+            driver_health.on_schedule_slip("index", i / 1000)
+
+        slips = [m[5] for m in driver_health.drain([]) if m[0] == "schedule_slip"]
+        self.assertEqual(worker_coordinator.DriverHealth.MAX_SCHEDULE_SLIPS, len(slips))
+        # the sample is drawn from all slips, not only the first ones
+        self.assertGreater(max(slips), worker_coordinator.DriverHealth.MAX_SCHEDULE_SLIPS)
 
 
 class AsyncProfilerTests(TestCase):
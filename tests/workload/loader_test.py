@@ -21,10 +21,12 @@
 # KIND, either express or implied.  See the License for the
 # specific language governing permissions and limitations
 # under the License.
+import bz2
 import copy
 import os
 import random
 import re
+import tempfile
 import textwrap
 import unittest.mock as mock
 import urllib.error
@@ -203,7 +205,7 @@ class WorkloadPreparationTests(TestCase):
                                data_root="/tmp")
 
         prepare_file_offset_table.assert_called_with(
-            "/tmp/docs.json", None, None, InstanceOf(loader.Downloader))
+            "/tmp/docs.json", None, None, InstanceOf(loader.Downloader), interval=io.FILE_OFFSET_TABLE_INTERVAL)
 
     @mock.patch("osbenchmark.utils.io.prepare_file_offset_table")
     @mock.patch("os.path.getsize")
@@ -227,7 +229,7 @@ class WorkloadPreparationTests(TestCase):
                                data_root="/tmp")
 
         prepare_file_offset_table.assert_called_with(
-            "/tmp/docs.json", None, None, InstanceOf(loader.Downloader))
+            "/tmp/docs.json", None, None, InstanceOf(loader.Downloader), interval=io.FILE_OFFSET_TABLE_INTERVAL)
 
     @mock.patch("osbenchmark.utils.io.decompress")
     @mock.patch("os.path.getsize")
@@ -315,7 +317,7 @@ class WorkloadPreparationTests(TestCase):
 
         p = loader.DocumentSetPreparator(workload_name="unit-test",
                                          downloader=loader.Downloader(
-                                             offline=False, test_mode=False),
+                                             offline=False, test_mode=False, streaming=False),
                                          decompressor=loader.Decompressor())
 
         p.prepare_document_set(document_set=workload.Documents(source_format=workload.Documents.SOURCE_FORMAT_BULK,
@@ -330,10 +332,43 @@ class WorkloadPreparationTests(TestCase):
         ensure_dir.assert_called_with("/tmp")
         decompress.assert_called_with("/tmp/docs.json.bz2", "/tmp")
         calls = [mock.call("http://benchmarks.opensearch.org/corpora/unit-test/docs.json.bz2",
-                           "/tmp/docs.json.bz2", 200, progress_indicator=mock.ANY)]
+                           "/tmp/docs.json.bz2", 200, progress_indicator=mock.ANY, streams=4)]
         download.assert_has_calls(calls)
         prepare_file_offset_table.assert_called_with("/tmp/docs.json", 'http://benchmarks.opensearch.org/corpora/unit-test',
-                                                     None, InstanceOf(loader.Downloader))
+                                                     None, InstanceOf(loader.Downloader), interval=io.FILE_OFFSET_TABLE_INTERVAL)
+
+    @mock.patch("osbenchmark.utils.net.stream_http")
+    def test_decompress_document_archive_while_downloading(self, stream_http):
+        docs = b"".join(b'{"id": %d}\n' % i for i in range(5))
+        archive = bz2.compress(docs[:20]) + bz2.compress(docs[20:])
+
+        def stream(url, consumer, progress_indicator, streams):
+            for i in range(0, len(archive), 7):
+                consumer(archive[i:i + 7])
+            return len(archive)
+
+        stream_http.side_effect = stream
+
+        p = loader.DocumentSetPreparator(workload_name="unit-test",
+                                         downloader=loader.Downloader(offline=False, test_mode=False, streaming=True),
+                                         decompressor=loader.Decompressor())
+        with tempfile.TemporaryDirectory() as data_root:
+            p.prepare_document_set(document_set=workload.Documents(source_format=workload.Documents.SOURCE_FORMAT_BULK,
+                                                                   base_url="http://benchmarks.opensearch.org/corpora/unit-test",
+                                                                   document_file="docs.json",
+                                                                   document_archive="docs.json.bz2",
+                                                                   number_of_documents=5,
+                                                                   compressed_size_in_bytes=len(archive),
+                                                                   uncompressed_size_in_bytes=len(docs)),
+                                   data_root=data_root)
+
+            with open(os.path.join(data_root, "docs.json"), "rb") as f:
+                self.assertEqual(docs, f.read())
+            # the archive is not stored and the offset table has been built while downloading
+            self.assertEqual(["docs.json", "docs.json.offset"], sorted(os.listdir(data_root)))
+
+        stream_http.assert_called_once_with("http://benchmarks.opensearch.org/corpora/unit-test/docs.json.bz2", mock.ANY,
+                                            progress_indicator=mock.ANY, streams=4)
 
     @mock.patch("osbenchmark.utils.io.prepare_file_offset_table")
     @mock.patch("osbenchmark.utils.io.decompress")
@@ -361,7 +396,7 @@ class WorkloadPreparationTests(TestCase):
 
         p = loader.DocumentSetPreparator(workload_name="unit-test",
                                          downloader=loader.Downloader(
-                                             offline=False, test_mode=False),
+                                             offline=False, test_mode=False, streaming=False),
                                          decompressor=loader.Decompressor())
 
         p.prepare_document_set(document_set=workload.Documents(source_format=workload.Documents.SOURCE_FORMAT_BULK,
@@ -377,10 +412,10 @@ class WorkloadPreparationTests(TestCase):
         ensure_dir.assert_called_with("/tmp")
         decompress.assert_called_with("/tmp/docs.json.bz2", "/tmp")
         download.assert_called_with("http://benchmarks.opensearch.org/corpora/unit-test/docs.json.bz2",
-                                    "/tmp/docs.json.bz2", 200, progress_indicator=mock.ANY)
+                                    "/tmp/docs.json.bz2", 200, progress_indicator=mock.ANY, streams=4)
         prepare_file_offset_table.assert_called_with("/tmp/docs.json", 'http://benchmarks.opensearch.org/corpora',
                                                      'http://benchmarks.opensearch.org/corpora/unit-test/docs.json.bz2',
-                                                     InstanceOf(loader.Downloader))
+                                                     InstanceOf(loader.Downloader), interval=io.FILE_OFFSET_TABLE_INTERVAL)
 
     @mock.patch("osbenchmark.utils.io.prepare_file_offset_table")
     @mock.patch("osbenchmark.utils.io.decompress")
@@ -418,10 +453,10 @@ class WorkloadPreparationTests(TestCase):
 
         ensure_dir.assert_called_with("/tmp")
         download.assert_called_with(f"{scheme}://benchmarks.opensearch.org/corpora/unit-test/docs.json",
-                                    "/tmp/docs.json", 2000, progress_indicator=mock.ANY)
+                                    "/tmp/docs.json", 2000, progress_indicator=mock.ANY, streams=4)
         prepare_file_offset_table.assert_called_with("/tmp/docs.json", f"{scheme}://benchmarks.opensearch.org/corpora/",
                                                      f"{scheme}://benchmarks.opensearch.org/corpora/unit-test/docs.json",
-                                                     InstanceOf(loader.Downloader))
+                                                     InstanceOf(loader.Downloader), interval=io.FILE_OFFSET_TABLE_INTERVAL)
 
     @mock.patch("osbenchmark.utils.io.prepare_file_offset_table")
     @mock.patch("osbenchmark.utils.io.decompress")
@@ -458,10 +493,10 @@ class WorkloadPreparationTests(TestCase):
 
         ensure_dir.assert_called_with("/tmp")
         calls = [mock.call(f"{scheme}://benchmarks.opensearch.org/corpora/unit-test/docs.json",
-                           "/tmp/docs.json", 2000, progress_indicator=mock.ANY)]
+                           "/tmp/docs.json", 2000, progress_indicator=mock.ANY, streams=4)]
         download.assert_has_calls(calls)
         prepare_file_offset_table.assert_called_with("/tmp/docs.json", f"{scheme}://benchmarks.opensearch.org/corpora/unit-test/",
-                                                     None, InstanceOf(loader.Downloader))
+                                                     None, InstanceOf(loader.Downloader), interval=io.FILE_OFFSET_TABLE_INTERVAL)
 
     @mock.patch("osbenchmark.utils.io.prepare_file_offset_table")
     @mock.patch("osbenchmark.utils.net.download")
@@ -495,10 +530,10 @@ class WorkloadPreparationTests(TestCase):
 
         ensure_dir.assert_called_with("/tmp")
         calls = [mock.call("http://benchmarks.opensearch.org/corpora/unit-test/docs.json",
-                           "/tmp/docs.json", 2000, progress_indicator=mock.ANY)]
+                           "/tmp/docs.json", 2000, progress_indicator=mock.ANY, streams=4)]
         download.assert_has_calls(calls)
         prepare_file_offset_table.assert_called_with("/tmp/docs.json", 'http://benchmarks.opensearch.org/corpora/unit-test',
-                                                     None, InstanceOf(loader.Downloader))
+                                                     None, InstanceOf(loader.Downloader), interval=io.FILE_OFFSET_TABLE_INTERVAL)
 
     @mock.patch("osbenchmark.utils.net.download")
     @mock.patch("osbenchmark.utils.io.ensure_dir")
@@ -609,7 +644,7 @@ class WorkloadPreparationTests(TestCase):
 
         ensure_dir.assert_called_with("/tmp")
         download.assert_called_with("http://benchmarks.opensearch.org/corpora/unit-test/docs-1k.json",
-                                    "/tmp/docs-1k.json", None, progress_indicator=mock.ANY)
+                                    "/tmp/docs-1k.json", None, progress_indicator=mock.ANY, streams=4)
 
     @mock.patch("osbenchmark.utils.net.download")
     @mock.patch("osbenchmark.utils.io.ensure_dir")
@@ -639,7 +674,7 @@ class WorkloadPreparationTests(TestCase):
 
         ensure_dir.assert_called_with("/tmp")
         download.assert_called_with("http://benchmarks.opensearch.org/corpora/unit-test/docs.json",
-                                    "/tmp/docs.json", 2000, progress_indicator=mock.ANY)
+                                    "/tmp/docs.json", 2000, progress_indicator=mock.ANY, streams=4)
 
     @mock.patch("osbenchmark.utils.io.prepare_file_offset_table")
     @mock.patch("osbenchmark.utils.io.decompress")
@@ -665,7 +700,7 @@ class WorkloadPreparationTests(TestCase):
                                                        data_root="."))
 
         prepare_file_offset_table.assert_called_with(
-            "./docs.json", None, None, InstanceOf(loader.Downloader))
+            "./docs.json", None, None, InstanceOf(loader.Downloader), interval=io.FILE_OFFSET_TABLE_INTERVAL)
 
     @mock.patch("osbenchmark.utils.io.prepare_file_offset_table")
     @mock.patch("osbenchmark.utils.io.decompress")
@@ -856,7 +891,7 @@ class WorkloadPreparationTests(TestCase):
                                                        data_root="."))
 
         prepare_file_offset_table.assert_called_with(
-            "./docs.json", None, None, InstanceOf(loader.Downloader))
+            "./docs.json", None, None, InstanceOf(loader.Downloader), interval=io.FILE_OFFSET_TABLE_INTERVAL)
 
     @mock.patch("os.path.getsize")
     @mock.patch("os.path.isfile")
@@ -915,17 +950,57 @@ class WorkloadPreparationTests(TestCase):
 
 class WorkloadPreparationTests_1(TestCase):
     @mock.patch("osbenchmark.utils.io.prepare_file_offset_table")
-    @mock.patch("osbenchmark.utils.net.download")
+    @mock.patch("osbenchmark.utils.net.download_parts")
     @mock.patch("osbenchmark.utils.io.ensure_dir")
     @mock.patch("os.path.getsize")
     @mock.patch("os.path.isfile")
-    @mock.patch("os.remove")
-    def test_download_document_file_from_part_files(self, rm_file, is_file, get_size, ensure_dir, download, prepare_file_offset_table):
+    def test_download_document_file_from_part_files(self, is_file, get_size, ensure_dir, download_parts, prepare_file_offset_table):
         # uncompressed file does not exist
         # after download uncompressed file exists
         # after download uncompressed file exists (main loop)
-        is_file.side_effect = [False, True, True, True, True]
+        is_file.side_effect = [False, True, True]
         # uncompressed file size is 2000
+        get_size.side_effect = [2000, 2000]
+
+        prepare_file_offset_table.return_value = 5
+
+        p = loader.DocumentSetPreparator(workload_name="unit-test",
+                                         downloader=loader.Downloader(
+                                             offline=False, test_mode=False),
+                                         decompressor=loader.Decompressor())
+
+        p.prepare_document_set(document_set=workload.Documents(source_format=workload.Documents.SOURCE_FORMAT_BULK,
+                                                               base_url="http://benchmarks.opensearch.org/corpora/unit-test",
+                                                               document_file="docs.json",
+                                                               document_file_parts=[{"name": "xaa", "size": 1000},
+                                                                                    {"name": "xab",
+                                                                                        "size": 600},
+                                                                                    {"name": "xac", "size": 400}],
+                                                               # --> We don't provide a document archive here <--
+                                                               document_archive=None,
+                                                               number_of_documents=5,
+                                                               compressed_size_in_bytes=200,
+                                                               uncompressed_size_in_bytes=2000),
+                               data_root="/tmp")
+
+        ensure_dir.assert_called_with("/tmp")
+        # parts are downloaded directly into the target file
+        download_parts.assert_called_once_with([("http://benchmarks.opensearch.org/corpora/unit-test/xaa", 1000),
+                                                ("http://benchmarks.opensearch.org/corpora/unit-test/xab", 600),
+                                                ("http://benchmarks.opensearch.org/corpora/unit-test/xac", 400)],
+                                               "/tmp/docs.json", progress_indicator=mock.ANY, streams=4)
+        prepare_file_offset_table.assert_called_with("/tmp/docs.json", 'http://benchmarks.opensearch.org/corpora/unit-test',
+                                                     None, InstanceOf(loader.Downloader), interval=io.FILE_OFFSET_TABLE_INTERVAL)
+
+    @mock.patch("osbenchmark.utils.io.prepare_file_offset_table")
+    @mock.patch("osbenchmark.utils.net.download")
+    @mock.patch("osbenchmark.utils.io.ensure_dir")
+    @mock.patch("os.path.getsize")
+    @mock.patch("os.path.isfile")
+    @mock.patch("os.remove")
+    def test_download_and_concatenate_part_files_from_bucket(self, rm_file, is_file, get_size, ensure_dir, download,
+                                                             prepare_file_offset_table):
+        is_file.side_effect = [False, True, True, True, True]
         get_size.side_effect = [1000, 600, 400, 2000]
 
         prepare_file_offset_table.return_value = 5
@@ -938,28 +1013,23 @@ class WorkloadPreparationTests_1(TestCase):
         mo = mock.mock_open()
         with mock.patch("builtins.open", mo):
             p.prepare_document_set(document_set=workload.Documents(source_format=workload.Documents.SOURCE_FORMAT_BULK,
-                                                                   base_url="http://benchmarks.opensearch.org/corpora/unit-test",
+                                                                   base_url="s3://benchmarks/corpora/unit-test",
                                                                    document_file="docs.json",
                                                                    document_file_parts=[{"name": "xaa", "size": 1000},
-                                                                                        {"name": "xab",
-                                                                                            "size": 600},
+                                                                                        {"name": "xab", "size": 600},
                                                                                         {"name": "xac", "size": 400}],
-                                                                   # --> We don't provide a document archive here <--
                                                                    document_archive=None,
                                                                    number_of_documents=5,
                                                                    compressed_size_in_bytes=200,
                                                                    uncompressed_size_in_bytes=2000),
                                    data_root="/tmp")
 
-        ensure_dir.assert_called_with("/tmp")
-        calls = [mock.call('http://benchmarks.opensearch.org/corpora/unit-test/xaa', '/tmp/xaa', 1000, progress_indicator=mock.ANY),
-                 mock.call('http://benchmarks.opensearch.org/corpora/unit-test/xab',
-                           '/tmp/xab', 600, progress_indicator=mock.ANY),
-                 mock.call('http://benchmarks.opensearch.org/corpora/unit-test/xac', '/tmp/xac', 400, progress_indicator=mock.ANY)]
+        calls = [mock.call("s3://benchmarks/corpora/unit-test/xaa", "/tmp/xaa", 1000, progress_indicator=mock.ANY, streams=4),
+                 mock.call("s3://benchmarks/corpora/unit-test/xab", "/tmp/xab", 600, progress_indicator=mock.ANY, streams=4),
+                 mock.call("s3://benchmarks/corpora/unit-test/xac", "/tmp/xac", 400, progress_indicator=mock.ANY, streams=4)]
 
         download.assert_has_calls(calls)
-        prepare_file_offset_table.assert_called_with("/tmp/docs.json", 'http://benchmarks.opensearch.org/corpora/unit-test',
-                                                     None, InstanceOf(loader.Downloader))
+        self.assertEqual(3, rm_file.call_count)
 
 class TemplateSource(TestCase):
     @mock.patch("osbenchmark.utils.io.dirname")
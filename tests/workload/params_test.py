@@ -23,17 +23,24 @@
 # under the License.
 # pylint: disable=protected-access
 
+import gc
+import itertools
+import os
 import random
 import shutil
 import tempfile
+import threading
+import time
+import zlib
 from unittest import TestCase
 
 import h5py
 import numpy as np
+import zstandard as zstd
 
 from osbenchmark import exceptions
 from osbenchmark.utils import io
-from osbenchmark.utils.dataset import Context, HDF5DataSet
+from osbenchmark.utils.dataset import Context, HDF5DataSet, PrefetchingDataSet, get_data_set
 from osbenchmark.utils.parse import ConfigurationError
 from osbenchmark.workload import params, workload, loader
 from osbenchmark.workload.params import VectorDataSetPartitionParamSource, VectorSearchPartitionParamSource, \
@@ -113,55 +120,24 @@ class ConflictingIdsBuilderTests(TestCase):
         self.assertIsNone(params.build_conflicting_ids(params.IndexIdConflict.NoConflicts, 100, 0))
 
     def test_sequential_conflicts(self):
-        self.assertEqual(
-            [
-                '0000000000',
-                '0000000001',
-                '0000000002',
-                '0000000003',
-                '0000000004',
-                '0000000005',
-                '0000000006',
-                '0000000007',
-                '0000000008',
-                '0000000009',
-                '0000000010'
-            ],
-            params.build_conflicting_ids(params.IndexIdConflict.SequentialConflicts, 11, 0)
-        )
+        ids = params.build_conflicting_ids(params.IndexIdConflict.SequentialConflicts, 11, 0)
+        self.assertEqual(np.int64, ids.dtype)
+        self.assertEqual(list(range(0, 11)), ids.tolist())
 
-        self.assertEqual(
-            [
-                '0000000005',
-                '0000000006',
-                '0000000007',
-                '0000000008',
-                '0000000009',
-                '0000000010',
-                '0000000011',
-                '0000000012',
-                '0000000013',
-                '0000000014',
-                '0000000015'
-            ],
-            params.build_conflicting_ids(params.IndexIdConflict.SequentialConflicts, 11, 5)
-        )
+        self.assertEqual(list(range(5, 16)), params.build_conflicting_ids(params.IndexIdConflict.SequentialConflicts, 11, 5).tolist())
 
     def test_random_conflicts(self):
-        predictable_shuffle = list.reverse
+        def predictable_shuffle(ids):
+            ids[:] = ids[::-1].copy()
 
         self.assertEqual(
-            [
-                '0000000002', '0000000001', '0000000000'
-            ],
-            params.build_conflicting_ids(params.IndexIdConflict.RandomConflicts, 3, 0, shuffle=predictable_shuffle)
+            [2, 1, 0],
+            params.build_conflicting_ids(params.IndexIdConflict.RandomConflicts, 3, 0, shuffle=predictable_shuffle).tolist()
         )
 
         self.assertEqual(
-            [
-                '0000000007', '0000000006', '0000000005'
-            ],
-            params.build_conflicting_ids(params.IndexIdConflict.RandomConflicts, 3, 5, shuffle=predictable_shuffle)
+            [7, 6, 5],
+            params.build_conflicting_ids(params.IndexIdConflict.RandomConflicts, 3, 5, shuffle=predictable_shuffle).tolist()
         )
 
 
@@ -219,15 +195,15 @@ class ActionMetaDataTests(TestCase):
                                                   randint=lambda x, y: next(chosen_index_of_conflicting_ids))
 
         # first one is always *not* drawn from a random index
-        self.assertEqual(idx("100"), next(generator))
+        self.assertEqual(idx("0000000100"), next(generator))
         # now we start using random ids, i.e. look in the first line of the pseudo-random sequence
-        self.assertEqual(conflict(conflict_action, "200"), next(generator))
-        self.assertEqual(conflict(conflict_action, "400"), next(generator))
-        self.assertEqual(conflict(conflict_action, "300"), next(generator))
+        self.assertEqual(conflict(conflict_action, "0000000200"), next(generator))
+        self.assertEqual(conflict(conflict_action, "0000000400"), next(generator))
+        self.assertEqual(conflict(conflict_action, "0000000300"), next(generator))
         # no conflict -> we draw the next sequential one, which is 200
-        self.assertEqual(idx("200"), next(generator))
+        self.assertEqual(idx("0000000200"), next(generator))
         # and we're back to random
-        self.assertEqual(conflict(conflict_action, "100"), next(generator))
+        self.assertEqual(conflict(conflict_action, "0000000100"), next(generator))
 
     def test_generate_action_meta_data_with_id_conflicts_and_recency_bias(self):
         def idx(type_name, id):
@@ -290,22 +266,22 @@ class ActionMetaDataTests(TestCase):
                                                   )
 
         # first one is always *not* drawn from a random index
-        self.assertEqual(idx(type_name, "100"), next(generator))
+        self.assertEqual(idx(type_name, "0000000100"), next(generator))
         # now we start using random ids
-        self.assertEqual(conflict(conflict_action, type_name, "100"), next(generator))
-        self.assertEqual(conflict(conflict_action, type_name, "100"), next(generator))
-        self.assertEqual(conflict(conflict_action, type_name, "100"), next(generator))
+        self.assertEqual(conflict(conflict_action, type_name, "0000000100"), next(generator))
+        self.assertEqual(conflict(conflict_action, type_name, "0000000100"), next(generator))
+        self.assertEqual(conflict(conflict_action, type_name, "0000000100"), next(generator))
         # no conflict
-        self.assertEqual(idx(type_name, "200"), next(generator))
-        self.assertEqual(idx(type_name, "300"), next(generator))
-        self.assertEqual(idx(type_name, "400"), next(generator))
+        self.assertEqual(idx(type_name, "0000000200"), next(generator))
+        self.assertEqual(idx(type_name, "0000000300"), next(generator))
+        self.assertEqual(idx(type_name, "0000000400"), next(generator))
         # conflict
-        self.assertEqual(conflict(conflict_action, type_name, "400"), next(generator))
-        self.assertEqual(conflict(conflict_action, type_name, "300"), next(generator))
+        self.assertEqual(conflict(conflict_action, type_name, "0000000400"), next(generator))
+        self.assertEqual(conflict(conflict_action, type_name, "0000000300"), next(generator))
 
     def test_generate_action_meta_data_with_id_and_zero_conflict_probability(self):
         def idx(id):
-            return "index", '{"index": {"_index": "test_index", "_type": "test_type", "_id": "%s"}}\n' % id
+            return "index", '{"index": {"_index": "test_index", "_type": "test_type", "_id": "%010d"}}\n' % id
 
         test_ids = [100, 200, 300, 400]
 
@@ -316,6 +292,54 @@ class ActionMetaDataTests(TestCase):
         self.assertListEqual([idx(id) for id in test_ids], list(generator))
 
 
+    def test_generate_action_meta_data_per_bulk(self):
+        class PredictableRandom:
+            def random(self, size):
+                # the first draw is ignored as there is no id yet that could conflict
+                return np.array([0.2, 0.25, 0.3, 0.0, 0.5])[:size]
+
+            def integers(self, low, high):
+                self.high = high.tolist()
+                return np.array([0, 1])
+
+        rng = PredictableRandom()
+        generator = params.GenerateActionMetaData("test_index", "test_type",
+                                                  conflicting_ids=np.array([100, 200, 300, 400]),
+                                                  conflict_probability=25,
+                                                  on_conflict="update",
+                                                  rng=rng)
+        self.assertTrue(generator.supports_bulks)
+
+        updates, lines, line_ends = generator.next_bulk(5)
+
+        self.assertEqual([1, 2], rng.high)
+        self.assertEqual([False, True, False, True, False], updates.tolist())
+        self.assertEqual(
+            b'{"index": {"_index": "test_index", "_type": "test_type", "_id": "0000000100"}}\n'
+            b'{"update": {"_index": "test_index", "_type": "test_type", "_id": "0000000100"}}\n'
+            b'{"index": {"_index": "test_index", "_type": "test_type", "_id": "0000000200"}}\n'
+            b'{"update": {"_index": "test_index", "_type": "test_type", "_id": "0000000200"}}\n'
+            b'{"index": {"_index": "test_index", "_type": "test_type", "_id": "0000000300"}}\n', lines)
+        self.assertEqual(lines.index(b"\n") + 1, line_ends[0])
+        self.assertEqual(len(lines), line_ends[-1])
+        self.assertEqual(3, generator.id_up_to)
+
+    def test_generate_action_meta_data_per_bulk_until_ids_are_exhausted(self):
+        generator = params.GenerateActionMetaData("test_index", None,
+                                                  conflicting_ids=np.array([7, 8]),
+                                                  conflict_probability=0,
+                                                  rng=np.random.default_rng())
+
+        updates, lines, line_ends = generator.next_bulk(3)
+
+        self.assertEqual([False, False], updates.tolist())
+        self.assertEqual(b'{"index": {"_index": "test_index", "_id": "0000000007"}}\n'
+                         b'{"index": {"_index": "test_index", "_id": "0000000008"}}\n', lines)
+        self.assertEqual(2, len(line_ends))
+        with self.assertRaises(StopIteration):
+            generator.next_bulk(3)
+
+
 class IndexDataReaderTests(TestCase):
     def test_read_bulk_larger_than_number_of_docs(self):
         data = [
@@ -508,15 +532,15 @@ class IndexDataReaderTests(TestCase):
                     bulks.append(bulk)
 
         self.assertEqual([
-            b'{"index": {"_index": "test_index", "_type": "test_type", "_id": "100"}}\n' +
+            b'{"index": {"_index": "test_index", "_type": "test_type", "_id": "0000000100"}}\n' +
             b'{"key": "value1"}\n' +
-            b'{"update": {"_index": "test_index", "_type": "test_type", "_id": "200"}}\n' +
+            b'{"update": {"_index": "test_index", "_type": "test_type", "_id": "0000000200"}}\n' +
             b'{"doc":{"key": "value2"}}\n',
-            b'{"update": {"_index": "test_index", "_type": "test_type", "_id": "400"}}\n' +
+            b'{"update": {"_index": "test_index", "_type": "test_type", "_id": "0000000400"}}\n' +
             b'{"doc":{"key": "value3"}}\n' +
-            b'{"update": {"_index": "test_index", "_type": "test_type", "_id": "300"}}\n' +
+            b'{"update": {"_index": "test_index", "_type": "test_type", "_id": "0000000300"}}\n' +
             b'{"doc":{"key": "value4"}}\n',
-            b'{"index": {"_index": "test_index", "_type": "test_type", "_id": "200"}}\n' +
+            b'{"index": {"_index": "test_index", "_type": "test_type", "_id": "0000000200"}}\n' +
             b'{"key": "value5"}\n'
         ], bulks)
 
@@ -550,17 +574,97 @@ class IndexDataReaderTests(TestCase):
                     bulks.append(bulk)
 
         self.assertEqual([
-            b'{"index": {"_index": "test_index", "_type": "test_type", "_id": "100"}}\n' +
+            b'{"index": {"_index": "test_index", "_type": "test_type", "_id": "0000000100"}}\n' +
             b'{"key": "value1"}\n' +
-            b'{"index": {"_index": "test_index", "_type": "test_type", "_id": "200"}}\n' +
+            b'{"index": {"_index": "test_index", "_type": "test_type", "_id": "0000000200"}}\n' +
             b'{"key": "value2"}\n',
 
-            b'{"index": {"_index": "test_index", "_type": "test_type", "_id": "300"}}\n' +
+            b'{"index": {"_index": "test_index", "_type": "test_type", "_id": "0000000300"}}\n' +
             b'{"key": "value3"}\n' +
-            b'{"index": {"_index": "test_index", "_type": "test_type", "_id": "400"}}\n' +
+            b'{"index": {"_index": "test_index", "_type": "test_type", "_id": "0000000400"}}\n' +
             b'{"key": "value4"}\n'
         ], bulks)
 
+    def test_read_bulks_as_blocks_from_memory_mapped_file(self):
+        data = [b'{"key": "value%d"}\n' % i for i in range(10)]
+        data_file = os.path.join(tempfile.mkdtemp(), "docs.json")
+        with open(data_file, "wb") as f:
+            # the last line is not terminated
+            f.write(b"".join(data)[:-1])
+
+        def read_bulks(source_class):
+            source = params.Slice(source_class, 3, 7, self.corpus("a", [self.docs(80)]), None)
+            am_handler = params.GenerateActionMetaData("test_index", "test_type")
+            reader = params.MetadataIndexDataReader(data_file,
+                                                    batch_size=6,
+                                                    bulk_size=3,
+                                                    file_source=source,
+                                                    action_metadata=am_handler,
+                                                    index_name="test_index",
+                                                    type_name="test_type")
+            with reader:
+                self.assertEqual(source_class is io.MmapSource, source.supports_blocks)
+                return [bulk for _, _, batch in reader for bulk in batch]
+
+        bulks = read_bulks(io.MmapSource)
+        lines = data[:-1] + [data[-1][:-1]]
+        self.assertEqual(read_bulks(lambda file_name, mode: io.StringAsFileSource(lines, mode)), bulks)
+        self.assertEqual([3, 3, 1], [docs_in_bulk for docs_in_bulk, _ in bulks])
+        self.assertEqual(
+            b'{"index": {"_index": "test_index", "_type": "test_type"}}\n{"key": "value9"}', bulks[-1][1])
+
+    def test_read_bulks_with_id_conflicts_as_blocks(self):
+        data = [b'{"key": "value%d"}\n' % i for i in range(10)]
+        data_file = os.path.join(tempfile.mkdtemp(), "docs.json")
+        with open(data_file, "wb") as f:
+            # the last line is not terminated
+            f.write(b"".join(data)[:-1])
+
+        def read_bulks(source_class, on_conflict):
+            source = params.Slice(source_class, 0, 10, self.corpus("a", [self.docs(80)]), None)
+            am_handler = params.GenerateActionMetaData("test_index", None,
+                                                       conflicting_ids=params.build_conflicting_ids(
+                                                           params.IndexIdConflict.SequentialConflicts, 10, 0),
+                                                       conflict_probability=50,
+                                                       on_conflict=on_conflict,
+                                                       rng=np.random.default_rng(seed=42))
+            reader = params.MetadataIndexDataReader(data_file,
+                                                    batch_size=4,
+                                                    bulk_size=4,
+                                                    file_source=source,
+                                                    action_metadata=am_handler,
+                                                    index_name="test_index",
+                                                    type_name=None)
+            with reader:
+                return [bulk for _, _, batch in reader for bulk in batch]
+
+        lines = data[:-1] + [data[-1][:-1]]
+        for on_conflict in ["index", "update"]:
+            bulks = read_bulks(io.MmapSource, on_conflict)
+            self.assertEqual(read_bulks(lambda file_name, mode: io.StringAsFileSource(lines, mode), on_conflict), bulks)
+            body = b"".join(bulk for _, bulk in bulks)
+            self.assertEqual(10, sum(docs_in_bulk for docs_in_bulk, _ in bulks))
+            self.assertEqual(10, body.count(b'{"index": ') + body.count(b'{"update": '))
+            self.assertEqual(on_conflict == "update", b'{"doc":{"key": ' in body)
+            self.assertTrue(body.startswith(b'{"index": {"_index": "test_index", "_id": "0000000000"}}\n{"key": "value0"}\n'))
+
+    def test_read_bulks_with_action_and_meta_data_as_blocks(self):
+        data = [b'{"index": {"_index": "test_index", "_id": "%d"}}\n{"key": "value%d"}\n' % (i, i) for i in range(5)]
+        data_file = os.path.join(tempfile.mkdtemp(), "docs.json")
+        with open(data_file, "wb") as f:
+            f.write(b"".join(data))
+
+        source = params.Slice(io.MmapSource, 0, 10, self.corpus("a", [self.docs(80)]), None)
+        reader = params.SourceOnlyIndexDataReader(data_file,
+                                                  batch_size=2,
+                                                  bulk_size=2,
+                                                  file_source=source,
+                                                  index_name="test_index",
+                                                  type_name=None)
+        with reader:
+            bulks = [bulk for _, _, batch in reader for bulk in batch]
+        self.assertEqual([(2, data[0] + data[1]), (2, data[2] + data[3]), (1, data[4])], bulks)
+
     def assert_bulks_sized(self, reader, expected_bulk_sizes, expected_line_sizes):
         self.assertEqual(len(expected_bulk_sizes), len(expected_line_sizes), "Bulk sizes and line sizes must be equal")
         with reader:
@@ -735,8 +839,7 @@ class InvocationGeneratorTests(TestCase):
 
     def test_build_conflicting_ids(self):
         self.assertIsNone(params.build_conflicting_ids(params.IndexIdConflict.NoConflicts, 3, 0))
-        self.assertEqual(["0000000000", "0000000001", "0000000002"],
-                         params.build_conflicting_ids(params.IndexIdConflict.SequentialConflicts, 3, 0))
+        self.assertEqual([0, 1, 2], params.build_conflicting_ids(params.IndexIdConflict.SequentialConflicts, 3, 0).tolist())
         # we cannot tell anything specific about the contents...
         self.assertEqual(3, len(params.build_conflicting_ids(params.IndexIdConflict.RandomConflicts, 3, 0)))
 
@@ -1217,6 +1320,385 @@ class BulkIndexParamSourceTests(TestCase):
         assert partition.total_bulks == 1
         assert partition.current_bulk == 1
 
+    def test_prefetches_bulks_in_background(self):
+        def create_unit_test_reader(*args):
+            return StaticBulkReader("idx", "doc", bulks=[[f'{{"id": {i}}}\n'] for i in range(5)])
+
+        corpora = [
+            workload.DocumentCorpus(name="default", documents=[
+                workload.Documents(source_format=workload.Documents.SOURCE_FORMAT_BULK,
+                                   number_of_documents=5,
+                                   target_index="test-idx",
+                                   target_type="test-type")
+            ]),
+        ]
+
+        def bulks(prefetch_bulks):
+            source = params.BulkIndexParamSource(
+                workload=workload.Workload(name="unit-test", corpora=corpora),
+                params={
+                    "bulk-size": 1,
+                    "prefetch-bulks": prefetch_bulks,
+                    "__create_reader": create_unit_test_reader,
+                })
+            partition = source.partition(0, 1)
+            result = []
+            while True:
+                while not partition.params_ready():
+                    time.sleep(0.001)
+                try:
+                    result.append(partition.params())
+                except StopIteration:
+                    return partition, result
+
+        partition, prefetched = bulks(prefetch_bulks=2)
+        self.assertIsInstance(partition.internal_params, params.BulkPrefetcher)
+        self.assertEqual(5, len(prefetched))
+        self.assertEqual([dict(bulk, **{"prefetch-bulks": 2}) for bulk in bulks(prefetch_bulks=0)[1]], prefetched)
+
+    def test_create_with_negative_prefetch_bulks(self):
+        corpus = workload.DocumentCorpus(name="default", documents=[
+            workload.Documents(source_format=workload.Documents.SOURCE_FORMAT_BULK,
+                               number_of_documents=10,
+                               target_index="test-idx",
+                               target_type="test-type"
+                               )])
+
+        with self.assertRaises(exceptions.InvalidSyntax) as ctx:
+            params.BulkIndexParamSource(workload=workload.Workload(name="unit-test", corpora=[corpus]), params={
+                "bulk-size": 5000,
+                "prefetch-bulks": -1
+            })
+
+        self.assertEqual("'prefetch-bulks' must be non-negative but was -1", ctx.exception.args[0])
+
+
+    def test_compresses_bulk_bodies(self):
+        def create_unit_test_reader(*args):
+            return StaticBulkReader("idx", "doc", bulks=[f'{{"id": {i}}}\n'.encode("utf-8") for i in range(3)])
+
+        corpora = [
+            workload.DocumentCorpus(name="default", documents=[
+                workload.Documents(source_format=workload.Documents.SOURCE_FORMAT_BULK,
+                                   number_of_documents=3,
+                                   target_index="test-idx",
+                                   target_type="test-type")
+            ]),
+        ]
+
+        source = params.BulkIndexParamSource(
+            workload=workload.Workload(name="unit-test", corpora=corpora),
+            params={
+                "bulk-size": 1,
+                "body-compression": "gzip",
+                "__create_reader": create_unit_test_reader,
+            })
+        partition = source.partition(0, 1)
+        bodies = []
+        while True:
+            while not partition.params_ready():
+                time.sleep(0.001)
+            try:
+                bulk = partition.params()
+            except StopIteration:
+                break
+            self.assertEqual("gzip", bulk["body-encoding"])
+            bodies.append(zlib.decompress(bulk["body"], wbits=zlib.MAX_WBITS | 16))
+
+        # compressed bulks are prefetched by default
+        self.assertIsInstance(partition.internal_params, params.BulkPrefetcher)
+        self.assertEqual([f'{{"id": {i}}}\n'.encode("utf-8") for i in range(3)], bodies)
+
+    def test_replays_cached_bulks(self):
+        cache_dir = tempfile.mkdtemp()
+        corpora = [
+            workload.DocumentCorpus(name="default", documents=[
+                workload.Documents(source_format=workload.Documents.SOURCE_FORMAT_BULK,
+                                   number_of_documents=3,
+                                   target_index="test-idx",
+                                   target_type="test-type")
+            ]),
+        ]
+
+        def bulks(create_reader):
+            source = params.BulkIndexParamSource(
+                workload=workload.Workload(name="unit-test", corpora=corpora),
+                params={
+                    "bulk-size": 1,
+                    "bulk-cache": True,
+                    "bulk-cache-dir": cache_dir,
+                    "__create_reader": create_reader,
+                })
+            partition = source.partition(0, 1)
+            result = []
+            while True:
+                try:
+                    result.append(partition.params())
+                except StopIteration:
+                    return result
+
+        def create_unit_test_reader(*args):
+            return StaticBulkReader("test-idx", "test-type", bulks=[f'{{"id": {i}}}\n'.encode("utf-8") for i in range(3)])
+
+        def create_failing_reader(*args):
+            raise AssertionError("the corpus must not be read again")
+
+        try:
+            recorded = bulks(create_unit_test_reader)
+            self.assertEqual(2, len(os.listdir(cache_dir)))
+            self.assertEqual(recorded, bulks(create_failing_reader))
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_adapts_bulk_size(self):
+        data_file = os.path.join(tempfile.mkdtemp(), "docs.json")
+        with open(data_file, "wb") as f:
+            f.write(b"".join(b'{"key": "value%d"}\n' % i for i in range(200)))
+        corpora = [
+            workload.DocumentCorpus(name="default", documents=[
+                workload.Documents(source_format=workload.Documents.SOURCE_FORMAT_BULK,
+                                   document_file=data_file,
+                                   number_of_documents=200,
+                                   target_index="test-idx")
+            ]),
+        ]
+        source = params.BulkIndexParamSource(
+            workload=workload.Workload(name="unit-test", corpora=corpora),
+            params={
+                "bulk-size": 10,
+                "batch-size": 20,
+                "adaptive-bulk-size": {"target-latency": 0.05, "max-bulk-size": 100},
+            })
+        partition = source.partition(0, 1)
+
+        bulk_sizes = []
+        while True:
+            try:
+                bulk = partition.params()
+            except StopIteration:
+                break
+            bulk_sizes.append(bulk["bulk-size"])
+            self.assertEqual(bulk["bulk-size"] * 2, bulk["body"].count(b"\n"))
+            # a bulk of 10 docs takes 0.1 seconds
+            partition.after_request(bulk["bulk-size"] * 0.01, bulk["bulk-size"], "docs", {"success": True})
+
+        self.assertEqual(200, sum(bulk_sizes))
+        self.assertEqual([10] * params.AdaptiveBulkSize.WINDOW + [5] * params.AdaptiveBulkSize.WINDOW, bulk_sizes[:10])
+        self.assertEqual((1.0, "%"), partition.task_progress)
+
+    def test_create_with_invalid_adaptive_bulk_size(self):
+        corpus = workload.DocumentCorpus(name="default", documents=[
+            workload.Documents(source_format=workload.Documents.SOURCE_FORMAT_BULK,
+                               number_of_documents=10,
+                               target_index="test-idx",
+                               target_type="test-type"
+                               )])
+
+        with self.assertRaises(exceptions.InvalidSyntax) as ctx:
+            params.BulkIndexParamSource(workload=workload.Workload(name="unit-test", corpora=[corpus]), params={
+                "bulk-size": 5000,
+                "adaptive-bulk-size": {"max-bulk-size": 1000}
+            })
+
+        self.assertEqual("'bulk-size' [5000] must be between 'min-bulk-size' [1] and 'max-bulk-size' [1000]", ctx.exception.args[0])
+
+    def test_create_with_unknown_body_compression(self):
+        corpus = workload.DocumentCorpus(name="default", documents=[
+            workload.Documents(source_format=workload.Documents.SOURCE_FORMAT_BULK,
+                               number_of_documents=10,
+                               target_index="test-idx",
+                               target_type="test-type"
+                               )])
+
+        with self.assertRaises(exceptions.InvalidSyntax) as ctx:
+            params.BulkIndexParamSource(workload=workload.Workload(name="unit-test", corpora=[corpus]), params={
+                "bulk-size": 5000,
+                "body-compression": "brotli"
+            })
+
+        self.assertEqual("Unknown 'body-compression' setting [brotli]", ctx.exception.args[0])
+
+
+class BulkCacheTests(TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    @staticmethod
+    def bulks():
+        return [
+            {"index": "idx-1", "type": None, "bulk-size": 2, "body": b"doc-1\ndoc-2\n"},
+            {"index": "idx-2", "type": "_doc", "bulk-size": 1, "body": "doc-3\n"},
+        ]
+
+    def test_records_and_replays_bulks(self):
+        cache = params.BulkCache(self.cache_dir, "key")
+        self.assertFalse(cache.exists())
+
+        self.assertEqual(self.bulks(), list(cache.record(iter(self.bulks()), total_bulks=2)))
+
+        self.assertTrue(cache.exists())
+        self.assertEqual([
+            ("idx-1", None, [(2, b"doc-1\ndoc-2\n")]),
+            ("idx-2", "_doc", [(1, b"doc-3\n")]),
+        ], list(params.BulkCache(self.cache_dir, "key").replay()))
+
+    def test_does_not_commit_incomplete_recordings(self):
+        cache = params.BulkCache(self.cache_dir, "key")
+        recording = cache.record(iter(self.bulks()), total_bulks=2)
+        next(recording)
+        recording.close()
+
+        self.assertFalse(cache.exists())
+        self.assertEqual([], os.listdir(self.cache_dir))
+
+    def test_key_depends_on_parameters(self):
+        corpora = [workload.DocumentCorpus(name="default", documents=[
+            workload.Documents(source_format=workload.Documents.SOURCE_FORMAT_BULK, number_of_documents=10, target_index="test-idx")
+        ])]
+        self.assertEqual(params.BulkCache.key(corpora, bulk_size=10), params.BulkCache.key(corpora, bulk_size=10))
+        self.assertNotEqual(params.BulkCache.key(corpora, bulk_size=10), params.BulkCache.key(corpora, bulk_size=5))
+
+    def test_key_depends_on_modification_time_of_document_file(self):
+        document_file = os.path.join(self.cache_dir, "docs.json")
+        with open(document_file, "wt", encoding="utf-8") as f:
+            f.write('{"id": 1}\n')
+        corpora = [workload.DocumentCorpus(name="default", documents=[
+            workload.Documents(source_format=workload.Documents.SOURCE_FORMAT_BULK, document_file=document_file,
+                               number_of_documents=1, target_index="test-idx")
+        ])]
+        key = params.BulkCache.key(corpora, bulk_size=10)
+        stat = os.stat(document_file)
+        os.utime(document_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        self.assertNotEqual(key, params.BulkCache.key(corpora, bulk_size=10))
+
+    def test_evicts_least_recently_used_entries(self):
+        # each entry takes 18 bytes for its bodies and 100 bytes for its index
+        for i, key in enumerate(["a", "b", "c"]):
+            cache = params.BulkCache(self.cache_dir, key, max_size_in_bytes=250)
+            list(cache.record(iter(self.bulks()), total_bulks=2))
+            os.utime(cache.index_path, (i, i))
+            if key == "b":
+                # "a" is used again
+                list(params.BulkCache(self.cache_dir, "a").replay())
+
+        self.assertTrue(params.BulkCache(self.cache_dir, "a").exists())
+        self.assertFalse(params.BulkCache(self.cache_dir, "b").exists())
+        self.assertTrue(params.BulkCache(self.cache_dir, "c").exists())
+        self.assertEqual(["a.bulks", "a.bulks.idx", "c.bulks", "c.bulks.idx"], sorted(os.listdir(self.cache_dir)))
+
+
+class AdaptiveBulkSizeTests(TestCase):
+    @staticmethod
+    def run_requests(adaptive, service_time, requests=500):
+        trajectory = []
+        for _ in range(requests):
+            bulk_size = adaptive.bulk_size
+            adaptive.update(service_time(bulk_size), bulk_size, {"success": True, "took": 1})
+            trajectory.append(bulk_size)
+        return trajectory
+
+    def test_converges_on_target_latency(self):
+        adaptive = params.AdaptiveBulkSize(bulk_size=1000, min_bulk_size=1, max_bulk_size=100000, target_latency=0.5)
+        trajectory = self.run_requests(adaptive, lambda bulk_size: 0.01 + bulk_size * 0.0001)
+
+        self.assertEqual([1000] * params.AdaptiveBulkSize.WINDOW, trajectory[:params.AdaptiveBulkSize.WINDOW])
+        self.assertAlmostEqual(4900, trajectory[-1], delta=10)
+
+    def test_respects_bulk_size_bounds(self):
+        adaptive = params.AdaptiveBulkSize(bulk_size=1000, min_bulk_size=500, max_bulk_size=2000, target_latency=0.5)
+        self.assertEqual(2000, self.run_requests(adaptive, lambda bulk_size: 0.01)[-1])
+
+        adaptive = params.AdaptiveBulkSize(bulk_size=1000, min_bulk_size=500, max_bulk_size=2000, target_latency=0.5)
+        self.assertEqual(500, self.run_requests(adaptive, lambda bulk_size: 10)[-1])
+
+    def test_maximizes_throughput(self):
+        adaptive = params.AdaptiveBulkSize(bulk_size=100, min_bulk_size=1, max_bulk_size=100000)
+        # throughput peaks at a bulk size of 10000 and degrades for larger bulks
+        self.run_requests(adaptive, lambda bulk_size: 0.1 + bulk_size ** 2 * 0.000000001)
+
+        self.assertTrue(adaptive.converged)
+        self.assertAlmostEqual(10000, adaptive.bulk_size, delta=3000)
+
+    def test_ignores_bulks_built_with_a_previous_bulk_size(self):
+        adaptive = params.AdaptiveBulkSize(bulk_size=100, min_bulk_size=1, max_bulk_size=1000, target_latency=0.5)
+        for _ in range(params.AdaptiveBulkSize.WINDOW):
+            adaptive.update(0.25, 100, {"success": True})
+        self.assertEqual(200, adaptive.bulk_size)
+
+        # prefetched bulks still have the previous size and their (lower) latency must not scale the new bulk size again
+        for _ in range(params.AdaptiveBulkSize.WINDOW):
+            self.assertFalse(adaptive.update(0.25, 100, {"success": True}))
+        self.assertEqual(200, adaptive.bulk_size)
+
+        for _ in range(params.AdaptiveBulkSize.WINDOW):
+            adaptive.update(0.5, 200, {"success": True})
+        self.assertEqual(200, adaptive.bulk_size)
+
+    def test_uses_took_and_ignores_errors(self):
+        adaptive = params.AdaptiveBulkSize(bulk_size=100, min_bulk_size=1, max_bulk_size=1000, target_latency=0.5, measure="took")
+        for _ in range(params.AdaptiveBulkSize.WINDOW):
+            self.assertFalse(adaptive.update(5, 100, {"success": False}))
+        self.assertEqual(100, adaptive.bulk_size)
+
+        changed = [adaptive.update(5, 100, {"success": True, "took": 250}) for _ in range(params.AdaptiveBulkSize.WINDOW)]
+        self.assertEqual([False] * (params.AdaptiveBulkSize.WINDOW - 1) + [True], changed)
+        self.assertEqual(200, adaptive.bulk_size)
+
+
+class CompressBulksTests(TestCase):
+    def test_compresses_in_order(self):
+        bulks = [{"body": f"line {i}\n", "bulk-size": 1} for i in range(10)]
+        compressed = list(params.compress_bulks(iter(bulks), "zstd", 3, max_pending=3))
+
+        self.assertEqual(10, len(compressed))
+        decompressor = zstd.ZstdDecompressor()
+        for i, bulk in enumerate(compressed):
+            self.assertEqual("zstd", bulk["body-encoding"])
+            self.assertEqual(1, bulk["bulk-size"])
+            self.assertEqual(f"line {i}\n".encode("utf-8"), decompressor.decompress(bulk["body"]))
+
+
+class BulkPrefetcherTests(TestCase):
+    def test_propagates_errors(self):
+        def failing_bulks():
+            yield {"body": "1"}
+            raise exceptions.DataError("cannot read")
+
+        prefetcher = params.BulkPrefetcher(failing_bulks(), max_bulks=1)
+        self.assertEqual({"body": "1"}, next(prefetcher))
+        with self.assertRaisesRegex(exceptions.DataError, "cannot read"):
+            next(prefetcher)
+        with self.assertRaises(StopIteration):
+            next(prefetcher)
+
+    def test_signals_when_next_bulk_is_ready(self):
+        produce = threading.Event()
+
+        def bulks():
+            produce.wait(timeout=5)
+            yield {"body": "1"}
+
+        prefetcher = params.BulkPrefetcher(bulks(), max_bulks=1)
+        ready = threading.Event()
+        self.assertFalse(prefetcher.ready(ready.set))
+        produce.set()
+        self.assertTrue(ready.wait(timeout=5))
+        self.assertTrue(prefetcher.ready())
+        self.assertEqual({"body": "1"}, next(prefetcher))
+
+    def test_stops_background_thread_when_garbage_collected(self):
+        prefetcher = params.BulkPrefetcher(itertools.count(), max_bulks=2)
+        self.assertEqual(0, next(prefetcher))
+        thread = prefetcher._thread
+        del prefetcher
+        gc.collect()
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+
 
 class BulkDataGeneratorTests(TestCase):
 
@@ -2990,6 +3472,50 @@ class VectorSearchPartitionPartitionParamSourceTestCase(TestCase):
         with self.assertRaises(StopIteration):
             query_param_source_partition.params()
 
+    def test_params_with_prefetching(self):
+        k = 12
+        data_set_path = create_data_set(
+            self.DEFAULT_NUM_VECTORS,
+            self.DEFAULT_DIMENSION,
+            self.DEFAULT_TYPE,
+            Context.QUERY,
+            self.data_set_dir
+        )
+        create_data_set(
+            self.DEFAULT_NUM_VECTORS,
+            self.DEFAULT_DIMENSION,
+            self.DEFAULT_TYPE,
+            Context.NEIGHBORS,
+            self.data_set_dir,
+            data_set_path
+        )
+        test_param_source_params = {
+            "field": self.DEFAULT_FIELD_NAME,
+            "data_set_format": self.DEFAULT_TYPE,
+            "data_set_path": data_set_path,
+            "k": k,
+            "repetitions": 2,
+            "prefetch_blocks": 2,
+            "prefetch_block_size": 3,
+        }
+        query_param_source = VectorSearchPartitionParamSource(
+            workload.Workload(name="unit-test"),
+            test_param_source_params, {
+                "index": self.DEFAULT_INDEX_NAME,
+                "request-params": {},
+            }
+        )
+        partition = query_param_source.partition(1, 2)
+        self.assertIsInstance(partition.data_set, PrefetchingDataSet)
+        self.assertIsInstance(partition.neighbors_data_set, PrefetchingDataSet)
+
+        expected_vectors = get_data_set(self.DEFAULT_TYPE, data_set_path, Context.QUERY).read(self.DEFAULT_NUM_VECTORS)[5:]
+        actual_vectors = [partition.params()["body"]["query"]["knn"][self.DEFAULT_FIELD_NAME]["vector"] for _ in range(10)]
+        self.assertEqual(expected_vectors.tolist() * 2, [list(v) for v in actual_vectors])
+
+        with self.assertRaises(StopIteration):
+            partition.params()
+
     def test_post_filter(self):
         # Create a data set
         k = 12